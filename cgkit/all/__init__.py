@@ -60,6 +60,7 @@ from cgkit.lightsource import LightSource
 from cgkit.component import Component, createFunctionComponent
 from cgkit.slots import DoubleSlot, BoolSlot, IntSlot, Vec3Slot, Vec4Slot, Mat3Slot, Mat4Slot, QuatSlot, PySlot, slotPropertyCode, ProceduralIntSlot, ProceduralDoubleSlot, ProceduralVec3Slot, ProceduralVec4Slot, ProceduralMat3Slot, ProceduralMat4Slot, ProceduralQuatSlot, NotificationForwarder, UserSizeConstraint, LinearSizeConstraint
 from cgkit.slots import Dependent
+from cgkit.slots import SlotBatch, beginSlotBatch, endSlotBatch, slotBatchDepth, getSlotCounters, resetSlotCounters
 from cgkit.boundingbox import BoundingBox
 
 ### Geom objects:
@@ -88,7 +89,7 @@ from cgkit.beziercurve import BezierCurve
 from cgkit.joint import Joint
 
 ### Dynamics world objects
-from cgkit.odedynamics import ODEDynamics, ODEContactProperties, ODEBallJoint, ODEHingeJoint, ODESliderJoint, ODEHinge2Joint, ODE_COLLISION
+from cgkit.odedynamics import ODEDynamics, ODESimulationRunner, ODEContactProperties, ODEBallJoint, ODEHingeJoint, ODESliderJoint, ODEHinge2Joint, ODE_COLLISION
 from cgkit.joints import HingeJoint
 
 ### Camera/light
@@ -118,6 +119,7 @@ from cgkit.pidcontroller import PIDController
 from cgkit.gnuplotter import GnuPlotter
 from cgkit.slideshow import SlideShow, Slide, XFade, XCube
 from cgkit.motionpath import MotionPath
+from cgkit.animcache import AnimCache
 
 from cgkit.glrenderer import GLRenderInstance
 
@@ -154,11 +156,13 @@ import cgkit.bvhimport
 import cgkit.maimport
 import cgkit.plyimport
 import cgkit.lwobimport
+import cgkit.cgcimport
 ### Exporter
 import cgkit.ribexport
 import cgkit.offexport
 import cgkit.objexport
 import cgkit.plyexport
+import cgkit.cgcexport
 
 from cgkit.rmshader import RMMaterial, RMLightSource, RMShader
 from cgkit.ribexport import ShadowPass, FlatReflectionPass
@@ -0,0 +1,651 @@
+# ***** BEGIN LICENSE BLOCK *****
+# Version: MPL 1.1/GPL 2.0/LGPL 2.1
+#
+# The contents of this file are subject to the Mozilla Public License Version
+# 1.1 (the "License"); you may not use this file except in compliance with
+# the License. You may obtain a copy of the License at
+# http://www.mozilla.org/MPL/
+#
+# Software distributed under the License is distributed on an "AS IS" basis,
+# WITHOUT WARRANTY OF ANY KIND, either express or implied. See the License
+# for the specific language governing rights and limitations under the
+# License.
+#
+# The Original Code is the Python Computer Graphics Kit.
+#
+# The Initial Developer of the Original Code is Matthias Baas.
+# Portions created by the Initial Developer are Copyright (C) 2004
+# the Initial Developer. All Rights Reserved.
+#
+# Contributor(s):
+#
+# Alternatively, the contents of this file may be used under the terms of
+# either the GNU General Public License Version 2 or later (the "GPL"), or
+# the GNU Lesser General Public License Version 2.1 or later (the "LGPL"),
+# in which case the provisions of the GPL or the LGPL are applicable instead
+# of those above. If you wish to allow use of your version of this file only
+# under the terms of either the GPL or the LGPL, and not to allow others to
+# use your version of this file under the terms of the MPL, indicate your
+# decision by deleting the provisions above and replace them with the notice
+# and other provisions required by the GPL or the LGPL. If you do not delete
+# the provisions above, a recipient may use your version of this file under
+# the terms of any one of the MPL, the GPL or the LGPL.
+#
+# ***** END LICENSE BLOCK *****
+
+"""Animation cache component.
+
+The AnimCache component records the values of slots (such as the world
+transform of an object or the vertices of a mesh) for every time at
+which they are evaluated. When the same time is evaluated again, the
+value is taken from the cache and the slots the recorded slot depends
+on are not evaluated at all. This speeds up scrubbing back and forth
+over frames that have already been computed.
+
+The recorded values can be saved into a file and loaded again later
+(for example, to render an animation without evaluating the original
+animation components). The file uses the same chunk layout as the
+scene cache files (see the chunkfile module):
+
+- Header: The magic string "CGKANIMC", the version number (uint32) and
+  a reserved uint32.
+- For each channel a "CHAN" chunk containing the pickled channel
+  description (name, type, array flag, multiplicity, sample times and
+  sample offsets) followed by a "BUFF" chunk with the raw sample data.
+"""
+
+import struct, array, pickle, bisect
+from globalscene import getScene
+import component
+import slots
+from slots import NotificationForwarder, IArraySlot
+from cgtypes import *
+from chunkfile import writeChunk, writeBufferChunk, readChunkHeader, readBufferChunk, skipPadding, loadPickle
+
+_MAGIC = "CGKANIMC"
+_VERSION = 1
+
+# The number of values per element for each channel type
+_components = { "double":1, "int":1, "vec3":3, "vec4":4,
+                "mat3":9, "mat4":16, "quat":4 }
+
+# The value classes of the vector/matrix channel types
+_classes = { "vec3":vec3, "vec4":vec4, "mat3":mat3, "mat4":mat4, "quat":quat }
+
+# The supported array slot types (the ones that support getBuffer())
+_array_types = ["double", "int", "vec3", "vec4"]
+
+# _Channel
+class _Channel:
+    """Stores the recorded values of one slot.
+
+    The values of all samples are stored in one flat array (data). The
+    values of sample i are data[offsets[i]:offsets[i+1]]. keys maps
+    time keys (see _timeKey()) to sample indices.
+    """
+    
+    def __init__(self, name, type, isarray=False, multiplicity=1, source=None):
+        self.name = name
+        self.type = type
+        self.isarray = isarray
+        self.multiplicity = multiplicity
+        # The recorded slot (None if the channel was loaded from a file)
+        self.source = source
+        # The output slot
+        self.output = None
+        # The forwarder that watches the source slot
+        self.forwarder = None
+        if type=="int":
+            self.typecode = "i"
+        else:
+            self.typecode = "d"
+        # The time key of the last evaluation
+        self.evaltime = None
+        # For array channels: True if the output slot contains values
+        # that have not been stored yet
+        self.dirty = False
+        self.clear()
+
+    def clear(self):
+        """Remove all samples.
+        """
+        self.keys = {}
+        self.times = array.array("d")
+        self.offsets = [0]
+        self.data = array.array(self.typecode)
+        self._sorted = None
+
+    def add(self, key, time, values):
+        """Add a sample.
+
+        values is either a sequence of numbers or a string with the raw
+        data. Returns the index of the new sample.
+        """
+        if isinstance(values, str):
+            self.data.fromstring(values)
+        else:
+            self.data.extend(values)
+        self.keys[key] = len(self.times)
+        self.times.append(time)
+        self.offsets.append(len(self.data))
+        self._sorted = None
+        return len(self.times)-1
+
+    def set(self, key, time, values):
+        """Set the values of a sample.
+
+        If there is already a sample at the given time, its values are
+        replaced, otherwise a new sample is added. Returns the index of
+        the sample.
+        """
+        idx = self.keys.get(key)
+        if idx==None:
+            return self.add(key, time, values)
+
+        start = self.offsets[idx]
+        end = self.offsets[idx+1]
+        values = array.array(self.typecode, values)
+        # If the size has changed, the values of the subsequent samples
+        # are moved so that the data doesn't contain unused values
+        delta = len(values)-(end-start)
+        if delta!=0:
+            for i in range(idx+1, len(self.offsets)):
+                self.offsets[i] += delta
+        self.data[start:end] = values
+        return idx
+
+    def sample(self, idx):
+        """Return the values of a sample as an array.
+        """
+        return self.data[self.offsets[idx]:self.offsets[idx+1]]
+
+    def find(self, time):
+        """Return the index of the last sample whose time is <= time.
+
+        If all samples come after time, the first sample is returned.
+        None is returned if there are no samples at all.
+        """
+        if len(self.keys)==0:
+            return None
+        # Create the sorted list of times and the corresponding indices
+        if self._sorted==None:
+            samples = map(lambda idx: (self.times[idx], idx), self.keys.values())
+            samples.sort()
+            self._sorted = (map(lambda x: x[0], samples),
+                            map(lambda x: x[1], samples))
+        times, indices = self._sorted
+        i = max(0, bisect.bisect_right(times, time)-1)
+        return indices[i]
+
+# AnimCache
+class AnimCache(component.Component):
+    """Animation cache component.
+
+    Each recorded slot is stored in a channel that has an output slot
+    with the same type as the recorded slot. The output slot delivers
+    the value of the recorded slot at the current time. If the time has
+    already been evaluated before, the value is taken from the cache,
+    otherwise the recorded slot is evaluated and its value is added to
+    the cache.
+
+    IMPORTANT: Edits of the slots the recorded slot depends on are NOT
+    detected reliably. The cache of a channel is cleared whenever the
+    recorded slot reports a change that is not caused by a change of the
+    time. But slots only report changes if they have been evaluated since
+    their last change, and a frame that is served from the cache does not
+    evaluate the recorded slot. So if the recorded slot depends on
+    animated values, an edit of an upstream slot goes unnoticed and the
+    cache keeps delivering the old values. Every slot that may be edited
+    while the cache is in use (such as an interactively modified
+    animation parameter) has to be registered with watch():
+
+        cache = AnimCache()
+        cache.addChannel("WT", obj.worldtransform_slot)
+        cache.watch(anim.amplitude_slot, "WT")
+
+    Alternatively, invalidate() can be called after an edit.
+
+    Output slots of array channels are updated whenever the time
+    changes. Changes of a recorded array slot only replace the values
+    at the current time (this is where procedures that modify a mesh
+    for every frame store their results).
+    """
+    
+    def __init__(self,
+                 name = "AnimCache",
+                 auto_insert = True):
+        """Constructor.
+        """
+        component.Component.__init__(self, name=name, auto_insert=auto_insert)
+
+        # Channels (key: name)
+        self._channels = {}
+        # Channel names in the order they were created
+        self._channel_names = []
+
+        self.time_slot = slots.DoubleSlot()
+        self.addSlot("time", self.time_slot)
+        getScene().timer().time_slot.connect(self.time_slot)
+
+        # Forwarders of the slots registered with watch()
+        self._watch_forwarders = []
+
+        self._time_forwarder = NotificationForwarder(self._onTimeChanged)
+        self.time_slot.addDependent(self._time_forwarder)
+
+    def __len__(self):
+        return len(self._channel_names)
+
+    def __iter__(self):
+        return iter(self._channel_names)
+
+    # addChannel
+    def addChannel(self, name, slot, type=None):
+        """Record the values of a slot.
+
+        name is the name of the new channel which is also the name of
+        the output slot. The output slot can be accessed via the slot()
+        method or the attribute <name>_slot. slot is the slot whose
+        values should be recorded. type is the value type ("double",
+        "int", "vec3", "vec4", "mat3", "mat4" or "quat") which is
+        determined automatically if it is None. Array slots of type
+        double, int, vec3 and vec4 are supported as well.
+        Returns the output slot.
+        """
+        if self.hasSlot(name):
+            raise ValueError('Slot "%s" already exists.'%name)
+
+        isarray = isinstance(slot, IArraySlot)
+        multiplicity = 1
+        if isarray:
+            multiplicity = slot.multiplicity()
+            if type==None:
+                type = _arraySlotType(slot)
+            if type not in _array_types:
+                raise ValueError("Unsupported array slot type: %s"%type)
+        else:
+            if type==None:
+                type = _valueType(slot.getValue())
+            if type not in _components:
+                raise ValueError("Unsupported slot type: %s"%type)
+
+        ch = _Channel(name, type, isarray, multiplicity, slot)
+        self._addChannel(ch)
+        return ch.output
+
+    # removeChannel
+    def removeChannel(self, name):
+        """Remove a channel and its output slot.
+        """
+        ch = self._channel(name)
+        if ch.source!=None:
+            ch.source.removeDependent(ch.forwarder)
+        if not ch.isarray:
+            self.time_slot.removeDependent(ch.output)
+        self.removeSlot(name)
+        delattr(self, "%s_slot"%name)
+        del self._channels[name]
+        self._channel_names.remove(name)
+
+    # invalidate
+    def invalidate(self, name=None):
+        """Clear the cache of a channel.
+
+        If name is None, the caches of all channels are cleared. The
+        output slots are notified so that the values are recomputed.
+        """
+        if name==None:
+            names = self._channel_names
+        else:
+            names = [name]
+        for name in names:
+            ch = self._channel(name)
+            ch.clear()
+            self._notifyOutput(ch)
+
+    # watch
+    def watch(self, slot, name=None):
+        """Clear the cache whenever a slot is edited.
+
+        slot is a slot that influences the recorded values, such as an
+        animation parameter that is modified interactively. Changes of
+        the slot that happen while the time stays the same clear the
+        cache of the channel name (or of all channels if name is None).
+        """
+        if name==None:
+            f = lambda *args: self._onWatchedSlotChanged(self._channel_names)
+        else:
+            self._channel(name)
+            f = lambda *args: self._onWatchedSlotChanged([name])
+        forwarder = NotificationForwarder(f, f)
+        self._watch_forwarders.append((slot, forwarder))
+        slot.addDependent(forwarder)
+
+    # times
+    def times(self, name):
+        """Return the sorted list of cached times of a channel.
+        """
+        ch = self._channel(name)
+        res = map(lambda idx: ch.times[idx], ch.keys.values())
+        res.sort()
+        return res
+
+    # value
+    def value(self, name, time):
+        """Return the cached value of a channel at a given time.
+
+        Returns None if the value at the given time is not in the cache.
+        For array channels, the value is a flat array containing all
+        values (with multiplicity and components).
+        """
+        ch = self._channel(name)
+        idx = ch.keys.get(_timeKey(time))
+        if idx==None:
+            return None
+        if ch.isarray:
+            return ch.sample(idx)
+        else:
+            return _fromValues(ch.sample(idx), ch.type)
+
+    # bake
+    def bake(self, start=None, end=None, step=None):
+        """Evaluate all channels over a range of time.
+
+        start and end specify the time range (default: 0 to the duration
+        of the timer) and step the time step (default: the timer's
+        time step). The current time is restored afterwards.
+        """
+        timer = getScene().timer()
+        if start==None:
+            start = 0.0
+        if end==None:
+            end = timer.duration
+        if step==None:
+            step = timer.timestep
+        
+        prev = timer.time
+        try:
+            for i in range(int(round((end-start)/step))+1):
+                timer.time = start+i*step
+                # Array channels are updated by _onTimeChanged()
+                for name in self._channel_names:
+                    ch = self._channels[name]
+                    if not ch.isarray:
+                        ch.output.getValue()
+        finally:
+            timer.time = prev
+
+    # save
+    def save(self, filename):
+        """Write the cached values of all channels into a file.
+        """
+        f = open(filename, "wb")
+        try:
+            f.write(struct.pack("<8sII", _MAGIC, _VERSION, 0))
+            for name in self._channel_names:
+                ch = self._channels[name]
+                desc = (ch.name, ch.type, ch.isarray, ch.multiplicity,
+                        ch.times.tolist(), ch.offsets)
+                writeChunk(f, "CHAN", pickle.dumps(desc, pickle.HIGHEST_PROTOCOL))
+                writeBufferChunk(f, ch.data)
+        finally:
+            f.close()
+
+    # load
+    def load(self, filename):
+        """Load cached values from a file.
+
+        The cached values of existing channels with the same name are
+        replaced by the values from the file (the types must match).
+        Channels that don't exist yet are created without a recorded
+        slot. Their output slots only deliver the values from the file
+        (at times that are not in the cache, the value of the previous
+        cached time is used).
+        """
+        f = open(filename, "rb")
+        try:
+            s = f.read(16)
+            if len(s)!=16:
+                raise ValueError('%s: Not an animation cache file.'%filename)
+            magic,version,reserved = struct.unpack("<8sII", s)
+            if magic!=_MAGIC:
+                raise ValueError('%s: Not an animation cache file.'%filename)
+            if version>_VERSION:
+                raise ValueError('%s: Unsupported animation cache version (%d).'%(filename, version))
+            desc = None
+            while 1:
+                tag,size = readChunkHeader(f)
+                if tag==None:
+                    break
+                if tag=="BUFF" and desc!=None:
+                    self._loadChannel(desc, readBufferChunk(f, size), filename)
+                    desc = None
+                else:
+                    data = f.read(size)
+                    if tag=="CHAN":
+                        # The description only contains built-in types
+                        desc = loadPickle(data)
+                skipPadding(f, size)
+        finally:
+            f.close()
+
+    ## protected:
+
+    def _channel(self, name):
+        """Return the channel with the given name.
+        """
+        ch = self._channels.get(name)
+        if ch==None:
+            raise KeyError('There is no channel "%s".'%name)
+        return ch
+
+    def _addChannel(self, ch):
+        """Add a channel and create its output slot.
+        """
+        if ch.isarray:
+            slotclass = getattr(slots, "%sArraySlot"%ch.type.capitalize())
+            out = slotclass(ch.multiplicity)
+        else:
+            slotclass = getattr(slots, "Procedural%sSlot"%ch.type.capitalize())
+            out = slotclass(lambda: self._computeValue(ch))
+            self.time_slot.addDependent(out)
+        ch.output = out
+        setattr(self, "%s_slot"%ch.name, out)
+        self.addSlot(ch.name, out)
+        self._channels[ch.name] = ch
+        self._channel_names.append(ch.name)
+
+        if ch.source!=None:
+            if ch.isarray:
+                ch.forwarder = NotificationForwarder(lambda start, end: self._onSourceChanged(ch, start, end),
+                                                     lambda size: self._onSourceChanged(ch))
+            else:
+                ch.forwarder = NotificationForwarder(lambda: self._onSourceChanged(ch))
+            ch.source.addDependent(ch.forwarder)
+        if ch.isarray:
+            self._updateArray(ch)
+
+    def _loadChannel(self, desc, data, filename):
+        """Create or update a channel from the data read from a file.
+        """
+        name, type, isarray, multiplicity, times, offsets = desc
+        ch = self._channels.get(name)
+        if ch==None:
+            if self.hasSlot(name):
+                raise ValueError('%s: Slot "%s" already exists.'%(filename, name))
+            ch = _Channel(name, type, isarray, multiplicity)
+            self._addChannel(ch)
+        elif (ch.type, ch.isarray, ch.multiplicity)!=(type, isarray, multiplicity):
+            raise ValueError('%s: The type of channel "%s" does not match.'%(filename, name))
+        
+        ch.clear()
+        ch.times = array.array("d", times)
+        ch.offsets = list(offsets)
+        ch.data = array.array(ch.typecode, data)
+        for i in range(len(times)):
+            ch.keys[_timeKey(times[i])] = i
+        self._notifyOutput(ch)
+
+    def _computeValue(self, ch):
+        """Compute the value of the output slot of a non-array channel.
+        """
+        t = self.time_slot.getValue()
+        key = _timeKey(t)
+        ch.evaltime = key
+        idx = ch.keys.get(key)
+        if idx==None:
+            if ch.source==None:
+                idx = ch.find(t)
+                if idx==None:
+                    return _fromValues([0]*_components[ch.type], ch.type)
+            else:
+                v = ch.source.getValue()
+                ch.add(key, t, _toValues(v, ch.type))
+                return v
+        return _fromValues(ch.sample(idx), ch.type)
+
+    def _updateArray(self, ch):
+        """Update the output slot of an array channel.
+        """
+        # Store the values that were modified at the previous time
+        if ch.dirty:
+            ch.set(ch.evaltime, ch.evaltime/1000000.0, ch.output.getBuffer())
+            ch.dirty = False
+        t = self.time_slot.getValue()
+        key = _timeKey(t)
+        ch.evaltime = key
+        idx = ch.keys.get(key)
+        if idx==None:
+            if ch.source==None:
+                idx = ch.find(t)
+                if idx==None:
+                    return
+            else:
+                idx = ch.add(key, t, ch.source.getBuffer())
+        values = ch.sample(idx)
+        size = len(values)/(_components[ch.type]*ch.multiplicity)
+        out = ch.output
+        if out.size()!=size:
+            out.resize(size)
+        out.setBuffer(values)
+
+    def _notifyOutput(self, ch):
+        """Make an output slot recompute its value.
+        """
+        if ch.isarray:
+            ch.dirty = False
+            self._updateArray(ch)
+        else:
+            ch.output.onValueChanged()
+
+    def _onTimeChanged(self):
+        """Callback that is called whenever the time has changed.
+        """
+        for name in self._channel_names:
+            ch = self._channels[name]
+            if ch.isarray:
+                self._updateArray(ch)
+
+    def _currentTime(self):
+        """Return the current time.
+
+        The value is taken from the first slot in the chain of
+        controllers of the time slot. During the propagation of a time
+        change, the time slot itself might not have been notified yet and
+        would still return the previous time.
+        """
+        slot = self.time_slot
+        while slot.getController()!=None:
+            slot = slot.getController()
+        return slot.getValue()
+
+    def _onSourceChanged(self, ch, start=None, end=None):
+        """Callback that is called whenever a recorded slot has changed.
+
+        If the time is still the same as the time of the last evaluation
+        of the channel, the change was not caused by the time and the
+        cache has to be cleared. For array channels, the modified values
+        are copied to the output slot instead (they are stored when the
+        time changes).
+        start and end is the modified range of an array slot (or None
+        if the size has changed).
+        """
+        if _timeKey(self._currentTime())!=ch.evaltime:
+            return
+        if not ch.isarray:
+            ch.clear()
+            self._notifyOutput(ch)
+            return
+
+        src = ch.source
+        out = ch.output
+        if start==None or out.size()!=src.size():
+            out.resize(src.size())
+            out.setBuffer(src.getBuffer())
+        else:
+            for i in range(start, end):
+                out[i] = src[i]
+        ch.dirty = True
+
+    def _onWatchedSlotChanged(self, names):
+        """Callback that is called whenever a watched slot has changed.
+        """
+        key = _timeKey(self._currentTime())
+        for name in names:
+            ch = self._channels[name]
+            if key==ch.evaltime:
+                ch.clear()
+                self._notifyOutput(ch)
+
+######################################################################
+
+def _timeKey(t):
+    """Return the key that is used to look up a time value.
+
+    Times that differ by less than a microsecond are considered equal.
+    """
+    return int(round(t*1000000))
+
+def _valueType(v):
+    """Return the channel type name of a value.
+    """
+    if isinstance(v, bool):
+        return None
+    if isinstance(v, float):
+        return "double"
+    if isinstance(v, (int, long)):
+        return "int"
+    for typ,cls in _classes.items():
+        if isinstance(v, cls):
+            return typ
+    return None
+
+def _arraySlotType(slot):
+    """Return the channel type name of an array slot.
+    """
+    name = slot.__class__.__name__
+    if name.endswith("ArraySlot"):
+        return name[:-9].lower()
+    return None
+
+def _toValues(v, type):
+    """Convert a value into a list of numbers.
+    """
+    if type in ["double", "int"]:
+        return [v]
+    elif type in ["mat3", "mat4"]:
+        return v.toList(rowmajor=True)
+    elif type=="quat":
+        return [v.w, v.x, v.y, v.z]
+    else:
+        return list(v)
+
+def _fromValues(values, type):
+    """Convert a sequence of numbers into a value (inverse of _toValues()).
+    """
+    if type=="double":
+        return float(values[0])
+    elif type=="int":
+        return int(values[0])
+    else:
+        return _classes[type](*values)
@@ -182,32 +182,22 @@ class AMCReader(asfamc.AMCReader):
         data = asf.bones[name]
         order = data["dof"]
         order = [s.lower() for s in order]
-        vtabx = []
-        vtaby = []
-        vtabz = []
-        framenr = 0
-        for vals in track:
-            t = float(framenr)/framerate
-            d = self.valueDict(vals, order)
-            if "rx" in d:
-                vtabx.append((t,d["rx"]))
-            if "ry" in d:
-                vtaby.append((t,d["ry"]))
-            if "rz" in d:
-                vtabz.append((t,d["rz"]))
-            framenr += 1
-
-        total_t = float(framenr)/framerate
+        columns = self.valueColumns(track, order)
+        times = self.frameTimes(len(track), framerate)
+        total_t = float(len(track))/framerate
 
         joint = asf.joints[name]
-        if vtabx!=[]:
-            vt = ValueTable(type="double", values=vtabx, modulo=total_t)
+        if "rx" in columns:
+            vt = ValueTable(type="double", modulo=total_t)
+            vt.setSamples(times, columns["rx"])
             vt.output_slot.connect(joint.anglex_slot)
-        if vtaby!=[]:
-            vt = ValueTable(type="double", values=vtaby, modulo=total_t)
+        if "ry" in columns:
+            vt = ValueTable(type="double", modulo=total_t)
+            vt.setSamples(times, columns["ry"])
             vt.output_slot.connect(joint.angley_slot)
-        if vtabz!=[]:
-            vt = ValueTable(type="double", values=vtabz, modulo=total_t)
+        if "rz" in columns:
+            vt = ValueTable(type="double", modulo=total_t)
+            vt.setSamples(times, columns["rz"])
             vt.output_slot.connect(joint.anglez_slot)
             
 
@@ -219,29 +209,45 @@ class AMCReader(asfamc.AMCReader):
         order = [s.lower() for s in order]
         ao = data["axis_order"]
         axis_order = ao[2]+ao[1]+ao[0]
-        vtab = []
-        vtabrot = []
-        framenr = 0
-        for vals in track:
-            t = float(framenr)/framerate
-            d = self.valueDict(vals, order)
-            pos = len_scale*vec3(d["tx"], d["ty"], d["tz"])
-            vtab.append((t, pos))
-            
-            ang = vec3(d["rx"], d["ry"], d["rz"])
-            exec "fromEuler = mat3.fromEuler%s"%axis_order.upper()
-            R = fromEuler(radians(ang.x), radians(ang.y), radians(ang.z))
-            vtabrot.append((t, R))
-            
-            framenr += 1
-
-        total_t = float(framenr)/framerate
-
-        vt = ValueTable(values=vtab, modulo=total_t)
+        columns = self.valueColumns(track, order)
+        times = self.frameTimes(len(track), framerate)
+        total_t = float(len(track))/framerate
+
+        vtab = map(lambda x,y,z: len_scale*vec3(x,y,z),
+                   columns["tx"], columns["ty"], columns["tz"])
+        fromEuler = getattr(mat3, "fromEuler%s"%axis_order.upper())
+        vtabrot = map(lambda x,y,z: fromEuler(radians(x), radians(y), radians(z)),
+                      columns["rx"], columns["ry"], columns["rz"])
+
+        vt = ValueTable(modulo=total_t)
+        vt.setSamples(times, vtab)
         vt.output_slot.connect(asf.joints["root"].pos_slot)
-        vr = ValueTable(values=vtabrot, type="mat3", modulo=total_t)
+        vr = ValueTable(type="mat3", modulo=total_t)
+        vr.setSamples(times, vtabrot)
         vr.output_slot.connect(asf.joints["root"].rot_slot)
-            
+
+    # valueColumns
+    def valueColumns(self, track, order):
+        """Convert a track into a dictionary with one value list per channel.
+
+        track is a list of value lists (one per frame) whose order is
+        defined by the argument order (see valueDict()).
+        Example: track = [[1,2], [3,4]]  order = ["rx", "ry"]
+        Result: {"rx":[1,3], "ry":[2,4]}
+        """
+        for values in track:
+            if len(values)!=len(order):
+                raise ValueError("Invalid number of values")
+        res = {}
+        for name, column in zip(order, zip(*track)):
+            res[name] = list(column)
+        return res
+
+    # frameTimes
+    def frameTimes(self, frames, framerate):
+        """Return a list with the times of the frames."""
+        framerate = float(framerate)
+        return map(lambda i: i/framerate, range(frames))
 
     # valueDict
     def valueDict(self, values, order):
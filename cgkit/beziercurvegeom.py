@@ -36,6 +36,11 @@
 
 from _OpenGL.GL import *
 import bisect
+try:
+    import numpy
+    _numpy_available = True
+except ImportError:
+    _numpy_available = False
 from geomobject import *
 from slots import *
 from cgtypes import *
@@ -70,15 +75,20 @@ class BezierCurveGeom(GeomObject):
                  closed = False,
                  epsilon = 0.01,
                  subdiv = 4,
-                 show_tangents = False):
+                 show_tangents = False,
+                 arclen_samples = 32):
         """Constructor.
 
         pnts is a list of BezierPoint objects.
+        arclen_samples is the number of samples per segment that are
+        used for the arc length table (see paramAtLength()).
         """
         GeomObject.__init__(self)
 
         # Epsilon value for segLength()
         self.epsilon = epsilon
+        # Number of samples per segment for the arc length table
+        self.arclen_samples = arclen_samples
         # Number of subdivisions for drawGL()
         self.subdiv = subdiv
         # Show tangents or not?
@@ -123,6 +133,16 @@ class BezierCurveGeom(GeomObject):
         # A list of lengths (the lengths are accumulated, so it's
         # the length of the entire curve until segment i)
         self._seg_lengths = []
+        # The arc length table (parallel lists with increasing arc
+        # lengths, the corresponding curve parameters and the derivatives
+        # dt/ds). The table is created on demand (None = not yet created).
+        self._arclen_lengths = None
+        self._arclen_params = None
+        self._arclen_slopes = None
+        # The control points of all segments as a (numsegs,4,3) numpy
+        # array (used by the array evaluation methods). The array is
+        # created on demand (None = not yet created).
+        self._ctrlpnts_array = None
         # Flag that indicates if all internal precomputed attributes have
         # to be recomputed or if they are still valid.
         self._internal_data_invalid = True
@@ -148,9 +168,69 @@ class BezierCurveGeom(GeomObject):
             sl += self.segLength(self.segCtrlPoints(i), self.epsilon)
             self._seg_lengths.append(sl)
 
+        self._arclen_lengths = None
+        self._arclen_params = None
+        self._arclen_slopes = None
         self._internal_data_invalid = False
-        
 
+    def _updateArcLenTable(self):
+        """Create the arc length table.
+
+        Each segment is sampled at arclen_samples uniformly spaced
+        parameter values. The arc lengths between the samples are
+        computed with a 3-point Gauss-Legendre quadrature and scaled so
+        that the table agrees with the segment lengths computed by
+        segLength(). Additionally, the derivative dt/ds is stored for
+        each sample so that the table can be interpolated with cubic
+        Hermite polynomials. The samples at the segment boundaries are
+        stored twice as the derivative may be discontinuous there.
+        """
+        if self._internal_data_invalid:
+            self._updateInternalData()
+        n = max(1, int(self.arclen_samples))
+        h = 1.0/n
+        # Gauss-Legendre nodes and weights (for the interval [0,h])
+        gx = map(lambda x: 0.5*h*(1.0+x), [-0.7745966692414834, 0.0, 0.7745966692414834])
+        gw = map(lambda w: 0.5*h*w, [0.5555555555555556, 0.8888888888888888, 0.5555555555555556])
+        lengths = []
+        params = []
+        slopes = []
+        base = 0.0
+        for seg, seglen in enumerate(self._seg_lengths):
+            ctrlpnts = self.segCtrlPoints(seg)
+            speed = lambda t: self.segDeriv(t, ctrlpnts).length()
+            sublens = []
+            for k in range(n):
+                t0 = k*h
+                sublens.append(sum(map(lambda x,w: w*speed(t0+x), gx, gw)))
+            total = sum(sublens)
+            seglen -= base
+            if total>0:
+                scale = seglen/total
+            else:
+                scale = 0.0
+            # Each segment stores its own start and end sample, so the
+            # samples at the segment boundaries appear twice (with
+            # possibly different derivatives).
+            l = base
+            for k in range(n+1):
+                if k==n:
+                    # Avoid accumulating rounding errors
+                    l = base+seglen
+                lengths.append(l)
+                params.append(seg+k*h)
+                ds = scale*speed(k*h)
+                if ds>0:
+                    slopes.append(1.0/ds)
+                else:
+                    slopes.append(None)
+                if k<n:
+                    l += scale*sublens[k]
+            base += seglen
+        self._arclen_lengths = lengths
+        self._arclen_params = params
+        self._arclen_slopes = slopes
+        
 #    def uniformCount(self):
 #        return 1
 
@@ -322,6 +402,40 @@ class BezierCurveGeom(GeomObject):
 #            t = 1.0
         return self.segDeriv(t, self.segCtrlPoints(seg))
 
+    # evalArray
+    def evalArray(self, t):
+        """Evaluate the curve at a sequence of parameters.
+
+        t is a sequence of parameter values (or a numpy array). The
+        return value is a numpy array of shape (N,3) with the curve points.
+        The parameters are clamped to the parameter interval (closed
+        curves are periodic instead).
+        """
+        seg, u = self._segParams(t)
+        return self._evalBasis(seg, [_bernstein3(u)])[0]
+
+    # evalFrameArray
+    def evalFrameArray(self, t):
+        """Evaluate the curve at a sequence of parameters.
+
+        Returns a tuple (points, tangents, second derivatives) where each
+        item is a numpy array of shape (N,3). See evalArray() for details
+        about the input parameters.
+        """
+        seg, u = self._segParams(t)
+        return tuple(self._evalBasis(seg, _bernsteinDerivs(u)))
+
+    # derivArray
+    def derivArray(self, t):
+        """Return the derivatives at a sequence of parameters.
+
+        The return value is a numpy array of shape (N,3). See evalArray()
+        for details about the input parameters.
+        """
+        seg, u = self._segParams(t)
+        b,db,ddb = _bernsteinDerivs(u, 1)
+        return self._evalBasis(seg, [db])[0]
+
     # arcLen
     def arcLen(self, t):
         """Return the arc length up to t.
@@ -352,6 +466,79 @@ class BezierCurveGeom(GeomObject):
             return self._seg_lengths[-1]
 
 
+    # paramAtLength
+    def paramAtLength(self, s):
+        """Return the curve parameter for a given arc length.
+
+        The parameter is obtained from a precomputed arc length table
+        (which is updated whenever the curve is modified). s is clamped
+        to the range [0, length()].
+        """
+        if self._internal_data_invalid or self._arclen_lengths==None:
+            self._updateArcLenTable()
+        lengths = self._arclen_lengths
+        params = self._arclen_params
+        if s<=0.0 or len(lengths)<2:
+            return 0.0
+        if s>=lengths[-1]:
+            return params[-1]
+        idx = bisect.bisect_right(lengths, s)
+        l0 = lengths[idx-1]
+        l1 = lengths[idx]
+        t0 = params[idx-1]
+        t1 = params[idx]
+        if l1<=l0:
+            return t0
+        dl = l1-l0
+        u = (s-l0)/dl
+        m0 = self._arclen_slopes[idx-1]
+        m1 = self._arclen_slopes[idx]
+        # Linear interpolation if the derivative is not defined
+        if m0==None or m1==None:
+            return t0+u*(t1-t0)
+        # Cubic Hermite interpolation
+        u2 = u*u
+        u3 = u2*u
+        return ((2*u3-3*u2+1)*t0 + (u3-2*u2+u)*dl*m0 +
+                (-2*u3+3*u2)*t1 + (u3-u2)*dl*m1)
+
+    # paramsAtLengths
+    def paramsAtLengths(self, s):
+        """Return the curve parameters for a sequence of arc lengths.
+
+        This is the vectorized version of paramAtLength(). If numpy is
+        available, the return value is a numpy array, otherwise a list.
+        """
+        if not _numpy_available:
+            return map(self.paramAtLength, s)
+        if self._internal_data_invalid or self._arclen_lengths==None:
+            self._updateArcLenTable()
+        lengths = numpy.array(self._arclen_lengths)
+        params = numpy.array(self._arclen_params)
+        s = numpy.asarray(s, dtype=float)
+        if len(lengths)<2:
+            return numpy.zeros(s.shape)
+        s = numpy.clip(s, 0.0, lengths[-1])
+        idx = numpy.clip(numpy.searchsorted(lengths, s, side="right"), 1, len(lengths)-1)
+        l0 = lengths[idx-1]
+        dl = lengths[idx]-l0
+        t0 = params[idx-1]
+        t1 = params[idx]
+        valid = dl>0
+        u = numpy.where(valid, (s-l0)/numpy.where(valid, dl, 1.0), 0.0)
+        # Hermite interpolation (use the linear interpolation where
+        # the derivative is not defined)
+        m = numpy.array(map(lambda x: x or 0.0, self._arclen_slopes))
+        hasslope = numpy.array(map(lambda x: x!=None, self._arclen_slopes))
+        m0 = m[idx-1]
+        m1 = m[idx]
+        u2 = u*u
+        u3 = u2*u
+        res = ((2*u3-3*u2+1)*t0 + (u3-2*u2+u)*dl*m0 +
+               (-2*u3+3*u2)*t1 + (u3-u2)*dl*m1)
+        linear = t0+u*(t1-t0)
+        return numpy.where(hasslope[idx-1] & hasslope[idx], res, linear)
+
     def eval0(self, t):
         if self._internal_data_invalid:
             self._updateInternalData()
@@ -375,15 +562,88 @@ class BezierCurveGeom(GeomObject):
         """This method is called whenever a point or tangent is modified.
         """
         self._internal_data_invalid = True
+        self._ctrlpnts_array = None
 
     # onCurveResized
     def onCurveResized(self, size):
         """This method is called whenever the number of points is modified.
         """
         self._internal_data_invalid = True
+        self._ctrlpnts_array = None
         
     ## protected:
 
+    def _segParams(self, t):
+        """Split an array of curve parameters into segments and segment parameters.
+
+        Returns a tuple (seg, u) where seg is an integer array containing
+        the segment numbers and u is an array with the parameters
+        (0-1) within the respective segment.
+        """
+        if not _numpy_available:
+            raise ImportError("numpy is not available")
+        t = numpy.asarray(t, dtype=float).reshape(-1)
+        numsegs = self.numsegs
+        if numsegs<1:
+            raise ValueError("The curve has no segments")
+        if self._closed:
+            t = numpy.mod(t, numsegs)
+        else:
+            t = numpy.clip(t, 0.0, numsegs)
+        # Samples at the very end are evaluated in the last segment
+        seg = numpy.minimum(numpy.floor(t).astype(int), numsegs-1)
+        return seg, t-seg
+
+    def _evalBasis(self, seg, bases):
+        """Sum up the control points weighted by the basis functions.
+
+        seg is an integer array of length N with the segment numbers and
+        bases a list of (N,4) arrays with the values of the 4 basis
+        functions. The control points are processed segment by segment.
+        Returns a list of (N,3) arrays (one for each basis).
+        """
+        ctrlpnts = self.segCtrlPointArray()
+        res = map(lambda b: numpy.empty((len(seg),3)), bases)
+        if len(seg)==0:
+            return res
+        # Sort the samples by segment (a stable sort keeps the samples
+        # in order which is already the case for monotonic input)
+        order = numpy.argsort(seg, kind="mergesort")
+        sseg = seg[order]
+        bounds = numpy.flatnonzero(numpy.diff(sseg))+1
+        starts = numpy.concatenate(([0], bounds))
+        ends = numpy.concatenate((bounds, [len(sseg)]))
+        for start,end in zip(starts, ends):
+            idx = order[start:end]
+            cp = ctrlpnts[sseg[start]]
+            for basis,r in zip(bases, res):
+                r[idx] = numpy.dot(basis[idx], cp)
+        return res
+
+    def segCtrlPointArray(self):
+        """Return the control points of all segments as a numpy array.
+
+        The return value is an array of shape (numsegs,4,3). The array
+        is cached until the curve is modified, so it must not be
+        modified by the caller.
+        """
+        if not _numpy_available:
+            raise ImportError("numpy is not available")
+        if self._ctrlpnts_array is None:
+            pnts = _vec3SlotArray(self.pnts_slot)
+            intangents = _vec3SlotArray(self.intangents_slot)
+            outtangents = _vec3SlotArray(self.outtangents_slot)
+            n = self.numsegs
+            i = numpy.arange(n)
+            j = (i+1)%len(pnts)
+            res = numpy.empty((n,4,3))
+            res[:,0] = pnts[i]
+            res[:,1] = pnts[i]+outtangents[i]
+            res[:,2] = pnts[j]+intangents[j]
+            res[:,3] = pnts[j]
+            self._ctrlpnts_array = res
+        return self._ctrlpnts_array
+
     def segSmooth(self, seg):
         b0,b1,b2,b3 = self.segCtrlPoints(seg-1)
         d1 = b2-b1
@@ -590,6 +850,7 @@ class BezierCurveGeom(GeomObject):
             return
         self._closed = c
         self._internal_data_invalid = True
+        self._ctrlpnts_array = None
         # Update the size constraint for vertex variables
         if self._closed:
             self._vtx_sizeconstraint.setCoeffs(3,0)
@@ -609,3 +870,54 @@ class BezierCurveGeom(GeomObject):
     numsegs = property(_getNumSegs, None, None, "Number of Bezier segments")
 
 
+######################################################################
+
+def _vec3SlotArray(slot):
+    """Return the contents of a vec3 array slot as an (N,3) numpy array.
+    """
+    n = slot.size()
+    if hasattr(slot, "getBuffer"):
+        return numpy.fromstring(slot.getBuffer(), dtype=float).reshape((n,3))
+    res = numpy.empty((n,3))
+    for i in range(n):
+        res[i] = tuple(slot[i])
+    return res
+
+def _bernstein3(u):
+    """Return the cubic Bernstein polynomials evaluated at u.
+
+    u is a 1-dimensional numpy array. Returns an (N,4) array.
+    """
+    _u = 1.0-u
+    res = numpy.empty((len(u),4))
+    res[:,0] = _u*_u*_u
+    res[:,1] = 3*u*_u*_u
+    res[:,2] = 3*u*u*_u
+    res[:,3] = u*u*u
+    return res
+
+def _bernsteinDerivs(u, maxorder=2):
+    """Return the cubic Bernstein polynomials and their derivatives.
+
+    Returns a tuple (b, db, ddb) with the basis functions and their
+    first and second derivatives evaluated at u (each item is an (N,4)
+    array). Derivatives beyond maxorder are returned as None.
+    """
+    _u = 1.0-u
+    b = _bernstein3(u)
+    db = None
+    ddb = None
+    if maxorder>=1:
+        db = numpy.empty((len(u),4))
+        db[:,0] = -3*_u*_u
+        db[:,1] = 3*_u*(_u-2*u)
+        db[:,2] = 3*u*(2*_u-u)
+        db[:,3] = 3*u*u
+    if maxorder>=2:
+        ddb = numpy.empty((len(u),4))
+        ddb[:,0] = 6*_u
+        ddb[:,1] = 6*(3*u-2)
+        ddb[:,2] = 6*(1-3*u)
+        ddb[:,3] = 6*u
+    return b, db, ddb
+
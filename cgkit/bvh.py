@@ -38,12 +38,19 @@
 ## Contains the BVHReader class.
 
 import string
+try:
+    import numpy
+    _numpy_available = True
+except ImportError:
+    _numpy_available = False
 
 # Node
 class Node:
     def __init__(self, root=False):
         self.name = None
         self.channels = []
+        # The index of the first channel of this node in a motion sample
+        self.channelindex = 0
         self.offset = (0,0,0)
         self.children = []
         self._is_root = root
@@ -84,6 +91,19 @@ class BVHReader:
     def onFrame(self, values):
         pass
 
+    def onMotionData(self, data):
+        """Process the entire motion data.
+
+        data contains the values of all frames and channels. If numpy
+        is available, it is a 2D array with shape (frames, channels),
+        otherwise it is a list of value lists (one per frame). The
+        default implementation calls onFrame() for every frame.
+        """
+        if _numpy_available:
+            data = data.tolist()
+        for values in data:
+            self.onFrame(values)
+
     # read
     def read(self):
         """Read the entire file.
@@ -126,14 +146,38 @@ class BVHReader:
 
         self.onMotion(frames, dt)
 
-        # Read the channel values
+        # Read the channel values (the entire block is converted at once)
+        lines = []
         for i in range(frames):
-            s = self.readLine()
-            a = s.split()
-            if len(a)!=self._numchannels:
-                raise SyntaxError("Syntax error in line %d: %d float values expected, got %d instead"%(self.linenr, self._numchannels, len(a)))
-            values = map(lambda x: float(x), a)
-            self.onFrame(values)
+            lines.append(self.readLine())
+        numchannels = self._numchannels
+        if _numpy_available:
+            data = numpy.fromstring(" ".join(lines), dtype=float, sep=" ")
+            if data.size==frames*numchannels:
+                data = data.reshape((frames, numchannels))
+            else:
+                data = None
+        else:
+            data = map(float, " ".join(lines).split())
+            if len(data)==frames*numchannels:
+                data = map(lambda i: data[i:i+numchannels], range(0, len(data), numchannels))
+            else:
+                data = None
+
+        # Invalid data? Then find the first line that causes the error
+        if data is None:
+            for i,s in enumerate(lines):
+                a = s.split()
+                linenr = self.linenr-frames+i+1
+                if len(a)!=numchannels:
+                    raise SyntaxError("Syntax error in line %d: %d float values expected, got %d instead"%(linenr, numchannels, len(a)))
+                try:
+                    map(float, a)
+                except ValueError:
+                    raise SyntaxError("Syntax error in line %d: Invalid float value"%linenr)
+            raise SyntaxError("Syntax error in the motion data")
+            
+        self.onMotionData(data)
 
 
     # readHierarchy
@@ -182,6 +226,7 @@ class BVHReader:
                                   "Xrotation", "Yrotation", "Zrotation"]:
                         raise SyntaxError("Syntax error in line %d: Invalid channel name: '%s'"%(self.linenr, tok))                        
                     channels.append(tok)
+                self._nodestack[-1].channelindex = self._numchannels
                 self._numchannels += len(channels)
                 self._nodestack[-1].channels = channels
             elif tok=="JOINT":
@@ -65,6 +65,55 @@ class BVHReader(bvh.BVHReader):
         self.applyMotion(self.root, values)
         self.currentframe += 1
 
+    def onMotionData(self, data):
+        """Apply the entire motion to the skeleton.
+
+        The values of each channel are passed to the value tables
+        in one go.
+        """
+        if hasattr(data, "shape"):
+            columns = data.T.tolist()
+        else:
+            columns = map(list, zip(*data))
+        if len(columns)==0:
+            return
+        dt = self.dt
+        times = map(lambda i: i*dt, range(self.frames))
+        self.applyMotionData(self.root, times, columns)
+        self.currentframe = self.frames
+
+    def applyMotionData(self, node, times, columns):
+        """Apply the motion of all frames to the skeleton.
+
+        node is the current joint, times the list of frame times and
+        columns contains the values of each channel (one list per channel).
+        The channel index that is stored in the node determines which
+        columns belong to the node.
+        """
+        pos = [None, None, None]
+        for i,ch in enumerate(node.channels):
+            values = columns[node.channelindex+i]
+            if ch=="Xrotation":
+                node.vtx.setSamples(times, values)
+            elif ch=="Yrotation":
+                node.vty.setSamples(times, values)
+            elif ch=="Zrotation":
+                node.vtz.setSamples(times, values)
+            elif ch=="Xposition":
+                pos[0] = values
+            elif ch=="Yposition":
+                pos[1] = values
+            elif ch=="Zposition":
+                pos[2] = values
+
+        if pos!=[None, None, None]:
+            zeros = len(times)*[0.0]
+            pos = map(lambda p: p or zeros, pos)
+            node.vtpos.setSamples(times, map(vec3, pos[0], pos[1], pos[2]))
+
+        for c in node.children:
+            self.applyMotionData(c, times, columns)
+
     def applyMotion(self, node, values):
         """Apply a motion sample to the skeleton.
 
@@ -0,0 +1,80 @@
+# ***** BEGIN LICENSE BLOCK *****
+# Version: MPL 1.1/GPL 2.0/LGPL 2.1
+#
+# The contents of this file are subject to the Mozilla Public License Version
+# 1.1 (the "License"); you may not use this file except in compliance with
+# the License. You may obtain a copy of the License at
+# http://www.mozilla.org/MPL/
+#
+# Software distributed under the License is distributed on an "AS IS" basis,
+# WITHOUT WARRANTY OF ANY KIND, either express or implied. See the License
+# for the specific language governing rights and limitations under the
+# License.
+#
+# The Original Code is the Python Computer Graphics Kit.
+#
+# The Initial Developer of the Original Code is Matthias Baas.
+# Portions created by the Initial Developer are Copyright (C) 2004
+# the Initial Developer. All Rights Reserved.
+#
+# Contributor(s):
+#
+# Alternatively, the contents of this file may be used under the terms of
+# either the GNU General Public License Version 2 or later (the "GPL"), or
+# the GNU Lesser General Public License Version 2.1 or later (the "LGPL"),
+# in which case the provisions of the GPL or the LGPL are applicable instead
+# of those above. If you wish to allow use of your version of this file only
+# under the terms of either the GPL or the LGPL, and not to allow others to
+# use your version of this file under the terms of the MPL, indicate your
+# decision by deleting the provisions above and replace them with the notice
+# and other provisions required by the GPL or the LGPL. If you do not delete
+# the provisions above, a recipient may use your version of this file under
+# the terms of any one of the MPL, the GPL or the LGPL.
+#
+# ***** END LICENSE BLOCK *****
+
+"""Export plugin for binary scene cache files (see the scenecache module).
+"""
+
+from globalscene import getScene
+import pluginmanager
+import cmds
+import scenecache
+
+# CGCExporter
+class CGCExporter:
+
+    _protocols = ["Export"]
+
+    # extension
+    def extension():
+        """Return the file extensions for this format."""
+        return ["cgc"]
+    extension = staticmethod(extension)
+
+    # description
+    def description(self):
+        """Return a short description for the file dialog."""
+        return "cgkit scene cache"
+    description = staticmethod(description)
+
+    # exportFile
+    def exportFile(self, filename, root=None, source=None):
+        """Export a scene cache file.
+
+        root is the root of the subtree that should be exported. source
+        is the name of the file the scene was loaded from. Its hash is
+        stored in the cache.
+        """
+        root = cmds.worldObject(root)
+        if root==None:
+            objs = list(getScene().worldRoot().iterChilds())
+        else:
+            objs = [root]
+        scenecache.writeSceneCache(filename, objs, source=source)
+
+
+######################################################################
+
+# Register the Exporter class as a plugin class
+pluginmanager.register(CGCExporter)
@@ -0,0 +1,156 @@
+# ***** BEGIN LICENSE BLOCK *****
+# Version: MPL 1.1/GPL 2.0/LGPL 2.1
+#
+# The contents of this file are subject to the Mozilla Public License Version
+# 1.1 (the "License"); you may not use this file except in compliance with
+# the License. You may obtain a copy of the License at
+# http://www.mozilla.org/MPL/
+#
+# Software distributed under the License is distributed on an "AS IS" basis,
+# WITHOUT WARRANTY OF ANY KIND, either express or implied. See the License
+# for the specific language governing rights and limitations under the
+# License.
+#
+# The Original Code is the Python Computer Graphics Kit.
+#
+# The Initial Developer of the Original Code is Matthias Baas.
+# Portions created by the Initial Developer are Copyright (C) 2004
+# the Initial Developer. All Rights Reserved.
+#
+# Contributor(s):
+#
+# Alternatively, the contents of this file may be used under the terms of
+# either the GNU General Public License Version 2 or later (the "GPL"), or
+# the GNU Lesser General Public License Version 2.1 or later (the "LGPL"),
+# in which case the provisions of the GPL or the LGPL are applicable instead
+# of those above. If you wish to allow use of your version of this file only
+# under the terms of either the GPL or the LGPL, and not to allow others to
+# use your version of this file under the terms of the MPL, indicate your
+# decision by deleting the provisions above and replace them with the notice
+# and other provisions required by the GPL or the LGPL. If you do not delete
+# the provisions above, a recipient may use your version of this file under
+# the terms of any one of the MPL, the GPL or the LGPL.
+#
+# ***** END LICENSE BLOCK *****
+
+"""Reading and writing chunk files.
+
+This module contains the functions that read and write the chunk layout
+that is shared by the scene cache files (see the scenecache module) and
+the animation cache files (see the animcache module). A chunk file
+begins with a 16 byte header (written by the respective module) that is
+followed by a sequence of chunks which are aligned to 8 bytes. Each
+chunk consists of a four-character tag, a reserved uint32, the size of
+the chunk data (uint64) and the data itself (padded to a multiple of 8
+bytes).
+
+Arrays are stored in "BUFF" chunks. The data starts with an 8 byte header
+containing the array type code as a single character, followed by the
+values in little endian byte order.
+
+Chunks that contain pickled data are read with loadPickle() which only
+accepts the classes that are expected in the respective chunk (so that
+loading a file cannot execute arbitrary code).
+"""
+
+import sys, struct, array, pickle, StringIO
+
+# The globals that may always appear in pickled chunk data
+_safe_globals = (array.array, set, frozenset, complex)
+
+# writeChunk
+def writeChunk(f, tag, data):
+    """Write a chunk (including the padding).
+
+    tag is the four-character tag and data a string with the chunk data.
+    """
+    f.write(struct.pack("<4sIQ", tag, 0, len(data)))
+    f.write(data)
+    _writePadding(f, len(data))
+
+# writeBufferChunk
+def writeBufferChunk(f, buf):
+    """Write an array as BUFF chunk.
+
+    buf is an array.array object. The array data is written directly
+    into the file without creating an intermediate string.
+    """
+    if sys.byteorder!="little":
+        buf = array.array(buf.typecode, buf)
+        buf.byteswap()
+    size = 8+len(buf)*buf.itemsize
+    f.write(struct.pack("<4sIQ", "BUFF", 0, size))
+    f.write(struct.pack("<c7x", buf.typecode))
+    buf.tofile(f)
+    _writePadding(f, size)
+
+# readChunkHeader
+def readChunkHeader(f):
+    """Read the header of the next chunk.
+
+    Returns a tuple (tag, size) or (None, None) at the end of the file.
+    """
+    s = f.read(16)
+    if len(s)<16:
+        return None, None
+    tag,reserved,size = struct.unpack("<4sIQ", s)
+    return tag, size
+
+# readBufferChunk
+def readBufferChunk(f, size):
+    """Read the data of a BUFF chunk.
+
+    This function has to be called after readChunkHeader() has returned
+    a BUFF chunk. size is the chunk size. The array is read directly
+    from the file and returned as an array.array object. The padding is
+    not skipped.
+    """
+    typecode = struct.unpack("<c7x", f.read(8))[0]
+    buf = array.array(typecode)
+    buf.fromfile(f, (size-8)/buf.itemsize)
+    if sys.byteorder!="little":
+        buf.byteswap()
+    return buf
+
+# loadPickle
+def loadPickle(data, classes=()):
+    """Unpickle the data of a chunk.
+
+    data is a string with the pickled data and classes a sequence of
+    classes that may appear in the data (in addition to the built-in
+    types and arrays). Any other global in the data raises an
+    UnpicklingError, so no other class or function can be
+    invoked while the data is unpickled.
+    """
+    unpickler = _RestrictedUnpickler(StringIO.StringIO(data), _safe_globals+tuple(classes))
+    return unpickler.load()
+
+# skipPadding
+def skipPadding(f, size):
+    """Skip the padding bytes after a chunk with the given data size.
+    """
+    pad = (8-size%8)%8
+    if pad>0:
+        f.read(pad)
+
+class _RestrictedUnpickler(pickle.Unpickler):
+    """Unpickler that only resolves the globals in a fixed list.
+    """
+
+    def __init__(self, f, classes):
+        pickle.Unpickler.__init__(self, f)
+        # Key: (module name, name) / Value: Class
+        self.classes = dict([((cls.__module__, cls.__name__), cls) for cls in classes])
+
+    def find_class(self, module, name):
+        cls = self.classes.get((module, name))
+        if cls==None:
+            raise pickle.UnpicklingError("%s.%s is not allowed in the pickled chunk data"%(module, name))
+        return cls
+
+def _writePadding(f, size):
+    """Write the padding bytes after a chunk with the given data size.
+    """
+    pad = (8-size%8)%8
+    if pad>0:
+        f.write(pad*"\0")
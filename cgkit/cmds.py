@@ -944,6 +944,89 @@ def load(filename, **options):
     # Change back to the previous directory
     os.chdir(oldpath)
 
+# loadBatch
+def loadBatch(filenames, processes=None, parent=None, **options):
+    """Load several files in parallel.
+
+    The files are imported in worker processes (using the same import
+    plugins as load()). Each worker converts the imported world objects
+    into a picklable description (see the scenedesc module) which is then
+    used to create the objects in the current scene. The objects are
+    created in the same order as the file names are given.
+
+    Files whose import creates scene items other than world objects
+    (such as animation components) are loaded again in the current
+    process using load(). A warning is printed for each of these files
+    and their names are returned. If the multiprocessing module is not
+    available or if only one process is used, all files are loaded
+    sequentially.
+
+    \param filenames (\c str sequence) File names
+    \param processes (\c int) Number of worker processes (None = number of CPUs)
+    \param parent (\c WorldObject) Parent for the top level objects of all files (when
+           files are loaded sequentially, this is passed to the import plugins)
+    \param options Options that are passed to the import plugins
+    \return List of file names that had to be loaded again in the current process
+    """
+    filenames = list(filenames)
+    try:
+        import multiprocessing
+    except ImportError:
+        multiprocessing = None
+
+    if multiprocessing==None or processes==1 or len(filenames)<2:
+        for filename in filenames:
+            if parent!=None:
+                load(filename, parent=parent, **options)
+            else:
+                load(filename, **options)
+        return []
+
+    import scenedesc
+    pool = multiprocessing.Pool(processes)
+    try:
+        results = pool.map(_loadDescription,
+                           [(filename, options) for filename in filenames])
+    finally:
+        pool.close()
+        pool.join()
+
+    reloaded = []
+    for filename,(desc,others) in zip(filenames, results):
+        if desc==None:
+            print >>sys.stderr, 'WARNING: "%s" creates other scene items than world objects (%s), the file is loaded again in the main process.'%(filename, ", ".join(others))
+            reloaded.append(filename)
+            if parent!=None:
+                load(filename, parent=parent, **options)
+            else:
+                load(filename, **options)
+        else:
+            scenedesc.createScene(desc, parent=parent)
+    return reloaded
+
+# _loadDescription
+def _loadDescription(args):
+    """Worker function for loadBatch().
+
+    args is a tuple (filename, options). The file is loaded into an
+    empty scene and a tuple (desc, others) is returned where desc is a
+    description of the world objects and others is a list with the
+    names of the other scene items that were created by the import. If
+    there are any other items, desc is None.
+    """
+    import scenedesc
+    filename, options = args
+    scene = getScene()
+    scene.clear()
+    load(filename, **options)
+    others = []
+    for item in scene.items:
+        if item is not scene.timer() and item is not scene.worldRoot():
+            others.append('%s "%s"'%(item.__class__.__name__, getattr(item, "name", "")))
+    if len(others)>0:
+        return None, others
+    return scenedesc.describeScene(list(scene.worldRoot().iterChilds())), []
+
 
 # save
 def save(filename, **options):
@@ -38,7 +38,7 @@
 ## Contains the EventManager class.
 
 import sys, types, bisect
-from copy import copy
+import profiler
 
 # Receiver
 class _Receiver:
@@ -87,6 +87,13 @@ class EventManager:
         # Scene wide connections.
         # Key: Event name - Value: Sorted list of _Receivers
         self.scene_connections = {}
+        # Receivers that are called during dispatch (system wide receivers
+        # first). The tuples are created on demand and removed whenever
+        # the connections of an event change.
+        # Key: Event name - Value: Tuple of callables
+        self._dispatch = {}
+        # Queued events. List of (name, params, keyargs) tuples.
+        self._queue = []
 
     def __str__(self):
         s = 70*"-"+"\n"
@@ -122,20 +129,53 @@ class EventManager:
         \todo Aufruf der Empfaenger-Methode kann Exception verursachen.
         """
 
-        # Process system wide connections
-        receivers = self.system_connections.get(name, [])
-        for rec in copy(receivers):
-            if rec.receiver(*params, **keyargs):
-                return True
+        receivers = self._dispatch.get(name)
+        if receivers is None:
+            receivers = self._updateDispatch(name)
+
+        if profiler._active is not None:
+            return self._profiledEvent(name, receivers, params, keyargs)
 
-        # Process scene wide connections
-        receivers = self.scene_connections.get(name, [])
-        for rec in copy(receivers):
-            if rec.receiver(*params, **keyargs):
+        # The tuple contains the system wide receivers followed by the
+        # scene wide receivers
+        for receiver in receivers:
+            if receiver(*params, **keyargs):
                 return True
 
         return False
 
+    # postEvent
+    def postEvent(self, name, *params, **keyargs):
+        """Queue an event.
+
+        The event is not dispatched immediately but stored until
+        processEvents() is called. This can be used by input devices
+        that produce events at a high rate (possibly from within another
+        thread) to deliver them in batches.
+
+        \param name (\c str) Name of the event.
+        """
+        self._queue.append((name, params, keyargs))
+
+    # processEvents
+    def processEvents(self):
+        """Dispatch all queued events.
+
+        The events are dispatched in the order in which they were posted.
+        Events that are posted while the queue is processed are dispatched
+        during the next call.
+
+        \return Number of events that were dispatched.
+        """
+        queue = self._queue
+        if not queue:
+            return 0
+        self._queue = []
+        event = self.event
+        for name,params,keyargs in queue:
+            event(name, *params, **keyargs)
+        return len(queue)
+
     # connect
     def connect(self, name, receiver, priority=10, system=False):
         """Connect a function or method to an event.
@@ -165,6 +205,7 @@ class EventManager:
             connections = self.scene_connections
 
         rec = _Receiver(receiver, priority)
+        self._dispatch.pop(name, None)
         # Has the event already any connections? then add the new receiver
         if name in connections:
             bisect.insort(connections[name], rec)
@@ -198,6 +239,7 @@ class EventManager:
         if receiver==None:
             if name in connections:
                 del connections[name]
+                self._dispatch.pop(name, None)
                 return
 
         receiver = self._determine_receiver(name, receiver)
@@ -219,6 +261,7 @@ class EventManager:
             raise KeyError('Receiver is not connected to event "%s"'%name)
 
         del connections[name][i]
+        self._dispatch.pop(name, None)
 
     # disconnectAll
     def disconnectAll(self, system=False):
@@ -232,9 +275,37 @@ class EventManager:
             self.system_connections = {}
         else:
             self.scene_connections = {}
+        self._dispatch = {}
 
 
     ## private:
+    def _updateDispatch(self, name):
+        """Create the tuple of receivers that are called for an event.
+
+        \param name (\c str) Name of the event.
+        \return Tuple of callables.
+        """
+        recs = self.system_connections.get(name, []) + self.scene_connections.get(name, [])
+        receivers = tuple(map(lambda rec: rec.receiver, recs))
+        self._dispatch[name] = receivers
+        return receivers
+
+    def _profiledEvent(self, name, receivers, params, keyargs):
+        """Signal an event and record the time spent in the receivers.
+
+        This is the same as event() but is used when a profiler is active.
+        """
+        prof = profiler._active
+        start = profiler._clock()
+        try:
+            for receiver in receivers:
+                recname = "%s: %s"%(name, profiler.procName(receiver))
+                if prof.call("receiver", recname, receiver, *params, **keyargs):
+                    return True
+            return False
+        finally:
+            prof.record("event", name, start, profiler._clock()-start)
+
     def _determine_receiver(self, name, receiver):
         """Returns the receiver object.
 
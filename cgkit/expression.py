@@ -100,6 +100,17 @@ class Expression(Component):
         self.expr = expr
         self.exprtype = exprtype
 
+        # The compiled expression and the (expr, exprtype) tuple it was
+        # compiled from
+        self._code = None
+        self._code_key = None
+        # The last input values and the corresponding result
+        self._last_input = None
+        self._last_output = None
+        # Memoization is disabled if there are parameters with arbitrary
+        # Python objects (which might be modified in place)
+        self._memoize = True
+
         # Create a parameter slot for every extra key arg...
         for k in keyargs:
             T = type(keyargs[k])
@@ -127,6 +138,7 @@ class Expression(Component):
             else:
                 typ = "py"
                 valstr = "keyargs[k]"
+                self._memoize = False
 #                raise ValueError("Unsupported type: %s"%T)
             # Create slot
             exec "self.%s_slot = %sSlot(%s)"%(k, typ.capitalize(), valstr)
@@ -142,6 +154,10 @@ class Expression(Component):
         self.vars = keyargs.keys()
         if "t" not in self.vars:
             self.vars.append("t")
+        # Store the (name, slot) pairs of all parameters
+        self._var_slots = []
+        for v in self.vars:
+            self._var_slots.append((v, getattr(self, "%s_slot"%v)))
 
         if self.exprtype==None:
             self.exprtype = self._determineReturnType()
@@ -163,21 +179,41 @@ class Expression(Component):
         return [ISceneItem, IComponent]
 
     def outProc(self):
-        for _v in self.vars:
-            exec "%s = self.%s_slot.getValue()"%(_v, _v)
-        return eval("%s(%s)"%(self.exprtype, self.expr))
+        # Compile the expression if it hasn't been compiled yet or if it
+        # was modified since the last call
+        key = (self.expr, self.exprtype)
+        if key!=self._code_key:
+            self._code = compile("%s(%s)"%key, "<expression>", "eval")
+            self._code_key = key
+            self._last_input = None
+
+        values = self._inputValues()
+        if self._memoize and values==self._last_input:
+            return self._last_output
+            
+        res = eval(self._code, globals(), values)
+        if self._memoize:
+            self._last_input = values
+            self._last_output = res
+        return res
      
     ## protected:
         
     # "output" property...
     exec slotPropertyCode("output")
 
+    def _inputValues(self):
+        """Return a dictionary with the current values of all parameters.
+        """
+        values = {"self":self}
+        for name, slot in self._var_slots:
+            values[name] = slot.getValue()
+        return values
+
     def _determineReturnType(self):
         """Try to execute the stored expression and return the output type.
         """
-        for _v in self.vars:
-            exec "%s = self.%s_slot.getValue()"%(_v, _v)
-        out = eval(self.expr)
+        out = eval(self.expr, globals(), self._inputValues())
         T = type(out)
         if T==float or T==int:
             return "float"
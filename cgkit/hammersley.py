@@ -78,6 +78,19 @@
 
 from math import pi, sqrt, cos, sin
 from cgtypes import *
+try:
+    import numpy
+    _numpy_available = True
+except ImportError:
+    _numpy_available = False
+
+# Maximum number of point arrays that are kept in the cache
+_cachesize = 16
+
+# Cached point arrays (key: (function name, n, base))
+_cache = {}
+# Cache keys (the most recently used key is at the end)
+_cachekeys = []
 
 # planeHammersley
 def planeHammersley(n):
@@ -211,4 +224,134 @@ def sphereHalton(n=None, p2=3):
         phirad = phi*4.0*pi
         yield vec3(st*cos(phirad), st*sin(phirad), t)
         k += 1
-    
+
+# planeHammersleyArray
+def planeHammersleyArray(n):
+    """Return n Hammersley points on the unit square as a numpy array.
+
+    This is the array version of planeHammersley(). The return value
+    is a read-only array of shape (n,2). Repeated calls with the same
+    n return the cached array.
+    """
+    def create():
+        res = numpy.empty((n,2))
+        res[:,0] = radicalInverse(n, 2)
+        res[:,1] = (numpy.arange(n)+0.5)/n
+        return res
+    return _cachedArray(("planeHammersley", n, 2), create)
+
+# sphereHammersleyArray
+def sphereHammersleyArray(n):
+    """Return n Hammersley points on the unit sphere as a numpy array.
+
+    This is the array version of sphereHammersley(). The return value
+    is a read-only array of shape (n,3). Repeated calls with the same
+    n return the cached array.
+    """
+    def create():
+        t = 2.0*radicalInverse(n, 2) - 1.0
+        phirad = (numpy.arange(n)+0.5)/n*2.0*pi
+        return _spherePoints(t, phirad)
+    return _cachedArray(("sphereHammersley", n, 2), create)
+
+# planeHaltonArray
+def planeHaltonArray(n, p2=3):
+    """Return n Halton points on the unit square as a numpy array.
+
+    This is the array version of planeHalton(). The return value is a
+    read-only array of shape (n,2). Repeated calls with the same
+    arguments return the cached array.
+    """
+    def create():
+        res = numpy.empty((n,2))
+        res[:,0] = radicalInverse(n, 2)
+        res[:,1] = radicalInverse(n, p2)
+        return res
+    return _cachedArray(("planeHalton", n, p2), create)
+
+# sphereHaltonArray
+def sphereHaltonArray(n, p2=3):
+    """Return n Halton points on the unit sphere as a numpy array.
+
+    This is the array version of sphereHalton(). The return value is a
+    read-only array of shape (n,3). Repeated calls with the same
+    arguments return the cached array.
+    """
+    def create():
+        t = 2.0*radicalInverse(n, 2) - 1.0
+        phirad = radicalInverse(n, p2)*4.0*pi
+        return _spherePoints(t, phirad)
+    return _cachedArray(("sphereHalton", n, p2), create)
+
+# radicalInverse
+def radicalInverse(n, base=2):
+    """Return the radical inverses of the numbers 0 to n-1.
+
+    The return value is a numpy array with n floats. The base 2 version
+    reverses the bits of the numbers, the other bases process one digit
+    of all numbers at once.
+    """
+    if not _numpy_available:
+        raise ImportError("numpy is not available")
+    if base==2:
+        if n>2**32:
+            raise ValueError("n must not exceed 2**32")
+        k = numpy.arange(n, dtype=numpy.uint32)
+        # Reverse the 32 bits of k
+        k = ((k>>1) & numpy.uint32(0x55555555)) | ((k & numpy.uint32(0x55555555))<<1)
+        k = ((k>>2) & numpy.uint32(0x33333333)) | ((k & numpy.uint32(0x33333333))<<2)
+        k = ((k>>4) & numpy.uint32(0x0f0f0f0f)) | ((k & numpy.uint32(0x0f0f0f0f))<<4)
+        k = ((k>>8) & numpy.uint32(0x00ff00ff)) | ((k & numpy.uint32(0x00ff00ff))<<8)
+        k = (k>>16) | (k<<16)
+        return k*(1.0/2**32)
+    else:
+        res = numpy.zeros(n)
+        kk = numpy.arange(n)
+        ip = 1.0/base
+        p = ip
+        while n>0 and kk[-1]>0:
+            res += (kk%base)*p
+            p *= ip
+            kk //= base
+        return res
+
+# clearCache
+def clearCache():
+    """Remove all point arrays from the cache."""
+    global _cache, _cachekeys
+    _cache = {}
+    _cachekeys = []
+
+def _spherePoints(t, phirad):
+    """Return an array of points on the unit sphere.
+
+    t contains the z values and phirad the angles.
+    """
+    st = numpy.sqrt(1.0-t*t)
+    res = numpy.empty((len(t),3))
+    res[:,0] = st*numpy.cos(phirad)
+    res[:,1] = st*numpy.sin(phirad)
+    res[:,2] = t
+    return res
+
+def _cachedArray(key, create):
+    """Return the array for the given key from the cache.
+
+    If the array is not in the cache yet, it is created by calling
+    create() and stored in the cache (removing the least recently used
+    array if the cache is full). The array is marked read-only so that
+    it cannot be modified by the caller.
+    """
+    if not _numpy_available:
+        raise ImportError("numpy is not available")
+    res = _cache.get(key)
+    if res is None:
+        res = create()
+        res.flags.writeable = False
+        _cache[key] = res
+        if len(_cachekeys)>=_cachesize:
+            del _cache[_cachekeys.pop(0)]
+    else:
+        _cachekeys.remove(key)
+    _cachekeys.append(key)
+    return res
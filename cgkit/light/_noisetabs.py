@@ -0,0 +1,928 @@
+# ***** BEGIN LICENSE BLOCK *****
+# Version: MPL 1.1/GPL 2.0/LGPL 2.1
+#
+# The contents of this file are subject to the Mozilla Public License Version
+# 1.1 (the "License"); you may not use this file except in compliance with
+# the License. You may obtain a copy of the License at
+# http://www.mozilla.org/MPL/
+#
+# Software distributed under the License is distributed on an "AS IS" basis,
+# WITHOUT WARRANTY OF ANY KIND, either express or implied. See the License
+# for the specific language governing rights and limitations under the
+# License.
+#
+# The Original Code is the Python Computer Graphics Kit.
+#
+# The Initial Developer of the Original Code is Matthias Baas.
+# Portions created by the Initial Developer are Copyright (C) 2004
+# the Initial Developer. All Rights Reserved.
+#
+# Contributor(s):
+#
+# Alternatively, the contents of this file may be used under the terms of
+# either the GNU General Public License Version 2 or later (the "GPL"), or
+# the GNU Lesser General Public License Version 2.1 or later (the "LGPL"),
+# in which case the provisions of the GPL or the LGPL are applicable instead
+# of those above. If you wish to allow use of your version of this file only
+# under the terms of either the GPL or the LGPL, and not to allow others to
+# use your version of this file under the terms of the MPL, indicate your
+# decision by deleting the provisions above and replace them with the notice
+# and other provisions required by the GPL or the LGPL. If you do not delete
+# the provisions above, a recipient may use your version of this file under
+# the terms of any one of the MPL, the GPL or the LGPL.
+#
+# ***** END LICENSE BLOCK *****
+
+"""Tables for the light version of the noise module.
+
+The values are identical to the tables in supportlib/include/noisetabs.h
+so that both implementations produce the same noise.
+"""
+
+perm = (
+    174, 170, 229, 205, 0, 154, 247, 103, 188, 49, 143, 9, 238, 162,
+    179, 209, 120, 105, 199, 48, 194, 27, 202, 77, 84, 3, 118, 17,
+    11, 20, 141, 58, 75, 14, 234, 215, 250, 248, 64, 80, 51, 22,
+    220, 175, 18, 113, 181, 155, 200, 56, 62, 227, 185, 70, 241, 122,
+    16, 121, 47, 164, 152, 13, 60, 101, 246, 32, 53, 251, 134, 76,
+    232, 100, 99, 90, 130, 178, 240, 123, 192, 8, 144, 147, 193, 72,
+    111, 207, 166, 88, 233, 52, 87, 150, 177, 24, 91, 96, 124, 254,
+    151, 190, 214, 50, 131, 115, 196, 171, 244, 33, 161, 6, 172, 195,
+    142, 108, 1, 106, 55, 210, 114, 98, 186, 216, 102, 29, 125, 139,
+    107, 59, 136, 126, 203, 19, 40, 218, 44, 222, 201, 153, 92, 169,
+    163, 66, 93, 112, 25, 208, 149, 89, 168, 69, 85, 4, 68, 135,
+    206, 67, 145, 65, 183, 21, 82, 212, 35, 38, 42, 187, 173, 146,
+    242, 211, 223, 83, 74, 34, 225, 15, 78, 10, 182, 94, 79, 243,
+    97, 148, 189, 219, 71, 73, 39, 128, 138, 54, 117, 61, 36, 157,
+    160, 140, 184, 46, 63, 110, 253, 133, 198, 255, 167, 129, 217, 5,
+    197, 23, 104, 132, 239, 28, 165, 249, 224, 86, 45, 236, 245, 235,
+    26, 231, 81, 127, 221, 12, 158, 37, 228, 137, 116, 30, 230, 31,
+    176, 41, 57, 252, 119, 43, 2, 159, 237, 226, 204, 7, 156, 109,
+    213, 180, 191, 95,
+)
+
+uniform = (
+    0.21715864926591522, 0.88494591885164553, 0.8422102044892319,
+    0.76061694491848586, 0.82502952148253805, 0.11135672005140451,
+    0.035584121845477767, 0.42905170691075289, 0.64771494138346597,
+    0.03652356702791737, 0.58312388586670405, 0.83772161231153652,
+    0.25375338516077539, 0.314500349022937, 0.15464815049483738,
+    0.81082349747399185, 0.23252514210291109, 0.16495269159527126,
+    0.97052509486193328, 0.91088178283237298, 0.93606713426157984,
+    0.12599971618182204, 0.30613588471368791, 0.21459922623596728,
+    0.85822196242422599, 0.8635466803848042, 0.76760814541473166,
+    0.88208150911101202, 0.32987333917096828, 0.70228023285475283,
+    0.94951612306075783, 0.56597305396924202, 0.14631262827054425,
+    0.36608672351258775, 0.87488038216336084, 0.94793393111319468,
+    0.29425440506389888, 0.19823677728191158, 0.68346894850203443,
+    0.68848955514947208, 0.74792194535680145, 0.084469258032776162,
+    0.43916834748094091, 0.12477092809742629, 0.95064259239531701,
+    0.82843393976676349, 0.34844525371465163, 0.85803121632192525,
+    0.69165902415187697, 0.81310460392766459, 0.81260344297977771,
+    0.49062085642721942, 0.033096754696003039, 0.45490425792006839,
+    0.95933922427365215, 0.12705899079813809, 0.51160120581467128,
+    0.077565020384584571, 0.1462293056883115, 0.35003723060005365,
+    0.24646944598938747, 0.85049687990007183, 0.66664779956152054,
+    0.7917473572102981, 0.90749666858460332, 0.54784136713946907,
+    0.075805542925102776, 0.79062507151903239, 0.52617724419884171,
+    0.46324971289143857, 0.30948512498544889, 0.84263883111086801,
+    0.71403209441160131, 0.33925396937133545, 0.57500789743187708,
+    0.97569197314428324, 0.1042191561905863, 0.300634246146259,
+    0.80594926456496618, 0.1643514573184861, 0.087012576503931349,
+    0.9597082672516164, 0.27375574605000241, 0.27110059521448582,
+    0.39763911909595095, 0.18293454559837752, 0.96671279529397935,
+    0.040499523737386633, 0.84180061115462679, 0.78947394060411913,
+    0.80558770603700891, 0.76127310212783272, 0.050330632669723485,
+    0.17424298881254141, 0.24445745542383818, 0.63978394353949919,
+    0.82604060519503419, 0.68715270086611691, 0.88442186325193961,
+    0.36678984961420769, 0.89894328537932511, 0.31185177064743153,
+    0.79674331978145285, 0.8529263547045085, 0.96103007755367309,
+    0.07138245304447377, 0.029311978138855999, 0.05447028605378712,
+    0.75843093970911712, 0.89581226507731038, 0.081879199174167194,
+    0.59629523850502553, 0.4502245524299191, 0.025322062881619756,
+    0.43636466916493899, 0.32420687139046844, 0.86390715051491118,
+    0.90960756097232576, 0.29084850791593864, 0.91968152377590251,
+    0.17297436256393439, 0.60673933531577529, 0.0063866470201241476,
+    0.62017152513986451, 0.84469478728506631, 0.13246405950141149,
+    0.070492632474985051, 0.87470969987527691, 0.56743950386910802,
+    0.79425325019237603, 0.011523322557381199, 0.64477679248977138,
+    0.94268505702525029, 0.56136327569357292, 0.51430861833124641,
+    0.92357934458863067, 0.44858541253199413, 0.56105159043751107,
+    0.67602470004190529, 0.23913123387247293, 0.82983707305717624,
+    0.17751824581607112, 0.83374910108819122, 0.016498184548795924,
+    0.65473320348406316, 0.47979339711180469, 0.21060805108186376,
+    0.81229721899316831, 0.92631124729363457, 0.54075670586929836,
+    0.11980962062110057, 0.4915011756130041, 0.360177691419868,
+    0.20051890189660182, 0.89686198299232034, 0.035292097909032316,
+    0.10821325982096131, 0.40943043402420143, 0.25546371842039273,
+    0.62398927905234358, 0.86553124794294178, 0.24064386614029232,
+    0.67300415864684116, 0.35087245303676906, 0.68321969660129844,
+    0.97177961662011558, 0.42480003415883072, 0.28268272966356167,
+    0.66192907948749302, 0.23800175055539929, 0.30781422787101187,
+    0.79373732192360191, 0.38039586553256033, 0.36964940989961903,
+    0.90314191819381473, 0.46976624211731099, 0.41020889963610885,
+    0.31952030003456544, 0.57005627872816245, 0.38564788466412092,
+    0.64146706828773947, 0.46475948709938342, 0.49668853571688332,
+    0.16961291868355444, 0.52557352879459884, 0.380893357566221,
+    0.41513403055754083, 0.90355939859532608, 0.16210831784810309,
+    0.88215240382933646, 0.21367746695166234, 0.51694505833647253,
+    0.28330182874644416, 0.76128774577290859, 0.70707698205961589,
+    0.52266247614021188, 0.099204399703884061, 0.087502438220024459,
+    0.76760008810421887, 0.85665506899507027, 0.74031936690766331,
+    0.43239745709964272, 0.13556972890531505, 0.22485222561361917,
+    0.48282920535837714, 0.2717628017946927, 0.79292199233761784,
+    0.53244313477563665, 0.31980183360846448, 0.76023963648353865,
+    0.31808928923626811, 0.39852943591323386, 0.60897339242421178,
+    0.77392604308245172, 0.78087347129657925, 0.56879625230699338,
+    0.18228233634061608, 0.15741541653810209, 0.59638527059963131,
+    0.1234707967955595, 0.61111838751029834, 0.60690527476111189,
+    0.73802644346604374, 0.045339895940861519, 0.75370943928523326,
+    0.084978586063783057, 0.98788181651526297, 0.636648923056784,
+    0.96165153415869808, 0.80825761202331048, 0.72151634090542149,
+    0.30049583224613352, 0.6883260699854914, 0.58105835169206399,
+    0.92448710864004102, 0.54412985740780129, 0.28126711642564661,
+    0.653363749982804, 0.91384995356249177, 0.26296307603817759,
+    0.038895617962350526, 0.62830639608169503, 0.21849622488608267,
+    0.44052275928912765, 0.17500037757636844, 0.10198274448650757,
+    0.35138217710277253, 0.016641954338015186, 0.39172508304409687,
+    0.030250109108473033, 0.047939427155327508, 0.077078723481999845,
+    0.95450295744656666, 0.21358960651510492, 0.36359395300358055,
+    0.98358630394746793,
+)
+
+grads2 = (
+    (0.45149288432193807, -0.89227471969492511),
+    (0.99575289703553382, -0.09206610693051806),
+    (0.9880693911773204, 0.15400934458168208),
+    (0.94025923372270293, -0.34045935645711894),
+    (-0.73316581405684655, 0.68004991662256786),
+    (-0.61701136754153474, 0.7869542377575236),
+    (-0.92279722900874328, 0.38528596410171118),
+    (-0.76715170271511324, 0.64146571616985315),
+    (-0.75963392461958457, -0.65035090571709608),
+    (0.37544326852511561, 0.92684537659696931),
+    (-0.88280879312342375, 0.46973251408004973),
+    (0.18291120880585052, 0.98312943689688315),
+    (-0.074346756078264437, -0.99723245026455032),
+    (-0.94406329890967455, -0.32976429105011146),
+    (-0.75669421480832522, 0.65376896934284956),
+    (-0.66176836479155854, 0.74970836420644693),
+    (0.96085799595835641, -0.27704135359706),
+    (-0.94803754014246366, -0.31815848641931072),
+    (-0.84221252451067063, 0.53914567934591018),
+    (-0.96808208210728608, -0.25063336231001204),
+    (0.87196365865166614, -0.48957060572587574),
+    (0.017494105817551189, 0.99984696642118409),
+    (0.06359672058038858, -0.99797567962922828),
+    (0.99891169424571502, -0.046641474024254025),
+    (0.31836306488609339, -0.94796885967648392),
+    (0.89570437427740957, 0.44465005779861794),
+    (0.99509116378971274, 0.098962496672401382),
+    (-0.63441582641790673, 0.77299195286269584),
+    (-0.84707551589285868, 0.53147254903225949),
+    (-0.37113687458355815, 0.92857817135895881),
+    (0.34721024069826489, -0.9377873153088887),
+    (0.6215960634512897, -0.78333794361173414),
+    (0.70518595172560061, -0.7090224069018265),
+    (0.1412764543165739, -0.98997018311449003),
+    (0.47614260874634823, 0.87936807773322201),
+    (-0.98348417216106276, -0.18099415213942449),
+    (-0.24527974066774411, -0.96945234478955389),
+    (-0.97303415484516342, -0.23066107930198962),
+    (-0.11611226250788108, -0.99323609604932339),
+    (-0.99511134434903625, -0.098759365874097935),
+    (0.75070875614019716, -0.66063330483289884),
+    (0.97228063592986524, -0.23381694762317115),
+    (0.64979942292957538, 0.76010572288359401),
+    (-0.44576875700983182, 0.89514815269535675),
+    (-0.79004705285501953, 0.61304620892319195),
+    (-0.014515303160016044, 0.99989464743750522),
+    (-0.97368146910849762, -0.22791313414263295),
+    (0.31430709306373561, 0.94932136352755914),
+    (-0.29597187495567112, -0.95519665474457394),
+    (0.18469029450422714, -0.98279677203170634),
+    (0.19319791971582195, -0.98115980544327175),
+    (-0.77697937835244391, 0.62952604840073922),
+    (-0.99972620828881231, -0.02339889870216854),
+    (-0.81082809292471592, 0.58528437850678028),
+    (-0.21344471444978619, 0.97695514424841889),
+    (0.38872989307773498, -0.92135176248150341),
+    (0.061075672083492856, 0.99813313855394536),
+    (0.8263070474661337, 0.56321990670412281),
+    (0.80860411165459622, 0.58835311728185924),
+    (-0.91881343681325689, 0.39469211840548729),
+    (-0.81915980291330592, 0.57356535572769207),
+    (-0.52520527022354191, -0.85097557199335416),
+    (-0.72696722417445947, -0.68667215975025597),
+    (0.79748452191169794, -0.60333940473938108),
+    (-0.90193391680885215, 0.43187406695684144),
+    (0.96962978008618594, 0.24457736929244819),
+    (0.22712869832480179, -0.97386475159401953),
+    (-0.020183167961379565, -0.99979629911849688),
+    (0.42951515234079651, 0.90305965135735222),
+    (0.67399435693842547, -0.73873649349085113),
+    (-0.27249296969184172, 0.9621577736881417),
+    (-0.8271626278703792, 0.56196262069159797),
+    (0.68886569645930273, 0.72488899304765264),
+    (-0.9955592718090599, -0.094136795754977992),
+    (0.27624333832978648, 0.96108772649972751),
+    (0.57276916769815212, -0.81971670748763326),
+    (-0.48064909554928131, 0.87691302131263738),
+    (0.66024643190748056, 0.75104903245623089),
+    (0.9733811019113271, -0.22919256192531703),
+    (0.98166378927040299, 0.19062057820517145),
+    (0.94528446597266724, 0.32624726572152191),
+    (-0.97854705220193139, -0.20602346135066871),
+    (-0.73243934045282244, -0.68083229400274092),
+    (-0.031566138897729301, -0.99950166526879258),
+    (0.64038561351673162, 0.76805355672687259),
+    (0.1276176316564247, -0.99182344199479622),
+    (-0.96722071055394654, 0.2539371912019171),
+    (-0.0077820632898418941, -0.9999697192870155),
+    (-0.57460788198340462, -0.81842884966412666),
+    (0.52635051095732477, 0.85026768703447908),
+    (0.13298170580531637, 0.99111849237167826),
+    (-0.83638317121922467, -0.54814522792894294),
+    (-0.98005444149998777, 0.19872919185702639),
+    (0.93868809023857347, -0.34476755828276529),
+    (0.040718170210572183, -0.99917067141440019),
+    (0.6958432645539544, 0.7181936724692688),
+    (0.99930397217439937, 0.037303769199199303),
+    (0.8978910705357549, 0.44021770233846325),
+    (-0.75241089408230366, 0.65869404617490523),
+    (0.4966788188108604, 0.86793441626925294),
+    (-0.17079620697585635, -0.98530637655637865),
+    (-0.98470126808042835, -0.17425100470527183),
+    (0.96860236040329439, 0.24861509894044378),
+    (-0.0036563473746818818, 0.99999331553959681),
+    (-0.34067670094994507, 0.94018050683358767),
+    (-0.96344003254846555, 0.26792406327728713),
+    (-0.93743576532821205, 0.34815827705730262),
+    (-0.98682960824928589, -0.16176317344365063),
+    (0.98503086171589849, -0.17237807710737016),
+    (-0.99145467162468748, 0.13045165431524133),
+    (0.71695497426228039, 0.69711947676174757),
+    (-0.84481957278223108, 0.53505129608669166),
+    (-0.42890101658504248, 0.90335149193008868),
+    (-0.33767673245333918, 0.94126214433580391),
+    (0.5771679700351503, 0.81662545537443543),
+    (0.27102084870493681, 0.96257347749003341),
+    (-0.98483707073114979, -0.17348182646516125),
+    (-0.62783239364917398, 0.77834856297467947),
+    (0.82692602482352806, 0.56231072323899156),
+    (-0.96151582676256453, -0.27474954938107199),
+    (0.12114638348433598, -0.99263465271401141),
+    (-0.88762069710878955, 0.46057518177177786),
+    (-0.85708814603483452, -0.51516978747454756),
+    (-0.94228603119706456, -0.33480895360023522),
+    (0.30518556266742197, 0.95229290259844379),
+    (0.19975507980440296, 0.97984585935357016),
+    (0.58904267358478712, -0.80810192964507022),
+    (-0.13235673835847522, -0.99120214578616916),
+    (-0.41767751950037835, 0.90859533880821264),
+    (-0.99750423652201803, -0.070606643601193161),
+    (0.26114141106808025, -0.96530055600593756),
+    (-0.45044556041179001, -0.89280389621982958),
+    (0.98654582821219061, -0.16348494987956186),
+    (0.84729271412304841, -0.53112621531421156),
+    (0.44635640708891311, -0.89485527201367965),
+    (-0.80188574056180095, -0.59747741303220159),
+    (-0.27710569292417236, 0.96083944285661693),
+    (-0.13644319470886471, -0.99064789638783313),
+    (0.16825165009127063, -0.9857440754280824),
+    (0.5342499650218846, -0.84532654925426021),
+    (0.79212210390377613, -0.61036265654695421),
+    (-0.54122893398429639, -0.84087528267765255),
+    (0.096189993369554305, -0.99536299166463127),
+    (-0.70329307836263422, 0.71090002526882057),
+    (-0.46401940336914049, 0.8858250353749022),
+    (0.70066157739907242, -0.71349376588491897),
+    (0.45827004909555918, 0.88881300738791724),
+    (0.35213764650248736, 0.93594822395028321),
+    (-0.35492754283666567, -0.93489381179678732),
+    (-0.3218461123258593, 0.94679199404131564),
+    (0.56854390890850992, 0.8226529180906319),
+    (-0.96555536912729678, -0.26019767322066817),
+    (0.7729156797255986, -0.6345087485876898),
+    (0.4923869327468251, 0.87037641768385099),
+    (-0.00012261976563711856, -0.99999999248219651),
+    (-0.93156409092375636, -0.36357715068661212),
+    (-0.95933139783312016, 0.28228225082628078),
+    (0.70646413985165535, 0.70774883899845475),
+    (0.83477625809587397, 0.55058931965617619),
+    (0.84766384036806364, 0.53053370649984699),
+    (0.037311689716676942, 0.99930367647201523),
+    (-0.62708833888994508, 0.77894814668773016),
+    (0.91209131848606018, -0.40998710558060242),
+    (0.93820982363682615, 0.34606693981274161),
+    (-0.24473067021871406, -0.9695910988939096),
+    (0.92889420990913085, -0.37034517250437021),
+    (-0.26414865722797526, 0.96448197851730644),
+    (0.92374414921653258, 0.38301011316703382),
+    (-0.90487462839854438, 0.42567817289660964),
+    (0.84901311007186331, 0.52837178097065551),
+    (-0.15447173827497021, 0.98799720752353792),
+    (-0.8723117439963185, -0.48895012147058653),
+    (0.74567316520669902, 0.66631188694981502),
+    (0.15517475886794554, -0.98788703514636478),
+    (-0.79575716032276833, -0.605615836809973),
+    (0.31687862046497201, -0.94846609844117047),
+    (-0.179750187133255, -0.98371229037028896),
+    (0.90408145479782009, 0.42736017958000888),
+    (0.46500352779865278, 0.88530882698344726),
+    (0.17969783205628759, 0.98372185558432645),
+    (-0.99935636284777873, -0.035872831441901475),
+    (-0.42154807323972321, 0.90680605531054814),
+    (-0.64431706517756282, 0.76475847136267294),
+    (0.64087106221044576, -0.76764854042801034),
+    (-0.74135633178786631, -0.67111160719960683),
+    (0.95898457081271726, 0.28345827372498528),
+    (0.99760266338483361, -0.069202066497224574),
+    (0.11057274834478245, -0.99386803315303451),
+    (-0.38005956047919864, 0.9249620157002979),
+    (0.028985662450256085, -0.99957982741365881),
+    (-0.59511831042558461, 0.8036381005130343),
+    (0.43151623604181566, 0.90210517016160796),
+    (0.67483210351469725, 0.73797129487936652),
+    (0.99460291383193988, -0.10375472903446299),
+    (-0.50323902771983253, 0.86414725653652202),
+    (-0.74645404378639935, 0.66543696960338172),
+    (0.54589803172131068, -0.83785162108979594),
+    (0.30312870768546718, -0.95294962436476072),
+    (0.83528938744137415, 0.54981054848721633),
+    (0.95789452377338435, 0.28712032551695371),
+    (0.76546043556298859, 0.64348296138104533),
+    (0.97203817633819323, 0.23482287738020671),
+    (-0.12352422738503878, 0.99234155674794222),
+    (0.98465601003826186, 0.17450656691233807),
+    (0.61137674792361985, -0.791339669230817),
+    (-0.99573115842040849, 0.092300921722111795),
+    (0.82065771681618682, 0.57142008350253426),
+    (-0.069704099762815497, 0.99756771122378218),
+    (-0.99212338421681323, -0.12526448215746372),
+    (-0.90715080134021897, 0.42080568393000439),
+    (-0.763667851440892, -0.64560933440870538),
+    (0.8575933795643137, -0.51432829528177704),
+    (-0.89753649546847447, -0.44094017655705769),
+    (-0.98663065602266664, -0.16297223259280225),
+    (-0.24556069746291848, -0.96938121699439028),
+    (0.9977681506229058, 0.066773629544504082),
+    (0.91472097800864494, -0.40408604577603074),
+    (0.25377005135859626, 0.96726457654224851),
+    (0.98176490578945053, 0.19009910510107991),
+    (0.9952637671718878, -0.097211284092034139),
+    (0.89224593685304399, 0.45154976267210428),
+    (0.77771604809396377, 0.62861573996926545),
+    (0.86936686999961199, -0.49416722407205232),
+    (-0.024995268458229518, -0.99968756947093274),
+    (0.71219971154808204, -0.70197690194965012),
+    (-0.56565648370241994, 0.82464097790821311),
+    (-0.36823993435079694, 0.92973079477304654),
+    (0.97995430002469219, -0.19922241305414332),
+    (-0.9977653888746405, -0.066814884298616747),
+    (-0.022256753711943394, -0.99975228777643022),
+    (0.78876491057950571, -0.61469497788619054),
+    (-0.32725462847011155, 0.94493619263148609),
+    (-0.58753588255615441, 0.80919811338692627),
+    (0.29729403013665406, -0.95478597583181246),
+    (-0.17683353577354446, -0.98424077370622398),
+    (-0.46766155733454612, 0.88390761270136553),
+    (0.33762178122132697, 0.9412818562178592),
+    (-0.18354453593493666, 0.98301139531972315),
+    (0.9705633853232295, -0.24084583257742326),
+    (0.84875784424163858, -0.52878173364658343),
+    (-0.96541479827928267, 0.26071875126920191),
+    (0.61685659910727708, -0.78707555935742535),
+    (0.70229231627492661, 0.71188868687541196),
+    (-0.86303235394763012, -0.50514864746885413),
+    (-0.58746665216911387, 0.80924837509210568),
+    (0.30912317408457063, 0.95102200986301055),
+    (-0.20162824822990447, 0.97946212255285303),
+    (-0.18487644560833186, -0.98276177167166501),
+    (-0.63414200245340158, -0.77321660660153313),
+    (0.5422144119508181, -0.84024016297296122),
+    (-0.91043595711621739, 0.41365005498594731),
+    (0.09700247291240989, 0.99528414045883262),
+    (0.035563503089446467, -0.99936741854435451),
+    (-0.013610888329200942, 0.99990736756906129),
+    (0.94536789314374181, -0.32600543954505229),
+    (0.51661260773900786, -0.85621925552109723),
+)
+
+grads3 = (
+    (0.82789759568688626, -0.5019306895259531, 0.25030212537626212),
+    (-0.24806441290573628, -0.68400003571236312, 0.68600874498450715),
+    (0.85189480135899442, -0.096361500793552574, -0.51477151104381591),
+    (0.23632884144733249, -0.76778726860465596, 0.59552614457197739),
+    (-0.78489756280724687, 0.016898689812071002, 0.61939506793473864),
+    (0.55979994875923866, 0.60255439561032231, 0.56881650617737245),
+    (-0.030478003102772277, 0.48981991627369498, 0.87129073273419932),
+    (-0.11321842516578494, -0.11267927990738424, -0.9871600519077609),
+    (0.13586056419322731, 0.77576527413347529, -0.61622248136992852),
+    (0.27201378026196404, 0.25952765016719137, 0.92663579800604068),
+    (0.53167886346435811, -0.59357295334719218, -0.60414297579293286),
+    (0.091567676628785594, 0.58995220955373484, -0.80222923845960159),
+    (-0.46711240571671314, 0.28220810747212294, 0.83795261471192251),
+    (0.93924872897056322, -0.32946808566581848, -0.096242431675859386),
+    (0.099179460495193175, -0.55380762549441021, 0.82671672812404462),
+    (-0.4778159083138363, -0.13410087035644205, -0.86816410564585555),
+    (0.68389083353724878, -0.16689970817680161, 0.7102378581955664),
+    (0.062214350994452827, 0.79598533755672252, -0.60211021991413616),
+    (0.85489428256499111, -0.22604684800651889, 0.46696743799113766),
+    (0.69944364552352511, 0.0050337173644881446, -0.71467002765350085),
+    (0.69315502540021556, 0.35376719792574224, -0.62800070098224814),
+    (-0.7990553671615076, 0.58601653028749889, -0.13451820114835542),
+    (-0.13587483541250939, 0.68415604949508102, -0.71656718389897511),
+    (0.10477329227286308, 0.83261217986736169, -0.5438561530063124),
+    (-0.11056188859706764, 0.37865694338928813, -0.91890967347880881),
+    (-0.96669258190844787, 0.18027319782011439, 0.18167835928059442),
+    (0.012958590905829494, 0.93709301939026213, 0.34883914334801552),
+    (-0.95347718859505415, -0.20713824311026463, 0.2190319590152642),
+    (0.62179258310850316, -0.66070862443133538, 0.42052122085967059),
+    (0.3108052656929054, -0.94839062796241103, 0.062891204556967298),
+    (-0.8147082795171946, 0.19216511727695645, -0.54710418293782603),
+    (-0.20856139367463533, -0.97618366704740467, -0.059729333316012594),
+    (0.32233436062872145, -0.94650967728496371, -0.014832085624999596),
+    (0.32657360828961612, 0.21070346621859423, -0.92138685018409594),
+    (-0.46856819603419009, 0.48122488262361895, -0.7408552206802278),
+    (-0.98913254889909052, -0.02405164702457124, -0.14504592025904689),
+    (0.80554400065564591, 0.58109428221912685, 0.11588053408547332),
+    (-0.67624338132057049, 0.73431285449481465, 0.058987464293684212),
+    (-0.066324457433390285, -0.17194003232552821, -0.98287216443953829),
+    (0.6586017204783956, 0.6078835018762534, -0.44353288708906419),
+    (-0.40291665866466098, 0.90942640632039695, 0.10296493411678163),
+    (0.87510387114206045, -0.38699093205214286, 0.290570530545673),
+    (-0.3490947236865925, -0.37253801521851593, 0.85985365098441635),
+    (-0.76048018002959772, -0.18901402427521818, -0.62124358701674953),
+    (-0.98556732769485189, 0.15772261360663525, -0.061486744404955995),
+    (0.027785641428761464, -0.62938305784001458, 0.77659830326517265),
+    (-0.72217843842221363, 0.6802973155605756, -0.12511540879974675),
+    (-0.54283494788252751, 0.72623368057614945, 0.42179955020624788),
+    (-0.028490878979377809, 0.26995550299345272, 0.96245119160325965),
+    (-0.47527230751490673, -0.47414751755489687, -0.74114800499359412),
+    (0.43011524738943291, 0.27526808179013723, -0.85978390140238459),
+    (-0.68294269354209725, 0.0397003622092739, -0.72939232144156629),
+    (0.87849865997193977, 0.030549176653045112, -0.47676708384003075),
+    (0.61111375064431239, -0.54414472470520947, 0.57484476369619397),
+    (0.57606752024626962, -0.1811842064649791, -0.7970686892890535),
+    (-0.93123167613493596, 0.34870939875650686, -0.10587407889466151),
+    (-0.50592105107331409, -0.03147459236285606, 0.86200535967966296),
+    (0.60994111288381825, -0.72038047261485427, -0.33018754290440561),
+    (-0.64301751958527353, -0.18112616695884493, -0.7441248424486302),
+    (0.33646352888554271, -0.49175834590193296, 0.80309776675426159),
+    (0.54280420642265614, -0.82809083018759855, 0.14010414144158759),
+    (0.41978761048769703, 0.60860400587398422, -0.6733346316024218),
+    (-0.11657588982652085, 0.83272839689170908, -0.54127024573804094),
+    (0.75636716769625667, 0.6428101522552403, -0.12125929155630805),
+    (-0.19158801003407908, 0.56736513335483052, -0.80086880315344844),
+    (0.0096789700325246551, -0.47481707262836076, 0.88003128642096762),
+    (0.96192564024115712, 0.12733900472666068, 0.24183432453203083),
+    (0.59077367779705037, 0.50650645277130202, -0.62804273335751559),
+    (-0.51681996528162411, -0.84614906171658266, 0.13011106348980303),
+    (0.29430287721773563, 0.047424125933310163, -0.95453484417323597),
+    (0.83056139631689363, -0.54882181731765833, -0.094669846225049967),
+    (-0.51726666485611872, 0.26461324188618685, 0.81388883125836664),
+    (-0.036649810980168097, -0.38764199967016766, 0.92108114270504515),
+    (-0.60372659238128357, -0.33583926531176778, 0.72299805637811743),
+    (0.22582390486067799, -0.4970034653819278, 0.83784910299637494),
+    (-0.92562507408217853, -0.34668106482017919, -0.1517579043262923),
+    (0.85502487457055942, 0.4243280620691291, -0.29812440290297698),
+    (-0.10147559249929464, -0.61564250889122718, 0.78146465394989717),
+    (-0.86351241020384373, -0.48305444797526809, 0.14493004421188083),
+    (0.43125715633903033, -0.8273927176393181, 0.3597757022143056),
+    (-0.38433192945852501, -0.39296380945344322, -0.8353851880770482),
+    (0.55052569585054734, 0.74774718057195, 0.37120831369322849),
+    (-0.087668731804306427, 0.94083923609931286, -0.32731594107205703),
+    (0.68513391772216625, 0.57813233617562199, -0.44311907728599709),
+    (-0.3521603236241384, 0.72909528377628408, 0.58685873397276977),
+    (-0.34122762485216895, 0.29064782199053496, 0.89391697131775383),
+    (0.56453660491521851, 0.81194633073764644, 0.14846406202334336),
+    (0.42192087027813668, 0.15687509088569893, -0.89295743744220168),
+    (-0.12553714984660447, -0.82559756878792023, 0.55011733150289521),
+    (0.46279716317854075, 0.24486924202741772, 0.85197291040432332),
+    (-0.82765980242520099, -0.56064907679312725, 0.025531630196512448),
+    (-0.95514460748600838, -0.22958419136692615, 0.18705581483822845),
+    (0.45753860625906839, -0.21379930348339862, 0.86310386490417412),
+    (-0.53835467374666979, 0.057009374330916615, 0.84078783084290309),
+    (0.60221582484954539, 0.47198680802729942, 0.64386687548668242),
+    (-0.20063380962975558, 0.95038976699849576, -0.2377085720330587),
+    (0.60867907273669297, -0.61071401816329496, 0.50649597671772506),
+    (0.11195951863720158, -0.20404541772992141, 0.97253819137859465),
+    (-0.49130281094074035, 0.68387834031502015, 0.5393810931147851),
+    (0.30351222719196275, -0.87082854538696874, 0.38670139964084743),
+    (-0.79775170266594497, 0.084500726788696273, 0.59703588507372629),
+    (0.14983573915805756, 0.6857068749495252, -0.71228879881542062),
+    (-0.066763251598948067, 0.85625391302500475, 0.51222251479733183),
+    (-0.23474911795552203, 0.97125614498617696, -0.039425276735808416),
+    (-0.24662753805954596, 0.96455030970840916, -0.093901850418929705),
+    (0.18081088795551875, -0.22279097340650583, 0.95795177590801428),
+    (0.55725157179266294, -0.32886243372110102, -0.76244356212223419),
+    (-0.84981882749677873, -0.3220402784010713, 0.4172505476561541),
+    (-0.7810217080563473, 0.24701677938900704, -0.5735745829837896),
+    (0.18388757626480887, -0.36519852563414013, 0.91258719921446663),
+    (-0.65250080067178395, 0.44664949528884784, -0.61216577287602281),
+    (-0.50516292904703641, 0.80441649123226866, 0.31260921891426102),
+    (-0.33526137217482777, -0.67214844074701852, 0.66016383264217338),
+    (0.26472560744692952, -0.93264212989141237, -0.24515099492652265),
+    (-0.27709022156013319, 0.42506413899474621, -0.86170846976016857),
+    (0.7745046307332023, -0.41958049768002242, 0.47338650481336159),
+    (-0.4817961233384318, 0.787525988030508, -0.38428545862760771),
+    (-0.66225741680450767, -0.048300956894078526, 0.74771794912957446),
+    (-0.090283857670272583, 0.24042809878093746, -0.9664590805413118),
+    (0.7070136445247015, -0.25840951670390966, 0.6582979782231988),
+    (-0.23373215403549313, -0.00071852375419219708, -0.97230075794146276),
+    (-0.51768742358889408, 0.70663754119678335, -0.48235165266562258),
+    (0.08353324995337566, 0.68997656208175939, -0.71899550758684361),
+    (-0.27205725093737343, 0.83616962257909577, -0.47624071065830959),
+    (0.33408526031633595, -0.010846742316789719, -0.94248044383980678),
+    (0.78336685656666538, 0.49110144027134234, -0.3809931015074613),
+    (0.50311733494953015, 0.76237248703310778, 0.40701491162884462),
+    (0.42655205050778677, -0.90359764893612637, -0.039555493230488951),
+    (0.88020516032544305, 0.40209622339922046, -0.25210613412716742),
+    (-0.16552599604920848, 0.96252335386691645, -0.21482536603646291),
+    (0.33610848576554331, 0.79876205788937527, -0.499009279144911),
+    (0.29987131691314822, 0.95282660790548135, 0.04688974898747459),
+    (0.17002900714498842, 0.44764684556832129, 0.8778965989124351),
+    (0.17546951658533261, -0.72816008811565325, 0.66256572113618561),
+    (-0.65603185955978971, 0.4277216975714177, -0.62183305530435518),
+    (0.62015117996097624, 0.77995476652401974, 0.084161013358150669),
+    (0.46461921008829021, 0.32580496232057643, 0.82339547979341077),
+    (-0.94092649727166811, -0.30545110350394133, -0.14614017278043098),
+    (0.85436930139192124, 0.46648823832469927, -0.22900179113666175),
+    (-0.20457345671091101, 0.17618576720454204, -0.96286461989414462),
+    (-0.94090402072695767, -0.22117849583849941, -0.25647552857624401),
+    (0.50869001559247196, -0.75038469750023695, -0.42208680836293411),
+    (-0.96339447258571442, 0.17759274197149558, -0.2008280562828286),
+    (-0.057508567114342872, -0.86716098003164932, -0.49469647200986244),
+    (-0.45382382688630835, -0.23578477016226687, 0.85933083053605896),
+    (-0.32733888995532973, 0.90223111897273345, 0.28076370684264329),
+    (-0.66249793664357115, -0.4948537184866329, 0.56233111352917597),
+    (0.22380706391289232, 0.69374826343714546, -0.68456098714477986),
+    (-0.64262371792619244, -0.24941760979635319, 0.7244484889087639),
+    (0.55168971912585474, -0.092977337682888628, 0.82885081196089672),
+    (0.59072823599824476, 0.48232746098502277, 0.64683875237507493),
+    (0.266472519230184, -0.84452112023052572, -0.4645174635895804),
+    (-0.94086463117472896, 0.26295569459376844, -0.21360722947772601),
+    (0.53326558836654203, 0.84000206809001055, -0.10012161539143809),
+    (-0.94770437790150719, 0.14013167557668221, 0.28673947340118494),
+    (-0.44859024030246603, -0.0035316664833851463, -0.89373056545987384),
+    (-0.93150107068910137, 0.36366820015386053, -0.0071551032074835107),
+    (0.45782005419173988, -0.38916622235180798, 0.79934376169473909),
+    (0.10632542071802821, 0.91197229734190477, -0.39623406439888847),
+    (-0.98663615070255917, 0.16108134968941096, 0.02453375040784694),
+    (-0.85230283063835466, 0.21733058736814034, -0.47575970897089115),
+    (0.8778131347343161, 0.4763939296019844, -0.04992919312679793),
+    (-0.5479886476836654, -0.56193435508035239, 0.61962748695507042),
+    (0.30732890835224286, -0.7770569427044669, -0.54930087373479175),
+    (-0.18509852343186159, -0.98222453312030034, -0.031201012162313333),
+    (0.27457365593668853, 0.30076076343327462, -0.91331936946754544),
+    (0.97107208176859505, -0.23709203514843094, 0.028396811067130889),
+    (0.20942196574111582, -0.34543406529956616, -0.91477743019586022),
+    (-0.9398107483272542, -0.20825816840211758, 0.27089535363745509),
+    (0.96688101322234521, 0.0073272501441243856, 0.25512235824297402),
+    (0.27008730569745665, 0.69125558476164728, 0.67023769204433858),
+    (-0.66112929858666813, 0.076662956116023681, -0.74634498840003816),
+    (0.32609524013531521, -0.046595346492813168, 0.94418788810612564),
+    (0.97901533935455498, 0.12768872727536121, -0.158822398405527),
+    (0.97153578551210773, -0.17685221215736818, -0.15761190476742862),
+    (0.30195742967442385, 0.20150579848423578, -0.93178169323165272),
+    (-0.83464703220184455, -0.15927555505758428, -0.52725290819278714),
+    (0.73406204393749397, -0.19356549894035097, 0.65091114084050039),
+    (0.063480838427759534, -0.90673458504733706, 0.41689636054005325),
+    (0.067270436323950383, -0.21940275775733128, 0.97331244638361802),
+    (-0.14221651842552149, -0.83087843023960417, -0.53797350868745797),
+    (-0.80327701339430591, -0.56310319653570162, -0.1940639837878205),
+    (-0.34232865343840363, 0.76863992029379336, -0.54037372804920902),
+    (0.47810617891725843, 0.74472479492613253, -0.46561729081228093),
+    (-0.46493351538105332, -0.091222422492182639, 0.88063346286072597),
+    (0.37852516038460049, 0.83734242184242424, 0.39443170706584435),
+    (-0.27693230183756185, -0.91467276503744566, -0.29441846595908872),
+    (0.054394687018387969, 0.62681050437088348, -0.77727074410046504),
+    (0.23629992414743994, -0.95790736288690048, -0.16302094949722848),
+    (-0.66978634825912142, 0.23976615857854386, -0.70277908113873111),
+    (0.048209833947092842, 0.93758538590296658, 0.34439723583672838),
+    (-0.57497138634769729, -0.59498020036025323, 0.56161060002521335),
+    (-0.13346315142892845, -0.88739343452219188, -0.44127143526129964),
+    (0.081313610031855957, 0.23843482081952955, 0.96774838312670208),
+    (0.48334170198669862, -0.64727573860117038, 0.58941913553846426),
+    (-0.94902059198045197, -0.10274459569243807, 0.29799910075882735),
+    (0.59622953791602107, -0.5726963552383052, 0.56260929854847652),
+    (-0.67901924438088512, 0.69459737779530739, -0.23762859365045852),
+    (-0.25645104254234019, -0.67040069213244147, 0.69627277324859582),
+    (0.72230921948373983, 0.66642329780983467, 0.18479550748071558),
+    (-0.95030323177731557, 0.22837979023318805, -0.21158080982602062),
+    (0.022740389478261382, 0.3102647615701925, 0.95037816284580579),
+    (-0.8576744469251496, -0.50475581898831057, 0.098061747328295756),
+    (0.39307515184210368, -0.31996959174122758, -0.86203908575264676),
+    (-0.46746906545897587, -0.35238352685202229, -0.81073949135480106),
+    (0.57310498449730141, 0.70230241156062834, -0.42228189572899466),
+    (0.89187904662965223, 0.16324896829037391, 0.4217837603975656),
+    (-0.47952684175760418, 0.85358532174918089, -0.20358316857816333),
+    (-0.99541551470637868, 0.0052269070417739214, -0.095502002725659382),
+    (-0.59879879738407693, -0.71870395311451452, -0.35341848852168561),
+    (0.58042440661563333, -0.81430411386264601, 0.0040395979082920004),
+    (-0.71702063157753471, -0.38700846063151817, -0.57974638014546997),
+    (-0.030474536274205297, 0.51898788431888254, -0.85423818608692637),
+    (0.40276867402091859, 0.72201162259056018, 0.56256254058689126),
+    (0.49961876583592713, -0.1106016509119445, -0.8591556108413293),
+    (0.15420702345018678, -0.97294624746524061, 0.1720342799035714),
+    (0.59467528947527004, 0.68900499977567964, 0.41428662828001028),
+    (-0.094581797787464825, 0.54281765476949495, -0.83450780535465119),
+    (-0.87494602365101448, 0.48168981087793, -0.049440689656016605),
+    (-0.45856825707270465, 0.3119981391500013, 0.83208912669992163),
+    (0.53834283212500211, 0.7840165185549276, -0.30903898416323211),
+    (-0.60536956681130549, 0.4020411405892782, 0.68694294439375725),
+    (-0.1405324373552001, 0.87186968771921625, -0.4691416435229378),
+    (0.66927925820973999, -0.048727567809871669, -0.74141142334439036),
+    (-0.61597118440714937, -0.48649403843013861, 0.61959910470560575),
+    (-0.28476896696361648, -0.47178246664735723, 0.83446266520354884),
+    (-0.64161163696685319, 0.76483655177565069, -0.057961680243482278),
+    (-0.61822109176942164, -0.74005254202355997, 0.26481109632319288),
+    (0.16547538117916302, 0.52177115763249404, -0.83688276197234313),
+    (0.54161947389664467, -0.73887369504987288, -0.40089151682128366),
+    (0.75204470790032174, 0.30959956735738126, 0.5818735818124432),
+    (0.68405190535779647, 0.43044934780279853, 0.58888568479163561),
+    (0.33403104007693285, -0.58948429268034053, -0.73548047761193547),
+    (-0.25923680126553295, -0.41236098228312851, -0.87335828911169566),
+    (-0.31986769254404118, -0.93762863254170836, -0.13615141095308797),
+    (-0.60107377400477247, -0.45932396899052474, 0.65401208682596323),
+    (0.36547659260026888, -0.30989465345144396, 0.87771986648560407),
+    (0.68812419460625518, 0.26855599973519806, -0.67406436473360665),
+    (0.16861419587582227, -0.97614428420052246, -0.13679031168836311),
+    (-0.0795809107999048, -0.66148891270113586, 0.74572065615063021),
+    (-0.65177735296079031, -0.34665230476529113, 0.67455056279595293),
+    (-0.05889953185914408, 0.99129747199808216, -0.11772921114568541),
+    (-0.17852723678983162, 0.34009511379383778, -0.92328941253419772),
+    (-0.36574650347261217, 0.76235174317906784, 0.53390009821069984),
+    (-0.64309567628437869, 0.44573273111349176, 0.62269598004037674),
+    (-0.63735431799352793, 0.5814093553260693, 0.50571003042685403),
+    (-0.0053098293234882521, -0.92683967415151947, 0.37541979720209334),
+    (-0.2165064684713677, -0.94206948200508511, -0.25618360639339743),
+    (-0.37403891994633615, 0.81614738449795554, -0.44045241870436436),
+    (0.80880781082563202, -0.56565276798113806, 0.16083181035704802),
+    (-0.91769497873263406, -0.20135338793230428, -0.34248027560298044),
+    (-0.42133957547918638, 0.050692145042238464, -0.90548510123912906),
+    (0.39438528275348184, -0.39446760981878992, -0.82997322459902712),
+    (-0.8610287650583105, 0.053928213719023996, 0.50568885048736822),
+    (-0.66681537166990135, -0.13997439917070162, 0.73195930739456561),
+    (-0.72366492690252915, -0.011501538720493937, -0.69005564136395425),
+)
+
+grads4 = (
+    (-0.69918998827596002, -0.62891499137565066, 0.30513385594257875, -0.14997541090205971),
+    (0.39646174201336426, -0.2558398830180777, 0.33632670380905855, -0.81501434937181239),
+    (0.36450922641591932, 0.35072505006792554, -0.74818256932222327, -0.42935743393461345),
+    (-0.048066875314471805, 0.70423434779442851, 0.081514597266102079, -0.70363266646497025),
+    (-0.52203668931852132, 0.53320033401076516, 0.63511352106575258, -0.19951419542385418),
+    (-0.50452720436661391, -0.045320300010607752, 0.83171247889881539, 0.22727235402693596),
+    (-0.66187512985526287, -0.11273154201803609, -0.70712183571435572, 0.22179184243176014),
+    (-0.097347265923124968, -0.48907477358909635, 0.86672779383819876, -0.010597501801608396),
+    (0.6992998566492058, 0.58787173019465955, -0.26886563393399815, 0.30511933766578464),
+    (-0.47768739527476778, -0.068169389836607433, -0.80198837606007023, -0.35211124854148595),
+    (-0.78657378269462352, -0.426675567840271, -0.38621219963436676, 0.22380746421698597),
+    (0.56482143652492511, 0.1826267270701265, -0.77535364063192125, 0.21552483699193278),
+    (-0.49873086057995147, -0.36039869694867449, -0.78668381047893743, 0.050088823835439403),
+    (0.4465614190196166, -0.78103244479724887, -0.30004625743982249, -0.31708589153977595),
+    (0.9381907028262596, -0.086771127646232238, 0.33087344980101779, -0.052836888195121577),
+    (-0.65978165561833657, -0.63211430280040726, 0.21896030309371561, -0.34230988997367567),
+    (0.54452056427324258, 0.83798869309366364, -0.030477058073443319, -0.018532519038464933),
+    (-0.33689516841904943, 0.52836395094120314, -0.60531089283175599, -0.49084814745593647),
+    (-0.031933460004959627, -0.2057179093408612, 0.56891375017334633, 0.79561142574263988),
+    (-0.45631289542184073, 0.58416253445994182, 0.06831771541757406, -0.66773150634457634),
+    (-0.5486626611422919, 0.47575347961959497, -0.22175808506520317, 0.65073132904933995),
+    (-0.77309271795261902, 0.37240319264821575, -0.26966730369341452, -0.43694743033089445),
+    (-0.17511935368985659, 0.93648142025739012, 0.29906277720673358, 0.053825800183036308),
+    (-0.3846239257856558, -0.1419561326315896, -0.90166137685742631, -0.1375487317465458),
+    (0.035498579558198733, 0.92703838843723507, 0.33923930638249067, 0.15574456721879848),
+    (-0.43050768543025331, 0.60616400208639176, 0.62956659768746381, 0.22555317429893521),
+    (-0.34888341344594626, -0.098037876466055135, 0.34437180473923956, 0.86606985786423174),
+    (-0.25854515077603196, 0.36481404696332564, 0.10722375965685749, 0.88801361561267034),
+    (-0.52180293551682033, -0.40120468791064456, -0.71642529488945483, 0.23128184478490546),
+    (0.63117169242401872, 0.3421961713370954, 0.227223911430634, 0.65794632689832422),
+    (-0.46940054332255909, -0.77907806699324689, -0.30832037792246947, -0.27863782947815613),
+    (0.13483591351242749, -0.33215824922318193, 0.89320443904015911, 0.27143324037268241),
+    (-0.20333385743627611, 0.67660628517830235, 0.37362930366214181, 0.60104943284412526),
+    (-0.20617239254703765, -0.9073052408192861, 0.027940690447316719, 0.3653894666662062),
+    (0.81868780255488927, -0.32691752599232032, 0.10276003096015003, 0.4607771578366015),
+    (0.45762098436869908, 0.37427429720206934, -0.67847194690036672, 0.43609357068013038),
+    (0.047429294984896085, 0.69082292124153011, 0.32676246650391, -0.64322658834102597),
+    (-0.65398834549797757, 0.59806213970896982, -0.43888633412248884, 0.14832298109217501),
+    (-0.32443921141787796, -0.24330255304377865, -0.40829252226610663, 0.81782655987593456),
+    (-0.017000615694705283, -0.59517561687332377, -0.35875579816492009, -0.7188680278246562),
+    (0.30471236913187755, 0.42882293634940422, -0.0521960616591743, 0.84884441006935119),
+    (0.21639716327979563, 0.32281138478197641, -0.57572845316128207, -0.71937599751459425),
+    (0.3159802371449264, -0.78226455320430743, -0.12509171970704169, 0.52208305871253469),
+    (0.33311275714399474, -0.67990293803934565, -0.41225656915481157, -0.50676661991699468),
+    (-0.5884495211606513, -0.11152733979891823, -0.56246710940868161, -0.57001716145798553),
+    (0.23791768366427868, 0.47552627174977452, 0.73199896338356985, 0.42596649901249617),
+    (-0.67366165132803801, 0.035632544961755032, -0.042859235516243384, 0.73693513093113727),
+    (-0.72976780773318295, 0.6347952528526225, 0.23912106332291172, 0.085411069700592604),
+    (0.037104778869627535, -0.94116576905482063, -0.25807494929968522, -0.21500593268198251),
+    (0.21801580921120947, -0.28328477119234646, 0.91604101499733748, -0.18190025889791667),
+    (-0.28190541937972158, 0.17080800128095511, -0.58939010797724101, -0.73754543035756415),
+    (0.47383818114691711, 0.74606194044359209, 0.38114515768497659, -0.27128827450189891),
+    (-0.45766682145352455, -0.016531817910843852, 0.39165745015710457, -0.79804274401414477),
+    (-0.65063858284405041, -0.55864087859227063, 0.23362247914639372, -0.45826885178662824),
+    (0.76538236259896619, 0.58776282239492861, -0.23924786880448312, 0.10716884297819508),
+    (-0.017553911174113434, -0.10728697345911352, 0.72282579968880911, -0.68242525512521024),
+    (-0.64682013608099753, -0.76250234931676164, -0.014248283779450756, 0.0032962487647987897),
+    (-0.90308582011123029, -0.0021535710713948245, 0.4267306357287618, -0.048294183668368108),
+    (0.74483006162254706, -0.010099330220556804, -0.20282772282882758, 0.63559979364732422),
+    (0.89608512360332204, 0.44012285419400843, 0.035590541860675631, 0.045350168720767844),
+    (0.83092161602171166, 0.16153048654365293, -0.20009728158172249, 0.49339461676070506),
+    (0.44019626322034494, -0.81902268740445827, -0.23148028075877519, -0.28608734152957938),
+    (0.44643118966898676, -0.042693975224867002, -0.34380338941805544, 0.82503069445620536),
+    (-0.31601221296901066, 0.61569789492993332, -0.72172027194862653, 0.013123737717501615),
+    (-0.94843793136360144, 0.2642542825143589, 0.14424284389439854, 0.099142153036990713),
+    (0.32327409673155183, 0.77375991668629718, -0.42809165320475578, -0.33693765917218738),
+    (0.83051627712140608, 0.46673835074837489, 0.29108128050373872, -0.0875769005925119),
+    (-0.39612697451167117, -0.36117625461228248, -0.84417708765514821, 0.00042171856251001027),
+    (-0.77918753027609178, -0.42365283740201148, -0.45518044735841517, -0.078713571676441732),
+    (0.70400322308784968, 0.20727333958727476, -0.59931819714858159, 0.31974196337802102),
+    (0.65575137464669686, -0.64431199233066183, 0.36626215520793826, 0.14388962732002775),
+    (0.77545924382682219, -0.29991651191148666, -0.53577910228710468, 0.14715230408934976),
+    (0.44552966870535271, 0.14321517810115297, 0.042395284615315124, -0.8827204353061846),
+    (0.82278334606860337, 0.034426122978217767, -0.47764212474751344, -0.30610522399253842),
+    (-0.21741999311202778, -0.16861147854226879, 0.90171414573832465, -0.33348210637807724),
+    (-0.021582579676193966, 0.17641086371640874, 0.95280423420448168, 0.24612494936385962),
+    (0.65284071520879938, 0.21773564390481845, -0.6986056819827583, -0.19580676964911806),
+    (-0.56667798931484981, 0.75416197446330546, -0.23803991454126328, 0.23119855489357105),
+    (-0.34169451502808196, 0.67506252714951076, 0.63751155551640015, -0.14530815332010732),
+    (-0.17011015600521887, -0.78776408399547071, 0.51195260424423572, -0.2973126532763144),
+    (-0.21421619927052898, -0.25195280364977019, -0.1784470499426612, 0.92670807435236624),
+    (0.72869890429489093, -0.026995091897277716, 0.66694616550484354, 0.15314040685354322),
+    (0.64581489315909457, -0.53162316979043778, -0.25740880997912979, 0.48377746295275359),
+    (0.075840416264583418, 0.067483312156377886, 0.18209025656372432, 0.97802728607425704),
+    (0.4655784395646167, 0.8010651637558901, -0.23171044506964095, -0.29638081866908034),
+    (-0.28720418056615304, 0.66111779574137663, 0.6792823614245489, -0.13788579432587109),
+    (-0.71367330453768174, 0.31402003817970708, 0.57757664762923955, 0.24179959910068094),
+    (0.11912254124531882, -0.67534657233913831, -0.17513290316074173, -0.70643137927722655),
+    (0.70122441319767637, 0.67427274132205961, -0.057055188525982875, -0.22446669710198466),
+    (0.23721265036614816, -0.96098765603709535, -0.083356813321082746, 0.11525851432128992),
+    (-0.27494692828847256, 0.35670089311079051, 0.35163716298265496, 0.82068262141232629),
+    (0.39409851022222475, -0.7690390483777132, -0.022383553893967758, 0.50275668352196012),
+    (0.20476326156387331, -0.47922470008404772, -0.77511059819943096, 0.35723837154202742),
+    (-0.43279524127456287, -0.14014799246550178, 0.36839069413687425, -0.81076205869005402),
+    (0.80827919432667961, -0.57235238789591791, 0.050134566987730375, -0.12877893182274477),
+    (-0.70302818298089442, 0.13447143863219449, 0.65694738840207789, -0.2368310262580885),
+    (-0.45347653570053165, 0.43415299131635582, 0.11128592725894192, 0.77038020100092286),
+    (0.12901368885379327, -0.54498931323271604, 0.82634106860715373, 0.059182386599870469),
+    (0.43917066824117851, 0.58713322781660848, -0.022502656374789577, 0.67963028729326447),
+    (0.51321880079328908, 0.2369229765281575, 0.336880390311388, -0.75298444096075656),
+    (-0.65632245998526995, 0.047435678966529359, -0.27743272470102281, 0.70001554850219894),
+    (0.53573498868825098, 0.31442056120056239, -0.23853820089555303, 0.74647656313044142),
+    (-0.054925744777719984, 0.7709459235378392, -0.50078083048586419, -0.38967179184396822),
+    (-0.27189344574707153, -0.77361464327174578, -0.28912484742250461, -0.4939647360674923),
+    (0.33538383779794262, -0.47645834564513628, -0.7317371220790081, 0.35364658966340101),
+    (0.54848944728738835, -0.28830585792976293, 0.24360244809312484, -0.74612124067124297),
+    (-0.50932188037798243, -0.11013666646277187, 0.78859562358539248, 0.32646298309405619),
+    (0.1835605077822535, 0.76853436698201694, -0.61057348369895903, -0.053483527875308745),
+    (-0.78678940724819957, -0.30393197250941428, 0.43120346927273145, -0.3203924980640524),
+    (0.23876102362244361, -0.1291534996382204, -0.95492582859114317, -0.1201216425940045),
+    (-0.5088118814541428, 0.22005868312286933, -0.70037846723486263, -0.44961611170760835),
+    (0.067050324677217193, 0.13493948236530212, 0.85010452169799933, -0.50459676202714565),
+    (-0.19124301876464028, 0.92870530734057111, -0.079723292537508844, -0.30753334212442929),
+    (-0.80387750453472062, -0.49114725675479781, -0.33092836194963349, 0.055152054745033943),
+    (-0.59353417607043379, 0.24794172034330847, -0.15425295009517051, -0.7499654075599278),
+    (-0.58418569900786144, 0.18084995536953302, -0.52740051603444049, -0.58980425431166572),
+    (0.18226885960046676, -0.63295918833493137, 0.35235949470494826, -0.66481840769762379),
+    (0.6622603862251073, -0.31086372379373589, 0.6810762363438827, -0.030167637522931664),
+    (-0.33414029498791953, 0.89282619466936874, -0.27791165959144437, 0.11822334304497489),
+    (-0.71491761201741799, 0.39730036194909668, 0.12305362610706184, 0.5620525202544091),
+    (-0.24482938464344917, 0.48740198377966443, 0.36483973393159425, -0.75457925174727758),
+    (-0.2374932239041456, -0.71923246044652089, 0.15637619944338416, -0.63391491596846183),
+    (-0.1768193224044485, 0.3460333350723323, -0.71777267977719961, 0.57775274850805181),
+    (-0.75738854788820742, -0.18891437527720911, -0.43650492937004182, 0.44736717914602203),
+    (0.30346175218502885, -0.24782463375984673, 0.84283045875723794, 0.36895898641129954),
+    (0.60747118005634704, -0.34154812447676469, 0.36333046681026315, -0.61831595156100383),
+    (-0.88258493683705608, -0.45810106916030163, -0.082962645801482063, 0.065608224363536277),
+    (0.84748721821631268, -0.10478587607608733, -0.51057672950347444, 0.10048252795625159),
+    (0.11372897415922287, 0.52479120836285653, -0.35069543153289384, -0.76725003901186017),
+    (-0.31486166984307651, 0.16273929425127059, 0.86901163947783167, 0.34524892675036534),
+    (-0.19220727433834148, 0.58779391456565921, -0.45659862499591497, -0.6395876588418854),
+    (0.066414079886258512, 0.87741962249306948, -0.46092405744736653, -0.11520846029366932),
+    (0.77169442037751212, 0.30638878410645271, -0.1673681205698235, 0.53160280919960357),
+    (-0.3199233035287789, 0.62189703728442036, -0.0018297732850826164, 0.71476556073010256),
+    (0.22736875296621262, 0.2627489868736762, 0.65792306853689542, 0.66813445949033479),
+    (-0.15205866876363611, -0.047157597634204539, 0.14544992700477888, 0.97647255003584488),
+    (0.2517212241212583, -0.81131617889990426, -0.52271786867177461, -0.071892370620193088),
+    (0.00066962626042670558, 0.24270793637882576, 0.53910107283311481, 0.80651251849527283),
+    (-0.92043922130114642, 0.14750696513112477, -0.028724864858016886, 0.3608437574175738),
+    (0.36119996600317678, -0.23652826446613234, 0.64730408681909635, 0.62816111297599375),
+    (-0.14047006911071441, -0.97981938752828746, 0.14156583554952853, -0.013462604238658981),
+    (0.134048885678792, 0.85150818136572937, 0.023361533867974807, 0.5063782697261382),
+    (-0.30854519576266254, 0.73123707535422477, -0.37066636625343136, -0.48238848113077593),
+    (0.0042259580316234991, 0.9565461722523726, 0.030475611623444806, 0.28995309745582359),
+    (0.42185526266753631, -0.36385438339103526, -0.044175377439328485, 0.8292747801994983),
+    (0.46696227687973429, -0.22802299852506849, -0.85100870599693446, 0.075735899231172937),
+    (0.56905420178346355, 0.0087975865298314613, 0.79045464976310431, -0.22645389060849336),
+    (-0.45112527784235967, -0.51184687417821295, -0.55440485462956857, 0.47658579316720445),
+    (0.66297598401786084, 0.68930327499548805, 0.27397158884700756, -0.10130848039868171),
+    (-0.80425273454467827, -0.23533766180183499, 0.32675458788495332, 0.43706425524307835),
+    (0.11270581645454521, 0.47285912225599214, -0.35094828733730443, -0.80033552279754516),
+    (0.75999421772256037, -0.14618744483291612, 0.21569383850345825, 0.59541094047148702),
+    (0.84158301940619862, 0.37021643754212025, 0.28634400699602686, 0.2696014103787791),
+    (0.25188321963918225, 0.92563938651879829, 0.25226214209076436, 0.12692667748381756),
+    (0.64387085943139422, 0.36453639596394632, 0.16149234094219961, 0.65304192530778826),
+    (-0.67889573506758494, -0.33574637493126225, 0.13921751934116497, -0.63796037097616964),
+    (0.88193339497499257, 0.14638772363727545, 0.42888031987717778, 0.1297142722225669),
+    (-0.19036454865874627, -0.37321941699793137, -0.46753086094019469, 0.77838518707526561),
+    (0.54584424778405427, 0.35836574874399729, 0.28086787728421592, 0.70337847763353756),
+    (0.50258143493497065, 0.18889291729758653, -0.042939303008916518, -0.84254826764442492),
+    (-0.33511152843296438, 0.13617649349712582, -0.013277706245026151, -0.93219092928810487),
+    (0.33313444723314289, 0.17763893480755086, -0.60922829689654034, -0.69735696108065603),
+    (0.58131117006546085, -0.42292374647721542, -0.13769892358891561, -0.68136028257101622),
+    (0.12714305415377725, -0.71558821924764948, 0.64714684927818467, -0.23015016776823363),
+    (-0.036751428353326961, 0.16404487656775066, -0.61242325168928036, 0.77244829715404906),
+    (-0.094433736989411252, -0.034962305612027268, 0.44947663356731693, 0.88759825505771361),
+    (-0.51649450425647159, -0.31081784229634934, 0.58126682615387204, -0.54658446080739198),
+    (0.59121502096714262, 0.61320222978118089, -0.4949232583579728, 0.17175212578170987),
+    (-0.61815465622416654, -0.75760032003893574, -0.13670240843010897, -0.15886795647547083),
+    (0.85242365433563672, 0.33227668616951866, -0.31106384651249541, -0.2573041016970638),
+    (0.22986611199248061, -0.81107649745743315, 0.40504800499840132, 0.35391043990882493),
+    (0.78742485466838275, -0.27801996612016816, 0.44609146845689829, -0.32197732600135848),
+    (-0.076131652245289533, 0.98062500817383791, 0.08123121929438859, 0.16118329281414315),
+    (0.90466133686323591, 0.0080369222844420621, -0.33928268165459807, 0.25770241635320679),
+    (-0.92318186762017329, -0.18358119462124181, -0.26651274284632287, 0.20737440097393006),
+    (0.53341776175312217, -0.37412109943919014, 0.54525483920871831, 0.52744293977659384),
+    (-0.77906688633277466, -0.38963648912919241, 0.13549320198879636, 0.47210145644093859),
+    (-0.36662363307483392, 0.76654393963979794, -0.39897636497529865, 0.3446960406845494),
+    (0.13003099844259486, 0.7247834502648951, -0.61462413872363419, 0.28287463259254447),
+    (0.70497200131795257, -0.63167867379154607, 0.3162632900970842, 0.063040159990927408),
+    (-0.12160326091460408, 0.84637105375363719, -0.33298540951620803, -0.39747880868319951),
+    (0.92301425678475124, -0.20721432131609363, -0.17001334629656006, 0.27604776560343697),
+    (0.46270237655829671, -0.2663113175205043, 0.80833814260964953, -0.24814157267612189),
+    (0.30811235763466094, 0.36137921439112092, -0.79041272040569444, 0.38693613155110868),
+    (0.13727516556818961, -0.39856331588727378, 0.43498748698697293, -0.79566871140690532),
+    (-0.33600230634730338, -0.61949847133110802, -0.41741334267040359, -0.57366383493160289),
+    (-0.40021536733761204, 0.62260315361942398, 0.066701994514406782, -0.66913662041302779),
+    (-0.73087754864883681, -0.26841707387412267, -0.25465383426545113, -0.5735169640279395),
+    (0.42194595275885222, 0.86837340562919407, -0.14831474657755828, -0.21422412864571114),
+    (-0.87174399937976776, -0.28842051195865837, -0.38563595309765769, -0.090337807729290898),
+    (-0.25673621123022627, 0.014417231298059895, -0.69215939109188762, 0.67438419213987677),
+    (0.032574502742823731, 0.4113661196550375, 0.17391878736124597, 0.89413034439829242),
+    (-0.15814652423533745, 0.96824719057462183, 0.19253244998716201, -0.020452640870423908),
+    (0.25989057433673801, -0.84503833354756985, -0.039611376229904509, -0.46561576764456702),
+    (0.29845903909135829, -0.54306788122386485, -0.7781569262530087, -0.10232925530929406),
+    (0.031643908328925961, 0.68874867267155893, 0.59846994970877765, 0.40799221592379614),
+    (0.22357933552502238, -0.39565503940105801, -0.85359975484832551, 0.25463077002910589),
+    (0.2621194864004005, -0.41915635630497533, -0.63333632046310839, -0.59538762919679278),
+    (-0.65921296658603457, -0.57663674442331803, -0.36926621176493551, -0.31075841825200873),
+    (-0.30791720890686147, 0.64933814055527694, 0.26163045229787302, 0.6442798135202078),
+    (-0.010577600437256094, -0.18145653394893874, -0.47379596488657605, 0.86167222556690648),
+    (0.72151566848129201, -0.15653717491512925, -0.26342736444584575, -0.62090037579848489),
+    (0.40395047606085527, -0.80473300856238672, -0.14177527113777846, -0.41125244110418036),
+    (0.062960504118428878, -0.07386215668175132, -0.98818975691266342, 0.11858060998478893),
+    (-0.48052222390059002, -0.64722644963280207, -0.37286883729165621, -0.45952708887520177),
+    (0.013813282697143017, -0.29626272365134471, -0.3420770196275123, -0.8916394475563395),
+    (0.40704511288495687, 0.39686961189117154, 0.057875198102033336, 0.82064562917161377),
+    (-0.49071260767140024, 0.6793356092677878, -0.41338325074986521, -0.35611592867010589),
+    (-0.4758122158214671, 0.83308082103870507, 0.2669269939117524, 0.09126368836387215),
+    (0.22435176011594823, -0.17679244752478276, -0.012518216966307394, 0.95825571351026007),
+    (-0.12183013644530646, 0.78780705835627673, -0.26418837594164046, -0.54288300643422827),
+    (-0.56667901969067902, -0.068373608291913621, 0.22321893168939952, 0.7901729221297058),
+    (0.57078328381363874, -0.033437279859090667, 0.82024592061912371, 0.016882563260077574),
+    (0.36995123604805302, 0.18292883656380363, 0.89577509906191333, 0.16510631605287024),
+    (0.01484544943302412, -0.7674354670156549, 0.20414828957106251, 0.60757377532510792),
+    (-0.47105551063909601, -0.11776397841874765, -0.20141043361776445, -0.85068924321013573),
+    (0.14377911807142219, -0.67892704069547327, 0.13123704433611261, -0.70792829920339562),
+    (0.47494743137452883, -0.76662781147499903, -0.26067197009007648, 0.34461117235682986),
+    (-0.044103873503543299, -0.24119639960245981, 0.25304173099022059, 0.93586806096707176),
+    (0.19252369989139168, -0.96218451643388603, -0.16832207876181191, 0.093825684736752901),
+    (0.068222694457886909, 0.15222237020250254, -0.036509630388872887, 0.98531267162241754),
+    (-0.64481120663517089, -0.21436320962013408, -0.25436233895735838, -0.68816184337639019),
+    (0.093521496703025245, 0.21511613091992157, -0.49157304329805712, 0.83865053685975532),
+    (0.20801460379754469, 0.21781493175956088, 0.059428516102492619, -0.95171152750367793),
+    (-0.67624828650916791, -0.12198345068512161, 0.55287060254246945, -0.47131983789852505),
+    (0.2505867304668995, -0.38847288749928605, 0.1230377442315595, -0.878155350542423),
+    (-0.43286605013313556, 0.37297470769834939, -0.167209470185682, 0.80346614311972864),
+    (-0.84246245544391285, -0.014188152500445835, 0.46439429548726724, -0.27275198590463468),
+    (0.28585191744407418, 0.59994344090288176, 0.61323248518725237, 0.42696893109712686),
+    (-0.98620104293408417, -0.088032760756023093, -0.098241834934394159, 0.10003138416577488),
+    (0.11288349257556173, -0.015638450373857662, 0.96204124013290082, 0.24797057941900708),
+    (0.61981753330993039, 0.71138326300651999, -0.29581468262667149, 0.14917691529949095),
+    (0.43483665250600545, -0.1702477768074793, 0.40220384359762762, -0.78750545923490423),
+    (-0.54831528287502251, -0.67294967431984754, 0.49420898289497278, 0.047397970678201076),
+    (0.69589619188625018, -0.01694193335366035, 0.71746805468152453, 0.026096963884030395),
+    (0.42608966449115948, -0.39192867053550218, 0.80716774587061479, -0.11541119985614814),
+    (-0.32337204897695521, -0.78760034675535118, 0.42364448366661112, -0.30925970185290302),
+    (-0.25903689628339482, -0.31249306973080265, -0.42172336075200978, -0.81080045308948601),
+    (0.65160473868216795, -0.65094354588590586, 0.33988577912924439, -0.1901615674686491),
+    (0.025663345517841031, -0.27915237061982839, 0.71844266176939486, 0.63659680208423031),
+    (-0.41638664981245049, 0.55108624299983378, -0.70893022415346796, 0.14263256260758067),
+    (0.61883686292813889, 0.15298310944409149, 0.0037790439795082672, 0.77046922335202839),
+    (0.17149592172189207, 0.041251231338950256, 0.7393229797499542, -0.64983768462549796),
+    (0.4577228204861683, -0.12933300821350716, -0.87193786282667129, -0.11613421529372338),
+    (-0.6885033374539048, -0.063886736041189426, 0.1554645240615615, 0.70548736418957225),
+    (0.42136801580582151, -0.39546976747132456, 0.13684134872528272, -0.80456640717288652),
+    (0.36138602724222735, 0.16458161254267931, 0.54989903351673064, -0.73479526744821733),
+    (-0.84719927075141366, 0.21444625629622069, 0.075161300208457696, 0.48022596530152595),
+    (-0.86246060146449477, 0.25699450121650164, 0.43319588818054933, 0.049566719978716416),
+    (-0.018752826961582994, -0.0046405225321126701, -0.60253005492845901, 0.79786235024563346),
+    (-0.53231673453748363, -0.14080967230829161, 0.66840834297610952, 0.50004181560716854),
+    (0.57981263742774591, -0.71163118499529621, -0.36740505173353605, -0.14970601184304339),
+    (0.00047305757538615499, 0.8308510988094705, 0.15842013092391774, 0.5334691087042196),
+    (-0.11756644677032607, -0.32572405631874113, 0.88100086875244688, 0.32236538118492147),
+    (-0.9365738560111786, -0.23547463042656552, 0.25454956017910418, -0.050849110852102995),
+    (0.36515378737282944, -0.30789464747212397, -0.79297090020807459, 0.37823372278062467),
+)
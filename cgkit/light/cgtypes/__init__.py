@@ -46,6 +46,7 @@ from vec4 import vec4
 from mat3 import mat3
 from mat4 import mat4
 from quat import quat, slerp, squad
+from arraytypes import vec3array, mat4array, quatarray
 
 # getEpsilon
 def getEpsilon():
@@ -0,0 +1,813 @@
+# ***** BEGIN LICENSE BLOCK *****
+# Version: MPL 1.1/GPL 2.0/LGPL 2.1
+#
+# The contents of this file are subject to the Mozilla Public License Version
+# 1.1 (the "License"); you may not use this file except in compliance with
+# the License. You may obtain a copy of the License at
+# http://www.mozilla.org/MPL/
+#
+# Software distributed under the License is distributed on an "AS IS" basis,
+# WITHOUT WARRANTY OF ANY KIND, either express or implied. See the License
+# for the specific language governing rights and limitations under the
+# License.
+#
+# The Original Code is the Python Computer Graphics Kit.
+#
+# The Initial Developer of the Original Code is Matthias Baas.
+# Portions created by the Initial Developer are Copyright (C) 2004
+# the Initial Developer. All Rights Reserved.
+#
+# Contributor(s):
+#
+# Alternatively, the contents of this file may be used under the terms of
+# either the GNU General Public License Version 2 or later (the "GPL"), or
+# the GNU Lesser General Public License Version 2.1 or later (the "LGPL"),
+# in which case the provisions of the GPL or the LGPL are applicable instead
+# of those above. If you wish to allow use of your version of this file only
+# under the terms of either the GPL or the LGPL, and not to allow others to
+# use your version of this file under the terms of the MPL, indicate your
+# decision by deleting the provisions above and replace them with the notice
+# and other provisions required by the GPL or the LGPL. If you do not delete
+# the provisions above, a recipient may use your version of this file under
+# the terms of any one of the MPL, the GPL or the LGPL.
+#
+# ***** END LICENSE BLOCK *****
+"""Array versions of the vec3, mat4 and quat types.
+
+The types in this module store many vectors, matrices or quaternions in
+one contiguous numpy array (float64) and implement the operations of
+the corresponding scalar types on all elements at once. The underlying
+numpy array is available as the data attribute:
+
+- vec3array: data has the shape (n,3)
+- mat4array: data has the shape (n,4,4) (row-major matrices)
+- quatarray: data has the shape (n,4) (w,x,y,z)
+
+Indexing an array returns an individual vec3/mat4/quat object and
+toList() converts the entire array into a list of scalar objects.
+The types require numpy.
+"""
+
+import numbers
+import vec3 as _vec3_module
+from vec3 import vec3 as _vec3
+from mat3 import mat3 as _mat3
+from mat4 import mat4 as _mat4
+from quat import quat as _quat
+try:
+    import numpy
+    _numpy_available = True
+except ImportError:
+    _numpy_available = False
+
+# The scalar types (the numpy scalars are registered as numbers as well)
+_ScalarTypes = (numbers.Real,)
+
+# vec3array
+class vec3array:
+    """Array of three-dimensional vectors.
+    """
+
+    # Let numpy scalars and arrays call the reflected operators (e.g.
+    # numpy.float64(2)*a calls a.__rmul__() instead of creating an ndarray)
+    __array_priority__ = 100.0
+
+    def __init__(self, arg=0):
+        """Constructor.
+
+        The array can be initialized in the following ways:
+
+        vec3array(n)        -> n null vectors
+        vec3array(seq)      -> seq is a sequence of vec3 or 3-sequences
+        vec3array(a)        -> a is a vec3array or a numpy array of shape (n,3)
+        """
+        if not _numpy_available:
+            raise ImportError("numpy is not available")
+        if isinstance(arg, _ScalarTypes):
+            data = numpy.zeros((int(arg), 3))
+        elif isinstance(arg, vec3array):
+            data = arg.data.copy()
+        elif isinstance(arg, numpy.ndarray):
+            data = numpy.array(arg, dtype=numpy.float64)
+        else:
+            data = numpy.array(map(_vec3Tuple, arg), dtype=numpy.float64)
+        if len(data)==0:
+            data = data.reshape(0, 3)
+        if data.ndim!=2 or data.shape[1]!=3:
+            raise TypeError("vec3array(): Invalid data shape %s"%(data.shape,))
+        self.data = data
+
+    def __repr__(self):
+        return "vec3array(%s)"%repr(self.toList())
+
+    def __str__(self):
+        return "[%s]"%", ".join(map(str, self.toList()))
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return _vec3array(self.data[key])
+        x,y,z = self.data[key]
+        return _vec3(x,y,z)
+
+    def __setitem__(self, key, value):
+        if isinstance(key, slice):
+            value = _asVec3Data(value)
+        else:
+            value = _vec3Tuple(value)
+        self.data[key] = value
+
+    def __iter__(self):
+        for x,y,z in self.data.tolist():
+            yield _vec3(x,y,z)
+
+    def __eq__(self, other):
+        if not isinstance(other, vec3array) or len(other)!=len(self):
+            return False
+        return bool(numpy.all(numpy.abs(self.data-other.data)<=_vec3Epsilon()))
+
+    def __ne__(self, other):
+        return not (self==other)
+
+    def __add__(self, other):
+        return _vec3array(self.data + _asVec3Data(other))
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        return _vec3array(self.data - _asVec3Data(other))
+
+    def __rsub__(self, other):
+        return _vec3array(_asVec3Data(other) - self.data)
+
+    def __neg__(self):
+        return _vec3array(-self.data)
+
+    def __mul__(self, other):
+        """Multiplication.
+
+        vec3array*scalar        -> vec3array
+        vec3array*numpy array   -> vec3array (every vector is multiplied by
+                                   the corresponding scalar)
+        vec3array*vec3(array)   -> numpy array with the dot products
+        vec3array*mat3/mat4     -> vec3array (v*M)
+        """
+        if isinstance(other, _ScalarTypes):
+            return _vec3array(self.data*other)
+        if isinstance(other, numpy.ndarray):
+            return _vec3array(self.data*other.reshape(-1,1))
+        if isinstance(other, _mat4):
+            M = _mat4Data(other)
+            p = numpy.dot(self.data, M[:3,:3]) + M[3,:3]
+            w = numpy.dot(self.data, M[:3,3]) + M[3,3]
+            return _vec3array(p/w.reshape(-1,1))
+        if isinstance(other, _mat3):
+            return _vec3array(numpy.dot(self.data, _mat3Data(other)))
+        if isinstance(other, vec3array) or isinstance(other, _vec3):
+            return numpy.sum(self.data*_asVec3Data(other), axis=-1)
+        raise TypeError("unsupported operand type for *")
+
+    def __rmul__(self, other):
+        """Multiplication with the array as right operand.
+
+        scalar*vec3array        -> vec3array
+        mat3*vec3array          -> vec3array (rotated vectors)
+        mat4*vec3array          -> vec3array (transformed points)
+        """
+        if isinstance(other, _ScalarTypes):
+            return _vec3array(other*self.data)
+        if isinstance(other, numpy.ndarray):
+            return _vec3array(other.reshape(-1,1)*self.data)
+        if isinstance(other, _mat4):
+            M = _mat4Data(other)
+            p = numpy.dot(self.data, M[:3,:3].T) + M[:3,3]
+            w = numpy.dot(self.data, M[3,:3]) + M[3,3]
+            return _vec3array(p/w.reshape(-1,1))
+        if isinstance(other, _mat3):
+            return _vec3array(numpy.dot(self.data, _mat3Data(other).T))
+        if isinstance(other, _vec3):
+            return numpy.dot(self.data, (other.x, other.y, other.z))
+        raise TypeError("unsupported operand type for *")
+
+    def __truediv__(self, other):
+        if isinstance(other, _ScalarTypes):
+            return _vec3array(self.data/float(other))
+        if isinstance(other, numpy.ndarray):
+            return _vec3array(self.data/other.reshape(-1,1))
+        raise TypeError("unsupported operand type for /")
+
+    # For Python <3:
+    __div__ = __truediv__
+
+    def toList(self):
+        """Return a list of vec3 objects.
+        """
+        return map(lambda v: _vec3(v[0],v[1],v[2]), self.data.tolist())
+
+    def cross(self, other):
+        """Cross product.
+
+        \param other A vec3array or a vec3
+        \return vec3array
+        """
+        return _vec3array(numpy.cross(self.data, _asVec3Data(other)))
+
+    def length(self):
+        """Return the lengths of all vectors.
+
+        \return numpy array
+        """
+        return numpy.sqrt(numpy.sum(self.data*self.data, axis=1))
+
+    def normalize(self):
+        """Return the normalized vectors.
+
+        Raises a ZeroDivisionError if any of the vectors is a null vector.
+        """
+        l = self.length()
+        if len(l)>0 and l.min()==0.0:
+            raise ZeroDivisionError("float division by zero")
+        return _vec3array(self.data/l.reshape(-1,1))
+
+# mat4array
+class mat4array:
+    """Array of 4x4 matrices.
+    """
+
+    # See vec3array
+    __array_priority__ = 100.0
+
+    def __init__(self, arg=0):
+        """Constructor.
+
+        The array can be initialized in the following ways:
+
+        mat4array(n)        -> n null matrices
+        mat4array(seq)      -> seq is a sequence of mat4 objects
+        mat4array(a)        -> a is a mat4array or a numpy array of shape (n,4,4)
+        """
+        if not _numpy_available:
+            raise ImportError("numpy is not available")
+        if isinstance(arg, _ScalarTypes):
+            data = numpy.zeros((int(arg), 4, 4))
+        elif isinstance(arg, mat4array):
+            data = arg.data.copy()
+        elif isinstance(arg, numpy.ndarray):
+            data = numpy.array(arg, dtype=numpy.float64)
+        else:
+            data = numpy.array(map(lambda M: M.toList(rowmajor=True), arg), dtype=numpy.float64)
+            data = data.reshape(-1, 4, 4)
+        if len(data)==0:
+            data = data.reshape(0, 4, 4)
+        if data.ndim!=3 or data.shape[1:]!=(4,4):
+            raise TypeError("mat4array(): Invalid data shape %s"%(data.shape,))
+        self.data = data
+
+    def __repr__(self):
+        return "mat4array(%s)"%repr(self.toList())
+
+    def __str__(self):
+        return "\n\n".join(map(str, self.toList()))
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return _mat4array(self.data[key])
+        return _mat4(*self.data[key].ravel().tolist())
+
+    def __setitem__(self, key, value):
+        if isinstance(key, slice):
+            value = _asMat4Data(value)
+        else:
+            value = _mat4Data(value)
+        self.data[key] = value
+
+    def __iter__(self):
+        for m in self.data.reshape(-1, 16).tolist():
+            yield _mat4(*m)
+
+    def __eq__(self, other):
+        if not isinstance(other, mat4array) or len(other)!=len(self):
+            return False
+        return bool(numpy.all(numpy.abs(self.data-other.data)<=_vec3Epsilon()))
+
+    def __ne__(self, other):
+        return not (self==other)
+
+    def __add__(self, other):
+        return _mat4array(self.data + _asMat4Data(other))
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        return _mat4array(self.data - _asMat4Data(other))
+
+    def __rsub__(self, other):
+        return _mat4array(_asMat4Data(other) - self.data)
+
+    def __neg__(self):
+        return _mat4array(-self.data)
+
+    def __mul__(self, other):
+        """Multiplication.
+
+        mat4array*scalar            -> mat4array
+        mat4array*mat4(array)       -> mat4array
+        mat4array*vec3(array)       -> vec3array (transformed points)
+        """
+        if isinstance(other, _ScalarTypes):
+            return _mat4array(self.data*other)
+        if isinstance(other, mat4array) or isinstance(other, _mat4):
+            return _mat4array(numpy.matmul(self.data, _asMat4Data(other)))
+        if isinstance(other, vec3array) or isinstance(other, _vec3):
+            v = _asVec3Data(other)
+            M = self.data
+            p = numpy.einsum("...ij,...j->...i", M[:,:3,:3], v) + M[:,:3,3]
+            w = numpy.einsum("...j,...j->...", M[:,3,:3], v) + M[:,3,3]
+            return _vec3array(p/w.reshape(-1,1))
+        raise TypeError("unsupported operand type for *")
+
+    def __rmul__(self, other):
+        if isinstance(other, _ScalarTypes):
+            return _mat4array(other*self.data)
+        if isinstance(other, _mat4):
+            return _mat4array(numpy.matmul(_mat4Data(other), self.data))
+        raise TypeError("unsupported operand type for *")
+
+    def toList(self):
+        """Return a list of mat4 objects.
+        """
+        return map(lambda m: _mat4(*m), self.data.reshape(-1, 16).tolist())
+
+    def transpose(self):
+        """Return the transposed matrices.
+        """
+        return _mat4array(self.data.transpose((0,2,1)))
+
+    def determinant(self):
+        """Return the determinants of all matrices.
+
+        \return numpy array
+        """
+        return numpy.linalg.det(self.data)
+
+    def inverse(self):
+        """Return the inverse matrices.
+
+        Raises a ZeroDivisionError if any of the matrices is singular.
+        """
+        try:
+            return _mat4array(numpy.linalg.inv(self.data))
+        except numpy.linalg.LinAlgError:
+            raise ZeroDivisionError("matrix is singular")
+
+    def getMat3(self):
+        """Return the upper left 3x3 matrices.
+
+        \return numpy array of shape (n,3,3)
+        """
+        return self.data[:,:3,:3].copy()
+
+    def decompose(self):
+        """Decompose the matrices into a translation, rotation and scaling part.
+
+        This is the array version of mat4.decompose(). Matrices with
+        linearly dependent axes decompose into (0, identity, 0).
+
+        \return Tuple (translation, rotation, scaling) with types
+                (vec3array, mat4array, vec3array)
+        """
+        M = self.data
+        n = len(M)
+        x = M[:,:3,0]
+        y = M[:,:3,1]
+        z = M[:,:3,2]
+        # Make the axes orthogonal (same as mat4.ortho())
+        xl2 = numpy.sum(x*x, axis=1).reshape(-1,1)
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            y = y - (numpy.sum(x*y, axis=1).reshape(-1,1)/xl2)*x
+            z = z - (numpy.sum(x*z, axis=1).reshape(-1,1)/xl2)*x
+            yl2 = numpy.sum(y*y, axis=1).reshape(-1,1)
+            z = z - (numpy.sum(y*z, axis=1).reshape(-1,1)/yl2)*y
+            scale = numpy.sqrt(numpy.concatenate((xl2, yl2, numpy.sum(z*z, axis=1).reshape(-1,1)), axis=1))
+            x = x/scale[:,0:1]
+            y = y/scale[:,1:2]
+            z = z/scale[:,2:3]
+        rot = numpy.zeros((n,4,4))
+        rot[:,:3,0] = x
+        rot[:,:3,1] = y
+        rot[:,:3,2] = z
+        rot[:,3,3] = 1.0
+        neg = numpy.linalg.det(rot[:,:3,:3])<0.0
+        rot[neg,:3,0] = -rot[neg,:3,0]
+        scale[neg,0] = -scale[neg,0]
+        trans = M[:,:3,3].copy()
+        # Degenerate matrices
+        bad = (xl2[:,0]==0.0) | (yl2[:,0]==0.0)
+        if bad.any():
+            trans[bad] = 0.0
+            scale[bad] = 0.0
+            rot[bad] = numpy.identity(4)
+        return _vec3array(trans), _mat4array(rot), _vec3array(scale)
+
+    def translation(t):
+        """Return translation matrices.
+
+        \param t (\c vec3array) Translations
+        """
+        t = _asVec3Data(t).reshape(-1,3)
+        data = numpy.zeros((len(t),4,4))
+        data[:] = numpy.identity(4)
+        data[:,:3,3] = t
+        return _mat4array(data)
+    translation = staticmethod(translation)
+
+    def lookAt(pos, target, up=_vec3(0,0,1)):
+        """Look from pos to target.
+
+        This is the array version of mat4.lookAt(). Any of the arguments
+        may be a vec3array or a single vec3 which is used for all
+        matrices.
+
+        \return mat4array
+        """
+        pos = _asVec3Data(pos)
+        target = _asVec3Data(target)
+        up = _asVec3Data(up)
+        n = max(map(lambda a: len(a.reshape(-1,3)), (pos, target, up)))
+        pos = numpy.broadcast_to(pos, (n,3))
+        dir = numpy.broadcast_to(target, (n,3)) - pos
+        dir = dir/numpy.sqrt(numpy.sum(dir*dir, axis=1)).reshape(-1,1)
+        up = numpy.broadcast_to(up, (n,3))
+        up = up/numpy.sqrt(numpy.sum(up*up, axis=1)).reshape(-1,1)
+        up = up - numpy.sum(up*dir, axis=1).reshape(-1,1)*dir
+        upl = numpy.sqrt(numpy.sum(up*up, axis=1))
+        # Looking along the up direction? then use an arbitrary
+        # direction that is perpendicular to dir
+        bad = upl<=_vec3Epsilon()
+        if bad.any():
+            up[bad] = vec3array(map(lambda d: _vec3(*d).ortho(), dir[bad].tolist())).data
+            upl[bad] = numpy.sqrt(numpy.sum(up[bad]*up[bad], axis=1))
+        up = up/upl.reshape(-1,1)
+        right = numpy.cross(up, dir)
+        right = right/numpy.sqrt(numpy.sum(right*right, axis=1)).reshape(-1,1)
+        data = numpy.zeros((n,4,4))
+        data[:,:3,0] = right
+        data[:,:3,1] = up
+        data[:,:3,2] = dir
+        data[:,:3,3] = pos
+        data[:,3,3] = 1.0
+        return _mat4array(data)
+    lookAt = staticmethod(lookAt)
+
+# quatarray
+class quatarray:
+    """Array of quaternions.
+    """
+
+    # See vec3array
+    __array_priority__ = 100.0
+
+    def __init__(self, arg=0):
+        """Constructor.
+
+        The array can be initialized in the following ways:
+
+        quatarray(n)        -> n null quaternions
+        quatarray(seq)      -> seq is a sequence of quat objects or 4-sequences (w,x,y,z)
+        quatarray(a)        -> a is a quatarray or a numpy array of shape (n,4)
+        """
+        if not _numpy_available:
+            raise ImportError("numpy is not available")
+        if isinstance(arg, _ScalarTypes):
+            data = numpy.zeros((int(arg), 4))
+        elif isinstance(arg, quatarray):
+            data = arg.data.copy()
+        elif isinstance(arg, numpy.ndarray):
+            data = numpy.array(arg, dtype=numpy.float64)
+        else:
+            data = numpy.array(map(_quatTuple, arg), dtype=numpy.float64)
+        if len(data)==0:
+            data = data.reshape(0, 4)
+        if data.ndim!=2 or data.shape[1]!=4:
+            raise TypeError("quatarray(): Invalid data shape %s"%(data.shape,))
+        self.data = data
+
+    def __repr__(self):
+        return "quatarray(%s)"%repr(self.toList())
+
+    def __str__(self):
+        return "[%s]"%", ".join(map(str, self.toList()))
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return _quatarray(self.data[key])
+        w,x,y,z = self.data[key]
+        return _quat(w,x,y,z)
+
+    def __setitem__(self, key, value):
+        if isinstance(key, slice):
+            value = _asQuatData(value)
+        else:
+            value = _quatTuple(value)
+        self.data[key] = value
+
+    def __iter__(self):
+        for w,x,y,z in self.data.tolist():
+            yield _quat(w,x,y,z)
+
+    def __eq__(self, other):
+        if not isinstance(other, quatarray) or len(other)!=len(self):
+            return False
+        return bool(numpy.all(numpy.abs(self.data-other.data)<=_vec3Epsilon()))
+
+    def __ne__(self, other):
+        return not (self==other)
+
+    def __add__(self, other):
+        return _quatarray(self.data + _asQuatData(other))
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        return _quatarray(self.data - _asQuatData(other))
+
+    def __neg__(self):
+        return _quatarray(-self.data)
+
+    def __mul__(self, other):
+        """Multiplication.
+
+        quatarray*scalar        -> quatarray
+        quatarray*quat(array)   -> quatarray
+        """
+        if isinstance(other, _ScalarTypes):
+            return _quatarray(self.data*other)
+        if isinstance(other, numpy.ndarray):
+            return _quatarray(self.data*other.reshape(-1,1))
+        if isinstance(other, quatarray) or isinstance(other, _quat):
+            return _quatarray(_quatMul(self.data, _asQuatData(other)))
+        raise TypeError("unsupported operand type for *")
+
+    def __rmul__(self, other):
+        if isinstance(other, _ScalarTypes):
+            return _quatarray(other*self.data)
+        if isinstance(other, _quat):
+            return _quatarray(_quatMul(_asQuatData(other), self.data))
+        raise TypeError("unsupported operand type for *")
+
+    def toList(self):
+        """Return a list of quat objects.
+        """
+        return map(lambda q: _quat(q[0],q[1],q[2],q[3]), self.data.tolist())
+
+    def __abs__(self):
+        """Return the absolute values of all quaternions.
+
+        \return numpy array
+        """
+        return numpy.sqrt(numpy.sum(self.data*self.data, axis=1))
+
+    def conjugate(self):
+        """Return the conjugates.
+        """
+        return _quatarray(self.data*(1.0,-1.0,-1.0,-1.0))
+
+    def normalize(self):
+        """Return the normalized quaternions.
+        """
+        l = abs(self)
+        if len(l)>0 and l.min()==0.0:
+            raise ZeroDivisionError("float division by zero")
+        return _quatarray(self.data/l.reshape(-1,1))
+
+    def inverse(self):
+        """Return the inverse quaternions.
+        """
+        l2 = numpy.sum(self.data*self.data, axis=1)
+        if len(l2)>0 and l2.min()==0.0:
+            raise ZeroDivisionError("float division by zero")
+        return _quatarray(self.data*(1.0,-1.0,-1.0,-1.0)/l2.reshape(-1,1))
+
+    def dot(self, b):
+        """Return the dot products.
+
+        \return numpy array
+        """
+        return numpy.sum(self.data*_asQuatData(b), axis=-1)
+
+    def toMat4(self):
+        """Return the rotation matrices.
+
+        \return mat4array
+        """
+        w,x,y,z = self.data.T
+        xx = 2.0*x*x
+        yy = 2.0*y*y
+        zz = 2.0*z*z
+        xy = 2.0*x*y
+        zw = 2.0*z*w
+        xz = 2.0*x*z
+        yw = 2.0*y*w
+        yz = 2.0*y*z
+        xw = 2.0*x*w
+        data = numpy.zeros((len(self.data),4,4))
+        data[:,0,0] = 1.0-yy-zz
+        data[:,0,1] = xy-zw
+        data[:,0,2] = xz+yw
+        data[:,1,0] = xy+zw
+        data[:,1,1] = 1.0-xx-zz
+        data[:,1,2] = yz-xw
+        data[:,2,0] = xz-yw
+        data[:,2,1] = yz+xw
+        data[:,2,2] = 1.0-xx-yy
+        data[:,3,3] = 1.0
+        return _mat4array(data)
+
+    def fromMat(m):
+        """Create quaternions from rotation matrices.
+
+        This is the array version of quat.fromMat().
+
+        \param m (\c mat4array) Rotation matrices (or a numpy array of
+               shape (n,3,3) or (n,4,4))
+        \return quatarray
+        """
+        if isinstance(m, mat4array):
+            m = m.data
+        m = numpy.asarray(m, dtype=numpy.float64)
+        d1 = m[:,0,0]
+        d2 = m[:,1,1]
+        d3 = m[:,2,2]
+        res = numpy.zeros((len(m),4))
+        t = d1+d2+d3+1.0
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            # Trace is positive
+            sel = t>_vec3Epsilon()
+            s = 0.5/numpy.sqrt(t[sel])
+            ms = m[sel]
+            res[sel,0] = 0.25/s
+            res[sel,1] = (ms[:,2,1]-ms[:,1,2])*s
+            res[sel,2] = (ms[:,0,2]-ms[:,2,0])*s
+            res[sel,3] = (ms[:,1,0]-ms[:,0,1])*s
+            rest = ~sel
+            # d1 is the largest diagonal element
+            sel = rest & (d1>=d2) & (d1>=d3)
+            ms = m[sel]
+            s = numpy.sqrt(1.0+d1[sel]-d2[sel]-d3[sel])*2.0
+            res[sel,1] = 0.25*s
+            res[sel,2] = (ms[:,0,1]+ms[:,1,0])/s
+            res[sel,3] = (ms[:,0,2]+ms[:,2,0])/s
+            res[sel,0] = (ms[:,1,2]+ms[:,2,1])/s
+            rest = rest & ~sel
+            # d2 is the largest diagonal element
+            sel = rest & (d2>=d1) & (d2>=d3)
+            ms = m[sel]
+            s = numpy.sqrt(1.0+d2[sel]-d1[sel]-d3[sel])*2.0
+            res[sel,1] = (ms[:,0,1]+ms[:,1,0])/s
+            res[sel,2] = 0.25*s
+            res[sel,3] = (ms[:,1,2]+ms[:,2,1])/s
+            res[sel,0] = (ms[:,0,2]+ms[:,2,0])/s
+            rest = rest & ~sel
+            # d3 is the largest diagonal element
+            sel = rest
+            ms = m[sel]
+            s = numpy.sqrt(1.0+d3[sel]-d1[sel]-d2[sel])*2.0
+            res[sel,1] = (ms[:,0,2]+ms[:,2,0])/s
+            res[sel,2] = (ms[:,1,2]+ms[:,2,1])/s
+            res[sel,3] = 0.25*s
+            res[sel,0] = (ms[:,0,1]+ms[:,1,0])/s
+        return _quatarray(res)
+    fromMat = staticmethod(fromMat)
+
+    def rotateVec(self, v):
+        """Return the rotated vectors.
+
+        The quaternions must be unit quaternions.
+
+        \param v (\c vec3array) Vectors (or a single vec3 that gets rotated
+               by all quaternions)
+        \return vec3array
+        """
+        v = _asVec3Data(v)
+        w = self.data[:,0:1]
+        u = self.data[:,1:]
+        # v' = v + 2w(u x v) + 2u x (u x v)
+        uv = numpy.cross(u, v)
+        return _vec3array(v + 2.0*w*uv + 2.0*numpy.cross(u, uv))
+
+    def slerp(self, t, q1, shortest=True):
+        """Spherical linear interpolation.
+
+        This is the array version of slerp(t, q0, q1) with q0 being self.
+        The quaternions must be unit quaternions.
+
+        \param t (\c float) Interpolation parameter (or a numpy array with
+               one value per quaternion)
+        \param q1 (\c quatarray) End quaternions (or a single quat)
+        \param shortest (\c bool) Always interpolate along the shortest path
+        \return quatarray
+        """
+        q0 = self.data
+        q1 = numpy.broadcast_to(_asQuatData(q1), q0.shape).copy()
+        t = numpy.asarray(t, dtype=numpy.float64).reshape(-1,1)
+        ca = numpy.sum(q0*q1, axis=1)
+        if shortest:
+            neg = ca<0
+            ca[neg] = -ca[neg]
+            q1[neg] = -q1[neg]
+        o = numpy.arccos(numpy.clip(ca, -1.0, 1.0))
+        so = numpy.sin(o)
+        small = numpy.abs(so)<=_vec3Epsilon()
+        so[small] = 1.0
+        o = o.reshape(-1,1)
+        so = so.reshape(-1,1)
+        a = numpy.sin(o*(1.0-t))/so
+        b = numpy.sin(o*t)/so
+        res = q0*a + q1*b
+        res[small] = q0[small]
+        return _quatarray(res)
+
+######################################################################
+
+def _vec3array(data):
+    """Create a vec3array that uses data without copying it.
+    """
+    res = vec3array()
+    res.data = data
+    return res
+
+def _mat4array(data):
+    """Create a mat4array that uses data without copying it.
+    """
+    res = mat4array()
+    res.data = data
+    return res
+
+def _quatarray(data):
+    """Create a quatarray that uses data without copying it.
+    """
+    res = quatarray()
+    res.data = data
+    return res
+
+def _vec3Epsilon():
+    return _vec3_module._epsilon
+
+def _mat4Data(M):
+    return numpy.array(M.toList(rowmajor=True), dtype=numpy.float64).reshape(4,4)
+
+def _mat3Data(M):
+    return numpy.array(M.toList(rowmajor=True), dtype=numpy.float64).reshape(3,3)
+
+def _vec3Tuple(v):
+    if isinstance(v, _vec3):
+        return (v.x, v.y, v.z)
+    return (v[0], v[1], v[2])
+
+def _quatTuple(q):
+    if isinstance(q, _quat):
+        return (q.w, q.x, q.y, q.z)
+    return (q[0], q[1], q[2], q[3])
+
+def _asVec3Data(v):
+    """Return the numpy array for a vec3array, a vec3 or a sequence of vec3.
+    """
+    if isinstance(v, vec3array):
+        return v.data
+    if isinstance(v, _vec3):
+        return numpy.array((v.x, v.y, v.z))
+    if isinstance(v, numpy.ndarray):
+        return v
+    return vec3array(v).data
+
+def _asMat4Data(M):
+    if isinstance(M, mat4array):
+        return M.data
+    if isinstance(M, _mat4):
+        return _mat4Data(M)
+    return mat4array(M).data
+
+def _asQuatData(q):
+    if isinstance(q, quatarray):
+        return q.data
+    if isinstance(q, _quat):
+        return numpy.array(_quatTuple(q))
+    return quatarray(q).data
+
+def _quatMul(a, b):
+    """Multiply quaternions given as numpy arrays (w,x,y,z).
+    """
+    w1,x1,y1,z1 = a[...,0],a[...,1],a[...,2],a[...,3]
+    w2,x2,y2,z2 = b[...,0],b[...,1],b[...,2],b[...,3]
+    return numpy.stack((w1*w2-x1*x2-y1*y2-z1*z2,
+                        w1*x2+x1*w2+y1*z2-z1*y2,
+                        w1*y2+y1*w2-x1*z2+z1*x2,
+                        w1*z2+z1*w2+x1*y2-y1*x2), axis=-1)
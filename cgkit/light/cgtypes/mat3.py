@@ -36,7 +36,7 @@
 # $Id: mat3.py,v 1.2 2005/08/17 19:38:29 mbaas Exp $
 
 import types, math, copy
-from vec3 import vec3 as _vec3
+from vec3 import vec3 as _vec3, _newvec3
 
 # [  0   1   2 ]
 # [  3   4   5 ]
@@ -47,13 +47,15 @@ _epsilon = 1E-12
 
 
 # mat3
-class mat3:
+class mat3(object):
     """Matrix class (3x3).
 
     This class represents a 3x3 matrix that can be used to store
     linear transformations.
     """
 
+    __slots__ = ("mlist",)
+
     def __init__(self, *args):
         """Constructor.
 
@@ -114,6 +116,14 @@ class mat3:
         if len(self.mlist)!=9:
             raise TypeError("mat4(): Wrong number of matrix elements (%s instead of 9)"%(len(self.mlist)))
 
+    def __getstate__(self):
+        return list(self.mlist)
+
+    def __setstate__(self, state):
+        # Pickles from older versions contain the instance dictionary
+        if isinstance(state, dict):
+            state = state["mlist"]
+        self.mlist = list(state)
 
     def __repr__(self):
         return 'mat3(%s)'%(repr(self.mlist)[1:-1])
@@ -125,6 +135,9 @@ class mat3:
                 '['+fmt%m21+', '+fmt%m22+', '+fmt%m23+']\n'+
                 '['+fmt%m31+', '+fmt%m32+', '+fmt%m33+']')
 
+    # Make the object unhashable (as it is mutable)
+    __hash__ = None
+
     def __eq__(self, other):
         """== operator"""
         global _epsilon
@@ -142,13 +155,13 @@ class mat3:
 
     def __add__(self, other):
         if isinstance(other, mat3):
-            return mat3(map(lambda x,y: x+y, self.mlist, other.mlist))
+            return _newmat3(map(lambda x,y: x+y, self.mlist, other.mlist))
         else:
             raise TypeError("unsupported operand type for +")
 
     def __sub__(self, other):
         if isinstance(other, mat3):
-            return mat3(map(lambda x,y: x-y, self.mlist, other.mlist))
+            return _newmat3(map(lambda x,y: x-y, self.mlist, other.mlist))
         else:
             raise TypeError("unsupported operand type for -")
 
@@ -156,43 +169,47 @@ class mat3:
         T = type(other)
         # mat3*scalar
         if T==types.FloatType or T==types.IntType or T==types.LongType:
-            return mat3(map(lambda x,other=other: x*other, self.mlist))
+            return _newmat3(map(lambda x,other=other: x*other, self.mlist))
         # mat3*vec3
         if isinstance(other, _vec3):
             m11,m12,m13,m21,m22,m23,m31,m32,m33 = self.mlist
-            return _vec3(m11*other.x + m12*other.y + m13*other.z, 
-                         m21*other.x + m22*other.y + m23*other.z, 
-                         m31*other.x + m32*other.y + m33*other.z)            
+            return _newvec3(m11*other.x + m12*other.y + m13*other.z, 
+                            m21*other.x + m22*other.y + m23*other.z, 
+                            m31*other.x + m32*other.y + m33*other.z)            
         # mat3*mat3
         if isinstance(other, mat3):
             m11,m12,m13,m21,m22,m23,m31,m32,m33 = self.mlist
             n11,n12,n13,n21,n22,n23,n31,n32,n33 = other.mlist
-            return mat3( m11*n11+m12*n21+m13*n31,
-                         m11*n12+m12*n22+m13*n32,
-                         m11*n13+m12*n23+m13*n33,
+            return _newmat3([m11*n11+m12*n21+m13*n31,
+                             m11*n12+m12*n22+m13*n32,
+                             m11*n13+m12*n23+m13*n33,
 
-                         m21*n11+m22*n21+m23*n31,
-                         m21*n12+m22*n22+m23*n32,
-                         m21*n13+m22*n23+m23*n33,
+                             m21*n11+m22*n21+m23*n31,
+                             m21*n12+m22*n22+m23*n32,
+                             m21*n13+m22*n23+m23*n33,
 
-                         m31*n11+m32*n21+m33*n31,
-                         m31*n12+m32*n22+m33*n32,
-                         m31*n13+m32*n23+m33*n33)
+                             m31*n11+m32*n21+m33*n31,
+                             m31*n12+m32*n22+m33*n32,
+                             m31*n13+m32*n23+m33*n33])
         # unsupported
         else:
-            raise TypeError("unsupported operand type for *")
+            # Try to delegate the operation to the other operand
+            if getattr(other,"__rmul__",None)!=None:
+                return other.__rmul__(self)
+            else:
+                raise TypeError("unsupported operand type for *")
 
     def __rmul__(self, other):
         T = type(other)
         # scalar*mat3
         if T==types.FloatType or T==types.IntType or T==types.LongType:
-            return mat3(map(lambda x,other=other: other*x, self.mlist))
+            return _newmat3(map(lambda x,other=other: other*x, self.mlist))
         # vec3*mat3
         if isinstance(other, _vec3):
             m11,m12,m13,m21,m22,m23,m31,m32,m33 = self.mlist
-            return _vec3(other.x*m11 + other.y*m21 + other.z*m31, 
-                         other.x*m12 + other.y*m22 + other.z*m32, 
-                         other.x*m13 + other.y*m23 + other.z*m33)
+            return _newvec3(other.x*m11 + other.y*m21 + other.z*m31, 
+                            other.x*m12 + other.y*m22 + other.z*m32, 
+                            other.x*m13 + other.y*m23 + other.z*m33)
         # mat3*mat3
         if isinstance(other, mat3):
             return self.__mul__(other)
@@ -205,7 +222,7 @@ class mat3:
         T = type(other)
         # mat3/scalar
         if T==types.FloatType or T==types.IntType or T==types.LongType:
-            return mat3(map(lambda x,other=other: x/other, self.mlist))
+            return _newmat3(map(lambda x,other=other: x/other, self.mlist))
         # unsupported
         else:
             raise TypeError("unsupported operand type for /")
@@ -214,20 +231,20 @@ class mat3:
         T = type(other)
         # mat3%scalar
         if T==types.FloatType or T==types.IntType or T==types.LongType:
-            return mat3(map(lambda x,other=other: x%other, self.mlist))
+            return _newmat3(map(lambda x,other=other: x%other, self.mlist))
         # mat3%mat3
         if isinstance(other, mat3):
-            return mat3(map(lambda a: a[0]%a[1], zip(self.mlist, other.mlist)))
+            return _newmat3(map(lambda a: a[0]%a[1], zip(self.mlist, other.mlist)))
         # unsupported
         else:
             raise TypeError("unsupported operand type for %")
 
 
     def __neg__(self):
-        return mat3(map(lambda x: -x, self.mlist))
+        return _newmat3(map(lambda x: -x, self.mlist))
 
     def __pos__(self):
-        return mat3(map(lambda x: +x, self.mlist))
+        return _newmat3(map(lambda x: +x, self.mlist))
 
 
     def __len__(self):
@@ -354,9 +371,9 @@ class mat3:
     def transpose(self):
         """Return the transposed matrix."""
         m11,m12,m13,m21,m22,m23,m31,m32,m33 = self.mlist
-        return mat3(m11,m21,m31,
-                    m12,m22,m32,
-                    m13,m23,m33)
+        return _newmat3([m11,m21,m31,
+                         m12,m22,m32,
+                         m13,m23,m33])
 
     def determinant(self):
         """Return determinant."""
@@ -792,6 +809,20 @@ def _eulerGivens(a, b):
             r = a*u
         return c,s,r
 
+
+_object_new = object.__new__
+
+# _newmat3
+def _newmat3(mlist):
+    """Create a mat3 from a list without argument checks.
+
+    This is used internally to create the results of operations. The
+    list is not copied and must already contain floats.
+    """
+    M = _object_new(mat3)
+    M.mlist = mlist
+    return M
+
 ######################################################################
 
 if __name__=="__main__":
@@ -35,8 +35,8 @@
 # $Id: mat4.py,v 1.2 2005/08/17 19:52:41 mbaas Exp $
 
 import types, math, copy
-from vec3 import vec3 as _vec3
-from vec4 import vec4 as _vec4
+from vec3 import vec3 as _vec3, _newvec3
+from vec4 import vec4 as _vec4, _newvec4
 from mat3 import mat3 as _mat3
 
 
@@ -50,13 +50,15 @@ _epsilon = 1E-12
 
 
 # mat4
-class mat4:
+class mat4(object):
     """Matrix class (4x4).
 
     This class represents a 4x4 matrix that can be used to store
     affine transformations.
     """
 
+    __slots__ = ("mlist",)
+
     def __init__(self, *args):
         "Constructor"
 
@@ -102,6 +104,14 @@ class mat4:
         # Check if there are really 16 elements in the list
         if len(self.mlist)!=16:
             raise TypeError("mat4(): Wrong number of matrix elements (%s instead of 16)"%(len(self.mlist)))
+    def __getstate__(self):
+        return list(self.mlist)
+
+    def __setstate__(self, state):
+        # Pickles from older versions contain the instance dictionary
+        if isinstance(state, dict):
+            state = state["mlist"]
+        self.mlist = list(state)
 
     def __repr__(self):
         return 'mat4(%s)'%(repr(self.mlist)[1:-1])
@@ -114,6 +124,9 @@ class mat4:
                 '['+fmt%m31+', '+fmt%m32+', '+fmt%m33+', '+fmt%m34+']\n'+
                 '['+fmt%m41+', '+fmt%m42+', '+fmt%m43+', '+fmt%m44+']')
 
+    # Make the object unhashable (as it is mutable)
+    __hash__ = None
+
     def __eq__(self, other):
         """== operator"""
         global _epsilon
@@ -139,7 +152,7 @@ class mat4:
         [  26.0000,   28.0000,   30.0000,   32.0000]
         """
         if isinstance(other, mat4):
-            return mat4(map(lambda x,y: x+y, self.mlist, other.mlist))
+            return _newmat4(map(lambda x,y: x+y, self.mlist, other.mlist))
         else:
             raise TypeError("unsupported operand type for +")
 
@@ -154,7 +167,7 @@ class mat4:
         [   0.0000,    0.0000,    0.0000,    0.0000]
         """
         if isinstance(other, mat4):
-            return mat4(map(lambda x,y: x-y, self.mlist, other.mlist))
+            return _newmat4(map(lambda x,y: x-y, self.mlist, other.mlist))
         else:
             raise TypeError("unsupported operand type for -")
 
@@ -185,67 +198,71 @@ class mat4:
         T = type(other)
         # mat4*scalar
         if T==types.FloatType or T==types.IntType or T==types.LongType:
-            return mat4(map(lambda x,other=other: x*other, self.mlist))
+            return _newmat4(map(lambda x,other=other: x*other, self.mlist))
         # mat4*vec3
         if isinstance(other, _vec3):
             m11,m12,m13,m14,m21,m22,m23,m24,m31,m32,m33,m34,m41,m42,m43,m44 = self.mlist
             w = float(m41*other.x + m42*other.y + m43*other.z + m44)
-            return _vec3(m11*other.x + m12*other.y + m13*other.z + m14, 
-                         m21*other.x + m22*other.y + m23*other.z + m24, 
-                         m31*other.x + m32*other.y + m33*other.z + m34)/w
+            return _newvec3(m11*other.x + m12*other.y + m13*other.z + m14, 
+                            m21*other.x + m22*other.y + m23*other.z + m24, 
+                            m31*other.x + m32*other.y + m33*other.z + m34)/w
         # mat4*vec4
         if isinstance(other, _vec4):
             m11,m12,m13,m14,m21,m22,m23,m24,m31,m32,m33,m34,m41,m42,m43,m44 = self.mlist
-            return _vec4(m11*other.x + m12*other.y + m13*other.z + m14*other.w, 
-                         m21*other.x + m22*other.y + m23*other.z + m24*other.w, 
-                         m31*other.x + m32*other.y + m33*other.z + m34*other.w,
-                         m41*other.x + m42*other.y + m43*other.z + m44*other.w)
+            return _newvec4(m11*other.x + m12*other.y + m13*other.z + m14*other.w, 
+                            m21*other.x + m22*other.y + m23*other.z + m24*other.w, 
+                            m31*other.x + m32*other.y + m33*other.z + m34*other.w,
+                            m41*other.x + m42*other.y + m43*other.z + m44*other.w)
         # mat4*mat4
         if isinstance(other, mat4):
             m11,m12,m13,m14,m21,m22,m23,m24,m31,m32,m33,m34,m41,m42,m43,m44 = self.mlist
             n11,n12,n13,n14,n21,n22,n23,n24,n31,n32,n33,n34,n41,n42,n43,n44 = other.mlist
-            return mat4( m11*n11+m12*n21+m13*n31+m14*n41,
-                         m11*n12+m12*n22+m13*n32+m14*n42,
-                         m11*n13+m12*n23+m13*n33+m14*n43,
-                         m11*n14+m12*n24+m13*n34+m14*n44,
-
-                         m21*n11+m22*n21+m23*n31+m24*n41,
-                         m21*n12+m22*n22+m23*n32+m24*n42,
-                         m21*n13+m22*n23+m23*n33+m24*n43,
-                         m21*n14+m22*n24+m23*n34+m24*n44,
-
-                         m31*n11+m32*n21+m33*n31+m34*n41,
-                         m31*n12+m32*n22+m33*n32+m34*n42,
-                         m31*n13+m32*n23+m33*n33+m34*n43,
-                         m31*n14+m32*n24+m33*n34+m34*n44,
-
-                         m41*n11+m42*n21+m43*n31+m44*n41,
-                         m41*n12+m42*n22+m43*n32+m44*n42,
-                         m41*n13+m42*n23+m43*n33+m44*n43,
-                         m41*n14+m42*n24+m43*n34+m44*n44)
+            return _newmat4([m11*n11+m12*n21+m13*n31+m14*n41,
+                             m11*n12+m12*n22+m13*n32+m14*n42,
+                             m11*n13+m12*n23+m13*n33+m14*n43,
+                             m11*n14+m12*n24+m13*n34+m14*n44,
+
+                             m21*n11+m22*n21+m23*n31+m24*n41,
+                             m21*n12+m22*n22+m23*n32+m24*n42,
+                             m21*n13+m22*n23+m23*n33+m24*n43,
+                             m21*n14+m22*n24+m23*n34+m24*n44,
+
+                             m31*n11+m32*n21+m33*n31+m34*n41,
+                             m31*n12+m32*n22+m33*n32+m34*n42,
+                             m31*n13+m32*n23+m33*n33+m34*n43,
+                             m31*n14+m32*n24+m33*n34+m34*n44,
+
+                             m41*n11+m42*n21+m43*n31+m44*n41,
+                             m41*n12+m42*n22+m43*n32+m44*n42,
+                             m41*n13+m42*n23+m43*n33+m44*n43,
+                             m41*n14+m42*n24+m43*n34+m44*n44])
         # unsupported
         else:
-            raise TypeError("unsupported operand type for *")
+            # Try to delegate the operation to the other operand
+            if getattr(other,"__rmul__",None)!=None:
+                return other.__rmul__(self)
+            else:
+                raise TypeError("unsupported operand type for *")
 
     def __rmul__(self, other):
         T = type(other)
         # scalar*mat4
         if T==types.FloatType or T==types.IntType or T==types.LongType:
-            return mat4(map(lambda x,other=other: other*x, self.mlist))
+            return _newmat4(map(lambda x,other=other: other*x, self.mlist))
         # vec4*mat4
         if isinstance(other, _vec4):
             m11,m12,m13,m14,m21,m22,m23,m24,m31,m32,m33,m34,m41,m42,m43,m44 = self.mlist
-            return _vec4(other.x*m11 + other.y*m21 + other.z*m31 + other.w*m41, 
-                         other.x*m12 + other.y*m22 + other.z*m32 + other.w*m42,
-                         other.x*m13 + other.y*m23 + other.z*m33 + other.w*m43,
-                         other.x*m14 + other.y*m24 + other.z*m34 + other.w*m44)
+            return _newvec4(other.x*m11 + other.y*m21 + other.z*m31 + other.w*m41, 
+                            other.x*m12 + other.y*m22 + other.z*m32 + other.w*m42,
+                            other.x*m13 + other.y*m23 + other.z*m33 + other.w*m43,
+                            other.x*m14 + other.y*m24 + other.z*m34 + other.w*m44)
         # vec3*mat4
         if isinstance(other, _vec3):
             m11,m12,m13,m14,m21,m22,m23,m24,m31,m32,m33,m34,m41,m42,m43,m44 = self.mlist
             w = float(other.x*m14 + other.y*m24 + other.z*m34 + m44)
-            return _vec3(other.x*m11 + other.y*m21 + other.z*m31 + m41, 
-                         other.x*m12 + other.y*m22 + other.z*m32 + m42,
-                         other.x*m13 + other.y*m23 + other.z*m33 + m43)/w
+            return _newvec3(other.x*m11 + other.y*m21 + other.z*m31 + m41, 
+                            other.x*m12 + other.y*m22 + other.z*m32 + m42,
+                            other.x*m13 + other.y*m23 + other.z*m33 + m43)/w
         # mat4*mat4
         if isinstance(other, mat4):
             return self.__mul__(other)
@@ -266,7 +283,7 @@ class mat4:
         T = type(other)
         # mat4/scalar
         if T==types.FloatType or T==types.IntType or T==types.LongType:
-            return mat4(map(lambda x,other=other: x/other, self.mlist))
+            return _newmat4(map(lambda x,other=other: x/other, self.mlist))
         # unsupported
         else:
             raise TypeError("unsupported operand type for /")
@@ -284,10 +301,10 @@ class mat4:
         T = type(other)
         # mat4%scalar
         if T==types.FloatType or T==types.IntType or T==types.LongType:
-            return mat4(map(lambda x,other=other: x%other, self.mlist))
+            return _newmat4(map(lambda x,other=other: x%other, self.mlist))
         # mat4%mat4
         if isinstance(other, mat4):
-            return mat4(map(lambda a,b: a%b, self.mlist, other.mlist))
+            return _newmat4(map(lambda a,b: a%b, self.mlist, other.mlist))
         # unsupported
         else:
             raise TypeError("unsupported operand type for %")
@@ -302,7 +319,7 @@ class mat4:
         [  -9.0000,  -10.0000,  -11.0000,  -12.0000]
         [ -13.0000,  -14.0000,  -15.0000,  -16.0000]
         """
-        return mat4(map(lambda x: -x, self.mlist))
+        return _newmat4(map(lambda x: -x, self.mlist))
 
     def __pos__(self):
         """
@@ -313,7 +330,7 @@ class mat4:
         [   9.0000,   10.0000,   11.0000,   12.0000]
         [  13.0000,   14.0000,   15.0000,   16.0000]
         """
-        return mat4(map(lambda x: +x, self.mlist))
+        return _newmat4(map(lambda x: +x, self.mlist))
 
 
     def __len__(self):
@@ -465,10 +482,10 @@ class mat4:
         [   4.0000,    8.0000,   12.0000,   16.0000]
         """
         m11,m12,m13,m14,m21,m22,m23,m24,m31,m32,m33,m34,m41,m42,m43,m44 = self.mlist
-        return mat4(m11,m21,m31,m41,
-                    m12,m22,m32,m42,
-                    m13,m23,m33,m43,
-                    m14,m24,m34,m44)
+        return _newmat4([m11,m21,m31,m41,
+                         m12,m22,m32,m42,
+                         m13,m23,m33,m43,
+                         m14,m24,m34,m44])
 
     def determinant(self):
         """Return determinant.
@@ -781,6 +798,20 @@ class mat4:
         self.mlist[4:7] = m3.mlist[3:6]
         self.mlist[8:11] = m3.mlist[6:9]
 
+
+_object_new = object.__new__
+
+# _newmat4
+def _newmat4(mlist):
+    """Create a mat4 from a list without argument checks.
+
+    This is used internally to create the results of operations. The
+    list is not copied and must already contain floats.
+    """
+    M = _object_new(mat4)
+    M.mlist = mlist
+    return M
+
 ######################################################################
 
 def _test():
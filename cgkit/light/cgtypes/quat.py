@@ -35,7 +35,7 @@
 # $Id: quat.py,v 1.1 2005/08/15 15:39:48 mbaas Exp $
 
 import types, math
-from vec3 import vec3 as _vec3
+from vec3 import vec3 as _vec3, _newvec3
 from mat3 import mat3 as _mat3
 from mat4 import mat4 as _mat4
 
@@ -43,7 +43,7 @@ from mat4 import mat4 as _mat4
 _epsilon = 1E-12
 
 # quat
-class quat:
+class quat(object):
     """Quaternion class.
 
     Quaternions are an extension to complex numbers and can be used
@@ -51,6 +51,8 @@ class quat:
     seen as an angle and an axis of rotation.
     """
 
+    __slots__ = ("w", "x", "y", "z")
+
     def __init__(self, *args):
         """Constructor.
 
@@ -120,7 +122,15 @@ class quat:
 
         else:
             raise TypeError("quat() arg can't be converted to quat")
-        
+
+    def __getstate__(self):
+        return (self.w, self.x, self.y, self.z)
+
+    def __setstate__(self, state):
+        # Pickles from older versions contain the instance dictionary
+        if isinstance(state, dict):
+            state = (state["w"], state["x"], state["y"], state["z"])
+        self.w, self.x, self.y, self.z = state
 
     def __repr__(self):
         return 'quat(%r, %r, %r, %r)'%(self.w, self.x, self.y, self.z)
@@ -128,6 +138,9 @@ class quat:
     def __str__(self):
         return '(%1.4f, %1.4f, %1.4f, %1.4f)'%(self.w, self.x, self.y, self.z)
 
+    # Make the object unhashable (as it is mutable)
+    __hash__ = None
+
     def __eq__(self, other):
         """== operator
 
@@ -173,7 +186,7 @@ class quat:
         (1.9378, 0.4320, 0.2160, 0.1080)
         """
         if isinstance(other, quat):
-            return quat(self.w+other.w, self.x+other.x,
+            return _newquat(self.w+other.w, self.x+other.x,
                         self.y+other.y, self.z+other.z)
         else:
             raise TypeError("unsupported operand type for +")
@@ -186,7 +199,7 @@ class quat:
         (0.0000, 0.0000, 0.0000, 0.0000)
         """
         if isinstance(other, quat):
-            return quat(self.w-other.w, self.x-other.x,
+            return _newquat(self.w-other.w, self.x-other.x,
                         self.y-other.y, self.z-other.z)
         else:
             raise TypeError("unsupported operand type for +")
@@ -205,15 +218,15 @@ class quat:
         T = type(other)
         # quat*scalar
         if T==types.FloatType or T==types.IntType or T==types.LongType:
-            return quat(self.w*other, self.x*other, self.y*other, self.z*other)
+            return _newquat(self.w*other, self.x*other, self.y*other, self.z*other)
         # quat*quat
         if isinstance(other, quat):
             w1,x1,y1,z1 = self.w,self.x,self.y,self.z
             w2,x2,y2,z2 = other.w,other.x,other.y,other.z
-            return quat(w1*w2-x1*x2-y1*y2-z1*z2,
-                        w1*x2+x1*w2+y1*z2-z1*y2,
-                        w1*y2+y1*w2-x1*z2+z1*x2,
-                        w1*z2+z1*w2+x1*y2-y1*x2)
+            return _newquat(w1*w2-x1*x2-y1*y2-z1*z2,
+                            w1*x2+x1*w2+y1*z2-z1*y2,
+                            w1*y2+y1*w2-x1*z2+z1*x2,
+                            w1*z2+z1*w2+x1*y2-y1*x2)
         # unsupported
         else:
             # Try to delegate the operation to the other operand
@@ -234,7 +247,7 @@ class quat:
         T = type(other)
         # quat/scalar
         if T==types.FloatType or T==types.IntType or T==types.LongType:
-            return quat(self.w/other, self.x/other, self.y/other, self.z/other)
+            return _newquat(self.w/other, self.x/other, self.y/other, self.z/other)
         # unsupported
         else:
             raise TypeError("unsupported operand type for /")
@@ -253,7 +266,7 @@ class quat:
         >>> print -q
         (-0.9689, -0.2160, -0.1080, -0.0540)
         """
-        return quat(-self.w, -self.x, -self.y, -self.z)
+        return _newquat(-self.w, -self.x, -self.y, -self.z)
 
     def __pos__(self):
         """
@@ -261,7 +274,7 @@ class quat:
         >>> print +q
         (0.9689, 0.2160, 0.1080, 0.0540)
         """
-        return quat(+self.w, +self.x, +self.y, +self.z)
+        return _newquat(+self.w, +self.x, +self.y, +self.z)
 
     def __abs__(self):
         """Return magnitude.
@@ -280,7 +293,7 @@ class quat:
         >>> print q.conjugate()
         (0.9689, -0.2160, -0.1080, -0.0540)
         """
-        return quat(self.w, -self.x, -self.y, -self.z)
+        return _newquat(self.w, -self.x, -self.y, -self.z)
 
     def normalize(self):
         """Return normalized quaternion.
@@ -293,7 +306,7 @@ class quat:
         1.0
         """
         nlen = 1.0/abs(self)
-        return quat(self.w*nlen, self.x*nlen, self.y*nlen, self.z*nlen)
+        return _newquat(self.w*nlen, self.x*nlen, self.y*nlen, self.z*nlen)
 
     def inverse(self):
         """Return inverse.
@@ -495,9 +508,9 @@ class quat:
         xz = self.x*self.z
         yz = self.y*self.z
 
-        return _vec3(ww*v.x + xx*v.x - yy*v.x - zz*v.x + 2*((xy-wz)*v.y + (xz+wy)*v.z),
-                     ww*v.y - xx*v.y + yy*v.y - zz*v.y + 2*((xy+wz)*v.x + (yz-wx)*v.z),
-                     ww*v.z - xx*v.z - yy*v.z + zz*v.z + 2*((xz-wy)*v.x + (yz+wx)*v.y))
+        return _newvec3(ww*v.x + xx*v.x - yy*v.x - zz*v.x + 2*((xy-wz)*v.y + (xz+wy)*v.z),
+                        ww*v.y - xx*v.y + yy*v.y - zz*v.y + 2*((xy+wz)*v.x + (yz-wx)*v.z),
+                        ww*v.z - xx*v.z - yy*v.z + zz*v.z + 2*((xz-wy)*v.x + (yz+wx)*v.y))
     
 
 def slerp(t, q0, q1, shortest=True):
@@ -541,6 +554,23 @@ def squad(t, a, b, c, d):
     return slerp(2*t*(1.0-t), slerp(t,a,d), slerp(t,b,c))
 
 
+_object_new = object.__new__
+
+# _newquat
+def _newquat(w, x, y, z):
+    """Create a quat without argument checks.
+
+    This is used internally to create the results of operations. The
+    arguments must already be floats.
+    """
+    v = _object_new(quat)
+    v.w = w
+    v.x = x
+    v.y = y
+    v.z = z
+    return v
+
+
 ######################################################################
 
 def _test():
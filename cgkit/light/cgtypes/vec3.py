@@ -40,14 +40,18 @@ import math
 # Comparison threshold
 _epsilon = 1E-12
 
+_ScalarTypes = (int, float, long)
+
 # vec3
-class vec3:
+class vec3(object):
     """Three-dimensional vector.
 
     This class can be used to represent points, vectors, normals
     or even colors. The usual vector operations are available.
     """
 
+    __slots__ = ("x", "y", "z")
+
     def __init__(self, *args):
         """Constructor.
 
@@ -69,18 +73,25 @@ class vec3:
         v = vec3("4,5")   -> v = <4,5,0>        
         """
         
-        if len(args)==0:
+        if len(args)==3:
+            x,y,z = args
+            self.x = float(x)
+            self.y = float(y)
+            self.z = float(z)
+
+        elif len(args)==0:
             self.x, self.y, self.z = (0.0, 0.0, 0.0)
 
         elif len(args)==1:
             T = type(args[0])
             # scalar
-            if T in [int, float, long]:
+            if T in _ScalarTypes:
                 f = float(args[0])
                 self.x, self.y, self.z = (f, f, f)
             # vec3  
             elif isinstance(args[0], vec3):
-                self.x, self.y, self.z = args[0]
+                v = args[0]
+                self.x, self.y, self.z = v.x, v.y, v.z
             # Tuple/List
             elif T is tuple or T is list:
                 if len(args[0])==0:
@@ -113,15 +124,17 @@ class vec3:
         elif len(args)==2:
             self.x, self.y, self.z = (float(args[0]), float(args[1]), 0.0)
             
-        elif len(args)==3:
-            x,y,z = args
-            self.x = float(x)
-            self.y = float(y)
-            self.z = float(z)
-
         else:
             raise TypeError("vec3() takes at most 3 arguments")
 
+    def __getstate__(self):
+        return (self.x, self.y, self.z)
+
+    def __setstate__(self, state):
+        # Pickles from older versions contain the instance dictionary
+        if isinstance(state, dict):
+            state = (state["x"], state["y"], state["z"])
+        self.x, self.y, self.z = state
 
     def __repr__(self):
         return 'vec3(%r, %r, %r)'%(self.x, self.y, self.z)
@@ -214,7 +227,7 @@ class vec3:
         (0.7000, 1.2500, -1.3000)
         """
         if isinstance(other, vec3):
-            return vec3(self.x+other.x, self.y+other.y, self.z+other.z)
+            return _newvec3(self.x+other.x, self.y+other.y, self.z+other.z)
         else:
             raise TypeError("unsupported operand type for +")
 
@@ -227,7 +240,7 @@ class vec3:
         (1.3000, -0.2500, -2.3000)
         """
         if isinstance(other, vec3):
-            return vec3(self.x-other.x, self.y-other.y, self.z-other.z)
+            return _newvec3(self.x-other.x, self.y-other.y, self.z-other.z)
         else:
             raise TypeError("unsupported operand type for -")
 
@@ -246,8 +259,8 @@ class vec3:
         
         T = type(other)
         # vec3*scalar
-        if T in [int, float, long]:
-            return vec3(self.x*other, self.y*other, self.z*other)
+        if T in _ScalarTypes:
+            return _newvec3(self.x*other, self.y*other, self.z*other)
         # vec3*vec3
         if isinstance(other, vec3):
             return self.x*other.x + self.y*other.y + self.z*other.z
@@ -270,8 +283,8 @@ class vec3:
         """
         T = type(other)
         # vec3/scalar
-        if T in [int, float, long]:
-            return vec3(self.x/other, self.y/other, self.z/other)
+        if T in _ScalarTypes:
+            return _newvec3(self.x/other, self.y/other, self.z/other)
         # unsupported
         else:
             raise TypeError("unsupported operand type for /")
@@ -288,11 +301,11 @@ class vec3:
         """
         T = type(other)
         # vec3%scalar
-        if T in [int, float, long]:
-            return vec3(self.x%other, self.y%other, self.z%other)
+        if T in _ScalarTypes:
+            return _newvec3(self.x%other, self.y%other, self.z%other)
         # vec3%vec3
         if isinstance(other, vec3):
-            return vec3(self.x%other.x, self.y%other.y, self.z%other.z)
+            return _newvec3(self.x%other.x, self.y%other.y, self.z%other.z)
         # unsupported
         else:
             raise TypeError("unsupported operand type for %")
@@ -372,7 +385,7 @@ class vec3:
         """
         T = type(other)
         # vec3%=scalar
-        if T in [int, float, long]:
+        if T in _ScalarTypes:
             self.x%=other
             self.y%=other
             self.z%=other
@@ -393,7 +406,7 @@ class vec3:
         >>> print -a
         (-3.0000, -2.5000, 1.8000)
         """
-        return vec3(-self.x, -self.y, -self.z)
+        return _newvec3(-self.x, -self.y, -self.z)
 
     def __pos__(self):
         """
@@ -401,7 +414,7 @@ class vec3:
         >>> print +a
         (3.0000, 2.5000, -1.8000)
         """
-        return vec3(+self.x, +self.y, +self.z)
+        return _newvec3(+self.x, +self.y, +self.z)
 
     def __abs__(self):
         """Return the length of the vector.
@@ -471,7 +484,7 @@ class vec3:
         """
         
         if isinstance(other, vec3):
-            return vec3(self.y*other.z-self.z*other.y,
+            return _newvec3(self.y*other.z-self.z*other.y,
                         self.z*other.x-self.x*other.z,
                         self.x*other.y-self.y*other.x)
         else:
@@ -499,7 +512,7 @@ class vec3:
         """
 
         nlen = 1.0/math.sqrt(self*self)
-        return vec3(self.x*nlen, self.y*nlen, self.z*nlen)
+        return _newvec3(self.x*nlen, self.y*nlen, self.z*nlen)
 
     def angle(self, other):
         """Return angle (in radians) between self and other.
@@ -543,7 +556,7 @@ class vec3:
         dot = self*N
         k   = 1.0 - eta*eta*(1.0 - dot*dot)
         if k<0:
-            return vec3(0.0,0.0,0.0)
+            return _newvec3(0.0,0.0,0.0)
         else:
             return eta*self - (eta*dot + math.sqrt(k))*N
 
@@ -563,13 +576,13 @@ class vec3:
         z=abs(self.z)
         # Is x the smallest element? 
         if x<y and x<z:
-            return vec3(0.0, -self.z, self.y)
+            return _newvec3(0.0, -self.z, self.y)
         # Is y smallest element?
         elif y<z:
-            return vec3(-self.z, 0.0, self.x)
+            return _newvec3(-self.z, 0.0, self.x)
         # z is smallest
         else:
-            return vec3(-self.y, self.x, 0.0)
+            return _newvec3(-self.y, self.x, 0.0)
 
     def min(self):
         """Return the minimum value of the components.
@@ -640,6 +653,21 @@ class vec3:
             return 2
 
 
+_object_new = object.__new__
+
+# _newvec3
+def _newvec3(x, y, z):
+    """Create a vec3 without argument checks.
+
+    This is used internally to create the results of operations. The
+    arguments must already be floats.
+    """
+    v = _object_new(vec3)
+    v.x = x
+    v.y = y
+    v.z = z
+    return v
+
 ######################################################################
 def _test():
     import doctest, vec3
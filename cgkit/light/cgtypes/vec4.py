@@ -47,6 +47,8 @@ class vec4(object):
     This class represents a 4D vector.
     """
 
+    __slots__ = ("x", "y", "z", "w")
+
     def __init__(self, *args):
         """Constructor.
 
@@ -68,7 +70,14 @@ class vec4(object):
         v = vec4("4,5")   -> v = <4,5,0,0>        
         """
         
-        if len(args)==0:
+        if len(args)==4:
+            x,y,z,w = args
+            self.x = float(x)
+            self.y = float(y)
+            self.z = float(z)
+            self.w = float(w)
+
+        elif len(args)==0:
             self.x, self.y, self.z, self.w = (0.0, 0.0, 0.0, 0.0)
 
         elif len(args)==1:
@@ -79,7 +88,8 @@ class vec4(object):
                 self.x, self.y, self.z, self.w = (f, f, f, f)
             # vec4
             elif isinstance(args[0], vec4):
-                self.x, self.y, self.z, self.w = args[0]
+                v = args[0]
+                self.x, self.y, self.z, self.w = v.x, v.y, v.z, v.w
             # Tuple/List
             elif T==types.TupleType or T==types.ListType:
                 if len(args[0])==0:
@@ -128,16 +138,17 @@ class vec4(object):
             self.z = float(z)
             self.w = 0.0
 
-        elif len(args)==4:
-            x,y,z,w = args
-            self.x = float(x)
-            self.y = float(y)
-            self.z = float(z)
-            self.w = float(w)
-
         else:
             raise TypeError("vec4() takes at most 4 arguments")
 
+    def __getstate__(self):
+        return (self.x, self.y, self.z, self.w)
+
+    def __setstate__(self, state):
+        # Pickles from older versions contain the instance dictionary
+        if isinstance(state, dict):
+            state = (state["x"], state["y"], state["z"], state["w"])
+        self.x, self.y, self.z, self.w = state
 
     def __repr__(self):
         return 'vec4(%r, %r, %r, %r)'%(self.x, self.y, self.z, self.w)
@@ -235,7 +246,7 @@ class vec4(object):
         (0.7000, 1.2500, -1.3000, 0.5000)
         """
         if isinstance(other, vec4):
-            return vec4(self.x+other.x, self.y+other.y, self.z+other.z, self.w+other.w)
+            return _newvec4(self.x+other.x, self.y+other.y, self.z+other.z, self.w+other.w)
         else:
             raise TypeError("unsupported operand type for +")
 
@@ -248,7 +259,7 @@ class vec4(object):
         (1.3000, -0.2500, -2.3000, -0.1000)
         """
         if isinstance(other, vec4):
-            return vec4(self.x-other.x, self.y-other.y, self.z-other.z, self.w-other.w)
+            return _newvec4(self.x-other.x, self.y-other.y, self.z-other.z, self.w-other.w)
         else:
             raise TypeError("unsupported operand type for -")
 
@@ -268,7 +279,7 @@ class vec4(object):
         T = type(other)
         # vec4*scalar
         if T==types.FloatType or T==types.IntType or T==types.LongType:
-            return vec4(self.x*other, self.y*other, self.z*other, self.w*other)
+            return _newvec4(self.x*other, self.y*other, self.z*other, self.w*other)
         # vec4*vec4
         if isinstance(other, vec4):
             return self.x*other.x + self.y*other.y + self.z*other.z + self.w*other.w
@@ -292,7 +303,7 @@ class vec4(object):
         T = type(other)
         # vec4/scalar
         if T==types.FloatType or T==types.IntType or T==types.LongType:
-            return vec4(self.x/other, self.y/other, self.z/other, self.w/other)
+            return _newvec4(self.x/other, self.y/other, self.z/other, self.w/other)
         # unsupported
         else:
             raise TypeError("unsupported operand type for /")
@@ -307,10 +318,10 @@ class vec4(object):
         T = type(other)
         # vec4%scalar
         if T==types.FloatType or T==types.IntType or T==types.LongType:
-            return vec4(self.x%other, self.y%other, self.z%other, self.w%other)
+            return _newvec4(self.x%other, self.y%other, self.z%other, self.w%other)
         # vec4%vec4
         if isinstance(other, vec4):
-            return vec4(self.x%other.x, self.y%other.y, self.z%other.z, self.w%other.w)
+            return _newvec4(self.x%other.x, self.y%other.y, self.z%other.z, self.w%other.w)
         # unsupported
         else:
             raise TypeError("unsupported operand type for %")
@@ -422,7 +433,7 @@ class vec4(object):
         >>> print -a
         (-3.0000, -2.5000, 1.8000, -0.2000)
         """
-        return vec4(-self.x, -self.y, -self.z, -self.w)
+        return _newvec4(-self.x, -self.y, -self.z, -self.w)
 
     def __pos__(self):
         """
@@ -430,7 +441,7 @@ class vec4(object):
         >>> print +a
         (3.0000, 2.5000, -1.8000, 0.2000)
         """
-        return vec4(+self.x, +self.y, +self.z, +self.w)
+        return _newvec4(+self.x, +self.y, +self.z, +self.w)
 
     def __abs__(self):
         """Return the length of the vector.
@@ -513,7 +524,7 @@ class vec4(object):
         """
 
         nlen = 1.0/math.sqrt(self*self)
-        return vec4(self.x*nlen, self.y*nlen, self.z*nlen, self.w*nlen)
+        return _newvec4(self.x*nlen, self.y*nlen, self.z*nlen, self.w*nlen)
 
     def min(self):
         """Return the minimum value of the components.
@@ -605,6 +616,21 @@ class vec4(object):
     t = property(_getT, _setT, None, "4th component")
 
 
+_object_new = object.__new__
+
+# _newvec4
+def _newvec4(x, y, z, w):
+    """Create a vec4 without argument checks.
+
+    This is used internally to create the results of operations. The
+    arguments must already be floats.
+    """
+    v = _object_new(vec4)
+    v.x = x
+    v.y = y
+    v.z = z
+    v.w = w
+    return v
 
 ######################################################################
 
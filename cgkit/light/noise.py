@@ -34,30 +34,770 @@
 # ***** END LICENSE BLOCK *****
 # $Id: noise.py,v 1.3 2006/02/14 19:29:39 mbaas Exp $
 
-"""Dummy noise module for cgkit light.
+"""Noise functions for cgkit light.
 
-This module will allow importing the module without an error. An error will
-only be triggered when the module is actually used.
-This means the sl module can be imported and all non-noise related functions
-can still be used in the light version.
+This is a Python implementation of the noise functions from
+supportlib/src/noise.cpp. It uses the same permutation and gradient
+tables, so the results match the regular noise module (up to rounding
+errors).
+
+The functions take the same arguments as their counterparts in the
+regular noise module. Additionally, the coordinates may be given as
+numpy arrays in which case all points are evaluated in one call and
+the result is a numpy array as well:
+
+- A point argument may be an array of shape (n,d) (or any shape (...,d))
+  that contains points with d coordinates. Further arguments (such as
+  the time) must then be scalars or arrays with fewer dimensions.
+- Individual coordinates (x, y, z, t) may be arrays that are broadcast
+  against each other, so a grid can be evaluated by passing the result
+  of numpy.meshgrid() (the first argument is only interpreted as a
+  coordinate array if it is 1-dimensional or if another argument has at
+  least as many dimensions).
+
+The vector functions (vnoise, vsnoise, ...) return arrays with an
+additional last axis that holds the components of the result.
+
+The batch functions (noiseArray(), pnoiseArray(), ...) of the regular
+noise module are available as well. In the light version, the output
+must be a numpy array.
 """
 
-def noise(*args, **kwargs):
-    raise NotImplementedError("This function is not yet implemented in the light version of cgkit")
-
-snoise = noise
-cellnoise = noise
-scellnoise = noise
-fBm = noise
-turbulence = noise
-pnoise = noise
-spnoise = noise
-
-vnoise = noise
-vsnoise = noise
-vcellnoise = noise
-vscellnoise = noise
-vfBm = noise
-vturbulence = noise
-vpnoise = noise
-vspnoise = noise
+import math
+from cgtypes import vec3 as _vec3, vec4 as _vec4
+from _noisetabs import perm as _perm, uniform as _uniform
+from _noisetabs import grads2 as _grads2, grads3 as _grads3, grads4 as _grads4
+try:
+    import numpy
+    _numpy_available = True
+except ImportError:
+    _numpy_available = False
+
+# Gradient tables (key: dimension)
+_grads = {2:_grads2, 3:_grads3, 4:_grads4}
+
+# The order in which the lattice coordinates are hashed (see the tabindex
+# functions in noise.h). The first axis is the one that receives the
+# offset in the periodic vector functions.
+_hashorder = {2:(1,0), 3:(2,1,0), 4:(2,1,0,3)}
+
+# Offset that is added to the coordinates for each further component
+# of the vector noise functions
+_voffset = 10.0
+
+# Hash offsets for the components of the periodic vector noise functions
+_vpoffsets = (0, 37, 99, 105)
+
+# numpy versions of the tables (initialized by _arrayTables())
+_arraytabs = None
+
+# noise
+def noise(*args):
+    """noise(x[, y[, z[, t]]]) -> float
+
+    Returns a noise value (Perlin) in the range from 0 to 1. The arguments
+    can be up to 4 floating point values or a sequence with up to 4 floating
+    point values. Time can be specified separately.
+    """
+    coords, npoint, shape = _coords(args)
+    return _reshape(0.5*(_snoise(coords, shape)+1.0), shape)
+
+# snoise
+def snoise(*args):
+    """snoise(x[, y[, z[, t]]]) -> float
+
+    Returns a signed noise value (Perlin) in the range from -1 to 1.
+    A call to snoise(args) is equivalent to 2*noise(args)-1.
+    """
+    coords, npoint, shape = _coords(args)
+    return _reshape(_snoise(coords, shape), shape)
+
+# pnoise
+def pnoise(*args):
+    """pnoise(point, period) / pnoise(point, t, pperiod, tperiod) -> float
+
+    Periodic noise function. Basically this is the same than noise
+    but with a periodic return value: pnoise(point) = pnoise(point+period).
+    The time value can be either part of the point or it can be
+    specified separately. The point and period must always have the
+    same dimension. The return value is in the range from 0 to 1.
+    """
+    coords, period, shape = _periodicArgs(args)
+    return _reshape(0.5*(_snoise(coords, shape, period)+1.0), shape)
+
+# spnoise
+def spnoise(*args):
+    """spnoise(point, period) / spnoise(point, t, pperiod, tperiod) -> float
+
+    Signed periodic noise function. The return value is in the range
+    from -1 to 1. A call to spnoise(args) is equivalent to
+    2*pnoise(args)-1.
+    """
+    coords, period, shape = _periodicArgs(args)
+    return _reshape(_snoise(coords, shape, period), shape)
+
+# cellnoise
+def cellnoise(*args):
+    """cellnoise(x, y=0, z=0, t=0) -> float
+
+    Returns a cellnoise value in the range from 0 to 1. The return value
+    is constant between integer lattice points. The arguments can be up
+    to 4 floating point values or a sequence with up to 4 floating point
+    values. Time can be specified separately.
+    """
+    coords, npoint, shape = _coords(args)
+    return _reshape(_cellnoise(coords, shape), shape)
+
+# scellnoise
+def scellnoise(*args):
+    """scellnoise(x, y=0, z=0, t=0) -> float
+
+    Signed cell noise. The return value is in the range from -1 to 1.
+    A call to scellnoise(args) is equivalent to 2*cellnoise(args)-1.
+    """
+    coords, npoint, shape = _coords(args)
+    return _reshape(2.0*_cellnoise(coords, shape)-1.0, shape)
+
+# fBm
+def fBm(p, octaves, lacunarity=2.0, gain=0.5):
+    """fBm(point, octaves, lacunarity=2.0, gain=0.5) -> float
+
+    Fractional Brownian motion. The argument point must be a sequence of
+    either 2 or 3 float values (e.g. a vec3). This function is a sum of
+    noise values with different frequencies and amplitudes.
+    """
+    coords, shape = _octaveCoords(p)
+    res = 0.0
+    amp = 1.0
+    for i in range(octaves):
+        res += amp*_snoise(coords, shape)
+        amp *= gain
+        coords = [c*lacunarity for c in coords]
+    return _reshape(0.5*(res+1.0), shape)
+
+# turbulence
+def turbulence(p, octaves, lacunarity=2.0, gain=0.5):
+    """turbulence(point, octaves, lacunarity=2.0, gain=0.5) -> float
+
+    The code of the turbulence function is very similar to fBm. The
+    difference is that it sums up abs(snoise) instead of snoise.
+    However, the return value is in the range from 0 to 1 again.
+    """
+    coords, shape = _octaveCoords(p)
+    res = 0.0
+    amp = 1.0
+    for i in range(octaves):
+        res += amp*abs(_snoise(coords, shape))
+        amp *= gain
+        coords = [c*lacunarity for c in coords]
+    return _reshape(0.5*(res+1.0), shape)
+
+# vnoise
+def vnoise(*args):
+    """vnoise(x[, y[, z[, t]]]) -> vector
+
+    Vector version of noise(). The number of components of the result
+    matches the dimension of the input (a single float input returns
+    a float).
+    """
+    coords, npoint, shape = _coords(args)
+    res = _vsnoise(coords, shape, _numComponents(coords, npoint))
+    return _vecResult([0.5*(x+1.0) for x in res], shape)
+
+# vsnoise
+def vsnoise(*args):
+    """vsnoise(x[, y[, z[, t]]]) -> vector
+
+    Signed vector noise. The components are in the range from -1 to 1.
+    """
+    coords, npoint, shape = _coords(args)
+    res = _vsnoise(coords, shape, _numComponents(coords, npoint))
+    return _vecResult(res, shape)
+
+# vpnoise
+def vpnoise(*args):
+    """vpnoise(point, period) / vpnoise(point, t, pperiod, tperiod) -> noiseval
+
+    Periodic noise function. Basically this is the same than vnoise
+    but with a periodic return value: vpnoise(point) = vpnoise(point+period).
+    The time value can be either part of the point or it can be
+    specified separately. The point and period must always have the
+    same dimension. The components of the return value are in the range
+    from 0 to 1.
+    """
+    coords, period, shape = _periodicArgs(args)
+    res = _vsnoise(coords, shape, _numComponents(coords, 0), period)
+    return _vecResult([0.5*(x+1.0) for x in res], shape)
+
+# vspnoise
+def vspnoise(*args):
+    """vspnoise(point, period) / vspnoise(point, t, pperiod, tperiod) -> noiseval
+
+    Signed periodic vector noise. The components are in the range
+    from -1 to 1.
+    """
+    coords, period, shape = _periodicArgs(args)
+    res = _vsnoise(coords, shape, _numComponents(coords, 0), period)
+    return _vecResult(res, shape)
+
+# vcellnoise
+def vcellnoise(*args):
+    """vcellnoise(x[, y[, z[, t]]]) -> vector
+
+    Vector version of cellnoise(). The components are in the range
+    from 0 to 1.
+    """
+    coords, npoint, shape = _coords(args)
+    res = _vcellnoise(coords, shape, _numComponents(coords, npoint))
+    return _vecResult(res, shape)
+
+# vscellnoise
+def vscellnoise(*args):
+    """vscellnoise(x[, y[, z[, t]]]) -> vector
+
+    Signed vector cell noise. The components are in the range
+    from -1 to 1.
+    """
+    coords, npoint, shape = _coords(args)
+    res = _vcellnoise(coords, shape, _numComponents(coords, npoint))
+    return _vecResult([2.0*x-1.0 for x in res], shape)
+
+# vfBm
+def vfBm(p, octaves, lacunarity=2.0, gain=0.5):
+    """vfBm(point, octaves, lacunarity=2.0, gain=0.5) -> vec3
+
+    Vector version of fBm().
+    """
+    coords, shape = _octaveCoords(p)
+    res = [0.0, 0.0, 0.0]
+    amp = 1.0
+    for i in range(octaves):
+        res = [r+amp*x for r,x in zip(res, _vsnoise(coords, shape, 3))]
+        amp *= gain
+        coords = [c*lacunarity for c in coords]
+    return _vecResult([0.5*(r+1.0) for r in res], shape)
+
+# vturbulence
+def vturbulence(p, octaves, lacunarity=2.0, gain=0.5):
+    """vturbulence(point, octaves, lacunarity=2.0, gain=0.5) -> vec3
+
+    Vector version of turbulence().
+    """
+    coords, shape = _octaveCoords(p)
+    res = [0.0, 0.0, 0.0]
+    amp = 1.0
+    for i in range(octaves):
+        res = [r+amp*abs(x) for r,x in zip(res, _vsnoise(coords, shape, 3))]
+        amp *= gain
+        coords = [c*lacunarity for c in coords]
+    return _vecResult([0.5*(r+1.0) for r in res], shape)
+
+######################################################################
+# Batch versions (same interface as in the regular noise module)
+
+# noiseArray
+def noiseArray(points, out, dim=3):
+    """noiseArray(points, out, dim=3)
+
+    Evaluate noise() at many points. points contains dim (1-4) values
+    per point and out (a numpy array) receives one value per point.
+    """
+    _batch(noise, points, out, dim, False)
+
+# snoiseArray
+def snoiseArray(points, out, dim=3):
+    """snoiseArray(points, out, dim=3)
+
+    Batch version of snoise() (see noiseArray()).
+    """
+    _batch(snoise, points, out, dim, False)
+
+# cellnoiseArray
+def cellnoiseArray(points, out, dim=3):
+    """cellnoiseArray(points, out, dim=3)
+
+    Batch version of cellnoise() (see noiseArray()).
+    """
+    _batch(cellnoise, points, out, dim, False)
+
+# scellnoiseArray
+def scellnoiseArray(points, out, dim=3):
+    """scellnoiseArray(points, out, dim=3)
+
+    Batch version of scellnoise() (see noiseArray()).
+    """
+    _batch(scellnoise, points, out, dim, False)
+
+# vnoiseArray
+def vnoiseArray(points, out, dim=3):
+    """vnoiseArray(points, out, dim=3)
+
+    Batch version of vnoise(). out receives dim values per point
+    (see noiseArray()).
+    """
+    _batch(vnoise, points, out, dim, True)
+
+# vsnoiseArray
+def vsnoiseArray(points, out, dim=3):
+    """vsnoiseArray(points, out, dim=3)
+
+    Batch version of vsnoise() (see vnoiseArray()).
+    """
+    _batch(vsnoise, points, out, dim, True)
+
+# vcellnoiseArray
+def vcellnoiseArray(points, out, dim=3):
+    """vcellnoiseArray(points, out, dim=3)
+
+    Batch version of vcellnoise() (see vnoiseArray()).
+    """
+    _batch(vcellnoise, points, out, dim, True)
+
+# vscellnoiseArray
+def vscellnoiseArray(points, out, dim=3):
+    """vscellnoiseArray(points, out, dim=3)
+
+    Batch version of vscellnoise() (see vnoiseArray()).
+    """
+    _batch(vscellnoise, points, out, dim, True)
+
+# pnoiseArray
+def pnoiseArray(points, period, out):
+    """pnoiseArray(points, period, out)
+
+    Evaluate pnoise() at many points. period is a sequence of 1-4 ints
+    which also determines the dimension of the points (see noiseArray()).
+    """
+    _batch(lambda p: pnoise(p, period), points, out, len(period), False)
+
+# spnoiseArray
+def spnoiseArray(points, period, out):
+    """spnoiseArray(points, period, out)
+
+    Batch version of spnoise() (see pnoiseArray()).
+    """
+    _batch(lambda p: spnoise(p, period), points, out, len(period), False)
+
+# vpnoiseArray
+def vpnoiseArray(points, period, out):
+    """vpnoiseArray(points, period, out)
+
+    Batch version of vpnoise(). out receives one value per point
+    dimension (see pnoiseArray()).
+    """
+    _batch(lambda p: vpnoise(p, period), points, out, len(period), True)
+
+# vspnoiseArray
+def vspnoiseArray(points, period, out):
+    """vspnoiseArray(points, period, out)
+
+    Batch version of vspnoise() (see vpnoiseArray()).
+    """
+    _batch(lambda p: vspnoise(p, period), points, out, len(period), True)
+
+# fBmArray
+def fBmArray(points, out, octaves, lacunarity=2.0, gain=0.5):
+    """fBmArray(points, out, octaves, lacunarity=2.0, gain=0.5)
+
+    Evaluate fBm() at many 3D points (see noiseArray()).
+    """
+    _batch(lambda p: fBm(p, octaves, lacunarity, gain), points, out, 3, False)
+
+# turbulenceArray
+def turbulenceArray(points, out, octaves, lacunarity=2.0, gain=0.5):
+    """turbulenceArray(points, out, octaves, lacunarity=2.0, gain=0.5)
+
+    Evaluate turbulence() at many 3D points (see noiseArray()).
+    """
+    _batch(lambda p: turbulence(p, octaves, lacunarity, gain), points, out, 3, False)
+
+# vfBmArray
+def vfBmArray(points, out, octaves, lacunarity=2.0, gain=0.5):
+    """vfBmArray(points, out, octaves, lacunarity=2.0, gain=0.5)
+
+    Evaluate vfBm() at many 3D points. out receives 3 values per point.
+    """
+    _batch(lambda p: vfBm(p, octaves, lacunarity, gain), points, out, 3, True)
+
+# vturbulenceArray
+def vturbulenceArray(points, out, octaves, lacunarity=2.0, gain=0.5):
+    """vturbulenceArray(points, out, octaves, lacunarity=2.0, gain=0.5)
+
+    Evaluate vturbulence() at many 3D points. out receives 3 values per point.
+    """
+    _batch(lambda p: vturbulence(p, octaves, lacunarity, gain), points, out, 3, True)
+
+def _batch(func, points, out, dim, vec):
+    """Implementation of the batch functions.
+
+    func is called with an array of shape (n,dim) (or with the flat
+    array of x values if dim is 1) and returns the results which are
+    written into out.
+    """
+    if not _numpy_available:
+        raise ImportError("numpy is not available")
+    if dim<1 or dim>4:
+        raise ValueError("the point dimension must be between 1 and 4")
+    pnts = numpy.asarray(points, dtype=float).ravel()
+    if len(pnts)%dim!=0:
+        raise ValueError("The buffer size must be a multiple of the point size.")
+    if dim==1:
+        res = func(pnts)
+    else:
+        res = func(pnts.reshape(-1, dim))
+    res = res.ravel()
+    if out.size<len(res):
+        raise ValueError("The output buffer is too small.")
+    out.flat[:len(res)] = res
+
+######################################################################
+# Helpers
+
+def _isArray(x):
+    """Check if x is a numpy array."""
+    return _numpy_available and isinstance(x, numpy.ndarray)
+
+def _isPointArray(p, args):
+    """Check if the array p contains points or a single coordinate.
+
+    p is a point array if it has at least 2 dimensions and all further
+    arguments args have fewer dimensions than p (i.e. they are scalars
+    or per-point values such as the time). Otherwise p is an array of
+    individual coordinate values (e.g. the x values of a grid).
+    """
+    if p.ndim<2:
+        return False
+    for a in args:
+        if _isArray(a) and a.ndim>=p.ndim:
+            return False
+    return True
+
+def _coords(args, maxdim=4):
+    """Convert the arguments of a noise function into a list of coordinates.
+
+    The first argument may be a scalar, a sequence (e.g. a vec3) or a
+    numpy array (see _isPointArray()). The remaining arguments are
+    further coordinates (such as the time).
+
+    Returns a tuple (coords, npoint, shape). If none of the arguments
+    is an array, coords is a list of floats and shape is None. Otherwise,
+    coords is a list of flat float arrays of equal length and shape is
+    the shape of the broadcast input arrays. npoint is the number of
+    coordinates that were passed as a point (or 0).
+    """
+    if len(args)==0:
+        raise TypeError("the function takes at least 1 argument (0 given)")
+    p = args[0]
+    npoint = 0
+    if _isArray(p):
+        if _isPointArray(p, args[1:]):
+            npoint = p.shape[-1]
+            coords = [p[...,i] for i in range(npoint)]
+        else:
+            coords = [p]
+    elif hasattr(p, "__len__"):
+        coords = list(p)
+        npoint = len(coords)
+    else:
+        coords = [p]
+    coords += list(args[1:])
+
+    if len(coords)<1 or len(coords)>maxdim:
+        raise TypeError("between 1 and %d coordinates expected (%d given)"%(maxdim, len(coords)))
+
+    for c in coords:
+        if _isArray(c):
+            break
+    else:
+        return map(float, coords), npoint, None
+
+    arrays = numpy.broadcast_arrays(*[numpy.asarray(c, dtype=float) for c in coords])
+    shape = arrays[0].shape
+    return [a.ravel() for a in arrays], npoint, shape
+
+def _periodicArgs(args):
+    """Convert the arguments of a periodic noise function.
+
+    args is either (point, period) or (point, t, pperiod, tperiod).
+    Returns a tuple (coords, period, shape) (see _coords()).
+    """
+    if len(args)==2:
+        p, pp = args
+        coords, npoint, shape = _coords((p,))
+        period = _sequence(pp)
+    elif len(args)==4:
+        p, t, pp, pt = args
+        coords, npoint, shape = _coords((p,t))
+        period = _sequence(pp)+[pt]
+    else:
+        raise TypeError("only 2 or 4 arguments allowed")
+    if len(coords)!=len(period):
+        raise ValueError("Invalid arguments")
+    period = map(int, period)
+    if 0 in period:
+        raise ValueError("period must not be zero")
+    return coords, period, shape
+
+def _sequence(x):
+    """Return x as a list."""
+    if hasattr(x, "__len__"):
+        return list(x)
+    else:
+        return [x]
+
+def _reshape(res, shape):
+    """Bring a flat result array into the shape of the input arrays."""
+    if shape is None:
+        return res
+    else:
+        return res.reshape(shape)
+
+def _zero(coords, shape):
+    """Return a zero coordinate that matches the given coordinates."""
+    if shape is None:
+        return 0.0
+    else:
+        return numpy.zeros(len(coords[0]))
+
+def _numComponents(coords, npoint):
+    """Return the number of components of a vector noise result.
+
+    Usually, this is the dimension of the input. A 3D point with an
+    extra time value returns a 3D vector.
+    """
+    if npoint==3 and len(coords)==4:
+        return 3
+    return len(coords)
+
+def _vecResult(res, shape):
+    """Convert a list of components into the result of a vector function.
+
+    res is a list with up to 4 components (floats or flat arrays).
+    """
+    n = len(res)
+    if shape is not None:
+        if n==1:
+            return res[0].reshape(shape)
+        return numpy.column_stack(res).reshape(shape+(n,))
+    if n==1:
+        return res[0]
+    elif n==2:
+        return tuple(res)
+    elif n==3:
+        return _vec3(res)
+    else:
+        return _vec4(res)
+
+def _octaveCoords(p):
+    """Return the 3D coordinates for fBm() and turbulence().
+
+    p is a point with 2 or 3 coordinates (or an array of such points).
+    Returns a tuple (coords, shape) (see _coords()).
+    """
+    coords, npoint, shape = _coords((p,), 3)
+    while len(coords)<3:
+        coords.append(_zero(coords, shape))
+    return coords, shape
+
+def _snoise(coords, shape, period=None):
+    """Evaluate the signed noise function.
+
+    Returns a float or a flat array (if shape is not None).
+    """
+    # The 1D version is computed as 2D noise with y=0
+    if len(coords)==1:
+        coords = coords+[_zero(coords, shape)]
+        if period is not None:
+            period = period+[1]
+    if shape is None:
+        return _snoiseScalar(coords, period, 0)
+    else:
+        return _snoiseArray(coords, period, 0)
+
+def _vsnoise(coords, shape, ncomp, period=None):
+    """Evaluate the signed vector noise function.
+
+    Returns a list with ncomp components (floats or flat arrays). For each
+    further component, the next coordinate gets offset (and the periodic
+    version uses a different hash offset).
+    """
+    if len(coords)==1:
+        # The 1D version returns a scalar (as in the C++ version)
+        return [_snoise(coords, shape, period)]
+    if shape is None:
+        func = _snoiseScalar
+    else:
+        func = _snoiseArray
+    coords = list(coords)
+    res = []
+    for i in range(ncomp):
+        if i>0:
+            coords[i-1] = coords[i-1]+_voffset
+        if period is None:
+            res.append(func(coords, None, 0))
+        else:
+            res.append(func(coords, period, _vpoffsets[i]))
+    return res
+
+def _cellnoise(coords, shape):
+    """Evaluate the cell noise function.
+
+    Returns a float or a flat array (if shape is not None).
+    """
+    coords = list(coords)
+    while len(coords)<4:
+        coords.append(_zero(coords, shape))
+    if shape is None:
+        return _cellnoiseScalar(coords)
+    else:
+        return _cellnoiseArray(coords)
+
+def _vcellnoise(coords, shape, ncomp):
+    """Evaluate the vector cell noise function.
+
+    Returns a list with ncomp components (floats or flat arrays).
+    """
+    if len(coords)==1:
+        return [_cellnoise(coords, shape)]
+    coords = list(coords)
+    res = []
+    for i in range(ncomp):
+        if i>0:
+            coords[i-1] = coords[i-1]+_voffset
+        res.append(_cellnoise(coords, shape))
+    return res
+
+######################################################################
+# Scalar implementation
+
+def _imod(a, b):
+    """Return a mod b (same as imod() in noise.h)."""
+    a = int(math.fmod(a, b))
+    if a<0:
+        a += b
+    return a
+
+def _snoiseScalar(c, period, offset):
+    """Signed noise at a single point.
+
+    c is a list with 2-4 floats. period is None or a list of integer
+    periods (one per coordinate) and offset is added to the first hashed
+    coordinate in the periodic case.
+    Returns a value between -1 and 1.
+    """
+    d = len(c)
+    grads = _grads[d]
+    order = _hashorder[d]
+    first = order[0]
+    ic = [int(math.floor(x)) for x in c]
+    r0 = [x-i for x,i in zip(c, ic)]
+    r1 = [r-1.0 for r in r0]
+    s = [r*r*(3.0-2.0*r) for r in r0]
+
+    # Evaluate the gradients at the cell corners (bit k of the corner
+    # index selects the upper cell boundary along axis k)
+    vals = []
+    for corner in range(1<<d):
+        cc = []
+        r = []
+        for k in range(d):
+            if corner & (1<<k):
+                cc.append(ic[k]+1)
+                r.append(r1[k])
+            else:
+                cc.append(ic[k])
+                r.append(r0[k])
+        if period is not None:
+            cc = map(_imod, cc, period)
+            cc[first] += offset
+        h = _perm[cc[first]&0xff]
+        for k in order[1:]:
+            h = _perm[(cc[k]+h)&0xff]
+        g = grads[h]
+        v = g[0]*r[0]
+        for k in range(1,d):
+            v += g[k]*r[k]
+        vals.append(v)
+
+    # Interpolate along x, then along y, etc.
+    for k in range(d):
+        t = s[k]
+        vals = [a+(b-a)*t for a,b in zip(vals[0::2], vals[1::2])]
+    return vals[0]
+
+def _cellnoiseScalar(c):
+    """Cell noise at a single 4D point."""
+    ix,iy,iz,it = [int(math.floor(x)) for x in c]
+    return _uniform[_perm[(it + _perm[(ix + _perm[(iy + _perm[iz&0xff])&0xff])&0xff])&0xff]]
+
+######################################################################
+# Array implementation
+
+def _arrayTables():
+    """Return the numpy versions of the noise tables.
+
+    Returns a tuple (perm, uniform, grads) where grads is a dict with
+    the gradient tables.
+    """
+    global _arraytabs
+    if _arraytabs is None:
+        if not _numpy_available:
+            raise ImportError("numpy is not available")
+        grads = {}
+        for d,tab in _grads.items():
+            grads[d] = numpy.array(tab, dtype=float)
+        _arraytabs = (numpy.array(_perm, dtype=int),
+                      numpy.array(_uniform, dtype=float),
+                      grads)
+    return _arraytabs
+
+def _snoiseArray(c, period, offset):
+    """Array version of _snoiseScalar().
+
+    c is a list with 2-4 flat float arrays of equal length.
+    """
+    perm, uniform, grads = _arrayTables()
+    d = len(c)
+    grads = grads[d]
+    order = _hashorder[d]
+    first = order[0]
+    ic = [numpy.floor(x).astype(int) for x in c]
+    r0 = [x-i for x,i in zip(c, ic)]
+    r1 = [r-1.0 for r in r0]
+    s = [r*r*(3.0-2.0*r) for r in r0]
+
+    vals = []
+    for corner in range(1<<d):
+        cc = []
+        r = []
+        for k in range(d):
+            if corner & (1<<k):
+                cc.append(ic[k]+1)
+                r.append(r1[k])
+            else:
+                cc.append(ic[k])
+                r.append(r0[k])
+        if period is not None:
+            for k in range(d):
+                a = numpy.fmod(cc[k], period[k])
+                cc[k] = numpy.where(a<0, a+period[k], a)
+            cc[first] = cc[first]+offset
+        h = perm[cc[first]&0xff]
+        for k in order[1:]:
+            h = perm[(cc[k]+h)&0xff]
+        g = grads[h]
+        v = g[:,0]*r[0]
+        for k in range(1,d):
+            v += g[:,k]*r[k]
+        vals.append(v)
+
+    for k in range(d):
+        t = s[k]
+        vals = [v0+(v1-v0)*t for v0,v1 in zip(vals[0::2], vals[1::2])]
+    return vals[0]
+
+def _cellnoiseArray(c):
+    """Array version of _cellnoiseScalar()."""
+    perm, uniform, grads = _arrayTables()
+    ix,iy,iz,it = [numpy.floor(x).astype(int) for x in c]
+    return uniform[perm[(it + perm[(ix + perm[(iy + perm[iz&0xff])&0xff])&0xff])&0xff]]
@@ -58,6 +58,7 @@ class MAImporter(mayaascii.DefaultMAReader):
 
     def __init__(self):
         mayaascii.DefaultMAReader.__init__(self)
+        self.selection = None
 
     # extension
     def extension():
@@ -72,14 +73,35 @@ class MAImporter(mayaascii.DefaultMAReader):
     description = staticmethod(description)
 
     # importFile
-    def importFile(self, filename, parent=None):
-        """Import a MA file."""
+    def importFile(self, filename, parent=None, nodes=None, nodetypes=None):
+        """Import a MA file.
+
+        nodes and nodetypes can be used to import only a part of the
+        file. nodes is a list of node names (which may contain
+        wildcards) and nodetypes a list of Maya node types. If any of them
+        is given, only the matching nodes (including their DAG children)
+        and the nodes they depend on are imported. The attribute values
+        of all other nodes are skipped while the file is read.
+        """
 
         self.root_parent = parent
 
+        # The full names of the nodes to import (None = all nodes)
+        self.selection = None
+        if nodes!=None or nodetypes!=None:
+            # Read the graph without any attribute values to determine
+            # which nodes are required
+            scanner = mayaascii.DefaultMAReader()
+            f = open(filename)
+            try:
+                scanner.read(f, attrnodes=set())
+            finally:
+                f.close()
+            self.selection = scanner.dependencyClosure(nodes, nodetypes)
+
         f = open(filename)
         try:
-            self.read(f)
+            self.read(f, attrnodes=self.selection)
         finally:
             f.close()
 
@@ -97,6 +119,8 @@ class MAImporter(mayaascii.DefaultMAReader):
         # Process the nodes by calling an appropriate handler method
         # onNode<Type>(node) for each node type...
         for node in self.nodelist:
+            if self.selection!=None and node.getFullName() not in self.selection:
+                continue
             s = node.nodetype
             handlername = "onNode%s%s"%(s[0].upper(), s[1:])
             handler = getattr(self, handlername, None)
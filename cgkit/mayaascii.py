@@ -34,7 +34,7 @@
 # ***** END LICENSE BLOCK *****
 # $Id: mayaascii.py,v 1.10 2005/06/15 19:18:46 mbaas Exp $
 
-import sys, types, simplecpp
+import sys, types, fnmatch, simplecpp
 
 # The keywords that may be used for the value True
 _true_keywords = ["true", "on", "yes"]
@@ -1162,6 +1162,9 @@ class MAReader:
         self.args = None
         # This flag specifies whether reading the file should continue or not
         self.continue_flag = True
+        # This flag is True while the remainder of an ignored command is
+        # being skipped (see ignoreCommand())
+        self.skip_cmd = False
 
         # The line number where the current MEL command began
         self.cmd_start_linenr = None
@@ -1192,6 +1195,16 @@ class MAReader:
         """
         self.continue_flag = False
 
+    def ignoreCommand(self, cmd):
+        """Check whether a MEL command should be skipped.
+
+        This method is called whenever a new command begins. If it
+        returns True, the remaining arguments of the command are not
+        tokenized and no callback is invoked for the command. The
+        default implementation always returns False.
+        """
+        return False
+
     def begin(self):
         """Callback that is invoked before the file is read."""
         pass
@@ -1430,6 +1443,19 @@ class MAReader:
         line). This method splits the arguments and calls onCommand()
         for every command found.
         """
+        # Is the current command ignored? Then only search for its end
+        # (without splitting the line into tokens)
+        if self.skip_cmd:
+            n = self.findCommandEnd(s)
+            if n==-1:
+                return
+            self.skip_cmd = False
+            self.new_cmd = True
+            self.cmd = None
+            self.args = []
+            self.processCommands(s[n+1:])
+            return
+        
         # Split the command into tokens...
         a,n = self.splitCommand(s)
         if a!=[]:
@@ -1440,6 +1466,12 @@ class MAReader:
                 self.args = a[1:]
                 # Store the line number where the command began
                 self.cmd_start_linenr = self.cpp.context.start_linenr
+                # Skip the command if it should be ignored...
+                if self.ignoreCommand(self.cmd):
+                    if n==-1:
+                        self.skip_cmd = True
+                        return
+                    self.cmd = None
             else:
                 self.args += a
 
@@ -1495,6 +1527,27 @@ class MAReader:
                     n += e+1
                 return s[:b].split() + [s[b:e+1]] + s2, n
 
+    # findCommandEnd
+    def findCommandEnd(self, s):
+        """Return the position of the ';' that terminates a command.
+
+        The return value is the same position that splitCommand() would
+        return but the string is not split into tokens. Semicolons inside
+        quoted strings are ignored. -1 is returned if the string does not
+        contain the end of the command.
+        """
+        offset = 0
+        while 1:
+            b,e = self.findString(s[offset:])
+            n = s.find(";", offset)
+            if n==-1:
+                return -1
+            if b==None or n<offset+b:
+                return n
+            if e==None:
+                return -1
+            offset += e+1
+
     # findString
     def findString(self, s):
         """Find the first string occurence.
@@ -1537,9 +1590,28 @@ class DefaultMAReader(MAReader):
     A derived class only has to implement the end() callback and
     process the graph as desired. All created Node objects are available
     in the attribute self.nodelist.
+
+    If only a part of the file is of interest, a set of node names can
+    be passed to read(). In this case, all nodes and connections are
+    still created, but the attribute values of the remaining nodes are
+    skipped while the file is parsed. The set of names can be obtained
+    from a previous read using dependencyClosure().
     """
 
-    def read(self, f):
+    def read(self, f, attrnodes=None):
+        """Read a MA file.
+
+        f is a file-like object or the name of a file. attrnodes is
+        either None or a set of full node names. If a set is given, only
+        the attributes of the nodes in this set are stored, the setAttr
+        commands of all other nodes are ignored.
+        """
+        # The set of full node names whose attributes are stored
+        # (None = all nodes)
+        self.attrnodes = attrnodes
+        # True if the setAttr commands of the current node are skipped
+        self.skip_attrs = False
+        
         # A dict with imported Node objects
         # Key: Node name (without path) / Value: Node object
         # If the node name is not unique anymore, the value contains None.
@@ -1565,7 +1637,7 @@ class DefaultMAReader(MAReader):
 #            opts[name] = map(lambda x: stripQuotes(x), opts[name])
             
         node = self.createNode(nodetype, opts)
-        self.currentnode = node
+        self.setCurrentNode(node)
 
     # onSelect
     def onSelect(self, objects, opts):
@@ -1581,7 +1653,12 @@ class DefaultMAReader(MAReader):
         if len(objects)!=1:
             raise ValueError("%s, %d: The select command contains more than one object."%(self.filename, self.linenr))
 
-        self.currentnode = self.findNode(objects[0], create=True)
+        self.setCurrentNode(self.findNode(objects[0], create=True))
+
+    # ignoreCommand
+    def ignoreCommand(self, cmd):
+        """Skip the setAttr commands of nodes that are not selected."""
+        return self.skip_attrs and cmd=="setAttr"
 
     # onSetAttr
     def onSetAttr(self, attr, vals, opts):
@@ -1642,6 +1719,79 @@ class DefaultMAReader(MAReader):
             dn.addInConnection(dattr, snode, sattr)
 
 
+    # setCurrentNode
+    def setCurrentNode(self, node):
+        """Make a node the current node.
+
+        node is the Node object that will receive subsequent setAttr
+        commands (may be None).
+        """
+        self.currentnode = node
+        self.skip_attrs = (self.attrnodes!=None and
+                           node!=None and
+                           node.getFullName() not in self.attrnodes)
+
+    # dependencyClosure
+    def dependencyClosure(self, names=None, nodetypes=None):
+        """Return the names of all nodes that a selection of nodes depends on.
+
+        names is a list of node names that may contain the shell-style
+        wildcards from the fnmatch module. A name may either be matched
+        against the node name or the full DAG path. nodetypes is a list
+        of node types. A node is selected if it matches a name or a type.
+        The selection is extended by the DAG children of the selected
+        nodes, by all nodes that are connected to an input of a required
+        node (via connectAttr) and by the DAG parents of all required nodes.
+
+        The return value is a set containing the full names of the
+        required nodes. It can be passed to read() to skip the attribute
+        values of all other nodes.
+        """
+        if names==None:
+            names = []
+        if nodetypes==None:
+            nodetypes = []
+
+        # Collect the initially selected nodes (including their children)
+        stack = []
+        for node in self.nodelist:
+            if node.nodetype in nodetypes:
+                stack.append(node)
+                continue
+            nodename = node.getName()
+            fullname = node.getFullName()
+            for pattern in names:
+                if (fnmatch.fnmatchcase(nodename, pattern) or
+                    fnmatch.fnmatchcase(fullname, pattern)):
+                    stack.append(node)
+                    break
+        todo = list(stack)
+        while todo:
+            node = todo.pop()
+            children = list(node.iterChildren())
+            stack.extend(children)
+            todo.extend(children)
+
+        # Follow the input connections and the parents...
+        res = set()
+        while stack:
+            node = stack.pop()
+            fullname = node.getFullName()
+            if fullname in res:
+                continue
+            res.add(fullname)
+            parent = node.getParent()
+            if parent!=None:
+                stack.append(parent)
+            for nodename,attrname in node.in_connections.values():
+                try:
+                    srcnode = self.findNode(nodename)
+                except KeyError:
+                    continue
+                if srcnode!=None:
+                    stack.append(srcnode)
+        return res
+
     # findNode
     def findNode(self, path, create=False):
         """Return the Node object corresponding to a particular path.
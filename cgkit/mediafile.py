@@ -36,6 +36,8 @@
 import sys
 import fractions
 import ctypes
+import threading
+import collections
 from ffmpeg import decls, cppdefs, avutil, swscale, avformat, avcodec
 
 try:
@@ -67,9 +69,95 @@ HEIGHT_WIDTH = 101
 SEPARATE_CHANNELS = 200
 COMBINED_CHANNELS = 201
 
+# AV_NOPTS_VALUE as a signed 64 bit value (as it appears in the int64_t fields)
+_AV_NOPTS = cppdefs.AV_NOPTS_VALUE-(1<<64)
+# AVIndexEntry flag for key frames
+_AVINDEX_KEYFRAME = 1
+
 class MediaFileError(Exception):
     pass
 
+def _createNumpyFrame(size, pixelFormat, pixelAccess, colorAccess):
+    """Allocate a numpy array that can receive a converted video frame.
+    
+    size is the (width, height) tuple of the video frame. The remaining
+    arguments are the ones from VideoData.numpyArray().
+    Returns a tuple (array, dstPixFmt, numChannels) where dstPixFmt is the
+    ffmpeg PIX_FMT_* value that sws_scale() has to convert into.
+    """
+    # Check the pixelAccess value...
+    if pixelAccess not in [WIDTH_HEIGHT, HEIGHT_WIDTH]:
+        raise ValueError("Invalid pixelAcess value")
+    
+    # Check the colorAccess value...
+    if colorAccess not in [SEPARATE_CHANNELS, COMBINED_CHANNELS]:
+        raise ValueError("Invalid colorAccess value")
+    
+    # Check the pixel format...
+    numChannels = None
+    dstPixFmt = None
+    if pixelFormat==RGB:
+        numChannels = 3
+        dstPixFmt = decls.PIX_FMT_RGB24
+    elif pixelFormat==BGR:
+        numChannels = 3
+        dstPixFmt = decls.PIX_FMT_BGR24
+    elif pixelFormat==RGBA:
+        numChannels = 4
+        dstPixFmt = decls.PIX_FMT_RGBA
+    elif pixelFormat==ARGB:
+        numChannels = 4
+        dstPixFmt = decls.PIX_FMT_ARGB
+    elif pixelFormat==ABGR:
+        numChannels = 4
+        dstPixFmt = decls.PIX_FMT_ABGR
+    elif pixelFormat==BGRA:
+        numChannels = 4
+        dstPixFmt = decls.PIX_FMT_BGRA
+    elif pixelFormat==GRAY:
+        numChannels = 1
+        dstPixFmt = decls.PIX_FMT_GRAY8
+    else:
+        raise ValueError("Invalid pixelFormat value")
+
+    width,height = size
+    # Allocate the numpy array that will hold the converted image.
+    # The memory layout of the buffer is always so that the image is stored
+    # in rows and all the channels are stored together with a pixel.
+    # Example: Row 0: RGB-RGB-RGB-RGB...
+    #          Row 1: RGB-RGB-RGB-RGB...
+    #          ...
+    # To get from one channel to the next channel, you always have to add 1 byte
+    # (for int8 channels). To get to the next x position, you have to add
+    # numChannels bytes and to get to the next y position you have to add
+    # width*numChannels bytes.
+    # The pixelAccess and colorAccess parameters don't affect this memory
+    # layout, they only affect how a pixel is accessed via numpy.
+    if colorAccess==SEPARATE_CHANNELS:
+        # Allocate a RGB buffer...
+        if pixelAccess==WIDTH_HEIGHT:
+            arr = numpy.empty((width,height,numChannels), dtype=numpy.uint8)
+            # Adjust the strides so that image rows are consecutive
+            arr.strides = (numChannels, numChannels*width, 1)
+        else:
+            arr = numpy.empty((height,width,numChannels), dtype=numpy.uint8)
+    else:
+        if numChannels not in [1,4]:
+            raise ValueError("COMBINED_CHANNELS pixel access can only be used with 1-channel or 4-channel pixel formats")
+        
+        if numChannels==1:
+            dtype = numpy.uint8
+        else:
+            dtype = numpy.uint32
+        
+        # Allocate a RGBA buffer (where a RGBA value is stored as a uint32)
+        if pixelAccess==WIDTH_HEIGHT:
+            arr = numpy.empty((width,height), dtype=dtype, order="F")
+        else:
+            arr = numpy.empty((height,width), dtype=dtype)
+
+    return arr, dstPixFmt, numChannels
+
 class VideoData:
     """Decoded image data.
     
@@ -201,76 +289,8 @@ class VideoData:
         the image data and the _lineSizes and _dataPtrs arrays for the sws_scale()
         call.
         """
-        # Check the pixelAccess value...
-        if pixelAccess not in [WIDTH_HEIGHT, HEIGHT_WIDTH]:
-            raise ValueError("Invalid pixelAcess value")
-        
-        # Check the colorAccess value...
-        if colorAccess not in [SEPARATE_CHANNELS, COMBINED_CHANNELS]:
-            raise ValueError("Invalid colorAccess value")
-        
-        # Check the pixel format...
-        numChannels = None
-        dstPixFmt = None
-        if pixelFormat==RGB:
-            numChannels = 3
-            dstPixFmt = decls.PIX_FMT_RGB24
-        elif pixelFormat==BGR:
-            numChannels = 3
-            dstPixFmt = decls.PIX_FMT_BGR24
-        elif pixelFormat==RGBA:
-            numChannels = 4
-            dstPixFmt = decls.PIX_FMT_RGBA
-        elif pixelFormat==ARGB:
-            numChannels = 4
-            dstPixFmt = decls.PIX_FMT_ARGB
-        elif pixelFormat==ABGR:
-            numChannels = 4
-            dstPixFmt = decls.PIX_FMT_ABGR
-        elif pixelFormat==BGRA:
-            numChannels = 4
-            dstPixFmt = decls.PIX_FMT_BGRA
-        elif pixelFormat==GRAY:
-            numChannels = 1
-            dstPixFmt = decls.PIX_FMT_GRAY8
-        else:
-            raise ValueError("Invalid pixelFormat value")
-
+        self._numpyArray,dstPixFmt,numChannels = _createNumpyFrame(self.size, pixelFormat, pixelAccess, colorAccess)
         width,height = self.size
-        # Allocate the numpy array that will hold the converted image.
-        # The memory layout of the buffer is always so that the image is stored
-        # in rows and all the channels are stored together with a pixel.
-        # Example: Row 0: RGB-RGB-RGB-RGB...
-        #          Row 1: RGB-RGB-RGB-RGB...
-        #          ...
-        # To get from one channel to the next channel, you always have to add 1 byte
-        # (for int8 channels). To get to the next x position, you have to add
-        # numChannels bytes and to get to the next y position you have to add
-        # width*numChannels bytes.
-        # The pixelAccess and colorAccess parameters don't affect this memory
-        # layout, they only affect how a pixel is accessed via numpy.
-        if colorAccess==SEPARATE_CHANNELS:
-            # Allocate a RGB buffer...
-            if pixelAccess==WIDTH_HEIGHT:
-                self._numpyArray = numpy.empty((width,height,numChannels), dtype=numpy.uint8)
-                # Adjust the strides so that image rows are consecutive
-                self._numpyArray.strides = (numChannels, numChannels*width, 1)
-            else:
-                self._numpyArray = numpy.empty((height,width,numChannels), dtype=numpy.uint8)
-        else:
-            if numChannels not in [1,4]:
-                raise ValueError("COMBINED_CHANNELS pixel access can only be used with 1-channel or 4-channel pixel formats")
-            
-            if numChannels==1:
-                dtype = numpy.uint8
-            else:
-                dtype = numpy.uint32
-            
-            # Allocate a RGBA buffer (where a RGBA value is stored as a uint32)
-            if pixelAccess==WIDTH_HEIGHT:
-                self._numpyArray = numpy.empty((width,height), dtype=dtype, order="F")
-            else:
-                self._numpyArray = numpy.empty((height,width), dtype=dtype)
 
         # Free any previously allocated context 
         if self._numpySwsCtx is not None:
@@ -663,6 +683,446 @@ class VideoStream_ffmpeg(StreamBase_ffmpeg):
             return None
 
 
+class VideoFrame(object):
+    """A video frame that was read by a VideoReader_ffmpeg object.
+    
+    The numpy array that contains the image is one of the preallocated
+    buffers of the reader. It stays valid until release() is called, after
+    that the buffer is reused for another frame.
+    """
+    def __init__(self, reader, buffer, timestamp, frameIndex, keyFrame):
+        # The parent reader (VideoReader_ffmpeg)
+        self._reader = reader
+        # The parent stream object (VideoStream_ffmpeg)
+        self.stream = reader.stream
+        # Index of the buffer in the reader's buffer ring
+        self._buffer = buffer
+        # The numpy array containing the converted image
+        self.array = reader._buffers[buffer]
+        # Presentation timestamp in stream time base units (int or None)
+        self.timestamp = timestamp
+        # Presentation timestamp in seconds (float or None)
+        if timestamp is None:
+            self.pts = None
+        else:
+            self.pts = float(timestamp*reader.stream.timeBase)
+        # The frame number (int)
+        self.frameIndex = frameIndex
+        self._keyFrame = keyFrame
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, errorType, errorValue, traceback):
+        self.release()
+        return False
+
+    def isKeyFrame(self):
+        """Check whether the frame is a key frame or not.
+        """
+        return self._keyFrame
+
+    def release(self):
+        """Return the buffer of the frame to the reader.
+        
+        The numpy array must not be used anymore after this call. Releasing
+        a frame more than once has no effect.
+        """
+        if self._buffer is not None:
+            self._reader._releaseBuffer(self._buffer)
+            self._buffer = None
+            self.array = None
+
+
+class VideoReader_ffmpeg(object):
+    """Prefetching video frame reader.
+    
+    The frames of one video stream are decoded and converted on a worker
+    thread into a fixed number of preallocated numpy arrays. The frames are
+    returned as VideoFrame objects which have to be released once they
+    are no longer needed.
+    The ffmpeg calls release the GIL, so decoding runs concurrently with
+    the processing of the previous frames.
+    
+    A reader must always be closed by calling close() (or by using it in
+    a with statement). The worker thread keeps a reference to the reader,
+    so an unclosed reader is never garbage collected and keeps decoding
+    into its buffers.
+    """
+    
+    def __init__(self, media, stream, numBuffers=4, pixelFormat=RGB, pixelAccess=WIDTH_HEIGHT, colorAccess=SEPARATE_CHANNELS):
+        """Constructor.
+        
+        media is the Media_Read_ffmpeg object and stream the VideoStream_ffmpeg
+        object whose frames should be read. numBuffers is the number of
+        frames that can be in flight at the same time. The remaining
+        arguments determine the layout of the arrays (see VideoData.numpyArray()).
+        """
+        object.__init__(self)
+        
+        self.media = media
+        self.stream = stream
+
+        # The AVFrame that receives the decoded frames (only used by the worker thread)
+        self._frame = None
+        # The sws context for the conversion
+        self._swsCtx = None
+        # The worker thread (None if it isn't running)
+        self._thread = None
+
+        global _numpyImportException
+        if _numpyImportException is not None:
+            raise _numpyImportException
+        if numBuffers<1:
+            raise ValueError("At least one frame buffer is required")
+        
+        # The preallocated frame buffers (numpy arrays) and the corresponding
+        # uint8*[4] data pointer arrays for sws_scale()
+        self._buffers = []
+        self._dataPtrs = []
+        DataPtrType = ctypes.POINTER(ctypes.c_uint8)
+        for i in range(numBuffers):
+            arr,dstPixFmt,numChannels = _createNumpyFrame(stream.size, pixelFormat, pixelAccess, colorAccess)
+            self._buffers.append(arr)
+            self._dataPtrs.append((4*DataPtrType)(arr.ctypes.data_as(DataPtrType), None, None, None))
+        width,height = stream.size
+        self._lineSizes = (4*ctypes.c_int)(numChannels*width,0,0,0)
+        
+        # The following attributes are shared with the worker thread and
+        # are protected by the condition variable.
+        self._cond = threading.Condition()
+        # Indices of the buffers that can be filled by the worker thread
+        self._freeBuffers = range(numBuffers)
+        # The VideoFrame objects that are ready to be returned
+        self._readyFrames = collections.deque()
+        # The number of frames that have been returned but not released yet
+        self._numOutstanding = 0
+        # Flag that asks the worker thread to stop
+        self._stopRequested = False
+        # Flag that indicates that the worker thread has finished
+        self._done = False
+        # Exception info if the worker thread was terminated by an exception
+        self._error = None
+        
+        # Index of the seek target (frames before it are skipped)
+        self._skipUntil = None
+        # The index of the next frame (used when there are no time stamps).
+        # None if the index is unknown (after a seek without stream index)
+        self._nextIndex = 0
+
+        try:
+            self._frame = avcodec.avcodec_alloc_frame()
+            if self._frame is None:
+                raise MemoryError("Failed to allocate AVFrame object")
+            self._swsCtx = swscale.sws_getContext(width, height, stream._codecCtx.pix_fmt, 
+                                                  width, height, dstPixFmt, 1)
+            self._startThread()
+        except:
+            self.close()
+            raise
+
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, errorType, errorValue, traceback):
+        self.close()
+        return False
+    
+    def __iter__(self):
+        while True:
+            frame = self.nextFrame()
+            if frame is None:
+                break
+            yield frame
+    
+    def close(self):
+        """Stop the worker thread and free the resources.
+        
+        Frames that have not been released yet stay valid.
+        """
+        self._stopThread()
+        if self._swsCtx is not None:
+            swscale.sws_freeContext(self._swsCtx)
+            self._swsCtx = None
+        if self._frame is not None:
+            avutil.av_free(self._frame)
+            self._frame = None
+        if self.media is not None:
+            self.media._videoReaderClosed(self)
+            self.media = None
+
+    def nextFrame(self):
+        """Return the next frame.
+        
+        Returns a VideoFrame object or None when the end of the stream has
+        been reached. Blocks until the worker thread has decoded the frame.
+        A MediaFileError exception is thrown if all frame buffers are still
+        in use (i.e. you have to release a frame first).
+        """
+        cond = self._cond
+        cond.acquire()
+        try:
+            while len(self._readyFrames)==0 and not self._done:
+                if self._numOutstanding==len(self._buffers):
+                    raise MediaFileError("All %d frame buffers are in use, a frame has to be released first"%len(self._buffers))
+                cond.wait()
+            if len(self._readyFrames)>0:
+                self._numOutstanding += 1
+                return self._readyFrames.popleft()
+            if self._error is not None:
+                exc = self._error
+                self._error = None
+                raise exc[0], exc[1], exc[2]
+            return None
+        finally:
+            cond.release()
+    
+    def seek(self, frameIndex):
+        """Position the reader on a particular frame.
+        
+        The next call to nextFrame() returns the frame with the given index
+        (or None if the index is beyond the end of the stream). Frames that
+        have been prefetched but not returned yet are discarded.
+        Seeking is done to the preceding key frame (which is looked up in the
+        stream index if the file has one) and then frames are decoded
+        (but not converted) until the requested frame is reached.
+        If the frames have no time stamps, the frames are counted from
+        the key frame. This requires the stream index, without it, the
+        next call to nextFrame() raises a MediaFileError exception.
+        """
+        if frameIndex<0:
+            raise ValueError("Invalid frame index: %s"%frameIndex)
+        self._stopThread()
+        
+        stream = self.stream
+        target = self._frameTimestamp(frameIndex)
+        if target is None:
+            raise MediaFileError("Seeking is not supported, the frame rate is unknown")
+        seekTs = self._keyFrameTimestamp(target)
+        if seekTs is None:
+            # The key frame (and therefore the index of the first decoded
+            # frame) is unknown
+            seekTs = target
+            self._nextIndex = None
+        else:
+            self._nextIndex = self._frameIndex(seekTs)
+        avformat.av_seek_frame(self.media._formatCtx, stream.index, seekTs, cppdefs.AVSEEK_FLAG_BACKWARD)
+        avcodec.avcodec_flush_buffers(stream._codecCtx)
+        
+        self._skipUntil = frameIndex
+        self._startThread()
+
+    def _frameTimestamp(self, frameIndex):
+        """Convert a frame index into a time stamp in time base units.
+        
+        Returns None if the frame rate or time base is not known.
+        """
+        stream = self.stream
+        frameRate = stream.frameRate
+        timeBase = stream.timeBase
+        if frameRate==0 or timeBase==0:
+            return None
+        return self._startTime()+int(round(frameIndex/(frameRate*timeBase)))
+
+    def _frameIndex(self, timestamp):
+        """Convert a time stamp into a frame index.
+        
+        Returns None if the frame rate or time base is not known.
+        """
+        stream = self.stream
+        frameRate = stream.frameRate
+        timeBase = stream.timeBase
+        if frameRate==0 or timeBase==0:
+            return None
+        return int(round((timestamp-self._startTime())*timeBase*frameRate))
+
+    def _startTime(self):
+        """Return the start time of the stream in time base units.
+        """
+        t = self.stream._stream.start_time
+        if t==_AV_NOPTS:
+            t = 0
+        return t
+    
+    def _keyFrameTimestamp(self, timestamp):
+        """Look up the last key frame at or before timestamp in the stream index.
+        
+        Returns the time stamp of the key frame or None if the stream has no
+        index or no suitable key frame was found.
+        """
+        stream = self.stream._stream
+        entries = stream.index_entries
+        n = stream.nb_index_entries
+        if n<=0 or not entries:
+            return None
+        # The index entries are sorted by time stamp
+        lo,hi = 0,n
+        while lo<hi:
+            mid = (lo+hi)//2
+            if entries[mid].timestamp<=timestamp:
+                lo = mid+1
+            else:
+                hi = mid
+        for i in range(lo-1, -1, -1):
+            if entries[i].flags & _AVINDEX_KEYFRAME:
+                return entries[i].timestamp
+        return None
+
+    def _startThread(self):
+        """Start the worker thread.
+        """
+        self._stopRequested = False
+        self._done = False
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name="VideoReader")
+        self._thread.setDaemon(True)
+        self._thread.start()
+    
+    def _stopThread(self):
+        """Stop the worker thread and discard the prefetched frames.
+        """
+        if self._thread is None:
+            return
+        cond = self._cond
+        cond.acquire()
+        try:
+            self._stopRequested = True
+            cond.notifyAll()
+        finally:
+            cond.release()
+        self._thread.join()
+        self._thread = None
+        
+        # Put the buffers of the frames that were never handed out back
+        # into the pool
+        cond.acquire()
+        try:
+            while len(self._readyFrames)>0:
+                frame = self._readyFrames.popleft()
+                self._freeBuffers.append(frame._buffer)
+                frame._buffer = None
+                frame.array = None
+        finally:
+            cond.release()
+    
+    def _releaseBuffer(self, buffer):
+        """Return a buffer to the pool (called by VideoFrame.release()).
+        """
+        cond = self._cond
+        cond.acquire()
+        try:
+            self._freeBuffers.append(buffer)
+            self._numOutstanding -= 1
+            cond.notifyAll()
+        finally:
+            cond.release()
+    
+    def _acquireBuffer(self):
+        """Wait for a free buffer (called by the worker thread).
+        
+        Returns the buffer index or None if the thread should stop.
+        """
+        cond = self._cond
+        cond.acquire()
+        try:
+            while len(self._freeBuffers)==0 and not self._stopRequested:
+                cond.wait()
+            if self._stopRequested:
+                return None
+            return self._freeBuffers.pop()
+        finally:
+            cond.release()
+
+    def _run(self):
+        """Worker thread.
+        
+        Decodes the frames and converts them into the frame buffers.
+        """
+        try:
+            for timestamp,keyFrame in self._iterDecodedFrames():
+                # Determine the frame index
+                if timestamp is None:
+                    index = None
+                else:
+                    index = self._frameIndex(timestamp)
+                if index is None:
+                    index = self._nextIndex
+                    if index is None:
+                        raise MediaFileError("Cannot determine the frame index after seeking (the stream has neither time stamps nor an index)")
+                self._nextIndex = index+1
+                # Skip the frames before the seek target
+                if self._skipUntil is not None:
+                    if index<self._skipUntil:
+                        continue
+                    self._skipUntil = None
+                
+                buffer = self._acquireBuffer()
+                if buffer is None:
+                    return
+                height = self.stream.height
+                swscale.sws_scale(self._swsCtx, self._frame.data, self._frame.linesize, 0, height, self._dataPtrs[buffer], self._lineSizes)
+                frame = VideoFrame(self, buffer, timestamp, index, keyFrame)
+
+                cond = self._cond
+                cond.acquire()
+                try:
+                    self._readyFrames.append(frame)
+                    cond.notifyAll()
+                finally:
+                    cond.release()
+        except:
+            self._error = sys.exc_info()
+        finally:
+            cond = self._cond
+            cond.acquire()
+            try:
+                self._done = True
+                cond.notifyAll()
+            finally:
+                cond.release()
+    
+    def _iterDecodedFrames(self):
+        """Decode the frames of the stream (called by the worker thread).
+        
+        Yields (timestamp, keyFrame) tuples for every decoded frame (the
+        image is in self._frame). The iteration stops when the end of the
+        stream was reached or the thread was asked to stop.
+        """
+        codecCtx = self.stream._codecCtx
+        streamIndex = self.stream.index
+        frame = self._frame
+        for pkt in self.media.iterPackets():
+            if self._stopRequested:
+                return
+            if pkt.stream_index!=streamIndex:
+                continue
+            hasFrame,bytes = avcodec.avcodec_decode_video2(codecCtx, frame, pkt)
+            if hasFrame:
+                yield self._frameTimestampFromPacket(pkt), frame.key_frame==1
+        
+        # Flush the frames that are still delayed in the codec
+        pkt = decls.AVPacket()
+        avcodec.av_init_packet(pkt)
+        while not self._stopRequested:
+            hasFrame,bytes = avcodec.avcodec_decode_video2(codecCtx, frame, pkt)
+            if not hasFrame:
+                break
+            yield self._frameTimestampFromPacket(None), frame.key_frame==1
+
+    def _frameTimestampFromPacket(self, pkt):
+        """Return the time stamp of the frame that was just decoded.
+        
+        Uses the packet pts that was stored in the frame by the decoder and
+        falls back to the dts of the packet.
+        """
+        ts = self._frame.pkt_pts
+        if ts==_AV_NOPTS and pkt is not None:
+            ts = pkt.dts
+        if ts==_AV_NOPTS:
+            return None
+        return ts
+
+
 class Media_Read_ffmpeg(object):
     """Media file reader.
     """
@@ -685,6 +1145,9 @@ class Media_Read_ffmpeg(object):
         # The AVFormatContext object for the open file
         self._formatCtx = None
         
+        # The currently open VideoReader_ffmpeg object (there can only be one)
+        self._videoReader = None
+        
         # Open the video file
         self._formatCtx = avformat.av_open_input_file(fileName, None, 0, None)
         # Fill the 'streams' fields...
@@ -715,6 +1178,9 @@ class Media_Read_ffmpeg(object):
     def close(self):
         """Close the file.
         """
+        if self._videoReader is not None:
+            self._videoReader.close()
+        
         for stream in self.audioStreams:
             stream.close()
         for stream in self.videoStreams:
@@ -749,6 +1215,9 @@ class Media_Read_ffmpeg(object):
 
         if len(streams)==0:
             return
+        
+        if self._videoReader is not None:
+            raise MediaFileError("iterData() cannot be used while a video reader is open")
 
         # Initialize the streams...
         # streamDict: Key:Stream index - Value:Stream object
@@ -787,6 +1256,36 @@ class Media_Read_ffmpeg(object):
             for stream in streamDict.values():
                 stream.decodeEnd()
     
+    def videoReader(self, stream=None, numBuffers=4, pixelFormat=RGB, pixelAccess=WIDTH_HEIGHT, colorAccess=SEPARATE_CHANNELS):
+        """Return a prefetching reader for the frames of a video stream.
+        
+        stream is the VideoStream object whose frames should be read (default
+        is the first video stream). numBuffers is the number of preallocated
+        numpy arrays the frames are converted into. The remaining arguments
+        determine the layout of the arrays (see VideoData.numpyArray()).
+        Returns a VideoReader_ffmpeg object. Only one reader can be open
+        at a time and iterData() cannot be used while the reader is open.
+        """
+        if stream is None:
+            if len(self.videoStreams)==0:
+                raise MediaFileError("The file contains no video stream")
+            stream = self.videoStreams[0]
+        if not isinstance(stream, VideoStream_ffmpeg):
+            raise TypeError("VideoStream object expected")
+        if stream not in self._streams:
+            raise ValueError("Invalid stream (stream is from a different source)")
+        if self._videoReader is not None:
+            raise MediaFileError("There is already an open video reader")
+        
+        self._videoReader = VideoReader_ffmpeg(self, stream, numBuffers=numBuffers, pixelFormat=pixelFormat, pixelAccess=pixelAccess, colorAccess=colorAccess)
+        return self._videoReader
+    
+    def _videoReaderClosed(self, reader):
+        """This is called by a video reader when it was closed.
+        """
+        if reader is self._videoReader:
+            self._videoReader = None
+    
     def decode(self):
         """Decode stream data and pass it to the callbacks stored in the streams.
         """
@@ -121,7 +121,14 @@ class MotionPath(Component):
     # arcLenToCurveParam
     def arcLenToCurveParam(self, s, eps=0.0001, maxiter=100):
         """Determine the native curve parameter for a given arc length.
+
+        If the curve has an arc length table (paramAtLength() method)
+        it is used, otherwise the parameter is computed with Newton's
+        method.
         """
+        if hasattr(self.curve, "paramAtLength"):
+            return self.curve.paramAtLength(s)
+        
         tmin, tmax = self.curve.paraminterval
         totallen = self.curve.arcLen(tmax)
         # Initial "guess"...
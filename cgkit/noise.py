@@ -43,6 +43,11 @@ from _core import spnoise as _spnoise
 from _core import vnoise, vsnoise, vcellnoise, vscellnoise, vfBm, vturbulence
 from _core import vpnoise as _vpnoise
 from _core import vspnoise as _vspnoise
+from _core import noiseArray, snoiseArray, pnoiseArray, spnoiseArray
+from _core import cellnoiseArray, scellnoiseArray
+from _core import vnoiseArray, vsnoiseArray, vpnoiseArray, vspnoiseArray
+from _core import vcellnoiseArray, vscellnoiseArray
+from _core import fBmArray, turbulenceArray, vfBmArray, vturbulenceArray
 from cgtypes import vec3
 
 # pnoise
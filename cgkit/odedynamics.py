@@ -40,7 +40,7 @@
 """This module contains a Dynamics component using the ODE rigid body
 dynamics package."""
 
-import weakref
+import sys, time, array, weakref
 from . import protocols
 from Interfaces import *
 from component import Component
@@ -63,6 +63,16 @@ try:
     has_ode = True
 except:
     has_ode = False
+try:
+    import numpy
+    _numpy_available = True
+except ImportError:
+    _numpy_available = False
+
+if sys.platform=="win32":
+    _clock = time.clock
+else:
+    _clock = time.time
 
 #import numarray
 #import numarray.linear_algebra
@@ -201,6 +211,10 @@ class ODEDynamics(Component):
         # Debug statistics (the number of contacts per simulation step)
         self.numcontacts = 0
 
+        # Accumulated time (in seconds) spent in collision detection,
+        # stepping the ODE world and updating the world objects
+        self.timings = {"collision":0.0, "step":0.0, "sync":0.0}
+
         # Automatically add world objects
         if auto_add:
             # Add all rigid bodies first...
@@ -424,6 +438,26 @@ class ODEDynamics(Component):
         if self.substeps==0 or not self.enabled:
             return
 
+        self.stepFrame(getScene().timer().timestep)
+        self.updateObjs()
+
+    # stepFrame
+    def stepFrame(self, dt, substeps=None):
+        """Advance the simulation by one frame.
+
+        The frame is split into \a substeps simulation steps. The world
+        objects are not updated, this has to be done by calling
+        updateObjs().
+
+        \param dt (\c float) Frame duration
+        \param substeps (\c int) Number of sub steps or None to use the
+               substeps attribute
+        """
+        if substeps is None:
+            substeps = self.substeps
+        if substeps==0:
+            return
+
         if self.show_contacts:
             cmds.drawClear()
 
@@ -431,8 +465,9 @@ class ODEDynamics(Component):
         self.body_manips = filter(lambda x: x() is not None, self.body_manips)
 
         # Sim loop...
-        subdt = getScene().timer().timestep/self.substeps
-        for i in range(self.substeps):
+        timings = self.timings
+        subdt = dt/substeps
+        for i in range(substeps):
             self.numcontacts = 0
             
             # Apply body manipulators
@@ -442,10 +477,12 @@ class ODEDynamics(Component):
                     bm._apply()
             
             # Detect collisions and create contact joints
+            t0 = _clock()
             self.space.collide(None, self.nearCallback)
 #            print "#Contacts:",self.numcontacts
 
             # Simulation step
+            t1 = _clock()
             if self.use_quick_step:
                 self.world.quickStep(subdt)
             else:
@@ -453,17 +490,205 @@ class ODEDynamics(Component):
 
             # Remove all contact joints
             self.contactgroup.empty()
+            t2 = _clock()
+            timings["collision"] += t1-t0
+            timings["step"] += t2-t1
             
-        # Update the world objects
-        for body in self.bodies:
-            body.updateObj()
-
         # Reset body manipulators
         for bmref in self.body_manips:
             bm = bmref()
             if bm is not None:
                 bm._reset()
 
+    # updateObjs
+    def updateObjs(self):
+        """Update the world objects.
+
+        The transformations and velocities of the ODE bodies are copied to
+        the corresponding world objects.
+        """
+        t0 = _clock()
+        for body in self.bodies:
+            body.updateObj()
+        self.timings["sync"] += _clock()-t0
+
+    # resetTimings
+    def resetTimings(self):
+        """Reset the accumulated times in the timings attribute to 0.
+        """
+        for key in self.timings:
+            self.timings[key] = 0.0
+
+
+# ODESimulationRunner
+class ODESimulationRunner:
+    """Runs an ODE simulation without a viewer.
+
+    The runner advances an ODEDynamics component independently of the
+    timer events. Every frame is split into a configurable number of sub
+    steps and the world objects are only updated at output frames (every
+    n-th frame). Optionally, the positions and orientations of all bodies
+    are recorded at the output frames so that the trajectories can be
+    exported.
+
+    Example:
+
+    \code
+    runner = ODESimulationRunner(dyn, substeps=10, record=True)
+    runner.run(1000)
+    runner.report()
+    pos = runner.getPositions()
+    \endcode
+    """
+
+    def __init__(self, dynamics, substeps=None, output_every=1, record=False, advance_timer=True):
+        """Constructor.
+
+        \param dynamics (\c ODEDynamics) The dynamics component to run
+        \param substeps (\c int) Number of simulation steps per frame or None
+               to use the substeps attribute of the dynamics component
+        \param output_every (\c int) Only update (and record) every n-th frame
+        \param record (\c bool) Record the trajectories of the bodies
+        \param advance_timer (\c bool) Set the time of the scene timer at output
+               frames (the StepFrame event is not issued)
+        """
+        if output_every<1:
+            raise ValueError("output_every must be at least 1")
+
+        self.dynamics = dynamics
+        self.substeps = substeps
+        self.output_every = output_every
+        self.record = record
+        self.advance_timer = advance_timer
+
+        # The number of simulated frames
+        self.frame = 0
+        # The world objects in the order in which they are stored in the
+        # recorded data (set when the first output frame is recorded)
+        self.objects = None
+        # Time values of the recorded output frames
+        self.times = []
+        # Time spent in recording the trajectories
+        self.recordtime = 0.0
+        # Total time spent in run()
+        self.runtime = 0.0
+
+        self._starttime = getScene().timer().time
+        # Recorded positions (x,y,z) and orientations (w,x,y,z)
+        self._positions = array.array("d")
+        self._orientations = array.array("d")
+
+    # run
+    def run(self, frames):
+        """Simulate a number of frames.
+
+        Just like onStepFrame(), the simulation is not advanced while
+        the dynamics component is disabled. The frames are still counted
+        (i.e. the timer is advanced and the frames are recorded), but
+        the bodies don't move and the world objects are not updated.
+
+        \param frames (\c int) Number of frames to simulate
+        """
+        t0 = _clock()
+        timer = getScene().timer()
+        dt = timer.timestep
+        dyn = self.dynamics
+        for i in range(frames):
+            enabled = dyn.enabled
+            if enabled:
+                dyn.stepFrame(dt, self.substeps)
+            self.frame += 1
+            if self.frame%self.output_every!=0:
+                continue
+            t = self._starttime + self.frame*dt
+            if self.advance_timer:
+                timer.time = t
+            if enabled:
+                dyn.updateObjs()
+            if self.record:
+                self._recordFrame(t)
+        self.runtime += _clock()-t0
+
+    # getPositions
+    def getPositions(self):
+        """Return the recorded positions.
+
+        \return numpy array of shape (frames, bodies, 3)
+        """
+        if not _numpy_available:
+            raise ImportError("numpy is not available")
+        return numpy.array(self._positions).reshape(len(self.times), -1, 3)
+
+    # getOrientations
+    def getOrientations(self):
+        """Return the recorded orientations as quaternions (w,x,y,z).
+
+        \return numpy array of shape (frames, bodies, 4)
+        """
+        if not _numpy_available:
+            raise ImportError("numpy is not available")
+        return numpy.array(self._orientations).reshape(len(self.times), -1, 4)
+
+    # getTrajectory
+    def getTrajectory(self, obj):
+        """Return the recorded positions of one object.
+
+        \param obj (\c WorldObject) World object (given as name or object)
+        \return List of vec3
+        """
+        obj = cmds.worldObject(obj)
+        if self.objects is None or obj not in self.objects:
+            raise ValueError('No trajectory recorded for object "%s"'%obj.name)
+        idx = self.objects.index(obj)
+        n = len(self.objects)
+        res = []
+        for i in range(len(self.times)):
+            j = 3*(i*n+idx)
+            res.append(vec3(tuple(self._positions[j:j+3])))
+        return res
+
+    # report
+    def report(self, file=None):
+        """Print the time spent in the individual parts of the simulation.
+
+        \param file A file-like object that receives the output (default: stdout)
+        """
+        if file is None:
+            file = sys.stdout
+        timings = self.dynamics.timings
+        print >>file, "Frames:    %d (%d output frames)"%(self.frame, self.frame//self.output_every)
+        for name,t in [("Collision", timings["collision"]),
+                       ("Stepping", timings["step"]),
+                       ("Sync", timings["sync"]),
+                       ("Recording", self.recordtime),
+                       ("Total", self.runtime)]:
+            print >>file, "%-10s %10.3fs"%(name+":", t)
+
+    ## protected:
+
+    def _recordFrame(self, t):
+        """Record the positions and orientations of all bodies.
+        """
+        t0 = _clock()
+        bodies = self.dynamics.bodies
+        if self.objects is None:
+            self.objects = map(lambda b: b.obj, bodies)
+        elif len(self.objects)!=len(bodies):
+            raise RuntimeError("The number of bodies has changed during the recording")
+        self.times.append(t)
+        positions = self._positions
+        orientations = self._orientations
+        for body in bodies:
+            odebody = body.odebody
+            if odebody is None:
+                positions.extend(body.obj.pos)
+                q = quat().fromMat(body.obj.rot)
+                orientations.extend((q.w, q.x, q.y, q.z))
+            else:
+                positions.extend(odebody.getPosition())
+                orientations.extend(odebody.getQuaternion())
+        self.recordtime += _clock()-t0
+
 
 ######################################################################
 
@@ -35,6 +35,11 @@
 # $Id: offexport.py,v 1.2 2005/04/14 17:22:24 mbaas Exp $
 
 import os.path, sys
+try:
+    import numpy
+    _numpy_available = True
+except ImportError:
+    _numpy_available = False
 from cgtypes import *
 from globalscene import getScene
 from geomobject import *
@@ -120,7 +125,9 @@ class OffExporter:
                 Cs = geom.slot("Cs")
             
             vo = self.voffsets[obj]
-            if isinstance(geom, TriMeshGeom):
+            if isinstance(geom, TriMeshGeom) and _numpy_available:
+                self.writeTrianglesNumPy(geom, vo, Cs)
+            elif isinstance(geom, TriMeshGeom):
                 for i in range(geom.faces.size()):
                     f = geom.faces[i]
                     s = "3 %d %d %d"%(f[0]+vo, f[1]+vo, f[2]+vo)
@@ -174,6 +181,11 @@ class OffExporter:
             WT = obj.worldtransform
             WT3 = WT.getMat3()
 
+            if _numpy_available:
+                self.writeVerticesNumPy(geom, WT, N, Cs, st)
+                voffset += geom.verts.size()
+                continue
+
             # Iterate over all vertices and write the stuff...
             for i in range(geom.verts.size()):
                 v = WT*geom.verts[i]
@@ -205,6 +217,94 @@ class OffExporter:
             
         self.voffsets = voffsets
 
+    # writeVerticesNumPy
+    def writeVerticesNumPy(self, geom, WT, N, Cs, st):
+        """Write the vertices of one geom using numpy.
+
+        This is the bulk version of the vertex loop in writeVertices().
+        WT is the world transform of the object, N, Cs and st are the
+        slots of the primitive variables (or None).
+        """
+        numverts = geom.verts.size()
+        if numverts==0:
+            return
+        
+        # Transform the vertices...
+        M = numpy.array(WT.toList(rowmajor=True)).reshape((4,4))
+        verts = self.slotArray(geom.verts, 3)
+        v = numpy.dot(verts, M[:3,:3].T) + M[:3,3]
+        w = numpy.dot(verts, M[3,:3]) + M[3,3]
+        w[w==0] = 1.0
+        v /= w[:,numpy.newaxis]
+        columns = [v]
+        fmt = "%f %f %f"
+
+        if self.N_flag:
+            if N!=None:
+                M3 = M[:3,:3]
+                norm = numpy.dot(self.slotArray(N, 3), M3.T)
+                l = numpy.sqrt((norm*norm).sum(axis=1))
+                l[l==0] = 1.0
+                norm /= l[:,numpy.newaxis]
+                columns.append(norm)
+                fmt += "  %f %f %f"
+            else:
+                fmt += "  0 0 0"
+        if self.C_flag:
+            if Cs!=None:
+                columns.append(self.slotArray(Cs, 3))
+                fmt += "  %f %f %f"
+            else:
+                fmt += "  0.666 0.666 0.666"
+        if self.ST_flag:
+            if st!=None:
+                columns.append(self.slotArray(st, 2))
+                fmt += "  %f %f"
+            else:
+                fmt += "  0.0 0.0"
+
+        self.writeRows(fmt, numpy.hstack(columns))
+
+    # writeTrianglesNumPy
+    def writeTrianglesNumPy(self, geom, vo, Cs):
+        """Write the faces of a TriMeshGeom using numpy.
+
+        vo is the vertex offset of the geom and Cs the uniform color
+        slot (or None).
+        """
+        if geom.faces.size()==0:
+            return
+        
+        faces = self.slotArray(geom.faces, 3, numpy.int32) + vo
+        if Cs!=None:
+            data = numpy.hstack((faces, self.slotArray(Cs, 3)))
+            self.writeRows("3 %d %d %d  %f %f %f", data)
+        else:
+            self.writeRows("3 %d %d %d", faces)
+
+    # slotArray
+    def slotArray(self, slot, n, dtype=None):
+        """Return the values of an array slot as a 2D numpy array.
+
+        n is the number of values per element and dtype the numpy type
+        that corresponds to the slot type (default: float64).
+        """
+        if dtype==None:
+            dtype = numpy.float64
+        return numpy.fromstring(slot.getBuffer(), dtype).reshape((-1, n))
+
+    # writeRows
+    def writeRows(self, fmt, data, chunksize=10000):
+        """Write a 2D array using a format string for each row.
+
+        The rows are converted in chunks and written with a single
+        write() call per chunk.
+        """
+        fmt += "\n"
+        for i in range(0, len(data), chunksize):
+            rows = data[i:i+chunksize].tolist()
+            self.fhandle.write("".join(map(lambda row: fmt%tuple(row), rows)))
+
     # getNumVertsNFaces
     def getNumVertsNFaces(self):
         """Return the total number of vertices and faces.
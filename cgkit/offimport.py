@@ -35,6 +35,11 @@
 # $Id: offimport.py,v 1.3 2005/04/14 08:01:50 mbaas Exp $
 
 import os.path, sys
+try:
+    import numpy
+    _numpy_available = True
+except ImportError:
+    _numpy_available = False
 from cgtypes import *
 from worldobject import WorldObject
 from geomobject import *
@@ -104,11 +109,15 @@ class OffImporter:
         self.geom.verts.resize(self.numverts)
         self.geom.faces.resize(self.numfaces)
 
-        # Read the vertices...
-        self.readVertices()
-
-        # Read the faces...
-        self.readFaces()
+        # Read the vertices and faces (use numpy if available)...
+        if _numpy_available:
+            if not self.readVerticesNumPy():
+                self.readVertices()
+            if not self.readTrianglesNumPy():
+                self.readFaces()
+        else:
+            self.readVertices()
+            self.readFaces()
 
         self.fhandle.close()
 
@@ -251,6 +260,105 @@ class OffImporter:
                 st[i] = f[:2]
         
 
+    # readVerticesNumPy
+    def readVerticesNumPy(self):
+        """Read the vertices (and varying variables) using numpy.
+
+        This is the bulk version of readVertices(). The entire vertex
+        block is parsed at once and the slots are initialized via their
+        raw buffers. Returns False if the vertex lines don't all have the
+        same number of values. In this case, the file position is reset
+        to the beginning of the vertex block so that the vertices can be
+        read with readVertices().
+        """
+        geom = self.geom
+        numverts = self.numverts
+        if numverts==0:
+            return True
+        
+        pos = self.fhandle.tell()
+        data = self.readArray(numverts, numpy.float64)
+        # Check the number of values per vertex
+        ncols = self.ndim
+        if self.four_flag:
+            ncols += 1
+        if self.normal_flag:
+            ncols += 3
+        if self.color_flag:
+            ncols += 3
+        if self.texcoord_flag:
+            ncols += 2
+        if data.size!=numverts*ncols:
+            self.fhandle.seek(pos)
+            return False
+        data = data.reshape((numverts, ncols))
+
+        # Vertices...
+        verts = numpy.zeros((numverts, 3), numpy.float64)
+        verts[:,:self.ndim] = data[:,:self.ndim]
+        c = self.ndim
+        if self.four_flag:
+            verts /= data[:,c:c+1]
+            c += 1
+        geom.verts.setBuffer(verts)
+
+        # Primitive variables...
+        if self.normal_flag:
+            geom.newVariable("N", VARYING, NORMAL)
+            geom.slot("N").setBuffer(numpy.ascontiguousarray(data[:,c:c+3]))
+            c += 3
+        if self.color_flag:
+            geom.newVariable("Cs", VARYING, COLOR)
+            geom.slot("Cs").setBuffer(numpy.ascontiguousarray(data[:,c:c+3]))
+            c += 3
+        if self.texcoord_flag:
+            geom.newVariable("st", VARYING, FLOAT, 2)
+            geom.slot("st").setBuffer(numpy.ascontiguousarray(data[:,c:c+2]))
+        return True
+
+    # readTrianglesNumPy
+    def readTrianglesNumPy(self):
+        """Read the faces using numpy if the mesh only contains triangles.
+
+        Returns True if the faces could be read. False is returned if
+        the file contains faces that are not triangles or faces with
+        colors. In this case, the file position is reset to the beginning
+        of the face block so that the faces can be read with readFaces().
+        """
+        geom = self.geom
+        numfaces = self.numfaces
+        if numfaces==0:
+            return True
+        
+        pos = self.fhandle.tell()
+        data = self.readArray(numfaces, numpy.int32)
+        if data.size!=4*numfaces:
+            self.fhandle.seek(pos)
+            return False
+        data = data.reshape((numfaces, 4))
+        if (data[:,0]!=3).any():
+            self.fhandle.seek(pos)
+            return False
+
+        if self.invertfaces:
+            faces = data[:,3:0:-1]
+        else:
+            faces = data[:,1:]
+        geom.faces.setBuffer(numpy.ascontiguousarray(faces))
+        return True
+
+    # readArray
+    def readArray(self, numlines, dtype):
+        """Read the values of several lines into a flat numpy array.
+
+        numlines is the number of lines to read (empty lines and comments
+        are skipped) and dtype the numpy type of the values.
+        """
+        lines = []
+        for i in range(numlines):
+            lines.append(self.readLine())
+        return numpy.fromstring(" ".join(lines), dtype=dtype, sep=" ")
+
     # parseHeaderKeyWord
     def parseHeaderKeyWord(self, header):
         """Parses the first line of an OFF file.
@@ -44,6 +44,14 @@ import pluginmanager
 import cmds
 import _core
 
+# Use the RPly based writer if it is available, otherwise use the
+# pure Python version
+if hasattr(_core, "PLYWriter"):
+    from _core import PLYWriter, PlyStorageMode
+else:
+    from plyfile import PLYWriter
+    PlyStorageMode = None
+
 # PLYExporter
 class PLYExporter:
 
@@ -90,11 +98,12 @@ class PLYExporter:
             raise ValueError("Cannot export geometry of type %s as a PLY file"%(object.geom.__class__.__name__))
 
         # Open the file...
-        ply = _core.PLYWriter()
-        try:
-            mode = eval ("_core.PlyStorageMode.%s"%mode.upper())
-        except:
-            raise ValueError("Invalid mode: %s"%mode)
+        ply = PLYWriter()
+        if PlyStorageMode!=None:
+            try:
+                mode = getattr(PlyStorageMode, mode.upper())
+            except:
+                raise ValueError("Invalid mode: %s"%mode)
         ply.create(filename, mode)
 
         # Set comment
@@ -0,0 +1,1130 @@
+# ***** BEGIN LICENSE BLOCK *****
+# Version: MPL 1.1/GPL 2.0/LGPL 2.1
+#
+# The contents of this file are subject to the Mozilla Public License Version
+# 1.1 (the "License"); you may not use this file except in compliance with
+# the License. You may obtain a copy of the License at
+# http://www.mozilla.org/MPL/
+#
+# Software distributed under the License is distributed on an "AS IS" basis,
+# WITHOUT WARRANTY OF ANY KIND, either express or implied. See the License
+# for the specific language governing rights and limitations under the
+# License.
+#
+# The Original Code is the Python Computer Graphics Kit.
+#
+# The Initial Developer of the Original Code is Matthias Baas.
+# Portions created by the Initial Developer are Copyright (C) 2004
+# the Initial Developer. All Rights Reserved.
+#
+# Contributor(s):
+#
+# Alternatively, the contents of this file may be used under the terms of
+# either the GNU General Public License Version 2 or later (the "GPL"), or
+# the GNU Lesser General Public License Version 2.1 or later (the "LGPL"),
+# in which case the provisions of the GPL or the LGPL are applicable instead
+# of those above. If you wish to allow use of your version of this file only
+# under the terms of either the GPL or the LGPL, and not to allow others to
+# use your version of this file under the terms of the MPL, indicate your
+# decision by deleting the provisions above and replace them with the notice
+# and other provisions required by the GPL or the LGPL. If you do not delete
+# the provisions above, a recipient may use your version of this file under
+# the terms of any one of the MPL, the GPL or the LGPL.
+#
+# ***** END LICENSE BLOCK *****
+"""Pure Python PLY reader and writer.
+
+This module contains the classes PLYReader and PLYWriter which have the
+same interface as the corresponding classes in the _core module (which
+are implemented on top of the RPly library). The PLY import and export
+plugins use them when the compiled versions are not available.
+
+The data is processed in blocks of elements using numpy, so the size of
+a file is not limited by the available memory. Binary element blocks are
+decoded via numpy record types. The values of a list property are
+returned as a pair of arrays (offsets, values) where the values of
+element i are values[offsets[i]:offsets[i+1]].
+
+The methods PLYReader.readElements() and PLYWriter.writeElement() do not
+use any cgkit geometry class, so they are also available in the light
+version of cgkit.
+"""
+
+import struct
+import numpy
+
+# The numpy type codes of the PLY types
+_ply_types = {"int8":"i1", "char":"i1",
+              "uint8":"u1", "uchar":"u1",
+              "int16":"i2", "short":"i2",
+              "uint16":"u2", "ushort":"u2",
+              "int32":"i4", "int":"i4",
+              "uint32":"u4", "uint":"u4",
+              "float32":"f4", "float":"f4",
+              "float64":"f8", "double":"f8"}
+
+# struct format characters of the numpy type codes
+_struct_codes = {"i1":"b", "u1":"B", "i2":"h", "u2":"H",
+                 "i4":"i", "u4":"I", "f4":"f", "f8":"d"}
+
+# File formats (the values of the "format" line in the header)
+_formats = {"ascii":"ascii",
+            "binary_little_endian":"<",
+            "binary_big_endian":">"}
+
+# Default number of elements per block
+BLOCKSIZE = 65536
+
+# Minimum number of elements with equal list lengths that are decoded
+# via a record type (shorter runs are decoded element by element)
+_MIN_RUN_LENGTH = 64
+
+# PLYProperty
+class PLYProperty:
+    """A property of a PLY element.
+
+    type is the PLY type name. For list properties, type is "list" and
+    len_type/val_type specify the type of the list length and of the
+    list items.
+    """
+    def __init__(self, name, type, len_type=None, val_type=None):
+        self.name = name
+        self.type = type
+        self.len_type = len_type
+        self.val_type = val_type
+
+    def __repr__(self):
+        if self.type=="list":
+            return "<PLYProperty %s: list %s %s>"%(self.name, self.len_type, self.val_type)
+        else:
+            return "<PLYProperty %s: %s>"%(self.name, self.type)
+
+    def isList(self):
+        """Return True if the property is a list property."""
+        return self.type=="list"
+
+    def valueCode(self):
+        """Return the numpy type code of the (list item) values."""
+        if self.type=="list":
+            return _ply_types[self.val_type]
+        else:
+            return _ply_types[self.type]
+
+    def lengthCode(self):
+        """Return the numpy type code of the list length."""
+        return _ply_types[self.len_type]
+
+# PLYElement
+class PLYElement:
+    """A PLY element declaration (such as "vertex" or "face").
+    """
+    def __init__(self, name, ninstances):
+        self.name = name
+        self.ninstances = ninstances
+        self.properties = []
+
+    def __repr__(self):
+        return "<PLYElement %s: %d instances, %d properties>"%(self.name, self.ninstances, len(self.properties))
+
+    def hasLists(self):
+        """Return True if the element contains list properties."""
+        for prop in self.properties:
+            if prop.isList():
+                return True
+        return False
+
+    def findProperty(self, name):
+        """Return the property with the given name or None."""
+        for prop in self.properties:
+            if prop.name==name:
+                return prop
+        return None
+
+    def recordType(self, byteorder, counts=None):
+        """Return a numpy record type for one element.
+
+        byteorder is either "<" or ">". counts is a list with the number
+        of items for each list property (in the order of the properties).
+        The list length of a list property "foo" is stored in the field
+        "#foo".
+        """
+        fields = []
+        i = 0
+        for prop in self.properties:
+            if prop.isList():
+                fields.append(("#"+prop.name, byteorder+prop.lengthCode()))
+                fields.append((prop.name, byteorder+prop.valueCode(), (counts[i],)))
+                i += 1
+            else:
+                fields.append((prop.name, byteorder+prop.valueCode()))
+        return numpy.dtype(fields)
+
+
+# PLYReader
+class PLYReader:
+    """Read PLY files.
+
+    The class has the same interface as the PLYReader class from the
+    _core module. Additionally, the data can be accessed as numpy arrays
+    using the readElements() method.
+    """
+    
+    def __init__(self):
+        self.fhandle = None
+        self.elements = []
+        self.comments = []
+        self.objinfos = []
+        self.format = None
+        self.numverts = 0
+        self.numfaces = 0
+        # Data that has been read from the file but not processed yet
+        self._buffer = ""
+        self._bufpos = 0
+
+    # open
+    def open(self, name):
+        """Open a PLY file."""
+        self.close()
+        try:
+            self.fhandle = file(name, "rb")
+        except IOError:
+            raise IOError('Could not open file "%s".'%name)
+
+    # close
+    def close(self):
+        """Close the file (if it is open)."""
+        if self.fhandle!=None:
+            self.fhandle.close()
+            self.fhandle = None
+        self.elements = []
+        self.comments = []
+        self.objinfos = []
+        self.numverts = 0
+        self.numfaces = 0
+        self._buffer = ""
+        self._bufpos = 0
+
+    # readHeader
+    def readHeader(self):
+        """Read the file header.
+
+        The return value is a tuple (elements, comment, objinfo) as
+        described in the PLYReader class of the _core module. elements
+        is a list of tuples (name, ninstances, properties) and each property
+        is a tuple (name, type, len_type, val_type). comment and objinfo
+        are the concatenated comment/obj_info lines.
+
+        The parsed header is also available in the attributes elements,
+        comments, objinfos and format.
+        """
+        if self.fhandle.readline().strip()!="ply":
+            raise ValueError("Not a PLY file.")
+        element = None
+        while 1:
+            line = self.fhandle.readline()
+            if line=="":
+                raise ValueError("Premature end of file in PLY header.")
+            line = line.strip()
+            a = line.split()
+            if len(a)==0:
+                continue
+            kw = a[0]
+            try:
+                if kw=="format":
+                    if a[1] not in _formats:
+                        raise ValueError("Unknown PLY format: %s"%a[1])
+                    self.format = _formats[a[1]]
+                elif kw=="comment":
+                    self.comments.append(line[8:])
+                elif kw=="obj_info":
+                    self.objinfos.append(line[9:])
+                elif kw=="element":
+                    element = PLYElement(a[1], int(a[2]))
+                    self.elements.append(element)
+                    if element.name=="vertex":
+                        self.numverts = element.ninstances
+                    elif element.name=="face":
+                        self.numfaces = element.ninstances
+                elif kw=="property":
+                    if a[1]=="list":
+                        prop = PLYProperty(a[4], "list", a[2], a[3])
+                    else:
+                        prop = PLYProperty(a[2], a[1])
+                    # Check the types...
+                    prop.valueCode()
+                    if prop.isList():
+                        prop.lengthCode()
+                    element.properties.append(prop)
+                elif kw=="end_header":
+                    break
+            except (IndexError, KeyError, AttributeError):
+                raise ValueError("Invalid PLY header line: %s"%line)
+
+        if self.format==None:
+            raise ValueError("The PLY header contains no format line.")
+
+        elements = []
+        for el in self.elements:
+            props = []
+            for prop in el.properties:
+                props.append((prop.name, prop.type, prop.len_type or "?", prop.val_type or "?"))
+            elements.append((el.name, el.ninstances, props))
+        return elements, "\n".join(self.comments), "\n".join(self.objinfos)
+
+    # readElements
+    def readElements(self, blocksize=BLOCKSIZE):
+        """Iterate over the data of the file in blocks of elements.
+
+        This method may only be called after readHeader() was called.
+        Each block is returned as a tuple (element, start, data) where
+        element is the PLYElement object, start the index of the first
+        element in the block and data a dictionary with the property
+        values. Scalar properties are stored as 1D numpy arrays, list
+        properties as a tuple (offsets, values) of two 1D numpy arrays.
+        blocksize is the maximum number of elements per block.
+        """
+        for el in self.elements:
+            start = 0
+            while start<el.ninstances:
+                n = min(blocksize, el.ninstances-start)
+                if self.format=="ascii":
+                    data = self._readAsciiBlock(el, n)
+                else:
+                    data = self._readBinaryBlock(el, n)
+                yield el, start, data
+                start += n
+
+    # read
+    def read(self, geom, vardecl, invertfaces=False):
+        """Read the data into a polyhedron geom.
+
+        This may only be called after readHeader() was called. vardecl is
+        a list of variable declarations. Each declaration is a tuple
+        (slot name, slot type, element name, propnames) where propnames
+        is a tuple with one property name or three property names if the
+        type is a vec3 type. The vertices and faces must not be declared
+        as they are added automatically.
+        """
+        from geomobject import VARYING, UNIFORM, USER, INT, FLOAT, COLOR, POINT, VECTOR, NORMAL
+
+        geom.verts.resize(self.numverts)
+        geom.setNumPolys(self.numfaces)
+
+        # Create the variables (except for list variables whose
+        # multiplicity is only known when the first value was read).
+        # Each declaration is a list [varname, vartype, storage, propnames,
+        # slot, multiplicity, islist]...
+        decls = {}
+        for varname, vartype, elname, propnames in vardecl:
+            el = self._findElement(elname)
+            if el==None:
+                continue
+            if elname=="vertex":
+                storage = VARYING
+            elif elname=="face":
+                storage = UNIFORM
+            else:
+                storage = USER
+            if len(propnames)==1:
+                if vartype not in [INT, FLOAT]:
+                    continue
+                prop = el.findProperty(propnames[0])
+                if prop==None:
+                    continue
+                if prop.isList():
+                    decl = [varname, vartype, storage, propnames, None, None, True]
+                else:
+                    geom.newVariable(varname, storage, vartype, 1, el.ninstances)
+                    decl = [varname, vartype, storage, propnames, geom.slot(varname), 1, False]
+            elif len(propnames)==3:
+                if vartype not in [COLOR, POINT, VECTOR, NORMAL]:
+                    continue
+                props = filter(lambda name: el.findProperty(name)!=None, propnames)
+                if len(props)==0:
+                    continue
+                geom.newVariable(varname, storage, vartype, 1, el.ninstances)
+                decl = [varname, vartype, storage, propnames, geom.slot(varname), 3, False]
+            else:
+                continue
+            decls.setdefault(elname, []).append(decl)
+
+        for el, start, data in self.readElements():
+            # Vertices
+            if el.name=="vertex":
+                geom.verts.setBuffer(_vec3Array(data, ("x", "y", "z")), start)
+            # Faces
+            if el.name=="face" and "vertex_indices" in data:
+                offsets, values = data["vertex_indices"]
+                if values.dtype.kind=="f":
+                    values = values+0.1
+                values = values.astype(int).tolist()
+                offsets = offsets.tolist()
+                for i in range(len(offsets)-1):
+                    loop = values[offsets[i]:offsets[i+1]]
+                    if invertfaces:
+                        loop.reverse()
+                    geom.setLoop(start+i, 0, loop)
+            # User variables
+            for decl in decls.get(el.name, []):
+                varname, vartype, storage, propnames, slot, mult, islist = decl
+                if len(propnames)==3:
+                    slot.setBuffer(_vec3Array(data, propnames), start)
+                    continue
+                if vartype==INT:
+                    dtype = numpy.int32
+                else:
+                    dtype = numpy.float64
+                values = data[propnames[0]]
+                # Scalar value
+                if not islist:
+                    slot.setBuffer(values.astype(dtype), start)
+                    continue
+                # List...
+                offsets, values = values
+                if len(offsets)<2:
+                    continue
+                if slot==None:
+                    # The length of the first list determines the multiplicity
+                    mult = int(offsets[1]-offsets[0])
+                    geom.newVariable(varname, storage, vartype, mult, el.ninstances)
+                    slot = geom.slot(varname)
+                    decl[4] = slot
+                    decl[5] = mult
+                slot.setBuffer(_padLists(offsets, values, mult, dtype), start)
+
+    ######################################################################
+    ## protected:
+
+    def _findElement(self, name):
+        """Return the element with the given name or None."""
+        for el in self.elements:
+            if el.name==name:
+                return el
+        return None
+
+    def _readAsciiBlock(self, el, n):
+        """Read n elements from an ASCII file.
+
+        Returns a dictionary with the property values.
+        """
+        lines = []
+        for i in range(n):
+            line = self.fhandle.readline()
+            if line=="":
+                raise ValueError("Premature end of file.")
+            lines.append(line)
+
+        if not el.hasLists():
+            rows = _parseAscii(" ".join(lines)).reshape((n, len(el.properties)))
+            data = {}
+            for i, prop in enumerate(el.properties):
+                data[prop.name] = rows[:,i].astype(prop.valueCode())
+            return data
+
+        # Try to parse the block as a table (which works if all lists
+        # have the same length)...
+        first = _parseAscii(lines[0])
+        counts = []
+        c = 0
+        for prop in el.properties:
+            if prop.isList():
+                counts.append(int(first[c]))
+                c += counts[-1]
+            c += 1
+        if numpy.all(map(lambda line: len(line.split())==c, lines)):
+            rows = _parseAscii(" ".join(lines)).reshape((n, c))
+            return _splitTable(el, rows, counts)
+
+        # Parse each line individually...
+        columns = map(lambda prop: [], el.properties)
+        for line in lines:
+            a = line.split()
+            c = 0
+            for i, prop in enumerate(el.properties):
+                if prop.isList():
+                    k = int(a[c])
+                    columns[i].append(a[c+1:c+1+k])
+                    c += k+1
+                else:
+                    columns[i].append(a[c])
+                    c += 1
+        data = {}
+        for i, prop in enumerate(el.properties):
+            if prop.isList():
+                offsets = _offsets(map(len, columns[i]))
+                values = _parseAscii(" ".join(map(lambda x: " ".join(x), columns[i])))
+                data[prop.name] = (offsets, values.astype(prop.valueCode()))
+            else:
+                data[prop.name] = _parseAscii(" ".join(columns[i])).astype(prop.valueCode())
+        return data
+
+    def _readBinaryBlock(self, el, n):
+        """Read n elements from a binary file.
+
+        Returns a dictionary with the property values.
+        """
+        byteorder = self.format
+        if not el.hasLists():
+            dtype = el.recordType(byteorder)
+            rec = numpy.frombuffer(self._read(n*dtype.itemsize), dtype)
+            data = {}
+            for prop in el.properties:
+                data[prop.name] = rec[prop.name].astype(prop.valueCode())
+            return data
+
+        # Elements with list properties are read in runs of elements
+        # where all lists have the same length as the lists of the first
+        # element of the run. Each run is decoded via a numpy record type.
+        # If the list lengths vary too often (e.g. in a mesh with mixed
+        # triangles and quads), the remaining elements are decoded by
+        # scanning the list lengths of every element.
+        parts = []
+        while n>0:
+            counts, recsize = self._peekRecord(el)
+            dtype = el.recordType(byteorder, counts)
+            m = min(n, self._fill(n*dtype.itemsize)//dtype.itemsize)
+            rec = numpy.frombuffer(self._buffer, dtype, m, self._bufpos)
+            m = _runLength(el, rec, counts)
+            if m<_MIN_RUN_LENGTH and m<n:
+                parts.append(self._readBinaryElements(el, n))
+                break
+            rec = rec[:m]
+            self._bufpos += m*dtype.itemsize
+            parts.append(_splitRecords(el, rec, counts))
+            n -= m
+        return _joinParts(el, parts)
+
+    def _readBinaryElements(self, el, n):
+        """Read n elements with list properties from a binary file.
+
+        The list lengths of all elements are scanned first, then the
+        values of each property are gathered from the raw data.
+        Returns a dictionary with the property values.
+        """
+        byteorder = self.format
+        props = el.properties
+        # Scan the elements and determine the start of each element
+        # and the list lengths (relative to the current buffer position)
+        layout = []
+        for prop in props:
+            itemsize = numpy.dtype(prop.valueCode()).itemsize
+            if prop.isList():
+                fmt = byteorder+_struct_codes[prop.lengthCode()]
+                layout.append((fmt, struct.calcsize(fmt), itemsize))
+            else:
+                layout.append((None, 0, itemsize))
+        starts = []
+        counts = map(lambda prop: [], props)
+        avail = len(self._buffer)-self._bufpos
+        pos = 0
+        for j in xrange(n):
+            starts.append(pos)
+            for i, (fmt, lensize, itemsize) in enumerate(layout):
+                if fmt==None:
+                    pos += itemsize
+                    continue
+                if pos+lensize>avail:
+                    avail = self._fill(2*pos+4096)
+                    if pos+lensize>avail:
+                        raise ValueError("Premature end of file.")
+                k = struct.unpack_from(fmt, self._buffer, self._bufpos+pos)[0]
+                counts[i].append(k)
+                pos += lensize+k*itemsize
+        if self._fill(pos)<pos:
+            raise ValueError("Premature end of file.")
+        raw = numpy.frombuffer(self._buffer, numpy.uint8, pos, self._bufpos)
+        self._bufpos += pos
+
+        # Gather the property values...
+        data = {}
+        offsets = numpy.array(starts, int)
+        for i, prop in enumerate(props):
+            fmt, lensize, itemsize = layout[i]
+            vtype = byteorder+prop.valueCode()
+            if fmt==None:
+                data[prop.name] = _gather(raw, offsets, vtype).astype(prop.valueCode())
+                offsets = offsets+itemsize
+                continue
+            k = numpy.array(counts[i], int)
+            listoffsets = _offsets(k)
+            elems = numpy.repeat(numpy.arange(n), k)
+            items = numpy.arange(listoffsets[-1])-listoffsets[elems]
+            values = _gather(raw, offsets[elems]+lensize+items*itemsize, vtype)
+            data[prop.name] = (listoffsets, values.astype(prop.valueCode()))
+            offsets = offsets+lensize+k*itemsize
+        return data
+
+    def _peekRecord(self, el):
+        """Return the list lengths and the size of the next element.
+
+        The file position is not modified.
+        """
+        byteorder = self.format
+        counts = []
+        pos = 0
+        for prop in el.properties:
+            if prop.isList():
+                fmt = byteorder+_struct_codes[prop.lengthCode()]
+                if self._fill(pos+struct.calcsize(fmt))<pos+struct.calcsize(fmt):
+                    raise ValueError("Premature end of file.")
+                k = struct.unpack_from(fmt, self._buffer, self._bufpos+pos)[0]
+                counts.append(k)
+                pos += struct.calcsize(fmt)+k*numpy.dtype(prop.valueCode()).itemsize
+            else:
+                pos += numpy.dtype(prop.valueCode()).itemsize
+        if self._fill(pos)<pos:
+            raise ValueError("Premature end of file.")
+        return counts, pos
+
+    def _fill(self, size):
+        """Try to make sure the buffer contains size unprocessed bytes.
+
+        Returns the number of unprocessed bytes in the buffer (which is
+        smaller than size if the end of the file was reached).
+        """
+        avail = len(self._buffer)-self._bufpos
+        if avail>=size:
+            return avail
+        s = self.fhandle.read(size-avail)
+        self._buffer = self._buffer[self._bufpos:]+s
+        self._bufpos = 0
+        return len(self._buffer)
+
+    def _read(self, size):
+        """Read size bytes (from the buffer or the file)."""
+        if self._fill(size)<size:
+            raise ValueError("Premature end of file.")
+        s = self._buffer[self._bufpos:self._bufpos+size]
+        self._bufpos += size
+        return s
+
+
+# PLYWriter
+class PLYWriter:
+    """Write PLY files.
+
+    The class has the same interface as the PLYWriter class from the
+    _core module. The only difference is that the mode is passed as a
+    string ("ascii", "little_endian" or "big_endian").
+    Additionally, arbitrary elements can be written using the
+    addElement() and writeElement() methods.
+    """
+    
+    def __init__(self):
+        self.fhandle = None
+        self.mode = "ascii"
+        self.comments = []
+        self.objinfos = []
+        self.elements = []
+        self.header_written = False
+
+    # create
+    def create(self, name, mode="ascii"):
+        """Create a PLY file.
+
+        mode is one of "ascii", "little_endian" or "big_endian".
+        """
+        self.close()
+        mode = str(mode).lower()
+        if mode not in ["ascii", "little_endian", "big_endian"]:
+            raise ValueError("Invalid mode: %s"%mode)
+        try:
+            self.fhandle = file(name, "wb")
+        except IOError:
+            raise IOError('Could not create file "%s".'%name)
+        self.mode = mode
+        self.comments = []
+        self.objinfos = []
+        self.elements = []
+        self.header_written = False
+
+    # close
+    def close(self):
+        """Close the file (if it is open)."""
+        if self.fhandle!=None:
+            self.fhandle.close()
+            self.fhandle = None
+
+    # addComment
+    def addComment(self, s):
+        """Add a comment line.
+
+        This method has to be called after create() and before the
+        header is written. s must not contain a newline character.
+        """
+        self.comments.append(s)
+
+    # addObjInfo
+    def addObjInfo(self, s):
+        """Add an obj_info line.
+
+        This method has to be called after create() and before the
+        header is written. s must not contain a newline character.
+        """
+        self.objinfos.append(s)
+
+    # addElement
+    def addElement(self, name, ninstances, properties):
+        """Declare an element.
+
+        properties is a list of property tuples (name, type) or
+        (name, "list", len_type, val_type). The types are PLY type names
+        such as "int32" or "float64".
+        """
+        el = PLYElement(name, ninstances)
+        for p in properties:
+            prop = PLYProperty(*p)
+            prop.valueCode()
+            if prop.isList():
+                prop.lengthCode()
+            el.properties.append(prop)
+        self.elements.append(el)
+
+    # writeHeader
+    def writeHeader(self):
+        """Write the header.
+
+        All elements must have been declared.
+        """
+        fmt = {"ascii":"ascii",
+               "little_endian":"binary_little_endian",
+               "big_endian":"binary_big_endian"}[self.mode]
+        lines = ["ply", "format %s 1.0"%fmt]
+        for s in self.comments:
+            lines.append("comment %s"%s)
+        for s in self.objinfos:
+            lines.append("obj_info %s"%s)
+        for el in self.elements:
+            lines.append("element %s %d"%(el.name, el.ninstances))
+            for prop in el.properties:
+                if prop.isList():
+                    lines.append("property list %s %s %s"%(prop.len_type, prop.val_type, prop.name))
+                else:
+                    lines.append("property %s %s"%(prop.type, prop.name))
+        lines.append("end_header")
+        self.fhandle.write("\n".join(lines)+"\n")
+        self.header_written = True
+
+    # writeElement
+    def writeElement(self, name, data):
+        """Write a block of elements.
+
+        name is the name of the element (that must have been declared
+        with addElement()) and data is a dictionary with the property
+        values of the block (in the same format as returned by
+        PLYReader.readElements()). Blocks have to be written in the order
+        of the element declarations. The header is written automatically
+        before the first block.
+        """
+        if not self.header_written:
+            self.writeHeader()
+        el = None
+        for e in self.elements:
+            if e.name==name:
+                el = e
+        if el==None:
+            raise ValueError("Unknown element: %s"%name)
+
+        # Determine the list lengths (the fast path requires all lists
+        # of a property to have the same length)
+        counts = []
+        uniform = True
+        n = None
+        for prop in el.properties:
+            if prop.isList():
+                offsets, values = data[prop.name]
+                lens = numpy.diff(offsets)
+                n = len(lens)
+                if n>0:
+                    counts.append(int(lens[0]))
+                    if (lens!=lens[0]).any():
+                        uniform = False
+                else:
+                    counts.append(0)
+            else:
+                n = len(data[prop.name])
+        if n==None or n==0:
+            return
+
+        if self.mode=="ascii":
+            self._writeAscii(el, data, n, uniform, counts)
+        else:
+            self._writeBinary(el, data, n, uniform, counts)
+
+    # write
+    def write(self, geom, WT):
+        """Write a TriMeshGeom or PolyhedronGeom.
+
+        WT is the transformation that is applied to the vertices.
+        The file is closed afterwards.
+        """
+        from trimeshgeom import TriMeshGeom
+        from polyhedrongeom import PolyhedronGeom
+        from geomobject import VARYING, UNIFORM
+
+        if isinstance(geom, PolyhedronGeom):
+            numfaces = geom.getNumPolys()
+        elif isinstance(geom, TriMeshGeom):
+            numfaces = geom.faces.size()
+        else:
+            raise ValueError("Invalid geom: Only TriMesh and Polyhedron geometry can be exported.")
+
+        # Collect the variables as tuples (properties, getdata) where
+        # getdata(begin, end) returns the property values of a block.
+        verts = _slotArray(geom.verts, 3)
+        varying = [((("x","float64"), ("y","float64"), ("z","float64")),
+                    lambda b,e: _vec3Data(("x", "y", "z"), _transform(verts[b:e], WT)))]
+        if isinstance(geom, PolyhedronGeom):
+            uniform = [((("vertex_indices", "list", "uint32", "uint32"),),
+                        lambda b,e: {"vertex_indices":_polyLists(geom, b, e)})]
+        else:
+            faces = _slotArray(geom.faces, 3, numpy.int32)
+            uniform = [((("vertex_indices", "list", "uint32", "uint32"),),
+                        lambda b,e: {"vertex_indices":_fixedLists(faces[b:e])})]
+        user = []
+        for name, storage, type, mult in geom.iterVariables():
+            var = self._variableWriter(geom, name, type, mult)
+            if var==None:
+                continue
+            if storage==VARYING:
+                varying.append(var)
+            elif storage==UNIFORM:
+                uniform.append(var)
+            else:
+                user.append((name, geom.slot(name).size(), var))
+
+        # Declare the elements...
+        elements = [("vertex", geom.verts.size(), varying),
+                    ("face", numfaces, uniform)]
+        for name, size, var in user:
+            elements.append((name, size, [var]))
+        for name, size, vars in elements:
+            props = []
+            for p, func in vars:
+                props += list(p)
+            self.addElement(name, size, props)
+
+        # Write the data...
+        for name, size, vars in elements:
+            for b in range(0, size, BLOCKSIZE):
+                e = min(b+BLOCKSIZE, size)
+                data = {}
+                for p, func in vars:
+                    data.update(func(b, e))
+                self.writeElement(name, data)
+        if not self.header_written:
+            self.writeHeader()
+
+    ######################################################################
+    ## protected:
+
+    def _variableWriter(self, geom, name, type, mult):
+        """Return a tuple (properties, getdata) for a primitive variable.
+
+        Returns None if the variable cannot be written to a PLY file.
+        """
+        from geomobject import INT, FLOAT, POINT, VECTOR, NORMAL
+        if type==INT:
+            ptype = "int32"
+            dtype = numpy.int32
+        elif type==FLOAT:
+            ptype = "float64"
+            dtype = numpy.float64
+        elif type in [POINT, VECTOR, NORMAL]:
+            ptype = "float64"
+            dtype = None
+        else:
+            return None
+        if dtype==None:
+            values = _slotArray(geom.slot(name), 3*mult)
+        else:
+            values = _slotArray(geom.slot(name), mult, dtype)
+
+        # vec3 types are split into three properties
+        if dtype==None:
+            if mult==1 and type==NORMAL and name=="N":
+                basename = "n"
+            else:
+                basename = name
+            names = (basename+"x", basename+"y", basename+"z")
+            if mult==1:
+                return (tuple(map(lambda n: (n, ptype), names)),
+                        lambda b,e: _vec3Data(names, values[b:e]))
+            else:
+                def getdata(b, e):
+                    v = values[b:e].reshape((-1, mult, 3))
+                    res = {}
+                    for i in range(3):
+                        res[names[i]] = _fixedLists(v[:,:,i])
+                    return res
+                return (tuple(map(lambda n: (n, "list", "uint32", ptype), names)), getdata)
+
+        if mult==1:
+            return (((name, ptype),),
+                    lambda b,e: {name:values[b:e,0]})
+        else:
+            return (((name, "list", "uint32", ptype),),
+                    lambda b,e: {name:_fixedLists(values[b:e])})
+
+    def _writeAscii(self, el, data, n, uniform, counts):
+        """Write a block of elements in ASCII format."""
+        columns = []
+        for prop in el.properties:
+            if prop.valueCode()[0]=="f":
+                vfmt = "%g"
+            else:
+                vfmt = "%d"
+            if prop.isList():
+                offsets, values = data[prop.name]
+                columns.append((True, offsets, values, vfmt))
+            else:
+                columns.append((False, None, data[prop.name], vfmt))
+
+        if uniform:
+            # Build one table and format it with a single format string
+            fmt = []
+            table = []
+            i = 0
+            for islist, offsets, values, vfmt in columns:
+                if islist:
+                    k = counts[i]
+                    i += 1
+                    fmt.append("%d")
+                    table.append(numpy.zeros((n, 1))+k)
+                    if k>0:
+                        fmt += k*[vfmt]
+                        table.append(numpy.asarray(values[offsets[0]:offsets[0]+n*k], numpy.float64).reshape((n, k)))
+                else:
+                    fmt.append(vfmt)
+                    table.append(numpy.asarray(values, numpy.float64).reshape((n, 1)))
+            fmt = " ".join(fmt)+" \n"
+            rows = numpy.hstack(table).tolist()
+            self.fhandle.write("".join(map(lambda row: fmt%tuple(row), rows)))
+        else:
+            lines = []
+            cols = []
+            for islist, offsets, values, vfmt in columns:
+                if islist:
+                    cols.append((offsets.tolist(), values.tolist(), vfmt))
+                else:
+                    cols.append((None, values.tolist(), vfmt))
+            for j in range(n):
+                s = []
+                for offsets, values, vfmt in cols:
+                    if offsets==None:
+                        s.append(vfmt%values[j])
+                    else:
+                        v = values[offsets[j]:offsets[j+1]]
+                        s.append("%d"%len(v))
+                        s += map(lambda x: vfmt%x, v)
+                lines.append(" ".join(s)+" \n")
+            self.fhandle.write("".join(lines))
+
+    def _writeBinary(self, el, data, n, uniform, counts):
+        """Write a block of elements in binary format."""
+        if self.mode=="little_endian":
+            byteorder = "<"
+        else:
+            byteorder = ">"
+        if uniform:
+            rec = numpy.zeros(n, el.recordType(byteorder, counts))
+            i = 0
+            for prop in el.properties:
+                if prop.isList():
+                    offsets, values = data[prop.name]
+                    k = counts[i]
+                    i += 1
+                    rec["#"+prop.name] = k
+                    if k>0:
+                        rec[prop.name] = values[offsets[0]:offsets[0]+n*k].reshape((n, k))
+                else:
+                    rec[prop.name] = data[prop.name]
+            self.fhandle.write(rec.tostring())
+            return
+
+        # Write each element individually...
+        packs = []
+        for prop in el.properties:
+            if prop.isList():
+                offsets, values = data[prop.name]
+                packs.append((byteorder+_struct_codes[prop.lengthCode()],
+                              byteorder+"%d"+_struct_codes[prop.valueCode()],
+                              offsets.tolist(), values.tolist()))
+            else:
+                packs.append((byteorder+_struct_codes[prop.valueCode()],
+                              None, None, data[prop.name].tolist()))
+        s = []
+        for j in range(n):
+            for lfmt, vfmt, offsets, values in packs:
+                if vfmt==None:
+                    s.append(struct.pack(lfmt, values[j]))
+                else:
+                    v = values[offsets[j]:offsets[j+1]]
+                    s.append(struct.pack(lfmt, len(v)))
+                    s.append(struct.pack(vfmt%len(v), *v))
+        self.fhandle.write("".join(s))
+
+
+######################################################################
+
+def _parseAscii(s):
+    """Convert a string with whitespace separated numbers into an array."""
+    return numpy.fromstring(s, numpy.float64, sep=" ")
+
+def _offsets(counts):
+    """Convert a sequence of list lengths into an offset array."""
+    res = numpy.zeros(len(counts)+1, int)
+    numpy.cumsum(counts, out=res[1:])
+    return res
+
+def _fixedLists(values):
+    """Convert a 2D array into a tuple (offsets, values)."""
+    n, k = values.shape
+    return numpy.arange(n+1)*k, values.reshape(-1)
+
+def _splitTable(el, rows, counts):
+    """Split a 2D table of ASCII values into the properties of el.
+    """
+    n = rows.shape[0]
+    data = {}
+    c = 0
+    i = 0
+    for prop in el.properties:
+        if prop.isList():
+            k = counts[i]
+            i += 1
+            values = rows[:,c+1:c+1+k].reshape(-1).astype(prop.valueCode())
+            data[prop.name] = (numpy.arange(n+1)*k, values)
+            c += k+1
+        else:
+            data[prop.name] = rows[:,c].astype(prop.valueCode())
+            c += 1
+    return data
+
+def _runLength(el, rec, counts):
+    """Return the number of leading records whose lists have the given lengths.
+
+    rec is a record array created with the record type for counts.
+    The records are checked in windows of increasing size, so the cost
+    is proportional to the length of the run (and not to len(rec)).
+    """
+    m = len(rec)
+    start = 0
+    while start<m:
+        end = min(m, max(2*start, _MIN_RUN_LENGTH))
+        window = rec[start:end]
+        valid = numpy.ones(end-start, bool)
+        i = 0
+        for prop in el.properties:
+            if prop.isList():
+                valid &= (window["#"+prop.name]==counts[i])
+                i += 1
+        if not valid.all():
+            return start+int(numpy.argmin(valid))
+        start = end
+    return m
+
+def _gather(raw, offsets, dtype):
+    """Return the values at the given byte offsets of a uint8 array.
+
+    dtype is the (byte order specific) type of the values.
+    """
+    dtype = numpy.dtype(dtype)
+    if len(offsets)==0:
+        return numpy.zeros(0, dtype)
+    idx = offsets.reshape((-1,1))+numpy.arange(dtype.itemsize)
+    return raw[idx].view(dtype).reshape(-1)
+
+def _splitRecords(el, rec, counts):
+    """Convert a numpy record array into a property dictionary.
+    """
+    n = len(rec)
+    data = {}
+    i = 0
+    for prop in el.properties:
+        if prop.isList():
+            k = counts[i]
+            i += 1
+            values = rec[prop.name].reshape(-1).astype(prop.valueCode())
+            data[prop.name] = (numpy.arange(n+1)*k, values)
+        else:
+            data[prop.name] = rec[prop.name].astype(prop.valueCode())
+    return data
+
+def _joinParts(el, parts):
+    """Join several property dictionaries into one dictionary."""
+    if len(parts)==1:
+        return parts[0]
+    data = {}
+    for prop in el.properties:
+        if prop.isList():
+            offsets = [numpy.zeros(1, int)]
+            values = []
+            base = 0
+            for part in parts:
+                o, v = part[prop.name]
+                offsets.append(o[1:]+base)
+                values.append(v)
+                base += o[-1]
+            data[prop.name] = (numpy.concatenate(offsets), numpy.concatenate(values))
+        else:
+            data[prop.name] = numpy.concatenate(map(lambda part: part[prop.name], parts))
+    return data
+
+def _padLists(offsets, values, mult, dtype):
+    """Convert lists into a 2D array with mult columns.
+
+    Longer lists are truncated, shorter lists are padded with zeros.
+    """
+    n = len(offsets)-1
+    counts = numpy.diff(offsets)
+    if (counts==mult).all():
+        return values.reshape((n, mult)).astype(dtype)
+    res = numpy.zeros((n, mult), dtype)
+    rows = numpy.repeat(numpy.arange(n), counts)
+    cols = numpy.arange(len(values))-numpy.repeat(offsets[:-1], counts)
+    mask = cols<mult
+    res[rows[mask], cols[mask]] = values[mask]
+    return res
+
+def _vec3Array(data, names):
+    """Combine three properties into a (n,3) float64 array.
+
+    Missing properties are set to 0.
+    """
+    n = None
+    for name in names:
+        if name in data:
+            n = len(data[name])
+    res = numpy.zeros((n, 3), numpy.float64)
+    for i, name in enumerate(names):
+        if name in data:
+            res[:,i] = data[name]
+    return res
+
+def _vec3Data(names, v):
+    """Split a (n,3) array into a property dictionary."""
+    return {names[0]:v[:,0], names[1]:v[:,1], names[2]:v[:,2]}
+
+def _slotArray(slot, n, dtype=numpy.float64):
+    """Return the values of an array slot as a 2D numpy array.
+
+    n is the number of values per item.
+    """
+    return numpy.fromstring(slot.getBuffer(), dtype).reshape((-1, n))
+
+def _transform(v, M):
+    """Transform a (n,3) array of points by a mat4."""
+    M = numpy.array(M.toList(rowmajor=True)).reshape((4,4))
+    res = numpy.dot(v, M[:3,:3].T) + M[:3,3]
+    w = numpy.dot(v, M[3,:3]) + M[3,3]
+    w[w==0] = 1.0
+    return res/w[:,numpy.newaxis]
+
+def _polyLists(geom, begin, end):
+    """Return the outer loops of polygons [begin:end] as (offsets, values)."""
+    loops = map(lambda i: geom.getLoop(i, 0), range(begin, end))
+    values = []
+    for loop in loops:
+        values += loop
+    return _offsets(map(len, loops)), numpy.array(values, numpy.int64)
@@ -41,6 +41,13 @@ from geomobject import *
 from polyhedron import *
 import pluginmanager
 
+# Use the RPly based reader if it is available, otherwise use the
+# pure Python version
+if hasattr(_core, "PLYReader"):
+    from _core import PLYReader
+else:
+    from plyfile import PLYReader
+
 
 # PLYImporter
 class PLYImporter:
@@ -73,7 +80,7 @@ class PLYImporter:
         self.includevar = includevar
         self.excludevar = excludevar
 
-        imp = _core.PLYReader()
+        imp = PLYReader()
         imp.open(filename)
         # Obtain the header information
         header = imp.readHeader()
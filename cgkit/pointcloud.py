@@ -86,6 +86,39 @@ def _arrayPointer(a, n):
     else:
         raise TypeError("Unknown array type")
 
+# Number of floats per variable type
+_varSizes = {"float":1, "vector":3, "point":3, "normal":3, "color":3, "matrix":16}
+
+def _varSlices(vars):
+    """Return a list of tuples (type, name, start, end).
+
+    vars is a list of tuples (type, name). start and end is the range of
+    the variable in the data part of a point.
+    """
+    res = []
+    idx = 0
+    for type,name in vars:
+        size = _varSizes.get(type)
+        if size is None:
+            raise RuntimeError("Unknown point cloud variable type: %s"%type)
+        res.append((type, name, idx, idx+size))
+        idx += size
+    return res
+
+def _decodeDataPoint(values, varSlices):
+    """Convert the values of a point into the tuple returned by readDataPoint().
+
+    values is a list containing the 7+datasize floats of a point and
+    varSlices the variable description as returned by _varSlices().
+    """
+    dataDict = {}
+    for type,name,start,end in varSlices:
+        if type=="float":
+            dataDict[name] = values[7+start]
+        else:
+            dataDict[name] = values[7+start:7+end]
+    return tuple(values[0:3]), tuple(values[3:6]), values[6], dataDict
+
 
 class PtcReader(object):
     """Point cloud reader class.
@@ -93,6 +126,9 @@ class PtcReader(object):
     An instance of this class is returned by the open() function.
     """
     
+    # The number of points that readDataPoint() reads at once
+    _pointBatchSize = 1000
+    
     def __init__(self, fileName, libName):
         """Constructor.
         
@@ -137,26 +173,10 @@ class PtcReader(object):
         # Access to the attributes is provided via properties.
         self._ptcAttrs = {}
         
-        code = ""
-        idx = 0
         vars = []
         for i in range(nvars.value):
-            name = names[i]
-            type = types[i]
-            vars.append((type, name))
-            if type=="float":
-                code += "dataDict['%s'] = data[%s]\n"%(name,idx)
-                idx += 1
-            elif type in ["vector", "point", "normal", "color"]:
-                code += "dataDict['%s'] = data[%s:%s]\n"%(name,idx,idx+3)
-                idx += 3
-            elif type=="matrix":
-                code += "dataDict['%s'] = data[%s:%s]\n"%(name,idx,idx+16)
-                idx += 16
-            else:
-                raise RuntimeError("Unknown variable type in point cloud file: %s"%type)
-        # Compile the code that will pick the correct data components and put them into a dict
-        self._dataCollectionCode = compile(code, "<string>", "exec")
+            vars.append((types[i], names[i]))
+        self._varSlices = _varSlices(vars)
         
         self._ptcAttrs["variables"] = vars
         
@@ -195,11 +215,12 @@ class PtcReader(object):
         # The number of points that can still be read before eof is hit
         self._numPointsLeft = self.npoints
 
-        # Set up storage for reading individual data points
-        self._pos = (3*ctypes.c_float)()
-        self._normal = (3*ctypes.c_float)()
-        self._radius = ctypes.c_float()
-        self._data = (self.datasize*ctypes.c_float)()
+        # readDataPoint() reads the points in batches. These are the values
+        # of the current batch (a list of floats), the number of points in
+        # the batch and the index of the next point that is returned.
+        self._pendingValues = []
+        self._pendingCount = 0
+        self._pendingPos = 0
 
     def __del__(self):
         """Destructor.
@@ -274,15 +295,23 @@ class PtcReader(object):
         if self._numPointsLeft==0:
             raise EOFError("There are no more points left to read from point cloud file %s"%self.name)
         
+        # Read the next batch of points?
+        if self._pendingPos==self._pendingCount:
+            n = min(self._pointBatchSize, self._numPointsLeft)
+            stride = 7+self.datasize
+            buf = ((stride*n)*ctypes.c_float)()
+            ptr = ctypes.addressof(buf)
+            _pointcloud.readDataPoints(ctypes.addressof(self._PtcReadDataPoint), self._handle, n,
+                                       ptr, stride, ptr+12, stride, ptr+24, stride, ptr+28, stride)
+            self._pendingValues = buf[:]
+            self._pendingCount = n
+            self._pendingPos = 0
+        
+        stride = 7+self.datasize
+        i = self._pendingPos*stride
+        self._pendingPos += 1
         self._numPointsLeft -= 1
-        res = self._PtcReadDataPoint(self._handle, self._pos, self._normal, self._radius, self._data)
-        if res==0:
-            raise IOError("Error while reading data point from point cloud file %s"%self.name)
-        else:
-            dataDict = {}
-            data = self._data
-            exec self._dataCollectionCode
-            return tuple(self._pos), tuple(self._normal), self._radius.value, dataDict
+        return _decodeDataPoint(self._pendingValues[i:i+stride], self._varSlices)
 
     def readDataPoints(self, numPoints, buffer):
         """Read a sequence of data points.
@@ -328,13 +357,42 @@ class PtcReader(object):
             dataPtr = radPtr+sizeOfFloat
         
         num = min(numPoints, self._numPointsLeft)
+        self._numPointsLeft -= num
+        
+        # Copy the points that were already read by readDataPoint()
+        k = min(num, self._pendingCount-self._pendingPos)
+        if k>0:
+            self._copyPending(k, [(pntPtr, pntStride, 0, 3), (normPtr, normStride, 3, 3),
+                                  (radPtr, radStride, 6, 1), (dataPtr, dataStride, 7, self.datasize)])
+            sizeOfFloat = 4
+            pntPtr += k*pntStride*sizeOfFloat
+            normPtr += k*normStride*sizeOfFloat
+            radPtr += k*radStride*sizeOfFloat
+            dataPtr += k*dataStride*sizeOfFloat
         
         # Read the points
-        self._numPointsLeft -= num
-        _pointcloud.readDataPoints(ctypes.addressof(self._PtcReadDataPoint), self._handle, num,
+        _pointcloud.readDataPoints(ctypes.addressof(self._PtcReadDataPoint), self._handle, num-k,
                                    pntPtr, pntStride, normPtr, normStride, radPtr, radStride, dataPtr, dataStride)
         return num
 
+    def _copyPending(self, num, buffers):
+        """Copy points from the current readDataPoint() batch into buffers.
+        
+        buffers is a list of tuples (ptr, stride, offset, size) that
+        describes where to write the values. offset and size is the range
+        of the values within a point.
+        """
+        stride = 7+self.datasize
+        values = self._pendingValues
+        for ptr,bufStride,offset,size in buffers:
+            if size==0:
+                continue
+            dst = ((bufStride*(num-1)+size)*ctypes.c_float).from_address(ptr)
+            for i in range(num):
+                j = (self._pendingPos+i)*stride+offset
+                dst[i*bufStride:i*bufStride+size] = values[j:j+size]
+        self._pendingPos += num
+
     def iterPoints(self):
         """Iterate over all the points in the file.
         
@@ -343,6 +401,41 @@ class PtcReader(object):
         """
         while self._numPointsLeft>0:
             yield self.readDataPoint()
+    
+    def recordType(self):
+        """Return the numpy dtype of the records returned by iterRecords().
+        
+        The dtype has the fields "point", "normal", "radius" and one field
+        per variable (using the variable name).
+        """
+        global _numpy_available
+        
+        if not _numpy_available:
+            raise ImportError("numpy is not available") 
+        fields = [("point", numpy.float32, (3,)),
+                  ("normal", numpy.float32, (3,)),
+                  ("radius", numpy.float32)]
+        for type,name,start,end in self._varSlices:
+            if name in ["point", "normal", "radius"]:
+                raise ValueError('Variable name "%s" conflicts with a record field'%name)
+            if type=="float":
+                fields.append((name, numpy.float32))
+            else:
+                fields.append((name, numpy.float32, (end-start,)))
+        return numpy.dtype(fields)
+    
+    def iterRecords(self, batchSize=1000):
+        """Iterate over point batches as numpy record arrays.
+        
+        Reads batchSize points at once and yields a 1-dimensional numpy
+        array with the dtype returned by recordType(), so the values can
+        be accessed by name (e.g. recs["point"] or recs["Ci"]).
+        The array is a view of the batch buffer which is reused for the
+        next batch.
+        """
+        dtype = self.recordType()
+        for buf in self.iterBatches(batchSize, combinedBuffer=True, numpyArray=True):
+            yield buf.view(dtype).reshape(-1)
             
     def iterBatches(self, batchSize=1000, combinedBuffer=False, numpyArray=False):
         """Iterate over point batches.
@@ -609,6 +702,11 @@ def open(fileName, mode="r", libName=None, **kwargs):
     *fileName* is the name of the point cloud file. *mode* is either ``"r"``
     for reading a file or ``"w"`` for writing a new point cloud file.
     *libName* is the library name that implements the point cloud API.
+    If *libName* is ``"cgkit"`` (or ``None``), the native cgkit point cloud
+    format is used which doesn't require a renderer library (see the
+    :mod:`ptcfile` module). When reading a file with *libName* set to
+    ``None``, the native format is only used if the file is a native file
+    (otherwise an :exc:`IOError` exception is thrown).
     When mode is ``"w"``, the following additional keyword arguments must
     be present:
     
@@ -620,13 +718,52 @@ def open(fileName, mode="r", libName=None, **kwargs):
     Depending on the mode, the function either returns a :class:`PtcReader` or
     :class:`PtcWriter` object.
     """
+    import ptcfile
     if mode=="r":
+        if libName=="cgkit" or (libName is None and ptcfile.isPtcFile(fileName)):
+            return ptcfile.PtcReader(fileName, libName, **kwargs)
+        if libName is None:
+            raise IOError("%s is not a native cgkit point cloud file, the renderer library has to be specified"%fileName)
         return PtcReader(fileName, libName, **kwargs)
     elif mode=="w":
+        if libName is None or libName=="cgkit":
+            return ptcfile.PtcWriter(fileName, libName=libName, **kwargs)
         return PtcWriter(fileName, libName=libName, **kwargs)
     else:
         raise ValueError('Invalid file mode: "%s" (expected "r" or "w")'%mode)
 
+def convert(srcFileName, dstFileName, srcLibName=None, dstLibName=None, batchSize=10000):
+    """Convert a point cloud file into another format.
+    
+    Reads the point cloud file *srcFileName* using the library *srcLibName*
+    and writes all points into the new file *dstFileName* using the library
+    *dstLibName*. The library names are passed to :func:`open`, so by
+    default the native cgkit format is written which can be used to
+    convert renderer point clouds into cgkit point clouds and vice versa.
+    The points are copied in batches of *batchSize* points.
+    Returns the number of points that were copied.
+    """
+    src = open(srcFileName, "r", srcLibName)
+    world2eye = src.world2eye
+    world2ndc = src.world2ndc
+    if world2eye is None:
+        world2eye = cgtypes.mat4(1)
+    if world2ndc is None:
+        world2ndc = cgtypes.mat4(1)
+    format = src.format
+    if format is None:
+        format = (640,480,1)
+    dst = open(dstFileName, "w", dstLibName, vars=src.variables,
+               world2eye=world2eye, world2ndc=world2ndc, format=format)
+    num = src.npoints
+    for buffer in src.iterBatches(batchSize, combinedBuffer=True, numpyArray=_numpy_available):
+        n = min(batchSize, num)
+        dst.writeDataPoints(n, buffer)
+        num -= n
+    dst.close()
+    src.close()
+    return src.npoints
+
 ###################################################################
 
 if __name__=="__main__":
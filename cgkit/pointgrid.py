@@ -0,0 +1,372 @@
+# ***** BEGIN LICENSE BLOCK *****
+# Version: MPL 1.1/GPL 2.0/LGPL 2.1
+#
+# The contents of this file are subject to the Mozilla Public License Version
+# 1.1 (the "License"); you may not use this file except in compliance with
+# the License. You may obtain a copy of the License at
+# http://www.mozilla.org/MPL/
+#
+# Software distributed under the License is distributed on an "AS IS" basis,
+# WITHOUT WARRANTY OF ANY KIND, either express or implied. See the License
+# for the specific language governing rights and limitations under the
+# License.
+#
+# The Original Code is the Python Computer Graphics Kit.
+#
+# The Initial Developer of the Original Code is Matthias Baas.
+# Portions created by the Initial Developer are Copyright (C) 2009
+# the Initial Developer. All Rights Reserved.
+#
+# Contributor(s):
+#
+# Alternatively, the contents of this file may be used under the terms of
+# either the GNU General Public License Version 2 or later (the "GPL"), or
+# the GNU Lesser General Public License Version 2.1 or later (the "LGPL"),
+# in which case the provisions of the GPL or the LGPL are applicable instead
+# of those above. If you wish to allow use of your version of this file only
+# under the terms of either the GPL or the LGPL, and not to allow others to
+# use your version of this file under the terms of the MPL, indicate your
+# decision by deleting the provisions above and replace them with the notice
+# and other provisions required by the GPL or the LGPL. If you do not delete
+# the provisions above, a recipient may use your version of this file under
+# the terms of any one of the MPL, the GPL or the LGPL.
+#
+# ***** END LICENSE BLOCK *****
+
+"""Spatial index for point clouds.
+
+This module contains the PointGrid class which sorts a set of points
+into a uniform grid and provides vectorized radius and k-nearest-neighbour
+queries. The points can be taken from a numpy array or directly from a
+point cloud file (see fromPointCloud()).
+"""
+
+try:
+    import numpy
+    _numpy_available = True
+except ImportError:
+    _numpy_available = False
+
+# The number of query points that are processed at once
+_QUERY_BLOCK_SIZE = 4096
+
+def fromPointCloud(ptc, batchSize=100000, cellSize=None, pointsPerCell=8):
+    """Create a PointGrid from the points in a point cloud file.
+
+    ptc is an open point cloud reader (see the pointcloud module). The
+    positions of all remaining points are read in batches of batchSize
+    points and are stored in a PointGrid. The indices returned by the
+    queries refer to the order of the points in the file.
+    cellSize and pointsPerCell are passed to the PointGrid constructor.
+    """
+    if not _numpy_available:
+        raise ImportError("numpy is not available")
+    pnts = numpy.empty((ptc.npoints,3), dtype=numpy.float32)
+    i = 0
+    for P,N,R,D in ptc.iterBatches(batchSize, numpyArray=True):
+        n = len(R)
+        pnts[i:i+n] = P
+        i += n
+    return PointGrid(pnts[:i], cellSize=cellSize, pointsPerCell=pointsPerCell)
+
+
+class PointGrid(object):
+    """Uniform grid that stores a set of points.
+
+    The points are stored as float32 values, sorted by the grid cell they
+    belong to. Only the occupied cells are stored (as a sorted array of
+    cell keys together with the index of the first point in each cell),
+    so the memory requirements only depend on the number of points and
+    not on the extent of the grid. All query methods take an array of query points
+    and return the indices (referring to the original point order) and
+    distances of the found points.
+    """
+
+    def __init__(self, points, cellSize=None, pointsPerCell=8):
+        """Constructor.
+
+        points is an array of shape (n,3) (or anything that can be
+        converted into such an array). cellSize is the edge length of
+        the grid cells. If it is None, a cell size is chosen so that the
+        occupied cells contain pointsPerCell points on average.
+        """
+        global _numpy_available
+
+        object.__init__(self)
+
+        if not _numpy_available:
+            raise ImportError("numpy is not available")
+
+        points = numpy.asarray(points, dtype=numpy.float32).reshape(-1,3)
+        n = len(points)
+
+        if n>0:
+            bmin = points.min(axis=0).astype(float)
+            bmax = points.max(axis=0).astype(float)
+        else:
+            bmin = numpy.zeros(3)
+            bmax = numpy.zeros(3)
+        self.bboxMin = bmin
+        self.bboxMax = bmax
+
+        if cellSize is None:
+            cellSize = self._estimateCellSize(points, pointsPerCell)
+        elif cellSize<=0:
+            raise ValueError("Invalid cell size: %s"%cellSize)
+        # The cell keys must fit into 62 bits
+        ext = bmax-bmin
+        while numpy.sum(numpy.log2(numpy.floor(ext/cellSize)+1))>62:
+            cellSize *= 2
+        self.cellSize = float(cellSize)
+        self._dims = (numpy.floor(ext/cellSize)+1).astype(numpy.int64)
+
+        # Sort the points by their cells
+        keys = self._cellKeys(self._cellCoords(points))
+        order = numpy.argsort(keys)
+        keys = keys[order]
+        first = numpy.flatnonzero(numpy.concatenate((keys[:1]==keys[:1], keys[1:]!=keys[:-1])))
+        # The keys of the occupied cells and the index of their first point
+        self._cellKeyArray = keys[first]
+        self._cellStart = numpy.append(first, n).astype(numpy.int64)
+        del keys
+        self.points = points[order]
+        if n<2**31:
+            order = order.astype(numpy.int32)
+        self.indices = order
+
+    def __len__(self):
+        return len(self.points)
+
+    def queryRadius(self, points, radius):
+        """Find all points within a given distance of the query points.
+
+        points is an array of shape (m,3) containing the query points.
+        Returns a tuple (offsets, indices, distances) where offsets is an
+        array with m+1 elements and indices and distances contain the
+        point indices and distances of the found points. The points found
+        for query point i are stored in the range offsets[i] to
+        offsets[i+1] and are sorted by distance.
+        """
+        q = numpy.asarray(points, dtype=float).reshape(-1,3)
+        radius = float(radius)
+        m = len(q)
+        counts = []
+        idxs = []
+        dists = []
+        for b in range(0, m, _QUERY_BLOCK_SIZE):
+            qb = q[b:b+_QUERY_BLOCK_SIZE]
+            lo = self._cellCoords(qb-radius)
+            hi = self._cellCoords(qb+radius)
+            offsets = _boxOffsets(numpy.max(hi-lo, axis=0))
+            cells = (lo[:,numpy.newaxis,:]+offsets).reshape(-1,3)
+            qi = numpy.repeat(numpy.arange(len(qb)), len(offsets))
+            valid = numpy.all(cells<=numpy.repeat(hi, len(offsets), axis=0), axis=1)
+            qi,pi,d2 = self._candidates(qb, qi[valid], cells[valid])
+            inside = d2<=radius*radius
+            qi = qi[inside]
+            pi = pi[inside]
+            d2 = d2[inside]
+            order = numpy.lexsort((d2, qi))
+            counts.append(numpy.bincount(qi, minlength=len(qb)))
+            idxs.append(self.indices[pi[order]])
+            dists.append(numpy.sqrt(d2[order]))
+
+        offsets = numpy.zeros(m+1, dtype=numpy.int64)
+        if m>0:
+            numpy.cumsum(numpy.concatenate(counts), out=offsets[1:])
+            return offsets, numpy.concatenate(idxs), numpy.concatenate(dists)
+        else:
+            return offsets, numpy.zeros(0, dtype=self.indices.dtype), numpy.zeros(0)
+
+    def queryKNN(self, points, k, maxDistance=None):
+        """Find the k nearest neighbours of the query points.
+
+        points is an array of shape (m,3) containing the query points.
+        Returns a tuple (indices, distances) of two arrays with shape (m,k)
+        that contain the point indices and distances of the k nearest
+        points of each query point sorted by distance. If fewer than k
+        points are available (or are within maxDistance), the remaining
+        indices are -1 and the distances are inf.
+        """
+        if k<1:
+            raise ValueError("k must be at least 1")
+        q = numpy.asarray(points, dtype=float).reshape(-1,3)
+        m = len(q)
+        resI = numpy.empty((m,k), dtype=numpy.int64)
+        resD = numpy.empty((m,k))
+        if len(self.points)==0:
+            resI.fill(-1)
+            resD.fill(numpy.inf)
+            return resI, resD
+        maxLevel = int(numpy.max(self._dims))
+        if maxDistance is not None:
+            maxLevel = min(maxLevel, int(maxDistance/self.cellSize)+1)
+        for b in range(0, m, _QUERY_BLOCK_SIZE):
+            qb = q[b:b+_QUERY_BLOCK_SIZE]
+            cell = self._cellCoords(qb)
+            bestD = numpy.empty((len(qb),k))
+            bestD.fill(numpy.inf)
+            bestI = numpy.zeros((len(qb),k), dtype=numpy.int64)
+            active = numpy.arange(len(qb))
+            level = 0
+            while len(active)>0:
+                # Collect the points in the cells at the current level
+                # (the cells whose distance to the query cell is level)
+                offsets = _shellOffsets(level)
+                cells = (cell[active][:,numpy.newaxis,:]+offsets).reshape(-1,3)
+                qi = numpy.repeat(active, len(offsets))
+                valid = numpy.all((cells>=0) & (cells<self._dims), axis=1)
+                qi,pi,d2 = self._candidates(qb, qi[valid], cells[valid])
+                _mergeBest(bestD, bestI, qi, pi, d2)
+                # Points in the next levels are at least level*cellSize away
+                if level>=maxLevel:
+                    break
+                bound = level*self.cellSize
+                active = active[bestD[active,k-1]>bound*bound]
+                level += 1
+
+            bestD = numpy.sqrt(bestD)
+            if maxDistance is not None:
+                bestD[bestD>maxDistance] = numpy.inf
+            found = bestD<numpy.inf
+            resI[b:b+len(qb)] = numpy.where(found, self.indices[bestI], -1)
+            resD[b:b+len(qb)] = bestD
+        return resI, resD
+
+    def _candidates(self, q, qi, cells):
+        """Return all points in the given cells.
+
+        q is the array of query points, qi an array of query indices
+        and cells contains the corresponding cell coordinates.
+        Returns a tuple (qi, pi, d2) with the query indices, point indices
+        (of the sorted points) and squared distances of all points in the
+        cells.
+        """
+        if len(self._cellKeyArray)==0:
+            return qi[:0], qi[:0], numpy.zeros(0)
+        keys = self._cellKeys(cells)
+        idx = numpy.searchsorted(self._cellKeyArray, keys)
+        idx = numpy.minimum(idx, len(self._cellKeyArray)-1)
+        occupied = self._cellKeyArray[idx]==keys
+        start = self._cellStart[idx]
+        counts = numpy.where(occupied, self._cellStart[idx+1]-start, 0)
+        total = int(numpy.sum(counts))
+        qi = numpy.repeat(qi, counts)
+        pi = numpy.repeat(start-(numpy.cumsum(counts)-counts), counts)+numpy.arange(total)
+        d = self.points[pi]-q[qi]
+        d2 = numpy.sum(d*d, axis=1)
+        return qi, pi, d2
+
+    def _cellCoords(self, points):
+        """Return the (clamped) integer cell coordinates of points.
+        """
+        c = numpy.floor((points-self.bboxMin)/self.cellSize)
+        c = numpy.clip(c, 0, self._dims-1)
+        return c.astype(numpy.int64)
+
+    def _cellKeys(self, cells):
+        """Convert integer cell coordinates into cell indices.
+        """
+        nx,ny,nz = self._dims
+        return cells[:,0]+nx*(cells[:,1]+ny*cells[:,2])
+
+    def _estimateCellSize(self, points, pointsPerCell):
+        """Return a cell size so that occupied cells contain pointsPerCell points.
+
+        The initial estimate assumes the points fill the bounding box. As
+        point clouds usually lie on surfaces, the estimate is refined using
+        the median number of points in the occupied cells (of a subset of
+        the points).
+        """
+        n = len(points)
+        ext = numpy.maximum(self.bboxMax-self.bboxMin, 1E-6*max(1.0, numpy.max(self.bboxMax-self.bboxMin)))
+        if n==0:
+            return 1.0
+        # Use a subset of the points for large point sets
+        m = min(n, 1000000)
+        if m<n:
+            sample = points[numpy.random.RandomState(0).randint(0, n, m)]
+        else:
+            sample = points
+        cellSize = (numpy.prod(ext)*pointsPerCell/m)**(1.0/3)
+        for i in range(8):
+            dims = (numpy.floor(ext/cellSize)+1).astype(numpy.int64)
+            c = numpy.clip(numpy.floor((sample-self.bboxMin)/cellSize), 0, dims-1).astype(numpy.int64)
+            keys = c[:,0]+dims[0]*(c[:,1]+dims[1]*c[:,2])
+            # Use the median so that a few dense clusters don't shrink the cells
+            perCell = float(numpy.median(numpy.unique(keys, return_counts=True)[1]))
+            if abs(perCell/pointsPerCell-1.0)<0.2:
+                break
+            # Assume the number of points per cell grows quadratically (surfaces)
+            cellSize *= (pointsPerCell/perCell)**0.5
+        # Scale the cell size to the full set of points
+        cellSize *= (m/float(n))**0.5
+        return cellSize
+
+######################################################################
+
+def _boxOffsets(span):
+    """Return all integer offsets (i,j,k) with 0<=i<=span[0], etc.
+    """
+    r = map(lambda s: numpy.arange(s+1), span)
+    g = numpy.meshgrid(r[0], r[1], r[2], indexing="ij")
+    return numpy.column_stack([a.ravel() for a in g])
+
+_shellCache = {}
+
+def _shellOffsets(level):
+    """Return the offsets of all cells with Chebyshev distance level.
+    """
+    res = _shellCache.get(level)
+    if res is None:
+        res = _boxOffsets((2*level, 2*level, 2*level))-level
+        res = res[numpy.max(numpy.abs(res), axis=1)==level]
+        if level<16:
+            _shellCache[level] = res
+    return res
+
+def _mergeBest(bestD, bestI, qi, pi, d2):
+    """Merge candidate points into the k best points of each query.
+
+    bestD and bestI are arrays of shape (m,k) that contain the squared
+    distances and point indices of the k nearest points found so far
+    (sorted by distance). qi, pi and d2 contain the query indices,
+    point indices and squared distances of the new candidates where
+    qi must be sorted.
+    """
+    if len(qi)==0:
+        return
+    k = bestD.shape[1]
+    # Put the current best points and the candidates of each query into
+    # one row of a matrix and sort the rows
+    start = numpy.flatnonzero(numpy.concatenate(([True], qi[1:]!=qi[:-1])))
+    rows = qi[start]
+    counts = numpy.diff(numpy.append(start, len(qi)))
+    width = k+int(counts.max())
+    # Very unevenly distributed candidates? Then sort all values at once
+    # instead of creating a huge matrix
+    if len(rows)*width>4*(len(qi)+k*len(rows))+100000:
+        allq = numpy.concatenate((numpy.repeat(rows, k), qi))
+        alld = numpy.concatenate((bestD[rows].ravel(), d2))
+        alli = numpy.concatenate((bestI[rows].ravel(), pi))
+        order = numpy.lexsort((alld, allq))
+        allq = allq[order]
+        rank = numpy.arange(len(allq))-numpy.searchsorted(allq, allq)
+        keep = rank<k
+        order = order[keep]
+        bestD[allq[keep], rank[keep]] = alld[order]
+        bestI[allq[keep], rank[keep]] = alli[order]
+        return
+    D = numpy.empty((len(rows), width))
+    D.fill(numpy.inf)
+    I = numpy.zeros((len(rows), width), dtype=numpy.int64)
+    D[:,:k] = bestD[rows]
+    I[:,:k] = bestI[rows]
+    r = numpy.repeat(numpy.arange(len(rows)), counts)
+    c = k+numpy.arange(len(qi))-numpy.repeat(start, counts)
+    D[r,c] = d2
+    I[r,c] = pi
+    order = numpy.argsort(D, axis=1)[:,:k]
+    r = numpy.arange(len(rows)).reshape(-1,1)
+    bestD[rows] = D[r,order]
+    bestI[rows] = I[r,order]
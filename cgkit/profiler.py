@@ -0,0 +1,335 @@
+# ***** BEGIN LICENSE BLOCK *****
+# Version: MPL 1.1/GPL 2.0/LGPL 2.1
+#
+# The contents of this file are subject to the Mozilla Public License Version
+# 1.1 (the "License"); you may not use this file except in compliance with
+# the License. You may obtain a copy of the License at
+# http://www.mozilla.org/MPL/
+#
+# Software distributed under the License is distributed on an "AS IS" basis,
+# WITHOUT WARRANTY OF ANY KIND, either express or implied. See the License
+# for the specific language governing rights and limitations under the
+# License.
+#
+# The Original Code is the Python Computer Graphics Kit.
+#
+# The Initial Developer of the Original Code is Matthias Baas.
+# Portions created by the Initial Developer are Copyright (C) 2004
+# the Initial Developer. All Rights Reserved.
+#
+# Contributor(s):
+#
+# Alternatively, the contents of this file may be used under the terms of
+# either the GNU General Public License Version 2 or later (the "GPL"), or
+# the GNU Lesser General Public License Version 2.1 or later (the "LGPL"),
+# in which case the provisions of the GPL or the LGPL are applicable instead
+# of those above. If you wish to allow use of your version of this file only
+# under the terms of either the GPL or the LGPL, and not to allow others to
+# use your version of this file under the terms of the MPL, indicate your
+# decision by deleting the provisions above and replace them with the notice
+# and other provisions required by the GPL or the LGPL. If you do not delete
+# the provisions above, a recipient may use your version of this file under
+# the terms of any one of the MPL, the GPL or the LGPL.
+#
+# ***** END LICENSE BLOCK *****
+"""Profiling of slot computations and event dispatching.
+
+A Profiler object records how often procedural slots are computed and
+event receivers are called and how much time is spent in them. The
+recorded data can be printed as a report sorted by time or saved as a
+trace file that can be viewed with the Chrome trace viewer
+(chrome://tracing).
+
+Profiling is opt-in. As long as no profiler is active, the instrumented
+code only checks a module variable.
+
+Example:
+
+\code
+prof = Profiler(trace=True)
+prof.start()
+... run the simulation ...
+prof.stop()
+prof.report()
+prof.saveTrace("trace.json")
+\endcode
+"""
+
+import sys, time
+import events
+import eventmanager
+try:
+    from _core import getSlotCounters
+except ImportError:
+    getSlotCounters = None
+
+if sys.platform=="win32":
+    _clock = time.clock
+else:
+    _clock = time.time
+
+# The currently active profiler (or None)
+_active = None
+
+# activeProfiler
+def activeProfiler():
+    """Return the currently active profiler.
+
+    \return Profiler object or None.
+    """
+    return _active
+
+# Profiler
+class Profiler:
+    """Records call counts and execution times of slots and event receivers.
+
+    The records are stored per category and name. The following
+    categories are used:
+
+    - "slot": The computeValue() call of a procedural slot. The name is
+      the name of the procedure (prefixed by the component name if the
+      procedure is a component method).
+    - "event": The entire dispatching of an event. The name is the event
+      name.
+    - "receiver": A single event receiver. The name is the event name
+      followed by the receiver name.
+
+    The profiler tracks the current frame by listening to the STEP_FRAME
+    event. If a frame range is given, only calls that happen inside this
+    range are recorded.
+    """
+
+    def __init__(self, trace=False, frames=None):
+        """Constructor.
+
+        \param trace (\c bool) If True, every single call is stored so
+               that a trace file can be written.
+        \param frames (\c tuple) A tuple (first, last) that specifies the
+               range of frames that should be recorded (inclusive) or None
+               to record all frames.
+        """
+        self.trace = trace
+        self.frames = frames
+        self.frame = 0
+        # Key: (category, name) - Value: [count, total time]
+        self.stats = {}
+        # List of (category, name, frame, start, duration) tuples
+        self.calls = []
+        # Key: Frame - Value: (notifications, computations, deferred)
+        self.slotcounters = {}
+
+        self._recording = True
+        self._starttime = None
+        self._counters = None
+        self._timer = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, errorType, errorValue, traceback):
+        self.stop()
+        return False
+
+    # start
+    def start(self):
+        """Activate the profiler.
+
+        Only one profiler can be active at any time. Activating the
+        profiler deactivates any other active profiler.
+        """
+        global _active
+        if _active is not None:
+            _active.stop()
+        _active = self
+        if self._starttime is None:
+            self._starttime = _clock()
+        try:
+            from globalscene import getScene
+            self._timer = getScene().timer()
+        except ImportError:
+            self._timer = None
+        self._setFrame(self._currentFrame())
+        if getSlotCounters is not None:
+            self._counters = getSlotCounters()
+        eventmanager.eventManager().connect(events.STEP_FRAME, self._onStepFrame, priority=-1000000, system=True)
+
+    # stop
+    def stop(self):
+        """Deactivate the profiler.
+        """
+        global _active
+        if _active is not self:
+            return
+        self._storeSlotCounters()
+        eventmanager.eventManager().disconnect(events.STEP_FRAME, self._onStepFrame, system=True)
+        _active = None
+
+    # clear
+    def clear(self):
+        """Remove all recorded data.
+        """
+        self.stats = {}
+        self.calls = []
+        self.slotcounters = {}
+
+    # call
+    def call(self, category, name, func, *args, **keyargs):
+        """Call a function and record the call.
+
+        \param category (\c str) The category under which the call is recorded
+        \param name (\c str) The name under which the call is recorded
+        \param func The callable that gets called with the remaining arguments
+        \return The return value of func.
+        """
+        if not self._recording:
+            return func(*args, **keyargs)
+        start = _clock()
+        try:
+            return func(*args, **keyargs)
+        finally:
+            self.record(category, name, start, _clock()-start)
+
+    # record
+    def record(self, category, name, start, duration):
+        """Record a call.
+
+        \param category (\c str) Category
+        \param name (\c str) Name
+        \param start (\c float) Start time (as returned by the profiler clock)
+        \param duration (\c float) Duration in seconds
+        """
+        if not self._recording:
+            return
+        key = (category, name)
+        stat = self.stats.get(key)
+        if stat is None:
+            self.stats[key] = [1, duration]
+        else:
+            stat[0] += 1
+            stat[1] += duration
+        if self.trace:
+            self.calls.append((category, name, self.frame, start, duration))
+
+    # report
+    def report(self, file=None, sort="time", limit=None):
+        """Print the recorded data.
+
+        \param file A file-like object that receives the output (default: stdout)
+        \param sort (\c str) Sort key. This is either "time", "count" or "name".
+        \param limit (\c int) Maximum number of lines or None
+        """
+        if file is None:
+            file = sys.stdout
+        items = [(key[0], key[1], stat[0], stat[1]) for key,stat in self.stats.items()]
+        if sort=="time":
+            items.sort(key=lambda x: (-x[3], x[0], x[1]))
+        elif sort=="count":
+            items.sort(key=lambda x: (-x[2], x[0], x[1]))
+        elif sort=="name":
+            items.sort()
+        else:
+            raise ValueError('Invalid sort key: "%s"'%sort)
+        if limit is not None:
+            items = items[:limit]
+
+        print >>file, "%8s %12s %12s  %-9s %s"%("calls", "total [ms]", "per call", "category", "name")
+        for category,name,count,total in items:
+            print >>file, "%8d %12.3f %12.3f  %-9s %s"%(count, 1000*total, 1000*total/count, category, name)
+
+        if self.slotcounters:
+            print >>file
+            print >>file, "%8s %14s %14s %12s"%("frame", "notifications", "computations", "deferred")
+            frames = self.slotcounters.keys()
+            frames.sort()
+            for frame in frames:
+                notifications,computations,deferred = self.slotcounters[frame]
+                print >>file, "%8d %14d %14d %12d"%(frame, notifications, computations, deferred)
+
+    # saveTrace
+    def saveTrace(self, filename):
+        """Save the recorded calls as a Chrome trace file.
+
+        The profiler must have been created with trace set to True.
+        The resulting JSON file can be loaded into the Chrome trace viewer.
+
+        \param filename (\c str) Output file name
+        """
+        if not self.trace:
+            raise ValueError("The profiler was not created with trace=True")
+        f = file(filename, "wt")
+        f.write('{"traceEvents": [\n')
+        t0 = self._starttime
+        lines = []
+        for category,name,frame,start,duration in self.calls:
+            lines.append('{"name": %s, "cat": %s, "ph": "X", "ts": %.3f, "dur": %.3f, "pid": 0, "tid": 0, "args": {"frame": %d}}'%(_jsonString(name), _jsonString(category), 1000000*(start-t0), 1000000*duration, frame))
+        f.write(",\n".join(lines))
+        f.write('\n]}\n')
+        f.close()
+
+    ## protected:
+
+    def _onStepFrame(self):
+        self._storeSlotCounters()
+        self._setFrame(self._currentFrame())
+
+    def _currentFrame(self):
+        """Return the frame number of the scene timer.
+        """
+        if self._timer is None:
+            return self.frame
+        return int(round(self._timer.frame))
+
+    def _setFrame(self, frame):
+        """Set the current frame and check if it's inside the frame range.
+        """
+        self.frame = frame
+        if self.frames is None:
+            self._recording = True
+        else:
+            first,last = self.frames
+            self._recording = (first<=frame<=last)
+
+    def _storeSlotCounters(self):
+        """Store the slot counter increments of the current frame.
+        """
+        if self._counters is None:
+            return
+        counters = getSlotCounters()
+        if self._recording:
+            prev = self.slotcounters.get(self.frame, (0,0,0))
+            self.slotcounters[self.frame] = tuple(map(lambda p,a,b: p+b-a, prev, self._counters, counters))
+        self._counters = counters
+
+
+# procName
+def procName(proc):
+    """Return a descriptive name for a callable.
+
+    If the callable is a method of a component, the name is prefixed by
+    the name of the component, otherwise methods are prefixed by the
+    class name.
+
+    \param proc A callable object
+    \return Name (\c str)
+    """
+    name = getattr(proc, "__name__", "<unnamed>")
+    obj = getattr(proc, "im_self", None)
+    if obj is not None:
+        objname = getattr(obj, "name", None)
+        if isinstance(objname, basestring):
+            return "%s.%s"%(objname, name)
+        return "%s.%s"%(obj.__class__.__name__, name)
+    return name
+
+def _jsonString(s):
+    """Return a JSON string literal.
+    """
+    s = str(s).replace("\\", "\\\\").replace('"', '\\"')
+    res = []
+    for c in s:
+        if ord(c)<32:
+            res.append("\\u%04x"%ord(c))
+        else:
+            res.append(c)
+    return '"%s"'%"".join(res)
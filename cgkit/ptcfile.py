@@ -0,0 +1,542 @@
+# ***** BEGIN LICENSE BLOCK *****
+# Version: MPL 1.1/GPL 2.0/LGPL 2.1
+#
+# The contents of this file are subject to the Mozilla Public License Version
+# 1.1 (the "License"); you may not use this file except in compliance with
+# the License. You may obtain a copy of the License at
+# http://www.mozilla.org/MPL/
+#
+# Software distributed under the License is distributed on an "AS IS" basis,
+# WITHOUT WARRANTY OF ANY KIND, either express or implied. See the License
+# for the specific language governing rights and limitations under the
+# License.
+#
+# The Original Code is the Python Computer Graphics Kit.
+#
+# The Initial Developer of the Original Code is Matthias Baas.
+# Portions created by the Initial Developer are Copyright (C) 2009
+# the Initial Developer. All Rights Reserved.
+#
+# Contributor(s):
+#
+# Alternatively, the contents of this file may be used under the terms of
+# either the GNU General Public License Version 2 or later (the "GPL"), or
+# the GNU Lesser General Public License Version 2.1 or later (the "LGPL"),
+# in which case the provisions of the GPL or the LGPL are applicable instead
+# of those above. If you wish to allow use of your version of this file only
+# under the terms of either the GPL or the LGPL, and not to allow others to
+# use your version of this file under the terms of the MPL, indicate your
+# decision by deleting the provisions above and replace them with the notice
+# and other provisions required by the GPL or the LGPL. If you do not delete
+# the provisions above, a recipient may use your version of this file under
+# the terms of any one of the MPL, the GPL or the LGPL.
+#
+# ***** END LICENSE BLOCK *****
+
+"""Native cgkit point cloud files.
+
+This module implements a point cloud file format that doesn't require
+a renderer library. The reader and writer classes have the same
+interface as the corresponding classes in the pointcloud module, so
+they can be used wherever the renderer versions are used. Usually you
+won't use this module directly but open the file via pointcloud.open()
+using "cgkit" as library name.
+
+The file consists of a header followed by a sequence of chunks. Each
+chunk contains up to chunkSize points where all positions, normals,
+radii and data values of the chunk are stored in consecutive blocks of
+little-endian 4-byte floats. This allows the reader to memory-map the
+file and provide numpy arrays that directly reference the file data.
+"""
+
+import struct, mmap, ctypes
+import pointcloud
+from pointcloud import _varSlices, _decodeDataPoint
+try:
+    import numpy
+    _numpy_available = True
+except ImportError:
+    _numpy_available = False
+
+# File magic and format version
+MAGIC = "CGKITPTC"
+VERSION = 1
+
+# Header: magic, version, header size, npoints, datasize, chunk size
+_HEADER_FORMAT = "<8sIIQII"
+# Header (cont.): format, world2eye, world2ndc, bbox, number of variables
+_INFO_FORMAT = "<3f16f16f6fI"
+# File offsets of the values that are only known when the file is closed
+_NPOINTS_OFFSET = 16
+_BBOX_OFFSET = struct.calcsize(_HEADER_FORMAT)+(3+16+16)*4
+# The start of the point data is aligned to this number of bytes
+_DATA_ALIGNMENT = 64
+
+def isPtcFile(fileName):
+    """Check if a file is a native cgkit point cloud file.
+
+    Returns True if the file exists and begins with the cgkit point cloud
+    magic.
+    """
+    try:
+        f = open(fileName, "rb")
+    except IOError:
+        return False
+    try:
+        return f.read(len(MAGIC))==MAGIC
+    finally:
+        f.close()
+
+def _floatArray(a, n, writable):
+    """Return a 1-dimensional float32 numpy array that references a buffer.
+
+    a is either a ctypes array or a numpy array. n is the minimum number of
+    floats the buffer must contain. If writable is True, the buffer must
+    not be read-only. A TypeError is thrown when the buffer is not suitable.
+    """
+    if isinstance(a, ctypes.Array):
+        if a._type_!=ctypes.c_float:
+            raise TypeError("Float array expected")
+        if len(a)<n:
+            raise TypeError("Array is not large enough")
+        return numpy.frombuffer(a, dtype=numpy.float32)
+    elif isinstance(a, numpy.ndarray):
+        if a.dtype!=numpy.float32:
+            raise TypeError("Unsupported array type (the array must contain 4-byte floats)")
+        if not a.flags.c_contiguous:
+            raise TypeError("Unsupported array type (strides are not supported)")
+        if writable and not a.flags.writeable:
+            raise TypeError("Array is read-only")
+        if a.size<n:
+            raise TypeError("Array is not large enough")
+        return a.reshape(-1)
+    else:
+        raise TypeError("Unknown array type")
+
+def _bufferViews(buffer, numPoints, datasize, writable):
+    """Return numpy views (P, N, R, D) on the buffer(s) of a point sequence.
+
+    buffer is either a single buffer or a tuple with four buffers (see
+    PtcReader.readDataPoints()). The returned arrays have the shapes
+    (numPoints,3), (numPoints,3), (numPoints,) and (numPoints,datasize).
+    """
+    n = numPoints
+    # Are there 4 individual buffers?
+    if type(buffer) is tuple:
+        if len(buffer)!=4:
+            raise ValueError("Expected four individual buffers, but got %s"%len(buffer))
+        pbuf,nbuf,rbuf,dbuf = buffer
+        P = _floatArray(pbuf, 3*n, writable)[:3*n].reshape(n,3)
+        N = _floatArray(nbuf, 3*n, writable)[:3*n].reshape(n,3)
+        R = _floatArray(rbuf, n, writable)[:n]
+        D = _floatArray(dbuf, datasize*n, writable)[:datasize*n].reshape(n,datasize)
+    # There is only one single buffer for all values
+    else:
+        stride = 7+datasize
+        buf = _floatArray(buffer, stride*n, writable)[:stride*n].reshape(n,stride)
+        P = buf[:,0:3]
+        N = buf[:,3:6]
+        R = buf[:,6]
+        D = buf[:,7:]
+    return P,N,R,D
+
+def _readString(f):
+    """Read a string that is preceded by its length.
+    """
+    s = f.read(2)
+    if len(s)!=2:
+        raise IOError("Unexpected end of file")
+    n, = struct.unpack("<H", s)
+    s = f.read(n)
+    if len(s)!=n:
+        raise IOError("Unexpected end of file")
+    return s
+
+def _writeString(f, s):
+    """Write a string preceded by its length.
+    """
+    f.write(struct.pack("<H", len(s)))
+    f.write(s)
+
+
+class PtcReader(pointcloud.PtcReader):
+    """Native point cloud reader class.
+
+    The file is memory-mapped and the point data is accessed via numpy
+    arrays that reference the mapped file.
+    """
+
+    def __init__(self, fileName, libName=None):
+        """Constructor.
+
+        fileName is the name of the point cloud file. libName is ignored,
+        it is only present for compatibility with the renderer version.
+        """
+        global _numpy_available
+
+        object.__init__(self)
+
+        if not _numpy_available:
+            raise ImportError("numpy is not available")
+
+        self._handle = None
+        self.name = fileName
+        # Index and arrays of the chunk that was accessed last
+        self._chunkIndex = None
+        self._chunkArrays = None
+        self._closed = True
+
+        f = open(fileName, "rb")
+        try:
+            s = f.read(struct.calcsize(_HEADER_FORMAT))
+            if len(s)!=struct.calcsize(_HEADER_FORMAT) or s[:len(MAGIC)]!=MAGIC:
+                raise IOError("%s is not a cgkit point cloud file"%fileName)
+            magic,version,headerSize,npoints,datasize,chunkSize = struct.unpack(_HEADER_FORMAT, s)
+            if version>VERSION:
+                raise IOError("Unsupported point cloud file version in %s: %s"%(fileName, version))
+            s = f.read(struct.calcsize(_INFO_FORMAT))
+            if len(s)!=struct.calcsize(_INFO_FORMAT):
+                raise IOError("Unexpected end of file in point cloud file %s"%fileName)
+            info = struct.unpack(_INFO_FORMAT, s)
+            vars = []
+            for i in range(info[-1]):
+                type = _readString(f)
+                name = _readString(f)
+                vars.append((type, name))
+
+            self._varSlices = _varSlices(vars)
+            if len(self._varSlices)>0 and self._varSlices[-1][3]!=datasize:
+                raise IOError("Inconsistent datasize in point cloud file %s"%fileName)
+            if chunkSize<1:
+                raise IOError("Invalid chunk size in point cloud file %s"%fileName)
+
+            self._dataOffset = headerSize
+            self._chunkBytes = 4*chunkSize*(7+datasize)
+            f.seek(0, 2)
+            if f.tell()<headerSize+4*npoints*(7+datasize):
+                raise IOError("Point cloud file %s is truncated"%fileName)
+
+            if npoints>0:
+                self._handle = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                self._handle = None
+        finally:
+            f.close()
+
+        self.chunkSize = chunkSize
+
+        self._ptcAttrs = {}
+        self._ptcAttrs["variables"] = vars
+        self._ptcAttrs["npoints"] = npoints
+        self._ptcAttrs["datasize"] = datasize
+        self._ptcAttrs["format"] = tuple(info[0:3])
+        self._ptcAttrs["world2eye"] = list(info[3:19])
+        self._ptcAttrs["world2ndc"] = list(info[19:35])
+        self._ptcAttrs["bbox"] = list(info[35:41])
+
+        # The number of points that can still be read before eof is hit
+        self._numPointsLeft = npoints
+        self._closed = False
+
+    @property
+    def numChunks(self):
+        """Return the number of chunks in the file."""
+        return (self.npoints+self.chunkSize-1)//self.chunkSize
+
+    def close(self):
+        """Close the point cloud file.
+
+        The memory-mapped file is not closed explicitly, the reader only
+        drops its reference. Arrays that were obtained via getChunk() or
+        iterChunks() keep the mapping alive, so they stay valid after the
+        file was closed (or the reader was deleted).
+        This method is also called from the destructor.
+        """
+        self._chunkIndex = None
+        self._chunkArrays = None
+        self._closed = True
+        self._handle = None
+
+    def getChunk(self, idx):
+        """Return the data of one chunk.
+
+        Returns a tuple (P, N, R, D) of read-only numpy arrays with shapes
+        (n,3), (n,3), (n,) and (n,datasize) containing the positions,
+        normals, radii and extra data of the points in chunk idx. The
+        arrays directly reference the memory-mapped file, so no data is
+        copied. The arrays keep the mapped file alive, so they remain
+        valid after the file was closed.
+        """
+        if self._closed:
+            raise IOError("The point cloud file has already been closed (%s)"%self.name)
+        if idx<0 or idx>=self.numChunks:
+            raise IndexError("Chunk index out of range: %s"%idx)
+        if idx==self._chunkIndex:
+            return self._chunkArrays
+
+        cs = self.chunkSize
+        n = min(cs, self.npoints-idx*cs)
+        ds = self.datasize
+        data = numpy.frombuffer(self._handle, dtype="<f4", count=n*(7+ds),
+                                offset=self._dataOffset+idx*self._chunkBytes)
+        P = data[:3*n].reshape(n,3)
+        N = data[3*n:6*n].reshape(n,3)
+        R = data[6*n:7*n]
+        D = data[7*n:].reshape(n,ds)
+        self._chunkIndex = idx
+        self._chunkArrays = (P,N,R,D)
+        return self._chunkArrays
+
+    def iterChunks(self):
+        """Iterate over all chunks in the file.
+
+        Yields the tuples (P, N, R, D) as returned by getChunk(). This
+        does not change the read position of the readDataPoint(s)() methods.
+        """
+        for i in range(self.numChunks):
+            yield self.getChunk(i)
+
+    def splitData(self, data):
+        """Split the extra data of a set of points into the individual variables.
+
+        data is an array of shape (n,datasize) (as returned by getChunk()).
+        Returns a dictionary with the variable names as keys and numpy
+        arrays as values that reference the respective columns of data.
+        The arrays have the shape (n,) for float variables, (n,3) for
+        vectors, points, normals and colors and (n,16) for matrices.
+        """
+        res = {}
+        for type,name,start,end in self._varSlices:
+            if type=="float":
+                res[name] = data[:,start]
+            else:
+                res[name] = data[:,start:end]
+        return res
+
+    def readDataPoint(self):
+        """Read the next data point.
+
+        Returns a tuple (pos, normal, radius, dataDict) where pos and normal
+        are 3-tuples of floats, radius is a single float and dataDict a
+        dictionary with the extra variables that are attached to the point.
+        If no more point is available an EOFError exception is thrown.
+        An IOErrror exception is thrown when the file has already been closed.
+        """
+        if self._closed:
+            raise IOError("The point cloud file has already been closed (%s)"%self.name)
+        if self._numPointsLeft==0:
+            raise EOFError("There are no more points left to read from point cloud file %s"%self.name)
+
+        idx = self.npoints-self._numPointsLeft
+        self._numPointsLeft -= 1
+        P,N,R,D = self.getChunk(idx//self.chunkSize)
+        i = idx%self.chunkSize
+        values = P[i].tolist()+N[i].tolist()+[float(R[i])]+D[i].tolist()
+        return _decodeDataPoint(values, self._varSlices)
+
+    def readDataPoints(self, numPoints, buffer):
+        """Read a sequence of data points.
+
+        numPoints is the number of points to read. buffer is either a single
+        buffer that will receive all values or a tuple (pointbuf, normalbuf,
+        radiusbuf, databuf) that contains the individual buffers for the
+        respective values. A buffer must always be large enough to hold
+        numPoints values.
+        The function accepts ctypes arrays or numpy arrays as buffers.
+
+        The return value is the number of points that have actually
+        been read (additional items in the buffers remain at their previous
+        value). When 0 is returned, the end of the file has been reached.
+        """
+        if numPoints<=0:
+            return 0
+        if self._closed:
+            raise IOError("The point cloud file has already been closed (%s)"%self.name)
+
+        P,N,R,D = _bufferViews(buffer, numPoints, self.datasize, True)
+
+        num = min(numPoints, self._numPointsLeft)
+        cs = self.chunkSize
+        i = 0
+        while i<num:
+            idx = self.npoints-self._numPointsLeft
+            CP,CN,CR,CD = self.getChunk(idx//cs)
+            j = idx%cs
+            k = min(num-i, len(CR)-j)
+            P[i:i+k] = CP[j:j+k]
+            N[i:i+k] = CN[j:j+k]
+            R[i:i+k] = CR[j:j+k]
+            D[i:i+k] = CD[j:j+k]
+            i += k
+            self._numPointsLeft -= k
+        return num
+
+
+class PtcWriter(pointcloud.PtcWriter):
+    """Native point cloud writer class.
+
+    The points are collected in a buffer and written to the file in
+    chunks of chunkSize points.
+    """
+
+    def __init__(self, fileName, libName=None, vars=[], world2eye=None, world2ndc=None, format=(640,480,1), chunkSize=65536):
+        """Constructor.
+
+        fileName is the name of the point cloud file. libName is ignored,
+        it is only present for compatibility with the renderer version.
+        vars is a list of tuples (type, name) that specifies what additional
+        variables to write into the file. world2eye and world2ndc are 4x4
+        matrices (None is equivalent to the identity) and format a tuple
+        (xres, yres, aspect). chunkSize is the number of points per chunk.
+        """
+        global _numpy_available
+
+        self._handle = None
+
+        if not _numpy_available:
+            raise ImportError("numpy is not available")
+        if chunkSize<1:
+            raise ValueError("Invalid chunk size: %s"%chunkSize)
+
+        self.name = fileName
+        self.chunkSize = chunkSize
+
+        self._varSlices = _varSlices(vars)
+        if len(self._varSlices)>0:
+            self.datasize = self._varSlices[-1][3]
+        else:
+            self.datasize = 0
+
+        identity = [1.0,0.0,0.0,0.0, 0.0,1.0,0.0,0.0, 0.0,0.0,1.0,0.0, 0.0,0.0,0.0,1.0]
+        if world2eye is None:
+            world2eye = identity
+        if world2ndc is None:
+            world2ndc = identity
+        w2e = list(self._matrixToCTypes(world2eye))
+        w2n = list(self._matrixToCTypes(world2ndc))
+        xres,yres,aspect = format
+
+        # Write the header (npoints and bbox are updated in close())
+        header = struct.pack(_INFO_FORMAT, *([float(xres), float(yres), float(aspect)]+w2e+w2n+6*[0.0]+[len(vars)]))
+        f = open(fileName, "wb")
+        headerSize = struct.calcsize(_HEADER_FORMAT)+len(header)
+        for type,name in vars:
+            headerSize += 4+len(type)+len(name)
+        headerSize += (-headerSize)%_DATA_ALIGNMENT
+        f.write(struct.pack(_HEADER_FORMAT, MAGIC, VERSION, headerSize, 0, self.datasize, chunkSize))
+        f.write(header)
+        for type,name in vars:
+            _writeString(f, type)
+            _writeString(f, name)
+        f.write((headerSize-f.tell())*"\0")
+
+        self._handle = f
+        self._npoints = 0
+        self._bboxMin = None
+        self._bboxMax = None
+        # The buffer that receives the points of the current chunk
+        self._buffer = numpy.zeros((chunkSize, 7+self.datasize), dtype=numpy.float32)
+        self._bufferCount = 0
+
+    def close(self):
+        """Close the point cloud file.
+
+        This method is also called from the destructor.
+        """
+        f = self._handle
+        if f is not None:
+            self._flush()
+            if self._npoints>0:
+                bbox = self._bboxMin.tolist()+self._bboxMax.tolist()
+            else:
+                bbox = 6*[0.0]
+            f.seek(_NPOINTS_OFFSET)
+            f.write(struct.pack("<Q", self._npoints))
+            f.seek(_BBOX_OFFSET)
+            f.write(struct.pack("<6f", *bbox))
+            f.close()
+            self._handle = None
+
+    def writeDataPoint(self, point, normal, radius, data):
+        """Write a point into the point cloud file.
+
+        point and normal are vectors (any 3-sequence of floats) and radius
+        a float. data is a dict that contains the extra variables that
+        must have been declared in the constructor. Undeclared values are
+        ignored, missing declared values are set to 0.
+        """
+        if self._handle is None:
+            raise IOError("The point cloud file has already been closed.")
+
+        row = numpy.zeros((1, 7+self.datasize), dtype=numpy.float32)
+        row[0,0:3] = tuple(point)
+        row[0,3:6] = tuple(normal)
+        row[0,6] = radius
+        for type,name,start,end in self._varSlices:
+            value = data.get(name)
+            if value is not None:
+                if type=="float":
+                    row[0,7+start] = value
+                else:
+                    row[0,7+start:7+end] = list(value)
+        self._append(row)
+
+    def writeDataPoints(self, numPoints, buffer):
+        """Write a sequence of data points.
+
+        numPoints is the number of points to write. buffer is either a single
+        buffer that contains all values or a tuple (pointbuf, normalbuf,
+        radiusbuf, databuf) that each contains the respective value.
+        The buffers must contain at least numPoints items.
+        The function accepts ctypes arrays or numpy arrays as buffers.
+        """
+        if self._handle is None:
+            raise IOError("The point cloud file has already been closed.")
+        if numPoints<=0:
+            return
+
+        P,N,R,D = _bufferViews(buffer, numPoints, self.datasize, False)
+        rows = numpy.empty((numPoints, 7+self.datasize), dtype=numpy.float32)
+        rows[:,0:3] = P
+        rows[:,3:6] = N
+        rows[:,6] = R
+        rows[:,7:] = D
+        self._append(rows)
+
+    def _append(self, rows):
+        """Append points to the chunk buffer.
+
+        rows is an array of shape (n,7+datasize). Full chunks are written
+        to the file.
+        """
+        cs = self.chunkSize
+        i = 0
+        while i<len(rows):
+            k = min(len(rows)-i, cs-self._bufferCount)
+            self._buffer[self._bufferCount:self._bufferCount+k] = rows[i:i+k]
+            self._bufferCount += k
+            i += k
+            if self._bufferCount==cs:
+                self._flush()
+
+    def _flush(self):
+        """Write the points in the chunk buffer to the file.
+        """
+        n = self._bufferCount
+        if n==0:
+            return
+        chunk = self._buffer[:n]
+        P = chunk[:,0:3]
+        pmin = P.min(axis=0)
+        pmax = P.max(axis=0)
+        if self._bboxMin is None:
+            self._bboxMin = pmin
+            self._bboxMax = pmax
+        else:
+            self._bboxMin = numpy.minimum(self._bboxMin, pmin)
+            self._bboxMax = numpy.maximum(self._bboxMax, pmax)
+        f = self._handle
+        for block in [P, chunk[:,3:6], chunk[:,6], chunk[:,7:]]:
+            f.write(numpy.ascontiguousarray(block, dtype="<f4").tostring())
+        self._npoints += n
+        self._bufferCount = 0
@@ -0,0 +1,298 @@
+# ***** BEGIN LICENSE BLOCK *****
+# Version: MPL 1.1/GPL 2.0/LGPL 2.1
+#
+# The contents of this file are subject to the Mozilla Public License Version
+# 1.1 (the "License"); you may not use this file except in compliance with
+# the License. You may obtain a copy of the License at
+# http://www.mozilla.org/MPL/
+#
+# Software distributed under the License is distributed on an "AS IS" basis,
+# WITHOUT WARRANTY OF ANY KIND, either express or implied. See the License
+# for the specific language governing rights and limitations under the
+# License.
+#
+# The Original Code is the Python Computer Graphics Kit.
+#
+# The Initial Developer of the Original Code is Matthias Baas.
+# Portions created by the Initial Developer are Copyright (C) 2004
+# the Initial Developer. All Rights Reserved.
+#
+# Contributor(s):
+#
+# Alternatively, the contents of this file may be used under the terms of
+# either the GNU General Public License Version 2 or later (the "GPL"), or
+# the GNU Lesser General Public License Version 2.1 or later (the "LGPL"),
+# in which case the provisions of the GPL or the LGPL are applicable instead
+# of those above. If you wish to allow use of your version of this file only
+# under the terms of either the GPL or the LGPL, and not to allow others to
+# use your version of this file under the terms of the MPL, indicate your
+# decision by deleting the provisions above and replace them with the notice
+# and other provisions required by the GPL or the LGPL. If you do not delete
+# the provisions above, a recipient may use your version of this file under
+# the terms of any one of the MPL, the GPL or the LGPL.
+#
+# ***** END LICENSE BLOCK *****
+
+"""Binary scene cache files.
+
+A scene cache file stores imported world objects (their hierarchy,
+transforms, materials and geometry) so that they can be loaded again
+without parsing the original file. The file is made of chunks which
+are aligned to 8 bytes:
+
+- Header: The magic string "CGKCACHE", the version number (uint32) and
+  a reserved uint32.
+- Each chunk: A four-character tag, a reserved uint32, the size of the
+  chunk data (uint64) and the data itself (padded to a multiple of 8 bytes).
+
+The chunks are read and written by the chunkfile module.
+The following chunks are used (in this order):
+
+- "SRC ": Name and SHA-1 hash of the source file (may be empty)
+- "DESC": The pickled scene description (see the scenedesc module)
+- "BUFF": A raw array with geometry data. The data starts with an
+  8 byte header containing the array type code as a single character.
+  The values are stored in little endian byte order.
+
+The numeric geometry arrays inside the pickled scene description are
+replaced by BufferRef objects that refer to the BUFF chunks (in the order they
+appear in the file).
+"""
+
+import os, os.path, struct, array, pickle, hashlib
+import scenedesc
+from chunkfile import writeChunk, writeBufferChunk, readChunkHeader, readBufferChunk, skipPadding, loadPickle
+
+_MAGIC = "CGKCACHE"
+_VERSION = 2
+
+# BufferRef
+class BufferRef:
+    """Reference to a buffer in a scene cache file.
+
+    index is the index of the BUFF chunk and n the number of values
+    per element (the last dimension of the data).
+    """
+    
+    def __init__(self, index, n=1):
+        self.index = index
+        self.n = n
+
+######################################################################
+
+# sourceHash
+def sourceHash(filename):
+    """Return the SHA-1 hash (as hex string) of the content of a file.
+    """
+    h = hashlib.sha1()
+    f = open(filename, "rb")
+    try:
+        while 1:
+            s = f.read(1<<20)
+            if s=="":
+                break
+            h.update(s)
+    finally:
+        f.close()
+    return h.hexdigest()
+
+# writeSceneCache
+def writeSceneCache(filename, objs, source=None):
+    """Write world objects into a scene cache file.
+
+    objs is a sequence of WorldObject objects (their children are
+    written as well). source is the name of the file the objects were
+    loaded from. Its hash is stored in the cache so that
+    isCacheValid() can detect when the cache is outdated.
+    """
+    desc = scenedesc.describeScene(objs)
+    buffers = []
+    for odesc in _iterWorldObjectDescs(desc.objects):
+        if odesc.geom!=None:
+            _geomToBuffers(odesc.geom, buffers)
+
+    if source==None:
+        src = ""
+    else:
+        src = "%s\n%s"%(sourceHash(source), os.path.basename(source))
+    
+    f = open(filename, "wb")
+    try:
+        f.write(struct.pack("<8sII", _MAGIC, _VERSION, 0))
+        writeChunk(f, "SRC ", src)
+        writeChunk(f, "DESC", pickle.dumps(desc, pickle.HIGHEST_PROTOCOL))
+        for buf in buffers:
+            writeBufferChunk(f, buf)
+    finally:
+        f.close()
+
+# readSceneCache
+def readSceneCache(filename):
+    """Read a scene cache file.
+
+    Returns the scene description (a SceneDesc object) that can be
+    passed to scenedesc.createScene().
+    """
+    f = open(filename, "rb")
+    try:
+        _readHeader(f, filename)
+        desc = None
+        buffers = []
+        while 1:
+            tag,size = readChunkHeader(f)
+            if tag==None:
+                break
+            # Read the array data directly from the file (the arrays are
+            # passed on to the slots as they are)...
+            if tag=="BUFF":
+                buffers.append(readBufferChunk(f, size))
+            else:
+                data = f.read(size)
+                if tag=="DESC":
+                    desc = loadPickle(data, scenedesc.descClasses()+[BufferRef])
+            skipPadding(f, size)
+    finally:
+        f.close()
+    if desc==None:
+        raise ValueError('%s: Scene description is missing.'%filename)
+
+    for odesc in _iterWorldObjectDescs(desc.objects):
+        if odesc.geom!=None:
+            _geomFromBuffers(odesc.geom, buffers)
+    return desc
+
+# readSourceInfo
+def readSourceInfo(filename):
+    """Return the hash and the name of the source file of a cache file.
+
+    Returns a tuple (hash, name) or (None, None) if the cache doesn't
+    contain any source information. Only the beginning of the file
+    is read.
+    """
+    f = open(filename, "rb")
+    try:
+        _readHeader(f, filename)
+        tag,size = readChunkHeader(f)
+        if tag!="SRC " or size==0:
+            return None, None
+        data = f.read(size)
+    finally:
+        f.close()
+    hash,name = data.split("\n", 1)
+    return hash, name
+
+# isCacheValid
+def isCacheValid(cachename, source):
+    """Check if a cache file is up to date.
+
+    Returns True if the cache file exists and was created from a file
+    with the same content as source.
+    """
+    if not os.path.exists(cachename):
+        return False
+    try:
+        hash,name = readSourceInfo(cachename)
+    except (IOError, ValueError):
+        return False
+    return hash!=None and hash==sourceHash(source)
+
+# loadCached
+def loadCached(filename, cachename=None, parent=None, **options):
+    """Load a file using a scene cache.
+
+    If the cache file is valid (see isCacheValid()), the objects are
+    read from the cache. Otherwise, the file is loaded with load() and
+    the cache is (re-)created from the newly loaded objects. cachename
+    defaults to the file name with an additional ".cgc" extension.
+    options are passed to the import plugin of the source file.
+    Returns a list with the top level objects that were loaded.
+    """
+    import cmds
+    from globalscene import getScene
+
+    if cachename==None:
+        cachename = filename+".cgc"
+    if parent==None:
+        parent = getScene().worldRoot()
+    else:
+        parent = cmds.worldObject(parent)
+
+    if isCacheValid(cachename, filename):
+        return scenedesc.createScene(readSceneCache(cachename), parent=parent)
+
+    # Load the source file and determine the new objects...
+    prev = dict([(obj.name, obj) for obj in parent.iterChilds()])
+    if parent!=getScene().worldRoot():
+        options["parent"] = parent
+    cmds.load(filename, **options)
+    objs = [obj for obj in parent.iterChilds() if prev.get(obj.name)!=obj]
+    writeSceneCache(cachename, objs, source=filename)
+    return objs
+
+######################################################################
+
+def _iterWorldObjectDescs(descs):
+    """Iterate over a list of WorldObjectDesc objects and their children.
+    """
+    for desc in descs:
+        yield desc
+        for cdesc in _iterWorldObjectDescs(desc.children):
+            yield cdesc
+
+def _addBuffer(buffers, values, n=1):
+    """Append an array to buffers and return its BufferRef.
+    """
+    buffers.append(values)
+    return BufferRef(len(buffers)-1, n)
+
+def _geomToBuffers(desc, buffers):
+    """Replace the geometry arrays in a GeomDesc object by buffer references.
+    """
+    if desc.verts==None:
+        return
+    desc.verts = _addBuffer(buffers, desc.verts, 3)
+    # Polygons (number of loops per poly, number of vertices per loop and
+    # the vertex indices)?
+    if isinstance(desc.faces, tuple):
+        desc.faces = tuple([_addBuffer(buffers, a) for a in desc.faces])
+    else:
+        desc.faces = _addBuffer(buffers, desc.faces, 3)
+
+    variables = []
+    for name, storage, type, mult, values in desc.variables:
+        # Only the numeric variables are stored as arrays, strings and
+        # matrices remain in the pickled description
+        if isinstance(values, array.array):
+            values = _addBuffer(buffers, values, scenedesc._array_types[type][1]*mult)
+        variables.append((name, storage, type, mult, values))
+    desc.variables = variables
+
+def _geomFromBuffers(desc, buffers):
+    """Replace the buffer references in a GeomDesc object by the arrays.
+    """
+    if desc.verts==None:
+        return
+    desc.verts = buffers[desc.verts.index]
+    if isinstance(desc.faces, tuple):
+        desc.faces = tuple([buffers[ref.index] for ref in desc.faces])
+    else:
+        desc.faces = buffers[desc.faces.index]
+
+    variables = []
+    for name, storage, type, mult, values in desc.variables:
+        if isinstance(values, BufferRef):
+            values = buffers[values.index]
+        variables.append((name, storage, type, mult, values))
+    desc.variables = variables
+
+def _readHeader(f, filename):
+    """Read and check the file header.
+    """
+    s = f.read(16)
+    if len(s)!=16:
+        raise ValueError('%s: Not a scene cache file.'%filename)
+    magic,version,reserved = struct.unpack("<8sII", s)
+    if magic!=_MAGIC:
+        raise ValueError('%s: Not a scene cache file.'%filename)
+    if version!=_VERSION:
+        raise ValueError('%s: Unsupported scene cache version (%d).'%(filename, version))
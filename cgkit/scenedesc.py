@@ -0,0 +1,446 @@
+# ***** BEGIN LICENSE BLOCK *****
+# Version: MPL 1.1/GPL 2.0/LGPL 2.1
+#
+# The contents of this file are subject to the Mozilla Public License Version
+# 1.1 (the "License"); you may not use this file except in compliance with
+# the License. You may obtain a copy of the License at
+# http://www.mozilla.org/MPL/
+#
+# Software distributed under the License is distributed on an "AS IS" basis,
+# WITHOUT WARRANTY OF ANY KIND, either express or implied. See the License
+# for the specific language governing rights and limitations under the
+# License.
+#
+# The Original Code is the Python Computer Graphics Kit.
+#
+# The Initial Developer of the Original Code is Matthias Baas.
+# Portions created by the Initial Developer are Copyright (C) 2004
+# the Initial Developer. All Rights Reserved.
+#
+# Contributor(s):
+#
+# Alternatively, the contents of this file may be used under the terms of
+# either the GNU General Public License Version 2 or later (the "GPL"), or
+# the GNU Lesser General Public License Version 2.1 or later (the "LGPL"),
+# in which case the provisions of the GPL or the LGPL are applicable instead
+# of those above. If you wish to allow use of your version of this file only
+# under the terms of either the GPL or the LGPL, and not to allow others to
+# use your version of this file under the terms of the MPL, indicate your
+# decision by deleting the provisions above and replace them with the notice
+# and other provisions required by the GPL or the LGPL. If you do not delete
+# the provisions above, a recipient may use your version of this file under
+# the terms of any one of the MPL, the GPL or the LGPL.
+#
+# ***** END LICENSE BLOCK *****
+
+"""Picklable descriptions of world objects and their geometry.
+
+This module converts a hierarchy of world objects into plain Python
+objects that can be pickled (and therefore be passed between processes
+or be stored in a file) and creates the world objects again from such
+a description.
+
+Triangle meshes and polyhedra are stored with all their vertices, faces
+and primitive variables (as flat arrays that are transferred from and
+to the slots in one go). All other geoms and objects are stored via
+the values of their (non-array) slots and the class is instantiated
+again when the objects are created. Materials are stored the same way
+plus any picklable Python attribute (such as the map settings of an
+OBJMaterial). Any other scene item (such as animation components) is
+not part of the description.
+"""
+
+import sys, pickle, array
+import _core
+from cgtypes import *
+from geomobject import *
+from worldobject import WorldObject
+
+# Storage classes and types by name (the enum values themselves are not
+# picklable)
+_storages = { "constant":CONSTANT, "uniform":UNIFORM, "varying":VARYING,
+              "vertex":VERTEX, "facevarying":FACEVARYING,
+              "facevertex":FACEVERTEX, "user":USER }
+_types = { "int":INT, "float":FLOAT, "string":STRING, "color":COLOR,
+           "point":POINT, "vector":VECTOR, "normal":NORMAL,
+           "matrix":MATRIX, "hpoint":HPOINT }
+
+_storage_names = dict([(v,k) for k,v in _storages.items()])
+_type_names = dict([(v,k) for k,v in _types.items()])
+
+# Slots that are not stored because they are either computed or set
+# explicitly
+_ignored_slots = ["transform", "pos", "rot", "scale", "worldtransform",
+                  "cog", "inertiatensor", "totalmass", "name"]
+
+# The array type code and number of components for the variable types
+# whose values are stored as flat arrays (the remaining types are stored
+# as lists)
+_array_types = { "int":("i",1), "float":("d",1), "color":("d",3),
+                 "point":("d",3), "vector":("d",3), "normal":("d",3),
+                 "hpoint":("d",4) }
+
+# The exceptions that are raised by slots whose value cannot be read or set
+_slot_errors = (TypeError, ValueError, RuntimeError, NotImplementedError)
+
+# The types of slot values that are stored
+_value_types = (int, long, float, bool, str, unicode,
+                _core.vec3, _core.vec4, _core.mat3, _core.mat4, _core.quat)
+
+# The base classes of the classes that can be created from a description
+_component_bases = (_core.WorldObject, _core.GeomObject, _core.Material)
+
+# SceneDesc
+class SceneDesc:
+    """Description of a world object hierarchy.
+
+    objects is a list of WorldObjectDesc objects describing the top
+    level objects and materials is a list of MaterialDesc objects that
+    are referenced by index from the world object descriptions.
+    """
+    
+    def __init__(self):
+        self.objects = []
+        self.materials = []
+
+# WorldObjectDesc
+class WorldObjectDesc:
+    """Description of a single world object (including its children).
+    """
+    
+    def __init__(self, classname, name):
+        self.classname = classname
+        self.name = name
+        self.transform = mat4(1)
+        self.offsettransform = mat4(1)
+        self.visible = True
+        # Key: Slot name / Value: Slot value
+        self.slots = {}
+        # List of material indices (or None) into SceneDesc.materials
+        self.materials = []
+        # GeomDesc or None
+        self.geom = None
+        # List of WorldObjectDesc objects
+        self.children = []
+
+# MaterialDesc
+class MaterialDesc:
+    """Description of a material.
+    """
+    
+    def __init__(self, classname, name):
+        self.classname = classname
+        self.name = name
+        # Key: Slot name / Value: Slot value
+        self.slots = {}
+        # Key: Attribute name / Value: Attribute value
+        self.attrs = {}
+
+# GeomDesc
+class GeomDesc:
+    """Description of a geom.
+
+    For TriMeshGeoms and PolyhedronGeoms, verts contains the vertices
+    as a flat array of doubles, faces the triangles as a flat int array
+    (TriMeshGeom) or the polygons as a tuple of three int arrays
+    (PolyhedronGeom) containing the number of loops per polygon, the
+    number of vertices per loop and the vertex indices. variables
+    contains the primitive variables as a list of tuples
+    (name, storage, type, multiplicity, values) where storage and type are
+    the lower case names of the constants. values is a flat array for
+    the numeric types and a list for strings and matrices. For all other
+    geoms, only the slot values are stored.
+    """
+    
+    def __init__(self, classname):
+        self.classname = classname
+        # Key: Slot name / Value: Slot value
+        self.slots = {}
+        self.verts = None
+        self.faces = None
+        self.variables = []
+
+######################################################################
+
+# describeScene
+def describeScene(objs):
+    """Create a description of a sequence of world objects.
+
+    objs is a sequence of WorldObject objects (their children are
+    described as well). The return value is a SceneDesc object.
+    """
+    desc = SceneDesc()
+    # Key: id of the material / Value: Material index
+    matidx = {}
+    for obj in objs:
+        desc.objects.append(_describeWorldObject(obj, desc, matidx))
+    return desc
+
+# createScene
+def createScene(desc, parent=None):
+    """Create the world objects from a scene description.
+
+    desc is a SceneDesc object and parent the parent of the top level
+    objects (None = world root). Returns a list with the top level
+    world objects.
+    """
+    materials = map(createMaterial, desc.materials)
+    res = []
+    for odesc in desc.objects:
+        res.append(_createWorldObject(odesc, parent, materials))
+    return res
+
+# describeGeom
+def describeGeom(geom):
+    """Create a description of a geom.
+
+    Returns a GeomDesc object.
+    """
+    desc = GeomDesc(_className(geom))
+    if isinstance(geom, _core.TriMeshGeom):
+        desc.verts = _slotArray(geom.verts, "d")
+        desc.faces = _slotArray(geom.faces, "i")
+    elif isinstance(geom, _core.PolyhedronGeom):
+        desc.verts = _slotArray(geom.verts, "d")
+        numloops = array.array("i")
+        numverts = array.array("i")
+        indices = array.array("i")
+        for i in range(geom.getNumPolys()):
+            poly = geom.getPoly(i)
+            numloops.append(len(poly))
+            for loop in poly:
+                numverts.append(len(loop))
+                indices.extend(loop)
+        desc.faces = (numloops, numverts, indices)
+    else:
+        _describeSlots(geom, desc.slots)
+        return desc
+
+    for name, storage, type, mult in geom.iterVariables():
+        type = _type_names[type]
+        slot = geom.slot(name)
+        if type in _array_types:
+            values = _slotArray(slot, _array_types[type][0])
+        else:
+            values = list(slot)
+        desc.variables.append((name, _storage_names[storage], type, mult, values))
+    return desc
+
+# createGeom
+def createGeom(desc, geom=None):
+    """Create a geom from a geom description.
+
+    desc is a GeomDesc object. If geom is given, the description is
+    applied to this existing geom, otherwise a new geom is created.
+    Returns the geom.
+    """
+    if geom==None:
+        geom = _getClass(desc.classname)()
+    _applySlots(geom, desc.slots)
+
+    if desc.verts==None:
+        return geom
+
+    geom.verts.resize(len(desc.verts)/3)
+    geom.verts.setBuffer(desc.verts)
+    if isinstance(geom, _core.TriMeshGeom):
+        geom.faces.resize(len(desc.faces)/3)
+        geom.faces.setBuffer(desc.faces)
+    else:
+        # There is no bulk access for polygons, so they are set one by one
+        numloops, numverts, indices = desc.faces
+        geom.setNumPolys(len(numloops))
+        j = 0
+        k = 0
+        for i,nl in enumerate(numloops):
+            poly = []
+            for nv in numverts[j:j+nl]:
+                poly.append(indices[k:k+nv].tolist())
+                k += nv
+            j += nl
+            geom.setPoly(i, poly)
+
+    for name, storage, type, mult, values in desc.variables:
+        if type in _array_types:
+            size = len(values)/(_array_types[type][1]*mult)
+        else:
+            size = len(values)
+        storage = _storages[storage]
+        if storage==USER:
+            geom.newVariable(name, storage, _types[type], mult, size)
+        else:
+            geom.newVariable(name, storage, _types[type], mult)
+        slot = geom.slot(name)
+        if type in _array_types:
+            slot.setBuffer(values)
+        else:
+            for i,v in enumerate(values):
+                slot[i] = v
+    return geom
+
+# describeMaterial
+def describeMaterial(mat):
+    """Create a description of a material.
+
+    Returns a MaterialDesc object.
+    """
+    desc = MaterialDesc(_className(mat), mat.name)
+    _describeSlots(mat, desc.slots)
+    for name,value in getattr(mat, "__dict__", {}).items():
+        if _isPicklable(value):
+            desc.attrs[name] = value
+    return desc
+
+# createMaterial
+def createMaterial(desc):
+    """Create a material from a material description.
+    """
+    mat = _getClass(desc.classname)(name=desc.name)
+    for name,value in desc.attrs.items():
+        setattr(mat, name, value)
+    _applySlots(mat, desc.slots)
+    return mat
+
+# descClasses
+def descClasses():
+    """Return the classes that may appear in a pickled scene description.
+
+    The returned list can be passed to chunkfile.loadPickle() when a
+    pickled description is loaded from a file.
+    """
+    classes = [SceneDesc, WorldObjectDesc, MaterialDesc, GeomDesc,
+               _core.vec3, _core.vec4, _core.mat3, _core.mat4, _core.quat]
+    # The map settings of OBJ materials
+    try:
+        from objmaterial import OBJTextureMap
+        classes.append(OBJTextureMap)
+    except ImportError:
+        pass
+    return classes
+
+######################################################################
+
+def _describeWorldObject(obj, scenedesc, matidx):
+    """Create a WorldObjectDesc object for obj.
+
+    scenedesc is the SceneDesc object that receives the materials and
+    matidx is a dict that maps the material ids to their index.
+    """
+    desc = WorldObjectDesc(_className(obj), obj.name)
+    desc.transform = obj.transform
+    desc.offsettransform = obj.getOffsetTransform()
+    desc.visible = obj.visible
+    _describeSlots(obj, desc.slots)
+    for i in range(obj.getNumMaterials()):
+        mat = obj.getMaterial(i)
+        if mat==None:
+            desc.materials.append(None)
+            continue
+        idx = matidx.get(id(mat))
+        if idx==None:
+            idx = len(scenedesc.materials)
+            scenedesc.materials.append(describeMaterial(mat))
+            matidx[id(mat)] = idx
+        desc.materials.append(idx)
+    if obj.geom!=None:
+        desc.geom = describeGeom(obj.geom)
+    for child in obj.iterChilds():
+        desc.children.append(_describeWorldObject(child, scenedesc, matidx))
+    return desc
+
+def _createWorldObject(desc, parent, materials):
+    """Create a world object (and its children) from a WorldObjectDesc.
+    """
+    try:
+        cls = _getClass(desc.classname)
+        obj = cls(name=desc.name, parent=parent)
+    except (ImportError, AttributeError, TypeError), exc:
+        print >>sys.stderr, 'WARNING: Cannot create %s object "%s" (%s), a WorldObject is created instead.'%(desc.classname, desc.name, exc)
+        obj = WorldObject(name=desc.name, parent=parent)
+
+    if desc.geom!=None:
+        if obj.geom!=None and _className(obj.geom)==desc.geom.classname:
+            createGeom(desc.geom, obj.geom)
+        else:
+            obj.geom = createGeom(desc.geom)
+    _applySlots(obj, desc.slots)
+    obj.setOffsetTransform(desc.offsettransform)
+    obj.transform = desc.transform
+    obj.visible = desc.visible
+    obj.setNumMaterials(len(desc.materials))
+    for i,idx in enumerate(desc.materials):
+        if idx!=None:
+            obj.setMaterial(materials[idx], i)
+    for cdesc in desc.children:
+        _createWorldObject(cdesc, obj, materials)
+    return obj
+
+def _slotArray(slot, typecode):
+    """Return the values of a numeric array slot as a flat array.
+    """
+    res = array.array(typecode)
+    res.fromstring(slot.getBuffer())
+    return res
+
+def _describeSlots(comp, slots):
+    """Store the picklable values of all non-array slots in the dict slots.
+    """
+    for name in comp.iterSlots():
+        if name in _ignored_slots:
+            continue
+        slot = comp.slot(name)
+        # Skip array slots
+        if hasattr(slot, "resize"):
+            continue
+        try:
+            value = slot.getValue()
+        except _slot_errors:
+            continue
+        if isinstance(value, _value_types):
+            slots[name] = value
+
+def _applySlots(comp, slots):
+    """Set the slot values that were stored by _describeSlots().
+
+    Slots that do not exist or that cannot be set are ignored.
+    """
+    for name,value in slots.items():
+        if not comp.hasSlot(name):
+            continue
+        try:
+            comp.slot(name).setValue(value)
+        except _slot_errors:
+            pass
+
+def _isPicklable(value):
+    """Check if a value can be pickled.
+    """
+    try:
+        pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+    except (pickle.PicklingError, TypeError, AttributeError):
+        return False
+    return True
+
+def _className(obj):
+    """Return the full class name (including the module) of an object.
+    """
+    cls = obj.__class__
+    return "%s.%s"%(cls.__module__, cls.__name__)
+
+def _getClass(classname):
+    """Return the class object for a name created by _className().
+
+    Only world object, geom and material classes are returned (any
+    other name raises a TypeError). Modules that are not loaded yet
+    are only imported if they are part of cgkit.
+    """
+    modname,name = classname.rsplit(".", 1)
+    mod = sys.modules.get(modname)
+    if mod==None:
+        if modname!="_core" and not modname.startswith("cgkit."):
+            raise ImportError('Module "%s" is not loaded.'%modname)
+        mod = __import__(modname, globals(), locals(), [name])
+    cls = getattr(mod, name, None)
+    if not isinstance(cls, type) or not issubclass(cls, _component_bases):
+        raise TypeError("%s is not a world object, geom or material class"%classname)
+    return cls
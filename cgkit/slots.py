@@ -41,8 +41,11 @@
 #from _core import Vec3Slot, Vec4Slot, Mat3Slot, Mat4Slot
 from cgtypes import vec3, vec4, mat3, mat4, quat
 import _core
+import profiler
 from _core import Dependent, UserSizeConstraint, LinearSizeConstraint
 from _core import ISlot, IArraySlot
+from _core import beginSlotBatch, endSlotBatch, slotBatchDepth
+from _core import getSlotCounters, resetSlotCounters
 
 # Factory functions for the individual slots:
 
@@ -106,6 +109,11 @@ def Mat4ArraySlot(multiplicity=1, constraint=None):
 #    return _core.QuatArraySlot(multiplicity, constraint)
 
 
+def _profiledCall(proc):
+    """Call the procedure of a procedural slot and record the call.
+    """
+    return profiler._active.call("slot", profiler.procName(proc), proc)
+
 # Test
 
 class ProceduralDoubleSlot(_core.DoubleSlot):
@@ -114,7 +122,10 @@ class ProceduralDoubleSlot(_core.DoubleSlot):
         self._proc = proc
 
     def computeValue(self):
-        self._value = self._proc()
+        if profiler._active is None:
+            self._value = self._proc()
+        else:
+            self._value = _profiledCall(self._proc)
 
 class ProceduralIntSlot(_core.IntSlot):
     def __init__(self, proc):
@@ -122,7 +133,10 @@ class ProceduralIntSlot(_core.IntSlot):
         self._proc = proc
 
     def computeValue(self):
-        self._value = self._proc()
+        if profiler._active is None:
+            self._value = self._proc()
+        else:
+            self._value = _profiledCall(self._proc)
 
 class ProceduralVec3Slot(_core.Vec3Slot):
     def __init__(self, proc):
@@ -130,7 +144,10 @@ class ProceduralVec3Slot(_core.Vec3Slot):
         self._proc = proc
 
     def computeValue(self):
-        self._value = self._proc()
+        if profiler._active is None:
+            self._value = self._proc()
+        else:
+            self._value = _profiledCall(self._proc)
 
 class ProceduralVec4Slot(_core.Vec4Slot):
     def __init__(self, proc):
@@ -138,7 +155,10 @@ class ProceduralVec4Slot(_core.Vec4Slot):
         self._proc = proc
 
     def computeValue(self):
-        self._value = self._proc()
+        if profiler._active is None:
+            self._value = self._proc()
+        else:
+            self._value = _profiledCall(self._proc)
 
 class ProceduralMat3Slot(_core.Mat3Slot):
     def __init__(self, proc):
@@ -146,7 +166,10 @@ class ProceduralMat3Slot(_core.Mat3Slot):
         self._proc = proc
 
     def computeValue(self):
-        self._value = self._proc()
+        if profiler._active is None:
+            self._value = self._proc()
+        else:
+            self._value = _profiledCall(self._proc)
 
 class ProceduralMat4Slot(_core.Mat4Slot):
     def __init__(self, proc):
@@ -154,7 +177,10 @@ class ProceduralMat4Slot(_core.Mat4Slot):
         self._proc = proc
 
     def computeValue(self):
-        self._value = self._proc()
+        if profiler._active is None:
+            self._value = self._proc()
+        else:
+            self._value = _profiledCall(self._proc)
 
 class ProceduralQuatSlot(_core.QuatSlot):
     def __init__(self, proc):
@@ -162,7 +188,10 @@ class ProceduralQuatSlot(_core.QuatSlot):
         self._proc = proc
 
     def computeValue(self):
-        self._value = self._proc()
+        if profiler._active is None:
+            self._value = self._proc()
+        else:
+            self._value = _profiledCall(self._proc)
 
 
 # NotificationForwarder
@@ -201,6 +230,37 @@ class NotificationForwarder(_core.Dependent):
             self.onresize(size)
 
 
+# SlotBatch
+class SlotBatch:
+    """Context manager that batches slot notifications.
+
+    While the batch is active, slots do not notify their dependents
+    when their value is changed. The notifications are collected and
+    sent once when the outermost batch is left. This means every
+    dependent slot is invalidated only once and procedural slots are
+    recomputed at most once, no matter how many of their inputs have
+    been modified inside the batch.
+
+    Example:
+
+    \code
+    with SlotBatch():
+        for obj in objs:
+            obj.pos = ...
+    \endcode
+
+    Note that values that are read inside a batch may be outdated.
+    Array slots are not affected by batches.
+    """
+
+    def __enter__(self):
+        beginSlotBatch()
+        return self
+
+    def __exit__(self, errorType, errorValue, traceback):
+        endSlotBatch()
+        return False
+
 # slotPropertyCode
 def slotPropertyCode(name, slotname=None):
     """Create the code to add a slot property to a class.
@@ -40,35 +40,11 @@
 from globalscene import getScene
 import component
 import bisect
+import array
+import operator
 from cgtypes import *
 from slots import *
 
-# TableEntry
-class _TableEntry:
-    """Stores a time/value pair for the ValueTable component.
-
-    This is an internal class.
-    """
-    def __init__(self, t, v):
-        self.t = t
-        self.v = v
-
-    def __str__(self):
-        return "%f : %s"%(self.t, self.v)
-
-    __repr__ = __str__
-
-    def __cmp__(self, other):
-        if other==None:
-            return 1
-        else:
-            if self.t<other.t:
-                return -1
-            elif self.t>other.t:
-                return 1
-            else:
-                return 0
-            
 # ValueTable
 class ValueTable(component.Component):
     """ValueTable component.
@@ -77,6 +53,9 @@ class ValueTable(component.Component):
     holds the appropriate value for the current time. The type of
     the value can be specified in the constructor. The name of the
     output slot is always \c output_slot.
+
+    The times are stored in a sorted array of floats and the values
+    in a parallel list (or float array for doubles).
     """
     
     def __init__(self,
@@ -85,6 +64,7 @@ class ValueTable(component.Component):
                  values = [],
                  modulo = None,
                  tscale = 1.0,
+                 interpolation = "step",
                  auto_insert = True):
         """Constructor.
 
@@ -93,11 +73,14 @@ class ValueTable(component.Component):
         \param values A list of tuples (time, value).
         \param modulo (\c float) Loop duration (None = no loop)
         \param tscale (\c float) Scaling factor for the time. A value of less than 1.0 makes the animation slower.
+        \param interpolation (\c str) Interpolation mode ("step", "linear" or "cubic")
         """
         
         component.Component.__init__(self, name=name, auto_insert=auto_insert)
 
-        # Value list. Contains a sorted list of TableEntry objects
+        # Sorted time array
+        self.times = array.array("d")
+        # Value list (the value at index i belongs to the time at index i)
         self.values = []
         # Time modulo value (or None)
         self.modulo = modulo
@@ -105,6 +88,10 @@ class ValueTable(component.Component):
         self.tscale = 1.0
         # Type of the value slot
         self.type = type
+        # Interpolation mode
+        if interpolation not in ["step", "linear", "cubic"]:
+            raise ValueError("Invalid interpolation mode: %s"%interpolation)
+        self.interpolation = interpolation
         
         self.time_slot = DoubleSlot()
         self.addSlot("time", self.time_slot)
@@ -113,32 +100,57 @@ class ValueTable(component.Component):
         self.addSlot("output", self.output_slot)
         pytypes = {"double":"float"}
         exec "self.default_value = %s()"%pytypes.get(typ, typ)
+        if typ=="double":
+            self.values = array.array("d")
 
         self.time_slot.addDependent(self.output_slot)
         getScene().timer().time_slot.connect(self.time_slot)
 
-        for t,v in values:
-            self.add(t,v)
+        if len(values)>0:
+            self.setSamples(map(lambda x: x[0], values), map(lambda x: x[1], values))
 
     def __iter__(self):
         return self.iterValues()
 
+    def __len__(self):
+        return len(self.times)
+
     def __call__(self, time):
-        if len(self.values)==0:
+        times = self.times
+        n = len(times)
+        if n==0:
             return self.default_value
 
         time *= self.tscale
         if self.modulo!=None:
             time = time % self.modulo
 
-        idx = bisect.bisect_left(self.values, _TableEntry(time,self.default_value))
-        if idx>=len(self.values):
-            idx = len(self.values)-1
-        e = self.values[idx]
-        if time<e.t:
-            if idx>0:
-                return self.values[idx-1].v
-        return e.v       
+        # Index of the last sample whose time is <= time
+        idx = bisect.bisect_right(times, time)-1
+        if idx<0:
+            return self.values[0]
+        if idx>=n-1 or self.interpolation=="step":
+            return self.values[idx]
+
+        t0 = times[idx]
+        f = (time-t0)/(times[idx+1]-t0)
+        values = self.values
+        if self.type=="quat":
+            return slerp(f, values[idx], values[idx+1])
+        v1 = values[idx]
+        v2 = values[idx+1]
+        if self.interpolation=="linear":
+            return v1+f*(v2-v1)
+        # Catmull-Rom spline (the end points are duplicated)
+        if idx>0:
+            v0 = values[idx-1]
+        else:
+            v0 = v1
+        if idx+2<n:
+            v3 = values[idx+2]
+        else:
+            v3 = v2
+        return v1 + 0.5*f*((v2-v0) + f*((2.0*v0-5.0*v1+4.0*v2-v3) + f*(3.0*(v1-v2)+v3-v0)))
 
     def __getitem__(self, time):
         return self(time)
@@ -150,28 +162,69 @@ class ValueTable(component.Component):
     def iterValues(self):
         """Iterate over all time/value pairs.
         """
-        for e in self.values:
-            yield e.t, e.v
+        values = self.values
+        for i,t in enumerate(self.times):
+            yield t, values[i]
 
     # add
     def add(self, t, v):
         """Add a value to the table.
 
+        If there already is a value at time t it is replaced.
+        Adding values in chronological order is done in constant time.
+
         \param t (\c float) Time
         \param v Value
         """
-        entry = _TableEntry(t, v)
-        idx = bisect.bisect_left(self.values, entry)
+        times = self.times
+        # Fast path: Append the value at the end
+        if len(times)==0 or t>times[-1]:
+            times.append(t)
+            self.values.append(v)
+            return
+            
+        idx = bisect.bisect_left(times, t)
         # Check if times are identical and the previous value has
         # to be replaced
-        if idx<len(self.values):
-            if self.values[idx].t==t:
-                # Replace the value
-                self.values[idx] = entry
-                return
+        if times[idx]==t:
+            self.values[idx] = v
+            return
 
         # Insert the value
-        self.values.insert(idx, entry)
+        times.insert(idx, t)
+        self.values.insert(idx, v)
+
+    # setSamples
+    def setSamples(self, times, values):
+        """Replace the entire table.
+
+        times is a sequence of time values and values a sequence of the
+        same length with the corresponding values. If the times are not
+        in ascending order, the samples are sorted (if a time appears
+        more than once, the last value is used).
+
+        \param times A sequence of floats
+        \param values A sequence of values
+        """
+        times = array.array("d", times)
+        values = list(values)
+        if len(times)!=len(values):
+            raise ValueError("The number of times and values must be identical")
+
+        # Sort the samples if the times are not strictly increasing
+        if False in map(operator.lt, times[:-1], times[1:]):
+            samples = {}
+            for j,t in enumerate(times):
+                samples[t] = values[j]
+            keys = sorted(samples.keys())
+            times = array.array("d", keys)
+            values = map(lambda t: samples[t], keys)
+            
+        self.times = times
+        if isinstance(self.values, array.array):
+            self.values = array.array("d", values)
+        else:
+            self.values = values
 
     ## protected:
         
@@ -54,15 +54,6 @@ namespace support3d {
 
 #include "noisetabs.h"
 
-// Period values for the pnoise() function family
-// (this should actually be parameters to the pnoise() functions, but
-// then the tabindex templates wouldn't work anymore)
-static int xperiod = 1;
-static int yperiod = 1;
-static int zperiod = 1;
-static int tperiod = 1;
-static int poffset = 0;
-
 /*----------------------------------------------------------------------
   Modulo function.
   Returns a mod b.
@@ -99,71 +90,50 @@ inline unsigned char tabindex4(int ix, int iy, int iz, int it)
 }
 
 /*----------------------------------------------------------------------
-  Periodic tabindex functions.
-
-  These functions create a "random" index between 0 and 255 which is 
-  dependent only on up to 4 integer input values.
-  The return value is periodic with a period stored in the global
-  variables xperiod, yperiod, zperiod and tperiod.
-  These period variables have to be set before calling the functions.
-----------------------------------------------------------------------*/
-
-inline unsigned char ptabindex2(int ix, int iy)
-{
-  ix=imod(ix,xperiod);
-  iy=imod(iy,yperiod);
-  return perm[(ix + perm[iy&TABMASK])&TABMASK];
-}
-
-inline unsigned char ptabindex3(int ix, int iy, int iz)
-{
-  ix=imod(ix,xperiod);
-  iy=imod(iy,yperiod);
-  iz=imod(iz,zperiod);
-  return perm[(ix + perm[(iy + perm[iz&TABMASK])&TABMASK])&TABMASK];
-}
-
-inline unsigned char ptabindex4(int ix, int iy, int iz, int it)
-{
-  ix=imod(ix,xperiod);
-  iy=imod(iy,yperiod);
-  iz=imod(iz,zperiod);
-  it=imod(it,tperiod);
-  return perm[(it + perm[(ix + perm[(iy + perm[iz&TABMASK])&TABMASK])&TABMASK])&TABMASK];
-}
+  Periodic tabindex functor.
 
-/*----------------------------------------------------------------------
-  Periodic tabindex functions with offset.
+  Creates a "random" index between 0 and 255 which is dependent only
+  on up to 4 integer input values. The return value is periodic with
+  the periods stored in the functor. The offset is added to the last
+  spatial index (it is used to obtain independent values for the
+  components of the vector versions of the pnoise() functions).
 
-  Same as before, but they use an additional offset (global variable
-  poffset) that is used in the calculation.
-  These versions are used for the vector version of the pnoise()
-  functions.
+  As the functor carries the periods itself, the periodic noise
+  functions do not depend on any global state and can be called from
+  several threads at the same time.
 ----------------------------------------------------------------------*/
-
-inline unsigned char ptabindex2offset(int ix, int iy)
-{
-  ix=imod(ix,xperiod);
-  iy=imod(iy,yperiod)+poffset;
-  return perm[(ix + perm[iy&TABMASK])&TABMASK];
-}
-
-inline unsigned char ptabindex3offset(int ix, int iy, int iz)
+struct PTabIndex
 {
-  ix=imod(ix,xperiod);
-  iy=imod(iy,yperiod);
-  iz=imod(iz,zperiod)+poffset;
-  return perm[(ix + perm[(iy + perm[iz&TABMASK])&TABMASK])&TABMASK];
-}
-
-inline unsigned char ptabindex4offset(int ix, int iy, int iz, int it)
-{
-  ix=imod(ix,xperiod);
-  iy=imod(iy,yperiod);
-  iz=imod(iz,zperiod)+poffset;
-  it=imod(it,tperiod);
-  return perm[(it + perm[(ix + perm[(iy + perm[iz&TABMASK])&TABMASK])&TABMASK])&TABMASK];
-}
+  int xperiod, yperiod, zperiod, tperiod;
+  int offset;
+
+  PTabIndex(int px, int py, int pz=1, int pt=1, int poffset=0)
+    : xperiod(px), yperiod(py), zperiod(pz), tperiod(pt), offset(poffset) {}
+
+  unsigned char operator()(int ix, int iy) const
+  {
+    ix=imod(ix,xperiod);
+    iy=imod(iy,yperiod)+offset;
+    return perm[(ix + perm[iy&TABMASK])&TABMASK];
+  }
+
+  unsigned char operator()(int ix, int iy, int iz) const
+  {
+    ix=imod(ix,xperiod);
+    iy=imod(iy,yperiod);
+    iz=imod(iz,zperiod)+offset;
+    return perm[(ix + perm[(iy + perm[iz&TABMASK])&TABMASK])&TABMASK];
+  }
+
+  unsigned char operator()(int ix, int iy, int iz, int it) const
+  {
+    ix=imod(ix,xperiod);
+    iy=imod(iy,yperiod);
+    iz=imod(iz,zperiod)+offset;
+    it=imod(it,tperiod);
+    return perm[(it + perm[(ix + perm[(iy + perm[iz&TABMASK])&TABMASK])&TABMASK])&TABMASK];
+  }
+};
 
 /*----------------------------------------------------------------------
  lerp - Linear interpolation between a and b
@@ -476,6 +446,26 @@ void vturbulence(double x, double y, double z,
 			int octaves, double lacunarity, double gain,
       double& ox, double& oy, double& oz);
 
+// Batch versions
+// (points contains n points with dim coordinates each, res receives one
+// value per point or dim values per point for the vector versions)
+void noiseArray(const double* points, int n, int dim, double* res);
+void snoiseArray(const double* points, int n, int dim, double* res);
+void pnoiseArray(const double* points, int n, int dim, const int* periods, double* res);
+void spnoiseArray(const double* points, int n, int dim, const int* periods, double* res);
+void cellnoiseArray(const double* points, int n, int dim, double* res);
+void scellnoiseArray(const double* points, int n, int dim, double* res);
+void vnoiseArray(const double* points, int n, int dim, double* res);
+void vsnoiseArray(const double* points, int n, int dim, double* res);
+void vpnoiseArray(const double* points, int n, int dim, const int* periods, double* res);
+void vspnoiseArray(const double* points, int n, int dim, const int* periods, double* res);
+void vcellnoiseArray(const double* points, int n, int dim, double* res);
+void vscellnoiseArray(const double* points, int n, int dim, double* res);
+// (3D points only)
+void fBmArray(const double* points, int n, int octaves, double lacunarity, double gain, double* res);
+void vfBmArray(const double* points, int n, int octaves, double lacunarity, double gain, double* res);
+void turbulenceArray(const double* points, int n, int octaves, double lacunarity, double gain, double* res);
+void vturbulenceArray(const double* points, int n, int octaves, double lacunarity, double gain, double* res);
 
 } // end of namespace
 
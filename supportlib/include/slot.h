@@ -299,6 +299,62 @@ class CGKIT_SHARED ISlot : public Dependent
      \param ctrl Controlling slot or 0 to disconnect any existing controller.
   */
   virtual void setController(ISlot* ctrl) = 0;
+
+  /**
+     Send a notification that was deferred during a batch.
+
+     This method is called by SlotBatch::end() for every slot whose
+     notification was deferred while the batch was active.
+
+     \see SlotBatch
+  */
+  virtual void sendDeferredNotification() { notifyDependents(); }
+};
+
+//////////////////////////////////////////////////////////////////////
+//////////////////////////////////////////////////////////////////////
+//////////////////////////////////////////////////////////////////////
+
+/**
+  Batched slot notifications.
+
+  While a batch is active (i.e. between begin() and end()), slots do not
+  notify their dependents when their value changes. Instead, the slots
+  are collected and the notifications are sent when the outermost batch
+  ends. Each slot is only collected once, no matter how often its value
+  was changed during the batch. So when many input values of a slot
+  network are modified, the network is only traversed once and every
+  procedural slot is recomputed at most once (when its value is
+  requested the next time).
+
+  Note that values that are read during a batch may be outdated as
+  the dependent slots have not been invalidated yet. %Array slots are
+  not affected by batches.
+
+  The class also maintains counters for the number of notifications that
+  were received by slots and the number of computeValue() calls.
+ */
+class CGKIT_SHARED SlotBatch
+{
+  public:
+  /// Number of onValueChanged() calls that were received by slots
+  static long notifications;
+  /// Number of computeValue() calls
+  static long computations;
+  /// Number of slots whose notification was deferred
+  static long deferred;
+
+  static void begin();
+  static void end();
+  /// Return the nesting level of the active batches (0 = no active batch).
+  static int depth() { return _depth; }
+  static void defer(ISlot* slot);
+  static void cancel(ISlot* slot);
+  static void resetCounters();
+
+  private:
+  static int _depth;
+  static std::vector<ISlot*> _pending;
 };
 
 //////////////////////////////////////////////////////////////////////
@@ -383,8 +439,9 @@ class CGKIT_SHARED Slot : public ISlot
   T value;
 
   /// Flag identifiers
-  enum Flags { CACHE_VALID          = 0x01, 
-               NO_INPUT_CONNECTIONS = 0x02 };
+  enum Flags { CACHE_VALID           = 0x01, 
+               NO_INPUT_CONNECTIONS  = 0x02,
+               NOTIFICATION_DEFERRED = 0x04 };
 
   public:
   Slot(int aflags=0);
@@ -411,6 +468,7 @@ class CGKIT_SHARED Slot : public ISlot
   virtual void onResize(int newsize);
   virtual void onControllerDeleted() { setController(0); };
   void notifyDependents();
+  virtual void sendDeferredNotification();
   
   protected:
   /**
@@ -606,6 +664,10 @@ template<class T>
 Slot<T>::~Slot()
 {
   DEBUGINFO1(this, "Slot<T>::~Slot()  (%s)", typeid(T).name());
+
+  // Remove the slot from the active batch
+  if (flags & NOTIFICATION_DEFERRED)
+    SlotBatch::cancel(this);
   
   // Disconnect from the controller...
   //  DEBUGINFO(this, "  disconnect");
@@ -667,6 +729,7 @@ const T& Slot<T>::getValue()
   }
   else
   {
+    SlotBatch::computations++;
     computeValue();
   }
 
@@ -810,6 +873,17 @@ void Slot<T>::removeDependent(Dependent* d)
 template<class T>
 void Slot<T>::notifyDependents()
 {
+  // Defer the notification while a batch is active
+  if (SlotBatch::depth()>0)
+  {
+    if (!(flags & NOTIFICATION_DEFERRED))
+    {
+      flags |= NOTIFICATION_DEFERRED;
+      SlotBatch::defer(this);
+    }
+    return;
+  }
+
   std::vector<Dependent*>::iterator it;
   for(it=dependents.begin(); it!=dependents.end(); it++)
   {
@@ -825,10 +899,21 @@ void Slot<T>::notifyDependents()
 
   \image html "onvaluechanged_diagram.png"
 */
+/**
+  Send the notification that was deferred during a batch.
+ */
+template<class T>
+void Slot<T>::sendDeferredNotification()
+{
+  flags &= ~NOTIFICATION_DEFERRED;
+  notifyDependents();
+}
+
 template<class T>
 void Slot<T>::onValueChanged()
 {
   DEBUGINFO(this, "Slot<T>::onValueChanged()");
+  SlotBatch::notifications++;
 
   // Only notify when the cache was still valid
   // (otherwise the dependents have already been notified before
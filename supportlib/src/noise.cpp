@@ -263,9 +263,7 @@ double spnoise(double x, double y, int px, int py)
 {
   if ((px==0) || (py==0))
     throw EValueError("period must not be zero");
-  xperiod = px;
-  yperiod = py;
-  return noise_template(ptabindex2,x,y);
+  return noise_template(PTabIndex(px,py),x,y);
 };
 
 /*----------------------------------------------------------------------
@@ -276,10 +274,7 @@ double spnoise(double x, double y, double z, int px, int py, int pz)
 {
   if ((px==0) || (py==0) || (pz==0))
     throw EValueError("period must not be zero");
-  xperiod = px;
-  yperiod = py;
-  zperiod = pz;
-  return noise_template(ptabindex3,x,y,z);
+  return noise_template(PTabIndex(px,py,pz),x,y,z);
 };
 
 /*----------------------------------------------------------------------
@@ -290,11 +285,7 @@ double spnoise(double x, double y, double z, double t, int px, int py, int pz, i
 {
   if ((px==0) || (py==0) || (pz==0) || (pt==0))
     throw EValueError("period must not be zero");
-  xperiod = px;
-  yperiod = py;
-  zperiod = pz;
-  tperiod = pt;
-  return noise_template(ptabindex4,x,y,z,t);
+  return noise_template(PTabIndex(px,py,pz,pt),x,y,z,t);
 };
 
 /*---------------------------------------------------------------------- 
@@ -305,13 +296,9 @@ void vspnoise(double x, double y, int px, int py, double& ox, double& oy)
 {
   if ((px==0) || (py==0))
     throw EValueError("period must not be zero");
-  xperiod = px;
-  yperiod = py;
-  poffset = 0;
-  ox = noise_template(ptabindex2offset,x,y);
+  ox = noise_template(PTabIndex(px,py,1,1,0),x,y);
   x += 10.0;
-  poffset = 37;
-  oy = noise_template(ptabindex2offset,x,y);
+  oy = noise_template(PTabIndex(px,py,1,1,37),x,y);
 };
 
 /*---------------------------------------------------------------------- 
@@ -324,17 +311,11 @@ void vspnoise(double x, double y, double z,
 {
   if ((px==0) || (py==0) || (pz==0))
     throw EValueError("period must not be zero");
-  xperiod = px;
-  yperiod = py;
-  zperiod = pz;
-  poffset = 0;
-  ox = noise_template(ptabindex3offset,x,y,z);
+  ox = noise_template(PTabIndex(px,py,pz,1,0),x,y,z);
   x += 10.0;
-  poffset = 37;
-  oy = noise_template(ptabindex3offset,x,y,z);
+  oy = noise_template(PTabIndex(px,py,pz,1,37),x,y,z);
   y += 10.0;
-  poffset = 99;
-  oz = noise_template(ptabindex3offset,x,y,z);
+  oz = noise_template(PTabIndex(px,py,pz,1,99),x,y,z);
 };
 
 /*---------------------------------------------------------------------- 
@@ -347,21 +328,13 @@ void vspnoise(double x, double y, double z, double t,
 {
   if ((px==0) || (py==0) || (pz==0) || (pt==0))
     throw EValueError("period must not be zero");
-  xperiod = px;
-  yperiod = py;
-  zperiod = pz;
-  tperiod = pt;
-  poffset = 0;
-  ox = noise_template(ptabindex4offset,x,y,z,t);
+  ox = noise_template(PTabIndex(px,py,pz,pt,0),x,y,z,t);
   x += 10.0;
-  poffset = 37;
-  oy = noise_template(ptabindex4offset,x,y,z,t);
+  oy = noise_template(PTabIndex(px,py,pz,pt,37),x,y,z,t);
   y += 10.0;
-  poffset = 99;
-  oz = noise_template(ptabindex4offset,x,y,z,t);
+  oz = noise_template(PTabIndex(px,py,pz,pt,99),x,y,z,t);
   z += 10.0;
-  poffset = 105;
-  ot = noise_template(ptabindex4offset,x,y,z,t);
+  ot = noise_template(PTabIndex(px,py,pz,pt,105),x,y,z,t);
 };
 
 /*---------------------------------------------------------------------- 
@@ -504,4 +477,237 @@ void vturbulence(double x, double y, double z,
 }
 
 
+/*----------------------------------------------------------------------
+  Batch versions
+
+  The following functions evaluate a noise function at n points. The
+  points are stored consecutively with dim (1-4) values per point and
+  the results are written into res (one value per point or, for the
+  vector versions, dim values per point). A 1D point is evaluated as
+  2D noise with y=0 (like the Python wrappers of the scalar functions).
+
+  The functions only read the constant noise tables, so they can be
+  called from several threads at the same time.
+----------------------------------------------------------------------*/
+
+static void checkDimension(int dim)
+{
+  if ((dim<1) || (dim>4))
+    throw EValueError("the point dimension must be between 1 and 4");
+}
+
+static void checkPeriods(int dim, const int* periods)
+{
+  checkDimension(dim);
+  for(int i=0; i<dim; i++)
+  {
+    if (periods[i]==0)
+      throw EValueError("period must not be zero");
+  }
+}
+
+// Map values from the range [-1,1] to [0,1]
+static void toUnsigned(double* res, int count)
+{
+  for(int i=0; i<count; i++)
+    res[i] = 0.5*(res[i]+1.0);
+}
+
+// snoiseArray
+void snoiseArray(const double* points, int n, int dim, double* res)
+{
+  checkDimension(dim);
+  const double* p = points;
+  for(int i=0; i<n; i++, p+=dim)
+  {
+    switch(dim)
+    {
+    case 1: res[i] = snoise(p[0], 0.0); break;
+    case 2: res[i] = snoise(p[0], p[1]); break;
+    case 3: res[i] = snoise(p[0], p[1], p[2]); break;
+    default: res[i] = snoise(p[0], p[1], p[2], p[3]);
+    }
+  }
+}
+
+// noiseArray
+void noiseArray(const double* points, int n, int dim, double* res)
+{
+  snoiseArray(points, n, dim, res);
+  toUnsigned(res, n);
+}
+
+// spnoiseArray
+void spnoiseArray(const double* points, int n, int dim, const int* periods, double* res)
+{
+  checkPeriods(dim, periods);
+  const int* pp = periods;
+  const double* p = points;
+  for(int i=0; i<n; i++, p+=dim)
+  {
+    switch(dim)
+    {
+    case 1: res[i] = spnoise(p[0], 0.0, pp[0], 1); break;
+    case 2: res[i] = spnoise(p[0], p[1], pp[0], pp[1]); break;
+    case 3: res[i] = spnoise(p[0], p[1], p[2], pp[0], pp[1], pp[2]); break;
+    default: res[i] = spnoise(p[0], p[1], p[2], p[3], pp[0], pp[1], pp[2], pp[3]);
+    }
+  }
+}
+
+// pnoiseArray
+void pnoiseArray(const double* points, int n, int dim, const int* periods, double* res)
+{
+  spnoiseArray(points, n, dim, periods, res);
+  toUnsigned(res, n);
+}
+
+// cellnoiseArray
+void cellnoiseArray(const double* points, int n, int dim, double* res)
+{
+  checkDimension(dim);
+  const double* p = points;
+  for(int i=0; i<n; i++, p+=dim)
+  {
+    switch(dim)
+    {
+    case 1: res[i] = cellnoise(p[0], 0.0, 0.0, 0.0); break;
+    case 2: res[i] = cellnoise(p[0], p[1], 0.0, 0.0); break;
+    case 3: res[i] = cellnoise(p[0], p[1], p[2], 0.0); break;
+    default: res[i] = cellnoise(p[0], p[1], p[2], p[3]);
+    }
+  }
+}
+
+// scellnoiseArray
+void scellnoiseArray(const double* points, int n, int dim, double* res)
+{
+  cellnoiseArray(points, n, dim, res);
+  for(int i=0; i<n; i++)
+    res[i] = 2.0*res[i]-1.0;
+}
+
+// vsnoiseArray
+void vsnoiseArray(const double* points, int n, int dim, double* res)
+{
+  checkDimension(dim);
+  const double* p = points;
+  double* r = res;
+  for(int i=0; i<n; i++, p+=dim)
+  {
+    switch(dim)
+    {
+    case 1: r[0] = snoise(p[0], 0.0); r+=1; break;
+    case 2: vsnoise(p[0], p[1], r[0], r[1]); r+=2; break;
+    case 3: vsnoise(p[0], p[1], p[2], r[0], r[1], r[2]); r+=3; break;
+    default: vsnoise(p[0], p[1], p[2], p[3], r[0], r[1], r[2], r[3]); r+=4;
+    }
+  }
+}
+
+// vnoiseArray
+void vnoiseArray(const double* points, int n, int dim, double* res)
+{
+  vsnoiseArray(points, n, dim, res);
+  toUnsigned(res, n*dim);
+}
+
+// vspnoiseArray
+void vspnoiseArray(const double* points, int n, int dim, const int* periods, double* res)
+{
+  checkPeriods(dim, periods);
+  const int* pp = periods;
+  const double* p = points;
+  double* r = res;
+  for(int i=0; i<n; i++, p+=dim)
+  {
+    switch(dim)
+    {
+    case 1:
+      r[0] = spnoise(p[0], 0.0, pp[0], 1);
+      r+=1;
+      break;
+    case 2:
+      vspnoise(p[0], p[1], pp[0], pp[1], r[0], r[1]);
+      r+=2;
+      break;
+    case 3:
+      vspnoise(p[0], p[1], p[2], pp[0], pp[1], pp[2], r[0], r[1], r[2]);
+      r+=3;
+      break;
+    default:
+      vspnoise(p[0], p[1], p[2], p[3], pp[0], pp[1], pp[2], pp[3], r[0], r[1], r[2], r[3]);
+      r+=4;
+    }
+  }
+}
+
+// vpnoiseArray
+void vpnoiseArray(const double* points, int n, int dim, const int* periods, double* res)
+{
+  vspnoiseArray(points, n, dim, periods, res);
+  toUnsigned(res, n*dim);
+}
+
+// vcellnoiseArray
+void vcellnoiseArray(const double* points, int n, int dim, double* res)
+{
+  checkDimension(dim);
+  const double* p = points;
+  double* r = res;
+  for(int i=0; i<n; i++, p+=dim)
+  {
+    switch(dim)
+    {
+    case 1: r[0] = cellnoise(p[0], 0.0, 0.0, 0.0); r+=1; break;
+    case 2: vcellnoise(p[0], p[1], r[0], r[1]); r+=2; break;
+    case 3: vcellnoise(p[0], p[1], p[2], r[0], r[1], r[2]); r+=3; break;
+    default: vcellnoise(p[0], p[1], p[2], p[3], r[0], r[1], r[2], r[3]); r+=4;
+    }
+  }
+}
+
+// vscellnoiseArray
+void vscellnoiseArray(const double* points, int n, int dim, double* res)
+{
+  vcellnoiseArray(points, n, dim, res);
+  for(int i=0; i<n*dim; i++)
+    res[i] = 2.0*res[i]-1.0;
+}
+
+// fBmArray (3D points)
+void fBmArray(const double* points, int n, int octaves, double lacunarity, double gain, double* res)
+{
+  const double* p = points;
+  for(int i=0; i<n; i++, p+=3)
+    res[i] = fBm(p[0], p[1], p[2], octaves, lacunarity, gain);
+}
+
+// vfBmArray (3D points)
+void vfBmArray(const double* points, int n, int octaves, double lacunarity, double gain, double* res)
+{
+  const double* p = points;
+  double* r = res;
+  for(int i=0; i<n; i++, p+=3, r+=3)
+    vfBm(p[0], p[1], p[2], octaves, lacunarity, gain, r[0], r[1], r[2]);
+}
+
+// turbulenceArray (3D points)
+void turbulenceArray(const double* points, int n, int octaves, double lacunarity, double gain, double* res)
+{
+  const double* p = points;
+  for(int i=0; i<n; i++, p+=3)
+    res[i] = turbulence(p[0], p[1], p[2], octaves, lacunarity, gain);
+}
+
+// vturbulenceArray (3D points)
+void vturbulenceArray(const double* points, int n, int octaves, double lacunarity, double gain, double* res)
+{
+  const double* p = points;
+  double* r = res;
+  for(int i=0; i<n; i++, p+=3, r+=3)
+    vturbulence(p[0], p[1], p[2], octaves, lacunarity, gain, r[0], r[1], r[2]);
+}
+
+
 } // end of namespace
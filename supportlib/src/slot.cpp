@@ -60,4 +60,86 @@ ISlot::~ISlot()
 //  std::cout<<"0x"<<std::hex<<(long)this<<std::dec<<": ISlot<T>::~ISlot() end"<<std::endl;
 }
 
+//////////////////////////////////////////////////////////////////////
+
+long SlotBatch::notifications = 0;
+long SlotBatch::computations = 0;
+long SlotBatch::deferred = 0;
+int SlotBatch::_depth = 0;
+std::vector<ISlot*> SlotBatch::_pending;
+
+/**
+  Begin a batch.
+
+  Batches can be nested. The notifications are only sent when the
+  outermost batch ends.
+ */
+void SlotBatch::begin()
+{
+  _depth++;
+}
+
+/**
+  End a batch.
+
+  If this is the outermost batch, all deferred notifications are sent
+  (in the order in which the slots were modified first). Slots that get
+  modified while the notifications are sent notify their dependents
+  immediately.
+ */
+void SlotBatch::end()
+{
+  if (_depth==0)
+    throw EValueError("SlotBatch::end() was called without an active batch.");
+  _depth--;
+  if (_depth>0)
+    return;
+
+  // Take the pending slots (new slots might get added while the
+  // notifications are sent if a dependent begins a new batch)
+  while(!_pending.empty())
+  {
+    std::vector<ISlot*> pending;
+    pending.swap(_pending);
+    for(unsigned int i=0; i<pending.size(); i++)
+    {
+      // A slot might have been removed from the list by cancel()
+      if (pending[i]!=0)
+        pending[i]->sendDeferredNotification();
+    }
+  }
+}
+
+/**
+  Register a slot whose notification is deferred.
+
+  This is called by a slot that was modified during a batch. A slot must
+  only be registered once per batch.
+ */
+void SlotBatch::defer(ISlot* slot)
+{
+  _pending.push_back(slot);
+  deferred++;
+}
+
+/**
+  Remove a slot from the list of pending slots.
+
+  This is called when a slot with a pending notification is deleted.
+ */
+void SlotBatch::cancel(ISlot* slot)
+{
+  std::replace(_pending.begin(), _pending.end(), slot, (ISlot*)0);
+}
+
+/**
+  Reset the notification and computation counters.
+ */
+void SlotBatch::resetCounters()
+{
+  notifications = 0;
+  computations = 0;
+  deferred = 0;
+}
+
 }  // end of namespace
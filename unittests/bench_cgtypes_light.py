@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+# Micro benchmark for the light cgtypes.
+#
+# Prints the number of operations per second and the memory used by
+# one instance (including its attribute values) for every type.
+#
+# Usage: bench_cgtypes_light.py [-n <number>]
+
+import sys, timeit, optparse
+
+setup = """
+from cgkit.light.cgtypes import vec3, vec4, mat3, mat4, quat
+a = vec3(1.0, 0.5, -1.8)
+b = vec3(-0.3, 0.75, 0.5)
+c = vec4(1.0, 0.5, -1.8, 1.0)
+d = vec4(-0.3, 0.75, 0.5, 0.2)
+M3 = mat3(1).rotation(0.5, vec3(1,1,0))
+M = mat4(1).rotation(0.5, vec3(1,1,0)).translate(vec3(1,2,3))
+N = mat4(1).scaling(vec3(2,1,0.5))
+q = quat(0.5, vec3(1,1,0))
+r = quat(1.2, vec3(0,1,1))
+"""
+
+benchmarks = [
+    ("vec3", "vec3(1.0, 2.0, 3.0)"),
+    ("vec3", "vec3(a)"),
+    ("vec3", "a+b"),
+    ("vec3", "a*2.0"),
+    ("vec3", "a*b"),
+    ("vec3", "a.cross(b)"),
+    ("vec3", "a.normalize()"),
+    ("vec4", "vec4(1.0, 2.0, 3.0, 4.0)"),
+    ("vec4", "c+d"),
+    ("vec4", "c*2.0"),
+    ("mat3", "mat3(1.0)"),
+    ("mat3", "M3*a"),
+    ("mat3", "M3*M3"),
+    ("mat4", "mat4(1.0)"),
+    ("mat4", "M*a"),
+    ("mat4", "M*N"),
+    ("mat4", "M.inverse()"),
+    ("quat", "quat(1.0, 0.0, 0.0, 0.0)"),
+    ("quat", "q*r"),
+    ("quat", "q.rotateVec(a)"),
+    ("quat", "q.toMat4()"),
+]
+
+def instanceSize(obj):
+    """Return the number of bytes used by obj and its attribute values.
+    """
+    size = sys.getsizeof(obj)
+    values = []
+    if hasattr(obj, "__dict__"):
+        size += sys.getsizeof(obj.__dict__)
+        values = obj.__dict__.values()
+    else:
+        for cls in type(obj).__mro__:
+            for name in getattr(cls, "__slots__", ()):
+                values.append(getattr(obj, name))
+    for v in values:
+        size += sys.getsizeof(v)
+        if isinstance(v, list):
+            size += sum(map(sys.getsizeof, v))
+    return size
+
+def main():
+    parser = optparse.OptionParser(usage="%prog [-n <number>]")
+    parser.add_option("-n", "--number", type="int", default=100000,
+                      help="Number of executions per benchmark")
+    opts, args = parser.parse_args()
+
+    ns = {}
+    exec setup in ns
+    print "%-5s %8s" % ("type", "bytes")
+    for name,expr in [("vec3", "a"), ("vec4", "c"), ("mat3", "M3"), ("mat4", "M"), ("quat", "q")]:
+        print "%-5s %8d" % (name, instanceSize(ns[expr]))
+    print
+    print "%-5s %-28s %12s" % ("type", "operation", "ops/sec")
+    for name,stmt in benchmarks:
+        t = min(timeit.Timer(stmt, setup).repeat(3, opts.number))
+        print "%-5s %-28s %12.0f" % (name, stmt, opts.number/t)
+
+if __name__=="__main__":
+    main()
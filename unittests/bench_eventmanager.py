@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+# Benchmark for the event dispatch of the EventManager.
+#
+# Prints the number of events per second for an event with three scene
+# wide receivers, an event with a system wide and two scene wide
+# receivers, an event without receivers and for queued events.
+#
+# To compare with another version of the event manager, pass the
+# corresponding module file with -m, e.g.:
+#
+#   git show <rev>:cgkit/eventmanager.py > /tmp/eventmanager_old.py
+#   bench_eventmanager.py -m /tmp/eventmanager_old.py
+#
+# Usage: bench_eventmanager.py [-n <number of events>] [-m <module file>]
+
+import sys, os.path, time, optparse, imp
+import cgkit
+from cgkit import eventmanager
+
+class Receiver:
+    def onStepFrame(self):
+        pass
+
+    def onMouseMove(self, e):
+        pass
+
+def bench(name, func, n):
+    t0 = time.time()
+    func(n)
+    t = time.time()-t0
+    print "%-12s %10.0f events/s"%(name, n/t)
+
+parser = optparse.OptionParser(usage="%prog [options]")
+parser.add_option("-n", "--numevents", type="int", default=200000,
+                  help="Number of events per benchmark")
+parser.add_option("-m", "--module", default=None,
+                  help="File name of an alternative eventmanager module")
+opts, args = parser.parse_args()
+
+if opts.module is not None:
+    # The module uses implicit relative imports
+    sys.path.insert(0, os.path.dirname(cgkit.__file__))
+    emmodule = imp.load_source("eventmanager_ref", opts.module)
+    print "Module:", opts.module
+else:
+    emmodule = eventmanager
+
+em = emmodule.EventManager()
+recs = [Receiver() for i in range(3)]
+for rec in recs:
+    em.connect("StepFrame", rec)
+em.connect("MouseMove", lambda e: False, system=True)
+em.connect("MouseMove", recs[0])
+em.connect("MouseMove", recs[1])
+
+def stepFrame(n):
+    event = em.event
+    for i in xrange(n):
+        event("StepFrame")
+
+def mouseMove(n):
+    event = em.event
+    for i in xrange(n):
+        event("MouseMove", None)
+
+def unconnected(n):
+    event = em.event
+    for i in xrange(n):
+        event("Spam")
+
+def queued(n):
+    postEvent = em.postEvent
+    for i in xrange(n):
+        postEvent("MouseMove", None)
+    em.processEvents()
+
+bench("StepFrame", stepFrame, opts.numevents)
+bench("MouseMove", mouseMove, opts.numevents)
+bench("unconnected", unconnected, opts.numevents)
+if hasattr(em, "postEvent"):
+    bench("queued", queued, opts.numevents)
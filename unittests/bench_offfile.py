@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# Benchmark for reading and writing OFF files.
+#
+# Creates a triangulated grid with at least n faces, writes it into an
+# OFF file and reads it back. Each step is timed with the bulk (numpy)
+# code and with the line-by-line code that is used when numpy is not
+# available.
+#
+# Usage: bench_offfile.py [-n <number of faces>] [-o <filename>]
+
+import time, optparse, math
+import numpy
+from cgkit import offimport, offexport
+from cgkit.globalscene import getScene
+from cgkit.trimesh import TriMesh
+from cgkit.geomobject import *
+
+def createMesh(numfaces):
+    """Create a grid mesh with at least numfaces triangles.
+    """
+    m = int(math.ceil(math.sqrt(numfaces/2.0)))
+    u,v = numpy.meshgrid(numpy.arange(m+1, dtype=numpy.float64), numpy.arange(m+1, dtype=numpy.float64))
+    verts = numpy.zeros(((m+1)*(m+1), 3))
+    verts[:,0] = u.flat
+    verts[:,1] = v.flat
+    idx = numpy.arange((m+1)*(m+1), dtype=numpy.int32).reshape((m+1, m+1))
+    a = idx[:-1,:-1].flatten()
+    b = idx[:-1,1:].flatten()
+    c = idx[1:,1:].flatten()
+    d = idx[1:,:-1].flatten()
+    faces = numpy.vstack((numpy.column_stack((a,b,c)), numpy.column_stack((a,c,d))))
+
+    tm = TriMesh(name="Grid")
+    tm.geom.verts.resize(len(verts))
+    tm.geom.verts.setBuffer(verts)
+    tm.geom.faces.resize(len(faces))
+    tm.geom.faces.setBuffer(numpy.ascontiguousarray(faces))
+    tm.geom.newVariable("N", VARYING, NORMAL)
+    normals = numpy.zeros(verts.shape)
+    normals[:,2] = 1.0
+    tm.geom.slot("N").setBuffer(normals)
+    return tm
+
+def bench(name, func, numfaces):
+    t0 = time.time()
+    func()
+    t = time.time()-t0
+    print "%-22s %6.2fs %10.0f faces/s"%(name, t, numfaces/t)
+
+parser = optparse.OptionParser(usage="%prog [options]")
+parser.add_option("-n", "--numfaces", type="int", default=4000000,
+                  help="Minimum number of faces in the mesh")
+parser.add_option("-o", "--output", default="bench.off",
+                  help="Name of the OFF file that is created")
+opts, args = parser.parse_args()
+
+tm = createMesh(opts.numfaces)
+numfaces = tm.geom.faces.size()
+print "Mesh: %d vertices, %d faces"%(tm.geom.verts.size(), numfaces)
+
+for numpyAvailable in [False, True]:
+    offexport._numpy_available = numpyAvailable
+    offimport._numpy_available = numpyAvailable
+    if numpyAvailable:
+        label = "bulk"
+    else:
+        label = "line-by-line"
+    bench("Write (%s)"%label, lambda: offexport.OffExporter().exportFile(opts.output, tm), numfaces)
+    bench("Read (%s)"%label, lambda: offimport.OffImporter().importFile(opts.output), numfaces)
+    # Remove the imported mesh again
+    for obj in list(getScene().worldRoot().iterChilds()):
+        if obj is not tm:
+            getScene().worldRoot().removeChild(obj)
@@ -0,0 +1,48 @@
+#!/usr/bin/env python
+# Benchmark for reading point cloud files.
+#
+# Prints the number of points per second for the different ways of
+# reading the points of a point cloud file.
+#
+# Usage: bench_pointcloud.py [-l <libname>] [-n <number>] <ptcfile>
+
+import sys, time, optparse
+from cgkit import pointcloud
+
+def readSingle(ptc, n):
+    for i in range(n):
+        ptc.readDataPoint()
+
+def iterPoints(ptc, n):
+    for p in ptc.iterPoints():
+        pass
+
+def iterBatches(ptc, n):
+    for buffers in ptc.iterBatches(10000, numpyArray=True):
+        pass
+
+def iterRecords(ptc, n):
+    for recs in ptc.iterRecords(10000):
+        pass
+
+parser = optparse.OptionParser(usage="%prog [options] ptcfile")
+parser.add_option("-l", "--lib-name", default=None,
+                  help="The renderer library implementing the point cloud API")
+parser.add_option("-n", "--numpoints", type="int", default=None,
+                  help="Maximum number of points to read per benchmark")
+opts, args = parser.parse_args()
+if len(args)!=1:
+    parser.print_help()
+    sys.exit(1)
+
+for name,func in [("readDataPoint()", readSingle), ("iterPoints()", iterPoints),
+                  ("iterBatches()", iterBatches), ("iterRecords()", iterRecords)]:
+    ptc = pointcloud.open(args[0], "r", opts.lib_name)
+    n = ptc.npoints
+    if opts.numpoints is not None and func in [readSingle]:
+        n = min(n, opts.numpoints)
+    t0 = time.time()
+    func(ptc, n)
+    t = time.time()-t0
+    ptc.close()
+    print "%-16s %10.0f points/s"%(name, n/t)
@@ -0,0 +1,42 @@
+#!/usr/bin/env python
+# Benchmark for the PointGrid spatial index.
+#
+# Builds a grid over n random points on the surface of a unit sphere
+# (which resembles a baked point cloud) and measures the build time
+# and the query throughput of the k-NN and radius queries.
+#
+# Usage: bench_pointgrid.py [-n <number of points>] [-q <number of queries>]
+
+import time, optparse
+import numpy
+from cgkit import pointgrid
+
+parser = optparse.OptionParser(usage="%prog [options]")
+parser.add_option("-n", "--numpoints", type="int", default=10000000,
+                  help="Number of points in the grid")
+parser.add_option("-q", "--numqueries", type="int", default=100000,
+                  help="Number of query points")
+parser.add_option("-k", type="int", default=8, help="Number of neighbours")
+opts, args = parser.parse_args()
+
+n = opts.numpoints
+numpy.random.seed(1)
+P = numpy.random.normal(size=(n,3)).astype(numpy.float32)
+P /= numpy.sqrt(numpy.sum(P*P, axis=1)).reshape(-1,1)
+
+t0 = time.time()
+grid = pointgrid.PointGrid(P)
+t = time.time()-t0
+print "Build: %d points in %1.2fs (%1.0f points/s), cell size %g"%(n, t, n/t, grid.cellSize)
+
+Q = P[numpy.random.randint(0, n, opts.numqueries)]+numpy.random.normal(scale=0.001, size=(opts.numqueries,3))
+t0 = time.time()
+grid.queryKNN(Q, opts.k)
+t = time.time()-t0
+print "k-NN (k=%d): %d queries in %1.2fs (%1.0f queries/s)"%(opts.k, len(Q), t, len(Q)/t)
+
+radius = grid.cellSize
+t0 = time.time()
+offsets, idx, dist = grid.queryRadius(Q, radius)
+t = time.time()-t0
+print "Radius (r=%g): %d queries in %1.2fs (%1.0f queries/s, %1.1f points/query)"%(radius, len(Q), t, len(Q)/t, len(idx)/float(len(Q)))
@@ -0,0 +1,127 @@
+# Test the AnimCache component
+
+import unittest, os, os.path, struct, pickle
+from cgkit.all import *
+from cgkit import chunkfile
+
+class Exploit(object):
+    """Object that calls a function when it is unpickled."""
+    def __reduce__(self):
+        return (os.remove, ("tmp/anim_victim.txt",))
+
+class TestAnimCache(unittest.TestCase):
+
+    def setUp(self):
+        if not os.path.exists("tmp"):
+            os.mkdir("tmp")
+        getScene().clear()
+        getScene().timer().time = 0.0
+
+    def testCache(self):
+        """Check that cached values are reused."""
+        timer = getScene().timer()
+        calls = []
+        def f(t):
+            calls.append(t)
+            return vec3(2*t, 0, 0)
+        e = Expression("f(t)", f=f, exprtype="vec3")
+        cache = AnimCache()
+        out = cache.addChannel("pos", e.output_slot)
+        self.assertEqual(cache._channels["pos"].type, "vec3")
+        
+        for i in range(5):
+            timer.time = 0.1*i
+            self.assertEqual(out.getValue(), vec3(0.2*i, 0, 0))
+        n = len(calls)
+        self.assertEqual(len(cache.times("pos")), 5)
+
+        # Going back to cached times must not evaluate the expression again
+        for i in range(4, -1, -1):
+            timer.time = 0.1*i
+            self.assertEqual(out.getValue(), vec3(0.2*i, 0, 0))
+        self.assertEqual(len(calls), n)
+        self.assertEqual(cache.value("pos", 0.3), vec3(0.6, 0, 0))
+        self.assertEqual(cache.value("pos", 0.35), None)
+
+        # Invalidate the cache
+        cache.invalidate()
+        self.assertEqual(cache.times("pos"), [])
+        self.assertEqual(out.getValue(), vec3(0))
+        self.assertEqual(cache.times("pos"), [0.0])
+        self.assertEqual(len(calls), n+1)
+
+    def testEdit(self):
+        """Check that editing a slot clears the cache."""
+        timer = getScene().timer()
+        e = Expression("t+a", a=1.0)
+        cache = AnimCache()
+        out = cache.addChannel("value", e.output_slot)
+        cache.watch(e.a_slot)
+        cache.bake(0.0, 1.0, 0.25)
+        self.assertEqual(cache.times("value"), [0.0, 0.25, 0.5, 0.75, 1.0])
+
+        timer.time = 0.5
+        self.assertEqual(out.getValue(), 1.5)
+        e.a = 2.0
+        self.assertEqual(cache.times("value"), [])
+        self.assertEqual(out.getValue(), 2.5)
+
+    def testArray(self):
+        """Check recording an array slot."""
+        timer = getScene().timer()
+        tm = TriMesh(verts=[(0,0,0), (1,0,0), (0,1,0)], faces=[(0,1,2)])
+        cache = AnimCache()
+        out = cache.addChannel("verts", tm.geom.verts_slot)
+        for i in range(3):
+            timer.time = i
+            tm.geom.verts[0] = vec3(0,0,i)
+        timer.time = 1
+        self.assertEqual(out.size(), 3)
+        self.assertEqual(out[0], vec3(0,0,1))
+        self.assertEqual(list(cache.value("verts", 2)), [0,0,2, 1,0,0, 0,1,0])
+
+        # Changing the size of a cached sample must not leave unused data
+        tm.geom.verts.resize(4)
+        tm.geom.verts[3] = vec3(1,1,0)
+        timer.time = 2
+        ch = cache._channels["verts"]
+        self.assertEqual(len(ch.data), 30)
+        self.assertEqual(list(cache.value("verts", 1)), [0,0,1, 1,0,0, 0,1,0, 1,1,0])
+        self.assertEqual(list(cache.value("verts", 2)), [0,0,2, 1,0,0, 0,1,0])
+        key = [k for k,idx in ch.keys.items() if idx==0][0]
+        ch.set(key, 0.0, [])
+        self.assertEqual(len(ch.data), 21)
+
+    def testSaveLoad(self):
+        """Check saving and loading a cache."""
+        timer = getScene().timer()
+        e = Expression("mat4(1).translate(vec3(t,0,0))", exprtype="mat4")
+        cache = AnimCache()
+        cache.addChannel("M", e.output_slot)
+        cache.bake(0.0, 1.0, 0.5)
+        cache.save("tmp/anim.cgac")
+
+        cache2 = AnimCache()
+        cache2.load("tmp/anim.cgac")
+        self.assertEqual(cache2.times("M"), [0.0, 0.5, 1.0])
+        timer.time = 0.5
+        self.assertEqual(cache2.M_slot.getValue(), mat4(1).translate(vec3(0.5,0,0)))
+        # A time that is not cached delivers the previous value
+        timer.time = 0.7
+        self.assertEqual(cache2.M_slot.getValue(), mat4(1).translate(vec3(0.5,0,0)))
+        # Not a cache file
+        self.assertRaises(ValueError, lambda: cache2.load(__file__))
+
+        # A channel description must not invoke any function
+        open("tmp/anim_victim.txt", "w").close()
+        f = open("tmp/exploit.cgac", "wb")
+        f.write(struct.pack("<8sII", "CGKANIMC", 1, 0))
+        chunkfile.writeChunk(f, "CHAN", pickle.dumps(Exploit(), pickle.HIGHEST_PROTOCOL))
+        f.close()
+        self.assertRaises(pickle.UnpicklingError, lambda: cache2.load("tmp/exploit.cgac"))
+        self.assertEqual(os.path.exists("tmp/anim_victim.txt"), True)
+
+######################################################################
+
+if __name__=="__main__":
+    unittest.main()
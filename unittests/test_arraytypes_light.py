@@ -0,0 +1,156 @@
+# Test the array types of the light version
+
+import unittest, sys, math
+from cgkit.light.cgtypes import *
+
+try:
+    import numpy
+    numpy_available = True
+except ImportError:
+    numpy_available = False
+
+class TestArrayTypes_light(unittest.TestCase):
+
+    def setUp(self):
+        if not numpy_available:
+            print >>sys.stderr, "numpy is not available, skipping test"
+        self.vs = [vec3(1,2,3), vec3(-0.5,0.2,4), vec3(0,0,1), vec3(2,-1,0.5)]
+        self.ms = [mat4(1).translation(vec3(1,2,3)),
+                   mat4(1).rotation(0.5, vec3(1,1,0)),
+                   mat4(1).scaling(vec3(2,-1,0.5))*mat4(1).rotation(1.2, vec3(0,1,0)),
+                   mat4.lookAt(vec3(1,2,3), vec3(0,0,0))]
+        self.qs = [quat(0.3, vec3(0,0,1)), quat(1.2, vec3(1,1,0)),
+                   quat(2.5, vec3(-1,2,3)), quat(1)]
+
+    def testVec3Array(self):
+        if not numpy_available:
+            return
+        a = vec3array(self.vs)
+        self.assertEqual(len(a), 4)
+        self.assertEqual(a.toList(), self.vs)
+        self.assertEqual(list(a), self.vs)
+        self.assertEqual(a[1], self.vs[1])
+        self.assertEqual(vec3array(a.data), a)
+        self.assertEqual(vec3array(3).toList(), 3*[vec3(0)])
+        self.assertEqual(vec3array([]).data.shape, (0,3))
+
+        b = vec3array(list(reversed(self.vs)))
+        c = a.cross(b)
+        d = a*b
+        l = a.length()
+        n = a.normalize()
+        s = a+b
+        e = 2*a-b/2.0
+        for i in range(4):
+            v = self.vs[i]
+            w = self.vs[3-i]
+            self.assertEqual(c[i], v.cross(w))
+            self.assertAlmostEqual(d[i], v*w, 12)
+            self.assertAlmostEqual(l[i], v.length(), 12)
+            self.assertEqual(n[i], v.normalize())
+            self.assertEqual(s[i], v+w)
+            self.assertEqual(e[i], 2*v-w/2.0)
+
+        a[0] = vec3(5,6,7)
+        self.assertEqual(a[0], vec3(5,6,7))
+        self.assertRaises(ZeroDivisionError, lambda: vec3array(2).normalize())
+
+    def testMatVec(self):
+        if not numpy_available:
+            return
+        a = vec3array(self.vs)
+        for M in self.ms:
+            b = M*a
+            c = a*M
+            for i in range(4):
+                self.assertEqual(b[i], M*self.vs[i])
+                self.assertEqual(c[i], self.vs[i]*M)
+        M3 = self.ms[1].getMat3()
+        b = M3*a
+        for i in range(4):
+            self.assertEqual(b[i], M3*self.vs[i])
+
+        ma = mat4array(self.ms)
+        b = ma*a
+        for i in range(4):
+            self.assertEqual(b[i], self.ms[i]*self.vs[i])
+
+    def testMat4Array(self):
+        if not numpy_available:
+            return
+        ma = mat4array(self.ms)
+        self.assertEqual(ma.toList(), self.ms)
+        self.assertEqual(ma[2], self.ms[2])
+        prod = ma*self.ms[1]
+        prod2 = self.ms[1]*ma
+        inv = ma.inverse()
+        tr = ma.transpose()
+        det = ma.determinant()
+        t,r,s = ma.decompose()
+        for i in range(4):
+            M = self.ms[i]
+            self.assertEqual(prod[i], M*self.ms[1])
+            self.assertEqual(prod2[i], self.ms[1]*M)
+            self.assertEqual(inv[i], M.inverse())
+            self.assertEqual(tr[i], M.transpose())
+            self.assertAlmostEqual(det[i], M.determinant(), 10)
+            t2,r2,s2 = M.decompose()
+            self.assertEqual(t[i], t2)
+            self.assertEqual(r[i], r2)
+            self.assertEqual(s[i], s2)
+
+        pos = vec3array([(1,2,3), (0,0,5), (-1,0,0)])
+        L = mat4array.lookAt(pos, vec3(0,0,0))
+        for i in range(len(pos)):
+            self.assertEqual(L[i], mat4.lookAt(pos[i], vec3(0,0,0)))
+        T = mat4array.translation(pos)
+        self.assertEqual(T[1], mat4(1).translation(pos[1]))
+
+    def testQuatArray(self):
+        if not numpy_available:
+            return
+        qa = quatarray(self.qs)
+        self.assertEqual(qa.toList(), self.qs)
+        qb = quatarray(list(reversed(self.qs)))
+        prod = qa*qb
+        mats = qa.toMat4()
+        inv = qa.inverse()
+        conj = qa.conjugate()
+        rot = qa.rotateVec(vec3array(self.vs))
+        q2 = quatarray.fromMat(mats)
+        for t in [0.0, 0.3, 1.0]:
+            sl = qa.slerp(t, qb)
+            for i in range(4):
+                self.assertEqual(sl[i], slerp(t, self.qs[i], self.qs[3-i]))
+        for i in range(4):
+            q = self.qs[i]
+            self.assertEqual(prod[i], q*self.qs[3-i])
+            self.assertEqual(mats[i], q.toMat4())
+            self.assertEqual(inv[i], q.inverse())
+            self.assertEqual(conj[i], q.conjugate())
+            self.assertEqual(rot[i], q.rotateVec(self.vs[i]))
+            self.assertEqual(q2[i], quat().fromMat(q.toMat4()))
+
+        # Matrices where the trace is negative
+        qs = [quat(math.pi, vec3(1,0,0)), quat(math.pi, vec3(0,1,0)), quat(math.pi, vec3(0,0,1))]
+        q2 = quatarray.fromMat(quatarray(qs).toMat4())
+        for i in range(3):
+            self.assertEqual(q2[i], quat().fromMat(qs[i].toMat4()))
+
+    def testNumPyScalars(self):
+        if not numpy_available:
+            return
+        a = vec3array(self.vs)
+        ma = mat4array(self.ms)
+        qa = quatarray(self.qs)
+        for s in [numpy.float64(2), numpy.float32(2), numpy.int32(2), numpy.int64(2)]:
+            for x in [a, ma, qa]:
+                self.assertEqual(x*s, 2*x)
+                self.assertEqual(s*x, 2*x)
+            self.assertEqual(a/s, a/2.0)
+            self.assertEqual(len(vec3array(numpy.int64(3))), 3)
+
+######################################################################
+
+if __name__=="__main__":
+    unittest.main()
@@ -1,6 +1,7 @@
 # Test the BezierCurveGeom class
 
-import unittest
+import unittest, sys
+from cgkit import beziercurvegeom
 from cgkit.beziercurvegeom import *
 from math import *
 from _utils import *    
@@ -80,6 +81,33 @@ class TestBezierCurveGeom(unittest.TestCase):
         crv.pnts.resize(5)
         self.assertEqual(crv.length(), 4.0+2*sqrt(2))
 
+    def testParamAtLength(self):
+        """Check the arc length table."""
+
+        crv = BezierCurveGeom(pnts = [BezierPoint((1,0,0), outtangent=(0.5,0.5,0)),
+                                      BezierPoint((2,0,0)),
+                                      BezierPoint((2,1,0)),
+                                      BezierPoint((1,1,0))],
+                              closed = False)
+        L = crv.length()
+        self.assertEqual(crv.paramAtLength(-1.0), 0.0)
+        self.assertEqual(crv.paramAtLength(L+1.0), 3.0)
+        for i in range(21):
+            s = i*L/20.0
+            t = crv.paramAtLength(s)
+            self.assertAlmostEqual(crv.arcLen(t), s, 2)
+
+        ts = crv.paramsAtLengths([0.0, 0.5*L, L])
+        self.assertAlmostEqual(ts[0], 0.0, 6)
+        self.assertAlmostEqual(ts[1], crv.paramAtLength(0.5*L), 6)
+        self.assertAlmostEqual(ts[2], 3.0, 6)
+
+        # Modifying the curve must invalidate the table
+        crv.pnts[2] = vec3(3,1,0)
+        L2 = crv.length()
+        self.assertTrue(L2>L)
+        self.assertAlmostEqual(crv.arcLen(crv.paramAtLength(0.9*L2)), 0.9*L2, 2)
+
     def testEval(self):
         """Evaluate the curve."""
 
@@ -122,6 +150,40 @@ class TestBezierCurveGeom(unittest.TestCase):
         self.assertEqual(crv.deriv(1.5).normalize(), vec3(0,1,0))
         self.assertEqual(crv.deriv(2.5).normalize(), vec3(-1,0,0))
 
+    def testEvalArray(self):
+        """Evaluate the curve at several parameters at once."""
+
+        if not beziercurvegeom._numpy_available:
+            print >>sys.stderr, "numpy is not available, skipping test"
+            return
+
+        crv = BezierCurveGeom(pnts = [BezierPoint((1,0,0), outtangent=(0.5,0.5,0)),
+                                      BezierPoint((2,0,0), intangent=(0,-0.5,0)),
+                                      BezierPoint((2,1,0)),
+                                      BezierPoint((1,1,0))],
+                              closed = False)
+        ts = [0.0, 0.25, 0.5, 1.0, 1.7, 2.2, 2.9]
+        pnts = crv.evalArray(ts)
+        derivs = crv.derivArray(ts)
+        fpnts, ftangents, fderivs2 = crv.evalFrameArray(ts)
+        self.assertEqual(pnts.shape, (len(ts),3))
+        for i,t in enumerate(ts):
+            p,tangent,d2 = crv.evalFrame(t)
+            self.assertEqual(vec3(tuple(pnts[i])), p)
+            self.assertEqual(vec3(tuple(fpnts[i])), p)
+            self.assertEqual(vec3(tuple(derivs[i])), tangent)
+            self.assertEqual(vec3(tuple(ftangents[i])), tangent)
+            self.assertEqual(vec3(tuple(fderivs2[i])), d2)
+
+        # Out of range parameters are clamped
+        pnts = crv.evalArray([-1.0, 4.0])
+        self.assertEqual(vec3(tuple(pnts[0])), vec3(1,0,0))
+        self.assertEqual(vec3(tuple(pnts[1])), vec3(1,1,0))
+
+        # The control points have to be updated when the curve changes
+        crv.pnts[3] = vec3(0,1,0)
+        self.assertEqual(vec3(tuple(crv.evalArray([3.0])[0])), vec3(0,1,0))
+
     def testVariables_Size(self):
         """Check the size of primitive variables."""
 
@@ -0,0 +1,96 @@
+# Test the bvh module
+
+import unittest, os, os.path
+from cgkit import bvh
+
+bvhdata = """HIERARCHY
+ROOT Hips
+{
+  OFFSET 0.0 0.0 0.0
+  CHANNELS 6 Xposition Yposition Zposition Zrotation Xrotation Yrotation
+  JOINT Chest
+  {
+    OFFSET 0.0 5.0 0.0
+    CHANNELS 3 Zrotation Xrotation Yrotation
+    End Site
+    {
+      OFFSET 0.0 2.0 0.0
+    }
+  }
+  JOINT Leg
+  {
+    OFFSET 1.0 -1.0 0.0
+    CHANNELS 2 Xrotation Yrotation
+    End Site
+    {
+      OFFSET 0.0 -3.0 0.0
+    }
+  }
+}
+MOTION
+Frames: 3
+Frame Time: 0.04
+1 2 3 4 5 6 7 8 9 10 11
+12 13 14 15 16 17 18 19 20 21 22
+23 24 25 26 27 28 29 30 31 32 33
+"""
+
+class FrameReader(bvh.BVHReader):
+    def onHierarchy(self, root):
+        self.root = root
+        self.frames = []
+    def onMotion(self, frames, dt):
+        self.numframes = frames
+        self.dt = dt
+    def onFrame(self, values):
+        self.frames.append(values)
+
+class TestBVH(unittest.TestCase):
+
+    def setUp(self):
+        if not os.path.exists("tmp"):
+            os.mkdir("tmp")
+        self.filename = os.path.join("tmp", "test.bvh")
+        f = open(self.filename, "wt")
+        f.write(bvhdata)
+        f.close()
+
+    def testRead(self):
+        """Check the hierarchy and the frame callbacks."""
+        r = FrameReader(self.filename)
+        r.read()
+        root = r.root
+        self.assertEqual(root.name, "Hips")
+        self.assertEqual([c.name for c in root.children], ["Chest", "Leg"])
+        self.assertEqual([c.channelindex for c in root.children], [6, 9])
+        self.assertEqual(r.numframes, 3)
+        self.assertEqual(r.dt, 0.04)
+        self.assertEqual(r.frames, [range(1,12), range(12,23), range(23,34)])
+        self.assertEqual(type(r.frames[0][0]), float)
+
+    def testMotionData(self):
+        """Check the bulk motion data."""
+        class Reader(bvh.BVHReader):
+            def onMotionData(self, data):
+                self.data = [list(values) for values in data]
+        r = Reader(self.filename)
+        r.read()
+        self.assertEqual(r.data, [range(1,12), range(12,23), range(23,34)])
+
+    def testInvalidMotion(self):
+        """Check that an invalid frame raises an error."""
+        f = open(self.filename, "wt")
+        f.write(bvhdata.replace("12 13 14", "12 13"))
+        f.close()
+        r = FrameReader(self.filename)
+        try:
+            r.read()
+            self.fail("no exception raised")
+        except SyntaxError, e:
+            linenr = bvhdata.split("\n").index("12 13 14 15 16 17 18 19 20 21 22")+1
+            self.assertTrue("line %d:"%linenr in str(e))
+
+######################################################################
+
+if __name__=="__main__":
+    unittest.main()
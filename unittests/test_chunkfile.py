@@ -0,0 +1,64 @@
+# Test the chunkfile module
+
+import unittest, os, os.path, array, pickle
+from cgkit import chunkfile
+
+class Spam:
+    def __init__(self, x):
+        self.x = x
+
+class Exploit(object):
+    """Object that calls a function when it is unpickled."""
+    def __reduce__(self):
+        return (os.remove, ("tmp/spam.txt",))
+
+class TestChunkFile(unittest.TestCase):
+
+    def setUp(self):
+        if not os.path.exists("tmp"):
+            os.mkdir("tmp")
+
+    def testReadWrite(self):
+        """Check writing and reading chunks."""
+        f = open("tmp/chunks.bin", "wb")
+        chunkfile.writeChunk(f, "SPAM", "abc")
+        chunkfile.writeBufferChunk(f, array.array("d", [1.5, 2.5, 3.5]))
+        chunkfile.writeBufferChunk(f, array.array("i", [1, 2, 3]))
+        chunkfile.writeChunk(f, "EGGS", "")
+        f.close()
+        self.assertEqual(os.path.getsize("tmp/chunks.bin"), 24+48+40+16)
+
+        f = open("tmp/chunks.bin", "rb")
+        self.assertEqual(chunkfile.readChunkHeader(f), ("SPAM", 3))
+        self.assertEqual(f.read(3), "abc")
+        chunkfile.skipPadding(f, 3)
+        tag,size = chunkfile.readChunkHeader(f)
+        self.assertEqual((tag,size), ("BUFF", 32))
+        buf = chunkfile.readBufferChunk(f, size)
+        self.assertEqual(buf, array.array("d", [1.5, 2.5, 3.5]))
+        chunkfile.skipPadding(f, size)
+        tag,size = chunkfile.readChunkHeader(f)
+        self.assertEqual((tag,size), ("BUFF", 20))
+        buf = chunkfile.readBufferChunk(f, size)
+        self.assertEqual(buf, array.array("i", [1, 2, 3]))
+        chunkfile.skipPadding(f, size)
+        self.assertEqual(chunkfile.readChunkHeader(f), ("EGGS", 0))
+        self.assertEqual(chunkfile.readChunkHeader(f), (None, None))
+        f.close()
+
+    def testLoadPickle(self):
+        """Check that only the given classes can be unpickled."""
+        value = [1, 2.5, "spam", (None, True), {"a":set([1])}, array.array("i", [1,2]), Spam(3)]
+        for protocol in range(pickle.HIGHEST_PROTOCOL+1):
+            data = pickle.dumps(value, protocol)
+            self.assertRaises(pickle.UnpicklingError, lambda: chunkfile.loadPickle(data))
+            res = chunkfile.loadPickle(data, [Spam])
+            self.assertEqual(res[:-1], value[:-1])
+            self.assertEqual(res[-1].x, 3)
+            data = pickle.dumps(Exploit(), protocol)
+            self.assertRaises(pickle.UnpicklingError, lambda: chunkfile.loadPickle(data, [Spam]))
+
+######################################################################
+
+if __name__=="__main__":
+    unittest.main()
@@ -95,6 +95,48 @@ class TestEventManager(unittest.TestCase):
         em.event("Remove")
         self.assertEqual([("spam",0),("other",)], rec.called)
 
+    def testSystemReceivers(self):
+        """Check that system wide receivers are called first and can consume events."""
+        em = EventManager()
+        rec = Receiver()
+        em.connect("Spam", rec)
+        em.connect("Spam", rec.otherCallback, priority=20, system=True)
+        em.event("Spam")
+        self.assertEqual([("other",), ("spam",0)], rec.called)
+
+        rec.called = []
+        consume = lambda arg=0: True
+        em.connect("Spam", consume, priority=30, system=True)
+        self.assertEqual(True, em.event("Spam"))
+        self.assertEqual([("other",)], rec.called)
+        em.disconnect("Spam", consume, system=True)
+
+        # Clearing the scene wide connections keeps the system receivers
+        rec.called = []
+        em.disconnectAll()
+        self.assertEqual(False, em.event("Spam"))
+        self.assertEqual([("other",)], rec.called)
+
+        # Clearing the system wide connections removes the rest
+        rec.called = []
+        em.disconnectAll(system=True)
+        self.assertEqual(False, em.event("Spam"))
+        self.assertEqual([], rec.called)
+
+    def testQueue(self):
+        """Check posting events."""
+        em = EventManager()
+        rec = Receiver()
+        em.connect("Spam", rec)
+        em.connect("Eggs", rec)
+        em.postEvent("Spam", 1)
+        em.postEvent("Eggs", 2, arg2=3)
+        em.postEvent("Spam")
+        self.assertEqual([], rec.called)
+        self.assertEqual(3, em.processEvents())
+        self.assertEqual([("spam",1), ("eggs",2,3), ("spam",0)], rec.called)
+        self.assertEqual(0, em.processEvents())
+
 ######################################################################
 
 if __name__=="__main__":
@@ -0,0 +1,28 @@
+# Test the Expression component
+
+import unittest
+from cgkit.all import *
+
+class TestExpression(unittest.TestCase):
+
+    def testEvaluation(self):
+        """Check evaluating and modifying an expression."""
+        e = Expression("a+2*b", a=1.0, b=2.0)
+        self.assertEqual(e.exprtype, "float")
+        self.assertEqual(e.output, 5.0)
+        e.a = 3.0
+        self.assertEqual(e.output, 7.0)
+        self.assertEqual(e.outProc(), 7.0)
+        e.expr = "a*b"
+        self.assertEqual(e.outProc(), 6.0)
+
+    def testVec3(self):
+        """Check an expression with a vec3 result."""
+        e = Expression("v*s", v=vec3(1,2,3), s=2.0)
+        self.assertEqual(e.exprtype, "vec3")
+        self.assertEqual(e.output, vec3(2,4,6))
+
+######################################################################
+
+if __name__=="__main__":
+    unittest.main()
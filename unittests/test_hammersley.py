@@ -0,0 +1,70 @@
+# Test the hammersley module
+
+import unittest, sys
+from cgkit import hammersley
+from cgkit.cgtypes import *
+
+class TestHammersley(unittest.TestCase):
+
+    def testArrays(self):
+        """Compare the array versions with the generators."""
+        if not hammersley._numpy_available:
+            print >>sys.stderr, "numpy is not available, skipping test"
+            return
+
+        for n in [1, 2, 7, 100]:
+            a = hammersley.planeHammersleyArray(n)
+            self.assertEqual(a.shape, (n,2))
+            self.assertEqual(map(tuple, a), list(hammersley.planeHammersley(n)))
+
+            a = hammersley.sphereHammersleyArray(n)
+            self.assertEqual(a.shape, (n,3))
+            for p,v in zip(a, hammersley.sphereHammersley(n)):
+                self.assertEqual(vec3(tuple(p)), v)
+
+            # (the generators yield n-1 points)
+            for p2 in [3, 5]:
+                a = hammersley.planeHaltonArray(n, p2)
+                self.assertEqual(a.shape, (n,2))
+                self.assertEqual(map(tuple, a), list(hammersley.planeHalton(n+1, p2)))
+
+                a = hammersley.sphereHaltonArray(n, p2)
+                self.assertEqual(a.shape, (n,3))
+                for p,v in zip(a, hammersley.sphereHalton(n+1, p2)):
+                    self.assertEqual(vec3(tuple(p)), v)
+
+    def testCache(self):
+        """Check the cache."""
+        if not hammersley._numpy_available:
+            print >>sys.stderr, "numpy is not available, skipping test"
+            return
+
+        hammersley.clearCache()
+        a = hammersley.sphereHaltonArray(50)
+        self.assertTrue(hammersley.sphereHaltonArray(50) is a)
+        self.assertTrue(hammersley.sphereHaltonArray(50, 5) is not a)
+        self.assertTrue(hammersley.sphereHammersleyArray(50) is not a)
+        # The arrays are read-only
+        self.assertRaises((ValueError, RuntimeError), lambda: a.__setitem__(0, 1.0))
+
+        # Fill the cache so that the first array gets removed
+        for n in range(hammersley._cachesize):
+            hammersley.planeHammersleyArray(n)
+        self.assertTrue(hammersley.sphereHaltonArray(50) is not a)
+        self.assertTrue(len(hammersley._cache)<=hammersley._cachesize)
+
+    def testRadicalInverse(self):
+        """Check the radical inverse."""
+        if not hammersley._numpy_available:
+            print >>sys.stderr, "numpy is not available, skipping test"
+            return
+
+        self.assertEqual(list(hammersley.radicalInverse(6)),
+                         [0.0, 0.5, 0.25, 0.75, 0.125, 0.625])
+        self.assertEqual(list(hammersley.radicalInverse(4, 3)),
+                         [0.0, 1.0/3, 2.0/3, 1.0/9])
+
+######################################################################
+
+if __name__=="__main__":
+    unittest.main()
@@ -41,6 +41,25 @@ class TestMAImport(unittest.TestCase):
         
         setEpsilon(eps)
 
+    def testSelectiveMAImport(self):
+
+        scene = getScene()
+        scene.clear()
+
+        # Load the box only...
+        load("data/objects.ma", nodes=["pCube1"])
+
+        self.assertEqual(len(list(scene.walkWorld())), 1)
+        obj = worldObject("pCube1")
+        self.assertEqual(type(obj), Box)
+        self.assertEqual(obj.geom.lx, 2.0)
+
+        scene.clear()
+
+        # Load all meshes that are not created by a creator node...
+        load("data/objects.ma", nodetypes=["mesh"])
+        self.assertEqual(len(list(scene.walkWorld())), 2)
+
 
 ######################################################################
 
@@ -66,6 +66,9 @@ class TestMat3_light(unittest.TestCase):
         self.assertTrue(M!=N, "mat3!=mat3 (2) falsch")
         self.assertFalse(M==N, "mat3==mat3 (2) falsch")
 
+        # Equal objects must not hash differently
+        self.assertRaises(TypeError, lambda: hash(M))
+
     ######################################################################
     def testAdd(self):
         M = mat3(1,2,3,4,5,6,7,8,9)
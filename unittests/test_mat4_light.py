@@ -67,6 +67,9 @@ class TestMat4_light(unittest.TestCase):
         self.assertTrue(M!=N, "mat4!=mat4 (2) falsch")
         self.assertFalse(M==N, "mat4==mat4 (2) falsch")
 
+        # Equal objects must not hash differently
+        self.assertRaises(TypeError, lambda: hash(M))
+
     ######################################################################
     def testAdd(self):
         M = mat4(1,2,3,4,5,6,7,8,9,10,11,12,13,14,15,16)
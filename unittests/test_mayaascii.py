@@ -23,6 +23,44 @@ class TestMayaAscii(unittest.TestCase):
         t = rd.nodelist[0]
 #        print t.getAttrValue("t", "t", "double3")
 
+    def testDependencyClosure(self):
+        """Check the dependency closure and the selective attribute reading.
+        """
+        rd = mayaascii.DefaultMAReader()
+        rd.read("data/objects.ma", attrnodes=set())
+        for node in rd.nodelist:
+            self.assertEqual(node._setattr, {})
+        res = rd.dependencyClosure(["pCube1"])
+        self.assertEqual(res, set(["|pCube1", "|pCube1|pCubeShape1", "|polyCube1"]))
+        res = rd.dependencyClosure(["mesh*"])
+        self.assertEqual(res, set(["|mesh", "|mesh|meshShape"]))
+        res = rd.dependencyClosure(nodetypes=["polyCube"])
+        self.assertEqual(res, set(["|polyCube1"]))
+        self.assertEqual(rd.dependencyClosure(), set())
+
+        rd = mayaascii.DefaultMAReader()
+        rd.read("data/objects.ma", attrnodes=res)
+        for node in rd.nodelist:
+            if node.getFullName() in res:
+                self.assertNotEqual(node._setattr, {})
+            else:
+                self.assertEqual(node._setattr, {})
+        self.assertEqual(rd.findNode("polyCube1").getAttrValue("height", "h", "float", 1, 1.0), 2.0)
+        self.assertEqual(rd.findNode("meshShape").getAttrValue("vrts", "vt", "float3", None, []), [])
+
+    def testMAReader_findCommandEnd(self):
+        """Test the MAReader.findCommandEnd() method.
+        """
+
+        rd = mayaascii.MAReader()
+        self.assertEqual(rd.findCommandEnd(''), -1)
+        self.assertEqual(rd.findCommandEnd(' 0.5 0.5 0.5'), -1)
+        self.assertEqual(rd.findCommandEnd(' 0.5 0.5 0.5;'), 12)
+        self.assertEqual(rd.findCommandEnd('setAttr -k off ".v";'), 19)
+        self.assertEqual(rd.findCommandEnd('setAttr "a;b" ".v";'), 18)
+        self.assertEqual(rd.findCommandEnd('setAttr "a;b'), -1)
+        self.assertEqual(rd.findCommandEnd('setAttr -k off ".v";select -ne :defaultShaderList1;'), 19)
+
     def testRelationshipCmd(self):
         """Check that the 'relationship' command gets processed.
         """
@@ -101,6 +101,45 @@ class TestMediaFile(unittest.TestCase):
         
         vid.close()
     
+    def testVideoReader(self):
+        """Test reading video frames with the prefetching reader.
+        """
+        vid = mediafile.open("data/video1.mp4")
+        reader = vid.videoReader(numBuffers=3)
+
+        # Read all frames
+        numFrames = 0
+        for i,frame in enumerate(reader):
+            numFrames += 1
+            self.assertEqual(i, frame.frameIndex)
+            self.assertEqual((320,240,3), frame.array.shape)
+            self.assertColor((255,0,0), self.readPixel(frame.array, (8+i*16,40)))
+            frame.release()
+            self.assertEqual(None, frame.array)
+        self.assertEqual(20, numFrames)
+
+        # Seek back and hold on to all frames
+        reader.seek(2)
+        frames = [reader.nextFrame() for i in range(3)]
+        self.assertEqual([2,3,4], [frame.frameIndex for frame in frames])
+        self.assertRaises(mediafile.MediaFileError, lambda: reader.nextFrame())
+        # The held frames must not be overwritten by a seek
+        frames[0].release()
+        reader.seek(13)
+        frame = reader.nextFrame()
+        self.assertEqual(13, frame.frameIndex)
+        self.assertColor((255,0,0), self.readPixel(frame.array, (8+13*16,40)))
+        self.assertColor((255,0,0), self.readPixel(frames[1].array, (8+3*16,40)))
+        frame.release()
+        reader.seek(25)
+        self.assertEqual(None, reader.nextFrame())
+
+        # iterData() can't be used while the reader is open
+        self.assertRaises(mediafile.MediaFileError, lambda: list(vid.iterData()))
+        reader.close()
+        self.assertRaises(ValueError, lambda: vid.videoReader(numBuffers=0))
+        vid.close()
+
     def testVideoProperties(self):
         """Test reading a video file and examining its properties.
         """
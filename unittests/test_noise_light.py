@@ -0,0 +1,151 @@
+# Test the noise functions of the light version
+
+import unittest, sys
+from cgkit.light import noise
+from cgkit.light.cgtypes import vec3, vec4
+
+# Reference values computed with the C++ version (supportlib/src/noise.cpp)
+# at the point (0.3, 1.7, -2.2, 0.9)
+_P = (0.3, 1.7, -2.2, 0.9)
+_REF = {
+    "snoise2" : -0.10813517980685328,
+    "snoise3" : 0.1652084073659347,
+    "snoise4" : 0.19734999431998346,
+    "cellnoise" : 0.46976624211731099,
+    "spnoise3" : -0.16071152077982442,
+    "vsnoise4" : (0.19734999431998346, 0.16548514867666209, -0.10160568761698663, 0.066924970273062767),
+    "vspnoise3" : (0.016503213674701339, -0.14146134909297053, -0.13196853003638598),
+    "vcellnoise4" : (0.46976624211731099, 0.1643514573184861, 0.653363749982804, 0.81310460392766459),
+    "fBm" : 0.63207908348755648,
+    "turbulence" : 0.67335022690618662,
+    "vfBm" : (0.63207908348755648, 0.2999336604448285, 0.51074108566921339),
+}
+
+class TestNoise_light(unittest.TestCase):
+
+    def testReference(self):
+        """Compare the noise values with the C++ version."""
+        x,y,z,t = _P
+        self.assertAlmostEqual(noise.snoise(x,y), _REF["snoise2"], 12)
+        self.assertAlmostEqual(noise.snoise(x,y,z), _REF["snoise3"], 12)
+        self.assertAlmostEqual(noise.snoise(vec3(x,y,z)), _REF["snoise3"], 12)
+        self.assertAlmostEqual(noise.snoise(x,y,z,t), _REF["snoise4"], 12)
+        self.assertAlmostEqual(noise.snoise(vec3(x,y,z),t), _REF["snoise4"], 12)
+        self.assertAlmostEqual(noise.noise(x,y,z), 0.5*(_REF["snoise3"]+1), 12)
+        self.assertAlmostEqual(noise.cellnoise(x,y,z,t), _REF["cellnoise"], 12)
+        self.assertAlmostEqual(noise.spnoise((x,y,z),(3,5,-4)), _REF["spnoise3"], 12)
+        self.assertAlmostEqual(noise.fBm((x,y,z),5), _REF["fBm"], 12)
+        self.assertAlmostEqual(noise.turbulence((x,y,z),4,2.1,0.6), _REF["turbulence"], 12)
+        self.assertEqual(noise.vsnoise(x,y,z,t), vec4(_REF["vsnoise4"]))
+        self.assertEqual(noise.vspnoise((x,y,z),(3,5,4)), vec3(_REF["vspnoise3"]))
+        self.assertEqual(noise.vcellnoise(x,y,z,t), vec4(_REF["vcellnoise4"]))
+        self.assertEqual(noise.vfBm((x,y,z),5), vec3(_REF["vfBm"]))
+
+    def testArgs(self):
+        """Check the argument variants."""
+        self.assertEqual(noise.noise(0.3), noise.noise(0.3, 0.0))
+        self.assertEqual(noise.noise((0.3,0.7)), noise.noise(0.3, 0.7))
+        self.assertEqual(noise.noise(2,3,4), 0.5)
+        self.assertEqual(noise.cellnoise(0.3), noise.cellnoise(0.3,0,0,0))
+        # vnoise() returns a vector with the dimension of the input
+        self.assertEqual(type(noise.vnoise(0.3)), float)
+        self.assertEqual(len(noise.vnoise(0.3, 0.5)), 2)
+        self.assertEqual(type(noise.vnoise(0.3, 0.5, 0.2)), vec3)
+        self.assertEqual(type(noise.vnoise(0.3, 0.5, 0.2, 0.1)), vec4)
+        v = noise.vnoise(0.3, 0.5, 0.2, 0.1)
+        self.assertEqual(noise.vnoise(vec3(0.3, 0.5, 0.2), 0.1), vec3(v.x, v.y, v.z))
+        self.assertRaises(TypeError, lambda: noise.noise(1,2,3,4,5))
+        self.assertRaises(ValueError, lambda: noise.pnoise((1,2),(0,1)))
+        self.assertRaises(ValueError, lambda: noise.pnoise((1,2),(1,)))
+        self.assertRaises(TypeError, lambda: noise.pnoise((1,2),(1,2),3))
+
+    def testPeriodic(self):
+        """Check the period of pnoise."""
+        for x,y,z in [(0.3,0.1,1.9), (-2.7,5.4,0.2)]:
+            self.assertAlmostEqual(noise.pnoise((x,y,z),(2,3,4)),
+                                   noise.pnoise((x+2,y-3,z+8),(2,3,4)), 12)
+            self.assertAlmostEqual(noise.pnoise((x,y),z,(2,3),4),
+                                   noise.pnoise((x,y+3),z+4,(2,3),4), 12)
+            self.assertEqual(noise.vpnoise((x,y,z),(2,3,4)),
+                             noise.vpnoise((x-4,y+3,z),(2,3,4)))
+
+    def testArrays(self):
+        """Check the array versions."""
+        try:
+            import numpy
+        except ImportError:
+            print >>sys.stderr, "numpy is not available, skipping test"
+            return
+
+        pnts = numpy.array([(0.3,1.7,-2.2,0.9), (-5.25,3.5,7.125,-1.75),
+                            (12.7,-0.01,0.49,3.3)])
+        xs,ys,zs,ts = pnts.T
+
+        # Point arrays
+        res = noise.noise(pnts[:,:3])
+        self.assertEqual(res.shape, (3,))
+        for i,p in enumerate(pnts):
+            self.assertEqual(res[i], noise.noise(p[0], p[1], p[2]))
+        res = noise.snoise(pnts[:,:3], ts)
+        for i,p in enumerate(pnts):
+            self.assertEqual(res[i], noise.snoise(*p))
+        res = noise.vsnoise(pnts)
+        self.assertEqual(res.shape, (3,4))
+        for i,p in enumerate(pnts):
+            self.assertEqual(vec4(tuple(res[i])), noise.vsnoise(*p))
+        res = noise.spnoise(pnts[:,:3], (3,5,-4))
+        for i,p in enumerate(pnts):
+            self.assertEqual(res[i], noise.spnoise(tuple(p[:3]), (3,5,-4)))
+        res = noise.vfBm(pnts[:,:3], 4)
+        self.assertEqual(res.shape, (3,3))
+        for i,p in enumerate(pnts):
+            self.assertEqual(vec3(tuple(res[i])), noise.vfBm(tuple(p[:3]), 4))
+        res = noise.cellnoise(pnts)
+        for i,p in enumerate(pnts):
+            self.assertEqual(res[i], noise.cellnoise(*p))
+
+        # Coordinate arrays (grid)
+        X,Y = numpy.meshgrid(xs, ys)
+        res = noise.noise(X, Y, 0.5)
+        self.assertEqual(res.shape, X.shape)
+        for i in range(3):
+            for j in range(3):
+                self.assertEqual(res[i,j], noise.noise(X[i,j], Y[i,j], 0.5))
+        res = noise.vnoise(X, Y)
+        self.assertEqual(res.shape, X.shape+(2,))
+        self.assertEqual(tuple(res[1,2]), noise.vnoise(X[1,2], Y[1,2]))
+        res = noise.noise(xs)
+        self.assertEqual(res.shape, (3,))
+        self.assertEqual(res[1], noise.noise(xs[1]))
+
+    def testBatch(self):
+        """Check the batch functions."""
+        try:
+            import numpy
+        except ImportError:
+            print >>sys.stderr, "numpy is not available, skipping test"
+            return
+
+        pnts = numpy.array([(0.3,1.7,-2.2), (-5.25,3.5,7.125), (12.7,-0.01,0.49)])
+        out = numpy.zeros(3)
+        noise.noiseArray(pnts, out)
+        for i,p in enumerate(pnts):
+            self.assertEqual(out[i], noise.noise(tuple(p)))
+        noise.pnoiseArray(pnts[:,:2], (3,5), out)
+        for i,p in enumerate(pnts):
+            self.assertEqual(out[i], noise.pnoise(tuple(p[:2]), (3,5)))
+        noise.snoiseArray(pnts[:,0], out, 1)
+        for i,p in enumerate(pnts):
+            self.assertEqual(out[i], noise.snoise(p[0]))
+        vout = numpy.zeros((3,3))
+        noise.vturbulenceArray(pnts, vout, 3)
+        for i,p in enumerate(pnts):
+            self.assertEqual(vec3(tuple(vout[i])), noise.vturbulence(tuple(p), 3))
+        self.assertRaises(ValueError, lambda: noise.noiseArray(pnts, numpy.zeros(2)))
+        self.assertRaises(ValueError, lambda: noise.noiseArray(pnts, out, 2))
+        self.assertRaises(ValueError, lambda: noise.noiseArray(pnts, out, 5))
+
+######################################################################
+
+if __name__=="__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+# Test the odedynamics module (without PyODE)
+
+import unittest
+from cgkit.all import *
+
+class FakeBody:
+    """Body without ODE body (the world object values are recorded)."""
+
+    def __init__(self, obj):
+        self.obj = obj
+        self.odebody = None
+
+class FakeDynamics:
+    """Dynamics component that moves its objects by 1 along x per frame."""
+
+    def __init__(self, objs):
+        self.enabled = True
+        self.bodies = map(FakeBody, objs)
+        self.timings = {"collision":0.0, "step":0.0, "sync":0.0}
+        self.steps = []
+        self.updates = 0
+        self.x = 0
+
+    def stepFrame(self, dt, substeps=None):
+        self.steps.append((dt, substeps))
+        self.x += 1
+
+    def updateObjs(self):
+        self.updates += 1
+        for body in self.bodies:
+            body.obj.pos = vec3(self.x, 0, 0)
+
+class TestODESimulationRunner(unittest.TestCase):
+
+    def setUp(self):
+        getScene().clear()
+        timer = getScene().timer()
+        timer.fps = 10
+        timer.time = 0.0
+
+    def testRun(self):
+        """Check frame counting, output frames and recording."""
+        timer = getScene().timer()
+        dyn = FakeDynamics([WorldObject(name="A"), WorldObject(name="B")])
+        runner = ODESimulationRunner(dyn, substeps=4, output_every=2, record=True)
+        runner.run(5)
+        self.assertEqual(5, runner.frame)
+        self.assertEqual(5*[(timer.timestep, 4)], dyn.steps)
+        # Only the output frames update the objects and the timer
+        self.assertEqual(2, dyn.updates)
+        self.assertAlmostEqual(0.4, timer.time)
+        self.assertEqual(2, len(runner.times))
+        self.assertAlmostEqual(0.2, runner.times[0])
+        self.assertAlmostEqual(0.4, runner.times[1])
+        self.assertEqual(["A", "B"], map(lambda obj: obj.name, runner.objects))
+        self.assertEqual([vec3(2,0,0), vec3(4,0,0)], runner.getTrajectory("B"))
+        self.assertEqual((2,2,3), runner.getPositions().shape)
+        self.assertEqual((2,2,4), runner.getOrientations().shape)
+
+        # Continue the run
+        runner.run(1)
+        self.assertEqual(6, runner.frame)
+        self.assertEqual([vec3(2,0,0), vec3(4,0,0), vec3(6,0,0)], runner.getTrajectory("A"))
+
+    def testDisabled(self):
+        """Check that a disabled dynamics component is not advanced."""
+        timer = getScene().timer()
+        dyn = FakeDynamics([WorldObject(name="A")])
+        runner = ODESimulationRunner(dyn, record=True)
+        runner.run(2)
+        dyn.enabled = False
+        runner.run(3)
+        self.assertEqual(5, runner.frame)
+        self.assertEqual(2, len(dyn.steps))
+        self.assertEqual(2, dyn.updates)
+        self.assertAlmostEqual(0.5, timer.time)
+        self.assertEqual([vec3(1,0,0), vec3(2,0,0)]+3*[vec3(2,0,0)], runner.getTrajectory("A"))
+
+    def testAdvanceTimer(self):
+        """Check the advance_timer and output_every arguments."""
+        timer = getScene().timer()
+        dyn = FakeDynamics([])
+        runner = ODESimulationRunner(dyn, advance_timer=False)
+        runner.run(3)
+        self.assertEqual(0.0, timer.time)
+        self.assertEqual(3, dyn.updates)
+        self.assertEqual(3*[(timer.timestep, None)], dyn.steps)
+        self.assertEqual([], runner.times)
+        self.assertRaises(ValueError, lambda: ODESimulationRunner(dyn, output_every=0))
+
+######################################################################
+
+if __name__=="__main__":
+    unittest.main()
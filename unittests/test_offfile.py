@@ -0,0 +1,112 @@
+# Test the OFF import/export plugins (numpy and line-by-line code)
+
+import unittest, os, os.path
+from cgkit.all import *
+from cgkit import offimport, offexport
+
+class TestOffFile(unittest.TestCase):
+
+    def setUp(self):
+        if not os.path.exists("tmp"):
+            os.mkdir("tmp")
+        getScene().clear()
+        self.numpy_available = (offimport._numpy_available, offexport._numpy_available)
+
+    def tearDown(self):
+        offimport._numpy_available, offexport._numpy_available = self.numpy_available
+
+    def setNumPy(self, flag):
+        """Switch between the numpy and the line-by-line code."""
+        offimport._numpy_available = flag
+        offexport._numpy_available = flag
+
+    def createScene(self):
+        """Create a triangle mesh with primitive variables and a polyhedron."""
+        tm = TriMesh(name="tm", pos=(1,2,3),
+                     verts=[(0,0,0), (1,0,0), (0,1,0), (1,1,0)],
+                     faces=[(0,1,2), (1,3,2)])
+        g = tm.geom
+        g.newVariable("N", VARYING, NORMAL)
+        g.newVariable("Cs", VARYING, COLOR)
+        g.newVariable("st", VARYING, FLOAT, 2)
+        for i in range(4):
+            g.slot("N")[i] = vec3(0,i,2)
+            g.slot("Cs")[i] = vec3(0.1*i, 0.2, 0.3)
+            g.slot("st")[i] = (i, 0.5*i)
+        p = Polyhedron(name="poly",
+                       verts=[(0,0,1), (1,0,1), (1,1,1), (0,1,1)],
+                       polys=[[(0,1,2,3)]])
+        return tm, p
+
+    def geomValues(self, geom):
+        """Return the vertices, faces and variables of a geom as lists."""
+        res = [list(geom.verts)]
+        if isinstance(geom, TriMeshGeom):
+            res.append(list(geom.faces))
+        else:
+            res.append([map(list, geom.getPoly(i)) for i in range(geom.getNumPolys())])
+        for name, storage, type, mult in geom.iterVariables():
+            res.append((name, storage, type, mult, list(geom.slot(name))))
+        return res
+
+    def importFile(self, name, invertfaces=False):
+        """Import a file and return the geom values."""
+        getScene().clear()
+        offimport.OffImporter().importFile(name, invertfaces=invertfaces)
+        objs = list(getScene().walkWorld())
+        self.assertEqual(len(objs), 1)
+        return self.geomValues(objs[0].geom)
+
+    def testExport(self):
+        """Check that the numpy code writes the same file."""
+        tm, p = self.createScene()
+        files = []
+        for flag in [False, True]:
+            self.setNumPy(flag)
+            name = os.path.join("tmp", "offexport_%s.off"%flag)
+            offexport.OffExporter().exportFile(name)
+            files.append(open(name).read())
+        self.assertEqual(files[0], files[1])
+        lines = files[0].split("\n")
+        self.assertEqual(lines[0], "STCNOFF")
+        self.assertEqual(lines[1], "8 3 0")
+        self.assertEqual(lines[3].split(), ["2.000000", "2.000000", "3.000000",
+                                            "0.000000", "0.447214", "0.894427",
+                                            "0.100000", "0.200000", "0.300000",
+                                            "1.000000", "0.500000"])
+        self.assertEqual(lines[10:13], ["3 0 1 2", "3 1 3 2", "4  4 5 6 7"])
+
+    def testImport(self):
+        """Check that the numpy code reads the same geoms."""
+        tm, p = self.createScene()
+        triname = os.path.join("tmp", "offimport_tri.off")
+        offexport.OffExporter().exportFile(triname, tm)
+        allname = os.path.join("tmp", "offimport_all.off")
+        offexport.OffExporter().exportFile(allname)
+
+        for name in [triname, allname]:
+            for invertfaces in [False, True]:
+                res = []
+                for flag in [False, True]:
+                    self.setNumPy(flag)
+                    res.append(self.importFile(name, invertfaces))
+                self.assertEqual(res[0], res[1])
+
+        # Check the values of the triangle mesh
+        verts, faces, N, Cs, st = self.importFile(triname)
+        self.assertEqual(verts, [vec3(1,2,3), vec3(2,2,3), vec3(1,3,3), vec3(2,3,3)])
+        self.assertEqual(faces, [(0,1,2), (1,3,2)])
+        self.assertEqual(N[0], "N")
+        self.assertEqual(Cs[0], "Cs")
+        self.assertEqual(st[:4], ("st", VARYING, FLOAT, 2))
+        self.assertEqual(st[4], [(0,0), (1,0.5), (2,1), (3,1.5)])
+
+        # The quad turns the mesh into a polyhedron
+        verts, polys = self.importFile(allname)[:2]
+        self.assertEqual(len(verts), 8)
+        self.assertEqual(polys, [[[0,1,2]], [[1,3,2]], [[4,5,6,7]]])
+
+######################################################################
+
+if __name__=="__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+# Test the plyfile module
+
+import unittest, os, os.path
+import numpy
+from cgkit import plyfile
+
+class TestPLYFile(unittest.TestCase):
+
+    def setUp(self):
+        if not os.path.exists("tmp"):
+            os.mkdir("tmp")
+
+    def writeFile(self, name, mode):
+        """Write a test file with varying list lengths."""
+        w = plyfile.PLYWriter()
+        w.create(name, mode)
+        w.addComment("cgkit test")
+        w.addElement("vertex", 5, [("x", "float32"), ("y", "float64"), ("id", "int16")])
+        w.addElement("face", 4, [("vertex_indices", "list", "uchar", "uint32"), ("mat", "uint8")])
+        x = numpy.arange(5)*1.5
+        w.writeElement("vertex", {"x":x, "y":-x, "id":numpy.arange(5)})
+        # The faces are written in two blocks (triangles and quad+triangle)
+        w.writeElement("face", {"vertex_indices":(numpy.array([0,3,6]), numpy.array([0,1,2, 1,2,3])),
+                                "mat":numpy.array([1,2])})
+        w.writeElement("face", {"vertex_indices":(numpy.array([0,4,7]), numpy.array([0,1,2,3, 2,3,4])),
+                                "mat":numpy.array([3,4])})
+        w.close()
+
+    def readFile(self, name, blocksize):
+        """Read a file and return the concatenated element data."""
+        r = plyfile.PLYReader()
+        r.open(name)
+        elements, comment, objinfo = r.readHeader()
+        self.assertEqual(comment, "cgkit test")
+        self.assertEqual(objinfo, "")
+        self.assertEqual([(elname, n) for elname,n,props in elements], [("vertex",5), ("face",4)])
+        self.assertEqual(elements[1][2][0], ("vertex_indices", "list", "uchar", "uint32"))
+        res = {}
+        for el, start, data in r.readElements(blocksize):
+            for key, value in data.items():
+                if isinstance(value, tuple):
+                    offsets, values = value
+                    value = [list(values[offsets[i]:offsets[i+1]]) for i in range(len(offsets)-1)]
+                else:
+                    value = list(value)
+                res.setdefault((el.name, key), []).extend(value)
+        r.close()
+        return res
+
+    def testReadWrite(self):
+        """Check writing and reading all formats."""
+        for mode in ["ascii", "little_endian", "big_endian"]:
+            name = os.path.join("tmp", "plyfile_%s.ply"%mode)
+            self.writeFile(name, mode)
+            for blocksize in [2, 3, 1000]:
+                res = self.readFile(name, blocksize)
+                self.assertEqual(res[("vertex","x")], [0, 1.5, 3, 4.5, 6])
+                self.assertEqual(res[("vertex","y")], [0, -1.5, -3, -4.5, -6])
+                self.assertEqual(res[("vertex","id")], range(5))
+                self.assertEqual(res[("face","vertex_indices")],
+                                 [[0,1,2], [1,2,3], [0,1,2,3], [2,3,4]])
+                self.assertEqual(res[("face","mat")], [1,2,3,4])
+
+    def testMixedLists(self):
+        """Check binary faces with alternating list lengths."""
+        n = 300
+        lengths = numpy.tile([3,4], n//2)
+        lengths[100:200] = 3
+        offsets = numpy.zeros(n+1, numpy.int32)
+        offsets[1:] = numpy.cumsum(lengths)
+        values = numpy.arange(offsets[-1])
+        for mode in ["little_endian", "big_endian"]:
+            name = os.path.join("tmp", "plyfile_mixed_%s.ply"%mode)
+            w = plyfile.PLYWriter()
+            w.create(name, mode)
+            w.addElement("face", n, [("vertex_indices", "list", "uchar", "int32"), ("mat", "int16")])
+            w.writeElement("face", {"vertex_indices":(offsets, values), "mat":-numpy.arange(n)})
+            w.close()
+            for blocksize in [7, 150, 1000]:
+                r = plyfile.PLYReader()
+                r.open(name)
+                r.readHeader()
+                for el, start, data in r.readElements(blocksize):
+                    e = min(start+blocksize, n)
+                    offs, vals = data["vertex_indices"]
+                    self.assertEqual(list(offs), list(offsets[start:e+1]-offsets[start]))
+                    self.assertEqual(list(vals), range(offsets[start], offsets[e]))
+                    self.assertEqual(list(data["mat"]), range(-start, -e, -1))
+                self.assertEqual(e, n)
+                r.close()
+
+    def testTruncated(self):
+        """Check that truncated files raise an error."""
+        name = os.path.join("tmp", "plyfile_truncated.ply")
+        self.writeFile(name, "little_endian")
+        s = open(name, "rb").read()
+        open(name, "wb").write(s[:-5])
+        r = plyfile.PLYReader()
+        r.open(name)
+        r.readHeader()
+        self.assertRaises(ValueError, lambda: list(r.readElements()))
+        r.close()
+
+######################################################################
+
+if __name__=="__main__":
+    unittest.main()
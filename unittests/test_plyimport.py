@@ -0,0 +1,113 @@
+# Test the PLY import/export plugins with the pure Python PLY classes
+
+import unittest, os, os.path
+import numpy
+from cgkit.all import *
+from cgkit import plyfile, plyimport, plyexport
+
+class TestPLYImport(unittest.TestCase):
+
+    def setUp(self):
+        if not os.path.exists("tmp"):
+            os.mkdir("tmp")
+        getScene().clear()
+        # Use the plyfile classes even if _core has PLY support
+        self.orig = (plyimport.PLYReader, plyexport.PLYWriter, plyexport.PlyStorageMode)
+        plyimport.PLYReader = plyfile.PLYReader
+        plyexport.PLYWriter = plyfile.PLYWriter
+        plyexport.PlyStorageMode = None
+
+    def tearDown(self):
+        plyimport.PLYReader, plyexport.PLYWriter, plyexport.PlyStorageMode = self.orig
+
+    def createPolyhedron(self):
+        """Create a polyhedron with a triangle and a quad."""
+        p = Polyhedron(name="poly")
+        g = p.geom
+        g.verts.resize(5)
+        for i in range(5):
+            g.verts[i] = vec3(i, 2*i, -i)
+        g.setNumPolys(2)
+        g.setLoop(0, 0, [0,1,2])
+        g.setLoop(1, 0, [1,2,3,4])
+        g.newVariable("N", VARYING, NORMAL)
+        for i in range(5):
+            g.slot("N")[i] = vec3(0,0,i)
+        g.newVariable("w", VARYING, FLOAT)
+        for i in range(5):
+            g.slot("w")[i] = 0.5*i
+        g.newVariable("mat", UNIFORM, INT)
+        g.slot("mat")[0] = 7
+        g.slot("mat")[1] = 8
+        g.newVariable("ids", UNIFORM, INT, 3)
+        g.slot("ids")[0] = (1,2,3)
+        g.slot("ids")[1] = (4,5,6)
+        return p
+
+    def importFile(self, name, **keyargs):
+        """Import a file and return the geom of the new object."""
+        getScene().clear()
+        plyimport.PLYImporter().importFile(name, **keyargs)
+        objs = list(getScene().walkWorld())
+        self.assertEqual(len(objs), 1)
+        return objs[0].geom
+
+    def testFallback(self):
+        """Check exporting and importing with the plyfile classes."""
+        for mode in ["ascii", "little_endian", "big_endian"]:
+            name = os.path.join("tmp", "plyimport_%s.ply"%mode)
+            p = self.createPolyhedron()
+            plyexport.PLYExporter().exportFile(name, p, mode)
+            g = self.importFile(name)
+            self.assertEqual(g.getNumPolys(), 2)
+            self.assertEqual(g.getLoop(0, 0), [0,1,2])
+            self.assertEqual(g.getLoop(1, 0), [1,2,3,4])
+            self.assertEqual(list(g.verts), [vec3(i, 2*i, -i) for i in range(5)])
+            self.assertEqual(list(g.slot("N")), [vec3(0,0,i) for i in range(5)])
+            self.assertEqual(list(g.slot("w")), [0.5*i for i in range(5)])
+            self.assertEqual(list(g.slot("mat")), [7,8])
+            # The list variable keeps its multiplicity
+            self.assertEqual(g.findVariable("ids"), ("ids", UNIFORM, INT, 3))
+            self.assertEqual(list(g.slot("ids")), [(1,2,3), (4,5,6)])
+
+            g = self.importFile(name, excludevar=["w", "N"], invertfaces=True)
+            self.assertEqual(g.getLoop(0, 0), [2,1,0])
+            self.assertEqual(g.findVariable("w"), None)
+            self.assertEqual(g.findVariable("N"), None)
+
+    def testListBlocks(self):
+        """Check list variables that are read in several blocks."""
+        name = os.path.join("tmp", "plyimport_lists.ply")
+        n = 10
+        w = plyfile.PLYWriter()
+        w.create(name, "little_endian")
+        w.addElement("vertex", 4, [("x", "float32"), ("y", "float32"), ("z", "float32")])
+        w.addElement("face", n, [("vertex_indices", "list", "uchar", "int32"),
+                                 ("tag", "list", "uchar", "int16"),
+                                 ("uv", "list", "uchar", "float32")])
+        z = numpy.zeros(4)
+        w.writeElement("vertex", {"x":numpy.arange(4), "y":z, "z":z})
+        k = numpy.arange(n)
+        w.writeElement("face", {"vertex_indices":(numpy.arange(0, 3*n+1, 3), numpy.tile([0,1,2], n)),
+                                "tag":(numpy.arange(n+1), k),
+                                "uv":(numpy.arange(0, 3*n+1, 3), numpy.repeat(k, 3))})
+        w.close()
+
+        r = plyfile.PLYReader()
+        r.open(name)
+        r.readHeader()
+        # Use small blocks so that the lists are spread over several blocks
+        r.readElements = lambda blocksize=3: plyfile.PLYReader.readElements(r, blocksize)
+        g = PolyhedronGeom()
+        r.read(g, [("tag", INT, "face", ("tag",)), ("uv", FLOAT, "face", ("uv",))])
+        r.close()
+        self.assertEqual(g.getNumPolys(), n)
+        self.assertEqual(g.findVariable("tag"), ("tag", UNIFORM, INT, 1))
+        self.assertEqual(list(g.slot("tag")), range(n))
+        self.assertEqual(g.findVariable("uv"), ("uv", UNIFORM, FLOAT, 3))
+        self.assertEqual(list(g.slot("uv")), [(i,i,i) for i in range(n)])
+
+######################################################################
+
+if __name__=="__main__":
+    unittest.main()
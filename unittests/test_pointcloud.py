@@ -12,6 +12,117 @@ except ImportError:
     print("Warning: numpy not available. pointcloud test incomplete.")
     numpy_available = False
 
+class FakePtcLib:
+    """Replacement for a renderer library and the _pointcloud module.
+
+    Provides a point cloud file with npoints points and the variables
+    "float spam" and "color Ci". Point i has the position (i, i+0.5, -i),
+    the normal (0,1,0), the radius 0.25 and the data values i*10+k.
+    """
+
+    PtcPointCloud = ctypes.c_void_p
+
+    def __init__(self, npoints):
+        self.npoints = npoints
+        # The index of the next point
+        self.next = 0
+        # The number of points requested by each readDataPoints() call
+        self.calls = []
+        # Only the address of the read function is used
+        self.PtcReadDataPoint = ctypes.c_int(0)
+        self.PtcOpenPointCloudFile = self._open
+        self.PtcGetPointCloudInfo = lambda handle, name, ptr: self._getInfo(name, ptr)
+        self.PtcClosePointCloudFile = lambda handle: None
+
+    def _open(self, fileName, nvars, types, names):
+        nvars._obj.value = 2
+        types[0], names[0] = "float", "spam"
+        types[1], names[1] = "color", "Ci"
+        return 1
+
+    def _getInfo(self, name, ptr):
+        if name=="npoints":
+            ptr._obj.value = self.npoints
+        elif name=="datasize":
+            ptr._obj.value = 4
+        else:
+            return 0
+        return 1
+
+    def readDataPoints(self, func, handle, n, pntPtr, pntStride, normPtr, normStride, radPtr, radStride, dataPtr, dataStride):
+        self.calls.append(n)
+        for i in range(self.next, self.next+n):
+            j = i-self.next
+            self._write(pntPtr+4*j*pntStride, (i, i+0.5, -i))
+            self._write(normPtr+4*j*normStride, (0, 1, 0))
+            self._write(radPtr+4*j*radStride, (0.25,))
+            self._write(dataPtr+4*j*dataStride, (i*10, i*10+1, i*10+2, i*10+3))
+        self.next += n
+
+    def _write(self, ptr, values):
+        (len(values)*ctypes.c_float).from_address(ptr)[:] = values
+
+class FakePtcReader(pointcloud.PtcReader):
+    _pointBatchSize = 4
+
+    def _loadPtcLib(self, libName):
+        return self.ptclib
+
+class TestPtcReaderBatches(unittest.TestCase):
+    """Test the batched reading of the PtcReader class (using a fake library).
+    """
+
+    def setUp(self):
+        self.ptclib = FakePtcLib(10)
+        FakePtcReader.ptclib = self.ptclib
+        self.origModule = pointcloud._pointcloud
+        pointcloud._pointcloud = self.ptclib
+
+    def tearDown(self):
+        pointcloud._pointcloud = self.origModule
+
+    def expectedPoint(self, i):
+        return ((i, i+0.5, -i), (0, 1, 0), 0.25, {"spam":i*10, "Ci":[i*10+1, i*10+2, i*10+3]})
+
+    def testMixedReads(self):
+        """Mix readDataPoint(), readDataPoints() and iterPoints().
+        """
+        ptc = FakePtcReader("fake.ptc", "fake")
+        self.assertEqual(10, ptc.npoints)
+        self.assertEqual(4, ptc.datasize)
+
+        # The first call reads a whole batch
+        self.assertEqual(self.expectedPoint(0), ptc.readDataPoint())
+        self.assertEqual([4], self.ptclib.calls)
+
+        # Combined buffer (the points are taken from the current batch)
+        buf = (22*ctypes.c_float)()
+        self.assertEqual(2, ptc.readDataPoints(2, buf))
+        for i in range(2):
+            p,n,r,data = self.expectedPoint(i+1)
+            values = list(p)+list(n)+[r, data["spam"]]+data["Ci"]
+            self.assertEqual(values, list(buf[11*i:11*i+11]))
+        self.assertEqual([4,0], self.ptclib.calls)
+
+        # Individual buffers (1 point from the batch, 2 from the library)
+        ps = (9*ctypes.c_float)()
+        ns = (9*ctypes.c_float)()
+        rs = (3*ctypes.c_float)()
+        ds = (12*ctypes.c_float)()
+        self.assertEqual(3, ptc.readDataPoints(3, (ps,ns,rs,ds)))
+        self.assertEqual([3,3.5,-3, 4,4.5,-4, 5,5.5,-5], list(ps))
+        self.assertEqual(3*[0,1,0], list(ns))
+        self.assertEqual(3*[0.25], list(rs))
+        self.assertEqual([30,31,32,33, 40,41,42,43, 50,51,52,53], list(ds))
+        self.assertEqual([4,0,2], self.ptclib.calls)
+
+        # The remaining points
+        self.assertEqual(map(self.expectedPoint, range(6,10)), list(ptc.iterPoints()))
+        self.assertEqual([4,0,2,4], self.ptclib.calls)
+        self.assertRaises(EOFError, lambda: ptc.readDataPoint())
+        self.assertEqual(0, ptc.readDataPoints(2, buf))
+        ptc.close()
+
 class TestPointCloud(unittest.TestCase):
     """Test the pointcloud module.
     """
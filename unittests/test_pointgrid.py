@@ -0,0 +1,125 @@
+# Test the pointgrid module
+
+import unittest
+import os, os.path
+from cgkit import pointgrid
+try:
+    import numpy
+    numpy_available = True
+except ImportError:
+    print("Warning: numpy not available. pointgrid test disabled.")
+    numpy_available = False
+
+def bruteForce(P, Q):
+    """Return a matrix with the distances between all points in Q and P.
+    """
+    # The grid stores the points as 4-byte floats
+    P = P.astype(numpy.float32).astype(float)
+    d = P[numpy.newaxis,:,:]-Q[:,numpy.newaxis,:]
+    return numpy.sqrt(numpy.sum(d*d, axis=2))
+
+class TestPointGrid(unittest.TestCase):
+    """Test the pointgrid module.
+    """
+
+    def pointSets(self):
+        """Return a list of test point sets.
+        """
+        rnd = numpy.random.RandomState(1)
+        res = []
+        # Points in a volume
+        res.append(rnd.random_sample((3000,3)))
+        # Points on a plane
+        res.append(numpy.column_stack((10*rnd.random_sample((3000,2)), numpy.zeros(3000))))
+        # Points on a sphere
+        P = rnd.normal(size=(3000,3))
+        res.append(P/numpy.sqrt(numpy.sum(P*P, axis=1)).reshape(-1,1))
+        # Clustered points
+        res.append(numpy.concatenate((numpy.zeros((1000,3)), rnd.random_sample((1000,3)))))
+        return res
+
+    def queryPoints(self, P):
+        """Return query points for the point set P.
+        """
+        rnd = numpy.random.RandomState(2)
+        return numpy.concatenate((P[:50], 3*rnd.random_sample((100,3))-1))
+
+    def testKNN(self):
+        """Check the k-NN query.
+        """
+        if not numpy_available:
+            return
+
+        for P in self.pointSets():
+            grid = pointgrid.PointGrid(P)
+            self.assertEqual(len(P), len(grid))
+            Q = self.queryPoints(P)
+            D = bruteForce(P, Q)
+            idx,dist = grid.queryKNN(Q, 6)
+            self.assertEqual((len(Q),6), idx.shape)
+            self.assertTrue(numpy.allclose(dist, numpy.sort(D, axis=1)[:,:6]))
+            self.assertTrue(numpy.allclose(D[numpy.arange(len(Q)).reshape(-1,1),idx], dist))
+
+            # maxDistance
+            idx,dist = grid.queryKNN(Q, 20, maxDistance=0.2)
+            self.assertTrue(((idx>=0)==(dist<=0.2)).all())
+            self.assertTrue(((idx>=0).sum(axis=1)==numpy.minimum((D<=0.2).sum(axis=1), 20)).all())
+
+    def testRadius(self):
+        """Check the radius query.
+        """
+        if not numpy_available:
+            return
+
+        for P in self.pointSets():
+            grid = pointgrid.PointGrid(P, cellSize=0.1)
+            Q = self.queryPoints(P)
+            D = bruteForce(P, Q)
+            offsets,idx,dist = grid.queryRadius(Q, 0.15)
+            self.assertEqual(len(Q)+1, len(offsets))
+            for i in range(len(Q)):
+                ids = idx[offsets[i]:offsets[i+1]]
+                ds = dist[offsets[i]:offsets[i+1]]
+                self.assertEqual(sorted(numpy.flatnonzero(D[i]<=0.15)), sorted(ids))
+                self.assertTrue(numpy.allclose(D[i,ids], ds))
+                self.assertTrue((numpy.diff(ds)>=0).all())
+
+    def testFromPointCloud(self):
+        """Check creating a grid from a point cloud file.
+        """
+        if not numpy_available:
+            return
+
+        from cgkit import pointcloud
+        if not os.path.exists("tmp"):
+            os.mkdir("tmp")
+        P = self.pointSets()[2].astype(numpy.float32)
+        ptc = pointcloud.open("tmp/pointgrid.cgptc", "w", "cgkit", vars=[], chunkSize=1000)
+        ptc.writeDataPoints(len(P), (P, P, numpy.ones(len(P), dtype=numpy.float32), numpy.zeros(0, dtype=numpy.float32)))
+        ptc.close()
+        ptc = pointcloud.open("tmp/pointgrid.cgptc", "r")
+        grid = pointgrid.fromPointCloud(ptc, batchSize=700)
+        ptc.close()
+        self.assertEqual(len(P), len(grid))
+        idx,dist = grid.queryKNN(P[:100], 1)
+        self.assertEqual(range(100), list(idx[:,0]))
+        self.assertTrue((dist==0).all())
+
+    def testEmpty(self):
+        """Check an empty grid.
+        """
+        if not numpy_available:
+            return
+
+        grid = pointgrid.PointGrid(numpy.zeros((0,3)))
+        idx,dist = grid.queryKNN([(0,0,0)], 2)
+        self.assertEqual([[-1,-1]], idx.tolist())
+        self.assertTrue(numpy.isinf(dist).all())
+        offsets,idx,dist = grid.queryRadius([(0,0,0),(1,1,1)], 1.0)
+        self.assertEqual([0,0,0], offsets.tolist())
+        self.assertEqual(0, len(idx))
+
+######################################################################
+
+if __name__=="__main__":
+    unittest.main()
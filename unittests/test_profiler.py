@@ -0,0 +1,77 @@
+# Test the profiler module
+
+import unittest
+import StringIO, os
+from cgkit.all import *
+from cgkit.eventmanager import EventManager
+from cgkit.profiler import Profiler, activeProfiler
+
+class Receiver:
+    def __init__(self):
+        self.name = "rec"
+        self.count = 0
+
+    def onFoo(self, x):
+        self.count += x
+
+
+class TestProfiler(unittest.TestCase):
+
+    def testEvents(self):
+        """Check recording event receivers."""
+        em = EventManager()
+        rec = Receiver()
+        em.connect("Foo", rec)
+        prof = Profiler()
+        em.event("Foo", 1)
+        self.assertEqual(prof.stats, {})
+        with prof:
+            self.assertTrue(activeProfiler() is prof)
+            em.event("Foo", 2)
+            em.event("Foo", 3)
+        self.assertTrue(activeProfiler() is None)
+        em.event("Foo", 4)
+
+        self.assertEqual(rec.count, 10)
+        self.assertEqual(prof.stats[("event", "Foo")][0], 2)
+        self.assertEqual(prof.stats[("receiver", "Foo: rec.onFoo")][0], 2)
+
+    def testSlots(self):
+        """Check recording procedural slots."""
+        a = DoubleSlot(1.0)
+        ps = ProceduralDoubleSlot(lambda: 2*a.getValue())
+        a.addDependent(ps)
+        prof = Profiler(trace=True)
+        with prof:
+            for i in range(3):
+                a.setValue(float(i))
+                self.assertEqual(ps.getValue(), 2.0*i)
+        self.assertEqual(prof.stats[("slot", "<lambda>")][0], 3)
+        self.assertEqual(len(prof.calls), 3)
+
+        out = StringIO.StringIO()
+        prof.report(out)
+        self.assertTrue("<lambda>" in out.getvalue())
+        prof.saveTrace("tmp/trace.json")
+        self.assertTrue(os.path.exists("tmp/trace.json"))
+
+    def testFrames(self):
+        """Check the frame range."""
+        scene = getScene()
+        scene.clear()
+        em = eventManager()
+        rec = Receiver()
+        em.connect("Foo", rec)
+        prof = Profiler(frames=(2,3))
+        with prof:
+            for i in range(6):
+                em.event("Foo", 1)
+                scene.timer().step()
+        em.disconnect("Foo", rec)
+        self.assertEqual(prof.stats[("receiver", "Foo: rec.onFoo")][0], 2)
+
+
+######################################################################
+
+if __name__=="__main__":
+    unittest.main()
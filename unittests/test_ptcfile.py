@@ -0,0 +1,184 @@
+# Test the ptcfile module (native point cloud files)
+
+import unittest
+import os, os.path
+import ctypes
+from cgkit import pointcloud, ptcfile
+from cgkit.cgtypes import *
+try:
+    import numpy
+    numpy_available = True
+except ImportError:
+    print("Warning: numpy not available. ptcfile test disabled.")
+    numpy_available = False
+
+class TestPtcFile(unittest.TestCase):
+    """Test the ptcfile module.
+    """
+
+    def setUp(self):
+        if not os.path.exists("tmp"):
+            os.mkdir("tmp")
+
+    def writeTestFile(self, fileName, n, chunkSize):
+        """Write a test file with n points and return the combined buffer.
+        """
+        vars = [("float", "spam"), ("color", "Ci")]
+        buf = numpy.arange(n*11, dtype=numpy.float32).reshape(n,11)
+        ptc = pointcloud.open(fileName, "w", "cgkit", vars=vars, world2eye=mat4(2), world2ndc=None, format=(320,240,1.5), chunkSize=chunkSize)
+        self.assertEqual(4, ptc.datasize)
+        ptc.writeDataPoints(n-1, buf)
+        ptc.writeDataPoint(tuple(buf[n-1,0:3]), tuple(buf[n-1,3:6]), buf[n-1,6], {"spam":buf[n-1,7], "Ci":tuple(buf[n-1,8:11])})
+        ptc.close()
+        return buf
+
+    def testHeader(self):
+        """Check the file attributes.
+        """
+        if not numpy_available:
+            return
+
+        self.writeTestFile("tmp/header.cgptc", 10, 4)
+        self.assertEqual(True, ptcfile.isPtcFile("tmp/header.cgptc"))
+        self.assertEqual(False, ptcfile.isPtcFile("test_ptcfile.py"))
+        self.assertRaises(IOError, lambda: ptcfile.PtcReader("test_ptcfile.py"))
+        self.assertRaises(IOError, lambda: pointcloud.open("test_ptcfile.py"))
+
+        ptc = pointcloud.open("tmp/header.cgptc")
+        self.assertTrue(isinstance(ptc, ptcfile.PtcReader))
+        self.assertEqual(10, ptc.npoints)
+        self.assertEqual(4, ptc.datasize)
+        self.assertEqual(4, ptc.chunkSize)
+        self.assertEqual(3, ptc.numChunks)
+        self.assertEqual([("float", "spam"), ("color", "Ci")], ptc.variables)
+        self.assertEqual((320.0, 240.0, 1.5), ptc.format)
+        self.assertEqual(mat4(2).toList(rowmajor=True), ptc.world2eye)
+        self.assertEqual(mat4(1).toList(rowmajor=True), ptc.world2ndc)
+        self.assertEqual([0.0, 1.0, 2.0, 99.0, 100.0, 101.0], ptc.bbox)
+        ptc.close()
+
+    def testChunks(self):
+        """Check the chunk access.
+        """
+        if not numpy_available:
+            return
+
+        buf = self.writeTestFile("tmp/chunks.cgptc", 10, 4)
+        ptc = ptcfile.PtcReader("tmp/chunks.cgptc")
+        chunks = list(ptc.iterChunks())
+        self.assertEqual(3, len(chunks))
+        P,N,R,D = chunks[2]
+        self.assertEqual((2,3), P.shape)
+        self.assertEqual((2,4), D.shape)
+        self.assertFalse(P.flags.writeable)
+        for i,(P,N,R,D) in enumerate(chunks):
+            b = buf[4*i:4*i+4]
+            self.assertTrue((P==b[:,0:3]).all())
+            self.assertTrue((N==b[:,3:6]).all())
+            self.assertTrue((R==b[:,6]).all())
+            self.assertTrue((D==b[:,7:]).all())
+            data = ptc.splitData(D)
+            self.assertTrue((data["spam"]==b[:,7]).all())
+            self.assertTrue((data["Ci"]==b[:,8:11]).all())
+        self.assertRaises(IndexError, lambda: ptc.getChunk(3))
+        ptc.close()
+        self.assertRaises(IOError, lambda: ptc.getChunk(0))
+        # The arrays stay valid after the file was closed
+        self.assertTrue((chunks[0][0]==buf[0:4,0:3]).all())
+
+        # ...and after the reader was deleted
+        P,N,R,D = pointcloud.open("tmp/chunks.cgptc").getChunk(1)
+        self.assertEqual(buf[4:8,0:3].sum(), P.sum())
+        self.assertTrue((D==buf[4:8,7:]).all())
+
+    def testRead(self):
+        """Check reading points across chunk boundaries.
+        """
+        if not numpy_available:
+            return
+
+        buf = self.writeTestFile("tmp/read.cgptc", 10, 4)
+        ptc = ptcfile.PtcReader("tmp/read.cgptc")
+        p,n,r,data = ptc.readDataPoint()
+        self.assertEqual(tuple(buf[0,0:3]), p)
+        self.assertEqual(tuple(buf[0,3:6]), n)
+        self.assertEqual(buf[0,6], r)
+        self.assertEqual({"spam":buf[0,7], "Ci":list(buf[0,8:11])}, data)
+
+        res = numpy.zeros((6,11), dtype=numpy.float32)
+        self.assertEqual(6, ptc.readDataPoints(6, res))
+        self.assertTrue((res==buf[1:7]).all())
+        ps = (15*ctypes.c_float)()
+        ns = (15*ctypes.c_float)()
+        rs = (5*ctypes.c_float)()
+        ds = (20*ctypes.c_float)()
+        self.assertEqual(3, ptc.readDataPoints(5, (ps,ns,rs,ds)))
+        self.assertEqual(list(buf[7:10,6])+[0.0,0.0], list(rs))
+        self.assertEqual(list(buf[7:10,7:].flat), list(ds)[:12])
+        self.assertEqual(0, ptc.readDataPoints(5, res))
+        self.assertRaises(EOFError, lambda: ptc.readDataPoint())
+        self.assertRaises(TypeError, lambda: ptc.readDataPoints(1, numpy.zeros((1,11))))
+        ptc.close()
+
+    def testRecords(self):
+        """Check reading the points as record arrays.
+        """
+        if not numpy_available:
+            return
+
+        buf = self.writeTestFile("tmp/records.cgptc", 10, 4)
+        ptc = ptcfile.PtcReader("tmp/records.cgptc")
+        dtype = ptc.recordType()
+        self.assertEqual(("point", "normal", "radius", "spam", "Ci"), dtype.names)
+        self.assertEqual(44, dtype.itemsize)
+        recs = list(ptc.iterRecords(3))
+        self.assertEqual([3,3,3,1], map(len, recs))
+        recs = recs[-1]
+        self.assertTrue((recs["point"]==buf[9:,0:3]).all())
+        self.assertTrue((recs["radius"]==buf[9:,6]).all())
+        self.assertTrue((recs["spam"]==buf[9:,7]).all())
+        self.assertTrue((recs["Ci"]==buf[9:,8:11]).all())
+        ptc.close()
+
+        ptc = pointcloud.open("tmp/records2.cgptc", "w", vars=[("float", "radius")])
+        ptc.close()
+        ptc = pointcloud.open("tmp/records2.cgptc", "r")
+        self.assertRaises(ValueError, lambda: ptc.recordType())
+        ptc.close()
+
+    def testConvert(self):
+        """Check the convert() function.
+        """
+        if not numpy_available:
+            return
+
+        buf = self.writeTestFile("tmp/convert.cgptc", 10, 4)
+        self.assertEqual(10, pointcloud.convert("tmp/convert.cgptc", "tmp/convert2.cgptc", batchSize=3))
+        ptc = pointcloud.open("tmp/convert2.cgptc")
+        self.assertEqual(65536, ptc.chunkSize)
+        self.assertEqual([("float", "spam"), ("color", "Ci")], ptc.variables)
+        self.assertEqual(mat4(2).toList(rowmajor=True), ptc.world2eye)
+        P,N,R,D = ptc.getChunk(0)
+        self.assertTrue((P==buf[:,0:3]).all())
+        self.assertTrue((D==buf[:,7:]).all())
+        ptc.close()
+
+    def testEmpty(self):
+        """Check an empty file.
+        """
+        if not numpy_available:
+            return
+
+        ptc = pointcloud.open("tmp/empty.cgptc", "w", vars=[])
+        ptc.close()
+        ptc = pointcloud.open("tmp/empty.cgptc", "r")
+        self.assertEqual(0, ptc.npoints)
+        self.assertEqual(0, ptc.numChunks)
+        self.assertEqual([], list(ptc.iterPoints()))
+        self.assertEqual(0, ptc.readDataPoints(1, numpy.zeros(7, dtype=numpy.float32)))
+        ptc.close()
+
+######################################################################
+
+if __name__=="__main__":
+    unittest.main()
@@ -73,6 +73,9 @@ class TestQuat_light(unittest.TestCase):
         self.assertTrue(a==b, "==-Operation falsch (2)")
         self.assertFalse(a!=b, "!=-Operation falsch (2)")
 
+        # Equal objects must not hash differently
+        self.assertRaises(TypeError, lambda: hash(a))
+
     ######################################################################
     def testAdd(self):
         a = quat(1.5, 2, 3, 4)
@@ -0,0 +1,112 @@
+# Test the scenecache module and the CGC import/export plugins
+
+import unittest, os, os.path, struct, pickle
+from cgkit.all import *
+from cgkit import scenecache, scenedesc, chunkfile
+
+class Exploit(object):
+    """Object that calls a function when it is unpickled."""
+    def __reduce__(self):
+        return (os.remove, ("tmp/cache_victim.txt",))
+
+
+class TestSceneCache(unittest.TestCase):
+
+    def setUp(self):
+        if not os.path.exists("tmp"):
+            os.mkdir("tmp")
+
+    def testWriteRead(self):
+        scene = getScene()
+        scene.clear()
+
+        tm = TriMesh(name="tm", pos=(1,2,3),
+                     verts=[(0,0,0), (1,0,0), (0,1,0), (1,1,0)],
+                     faces=[(0,1,2), (1,3,2)])
+        tm.geom.newVariable("N", VARYING, NORMAL)
+        N = tm.geom.slot("N")
+        for i in range(4):
+            N[i] = vec3(0,0,1)
+        tm.geom.newVariable("st", VARYING, FLOAT, 2)
+        st = tm.geom.slot("st")
+        for i in range(4):
+            st[i] = (i, 2*i)
+        tm.geom.newVariable("names", UNIFORM, STRING)
+        tm.geom.slot("names")[1] = "spam"
+        Polyhedron(name="poly", parent=tm,
+                   verts=[(0,0,0), (1,0,0), (1,1,0), (0,1,0), (0.5,0.5,0)],
+                   polys=[[(0,1,2,3), (4,)], [(0,1,4)]])
+        
+        save("tmp/scene.cgc")
+        scene.clear()
+        load("tmp/scene.cgc")
+
+        obj = worldObject("tm")
+        self.assertEqual(type(obj), TriMesh)
+        self.assertEqual(obj.pos, vec3(1,2,3))
+        self.assertEqual(list(obj.geom.verts), [vec3(0,0,0), vec3(1,0,0), vec3(0,1,0), vec3(1,1,0)])
+        self.assertEqual(list(obj.geom.faces), [(0,1,2), (1,3,2)])
+        self.assertEqual(list(obj.geom.slot("N")), 4*[vec3(0,0,1)])
+        self.assertEqual(list(obj.geom.slot("st")), [(0,0), (1,2), (2,4), (3,6)])
+        self.assertEqual(list(obj.geom.slot("names")), ["", "spam"])
+
+        obj = worldObject("tm|poly")
+        self.assertEqual(type(obj), Polyhedron)
+        self.assertEqual(obj.geom.getNumPolys(), 2)
+        self.assertEqual(obj.geom.getPoly(0), [[0,1,2,3], [4]])
+        self.assertEqual(obj.geom.getPoly(1), [[0,1,4]])
+
+    def testSourceHash(self):
+        f = open("tmp/cachesrc.off", "wt")
+        f.write("OFF\n3 1 0\n0 0 0\n1 0 0\n0 1 0\n3 0 1 2\n")
+        f.close()
+        if os.path.exists("tmp/cachesrc.off.cgc"):
+            os.remove("tmp/cachesrc.off.cgc")
+
+        scene = getScene()
+        scene.clear()
+        self.assertEqual(scenecache.isCacheValid("tmp/cachesrc.off.cgc", "tmp/cachesrc.off"), False)
+        objs = scenecache.loadCached("tmp/cachesrc.off")
+        self.assertEqual(len(objs), 1)
+        self.assertEqual(scenecache.isCacheValid("tmp/cachesrc.off.cgc", "tmp/cachesrc.off"), True)
+        hash,name = scenecache.readSourceInfo("tmp/cachesrc.off.cgc")
+        self.assertEqual(name, "cachesrc.off")
+        self.assertEqual(hash, scenecache.sourceHash("tmp/cachesrc.off"))
+
+        # Load from the cache
+        scene.clear()
+        objs = scenecache.loadCached("tmp/cachesrc.off")
+        self.assertEqual(len(objs), 1)
+        self.assertEqual(list(objs[0].geom.verts), [vec3(0,0,0), vec3(1,0,0), vec3(0,1,0)])
+
+        # Modify the source file which invalidates the cache
+        f = open("tmp/cachesrc.off", "at")
+        f.write("\n")
+        f.close()
+        self.assertEqual(scenecache.isCacheValid("tmp/cachesrc.off.cgc", "tmp/cachesrc.off"), False)
+
+    def testUnsafeClasses(self):
+        """Check that a cache file cannot invoke arbitrary functions."""
+        open("tmp/cache_victim.txt", "w").close()
+        f = open("tmp/exploit.cgc", "wb")
+        f.write(struct.pack("<8sII", "CGKCACHE", 2, 0))
+        chunkfile.writeChunk(f, "SRC ", "")
+        chunkfile.writeChunk(f, "DESC", pickle.dumps(Exploit(), pickle.HIGHEST_PROTOCOL))
+        f.close()
+        self.assertRaises(pickle.UnpicklingError, lambda: scenecache.readSceneCache("tmp/exploit.cgc"))
+        self.assertEqual(os.path.exists("tmp/cache_victim.txt"), True)
+
+        # Class names in the description are restricted as well
+        self.assertRaises(TypeError, lambda: scenedesc._getClass("os.system"))
+        self.assertRaises(ImportError, lambda: scenedesc._getClass("antigravity.Spam"))
+        self.assertEqual(scenedesc._getClass("cgkit.trimesh.TriMesh"), TriMesh)
+        desc = scenedesc.SceneDesc()
+        desc.objects.append(scenedesc.WorldObjectDesc("os.system", "spam"))
+        objs = scenedesc.createScene(desc)
+        self.assertEqual(objs[0].__class__, WorldObject)
+
+
+######################################################################
+
+if __name__=="__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+# Test the scenedesc module
+
+import unittest, pickle
+from cgkit.all import *
+from cgkit import scenedesc
+
+
+class TestSceneDesc(unittest.TestCase):
+
+    def testTriMesh(self):
+        scene = getScene()
+        scene.clear()
+
+        mat = GLMaterial(name="mat", diffuse=(1,0,0,1))
+        tm = TriMesh(name="tm", pos=(1,2,3), material=mat,
+                     verts=[(0,0,0), (1,0,0), (0,1,0), (1,1,0)],
+                     faces=[(0,1,2), (1,3,2)])
+        tm.geom.newVariable("st", VARYING, FLOAT, 2)
+        st = tm.geom.slot("st")
+        for i in range(4):
+            st[i] = (i, 2*i)
+        tm.geom.newVariable("Cs", UNIFORM, COLOR)
+        tm.geom.slot("Cs")[1] = vec3(0.5, 0.25, 1)
+        tm.geom.newVariable("dPdu", VARYING, VECTOR, 2)
+        dPdu = tm.geom.slot("dPdu")
+        for i in range(4):
+            dPdu[i] = (vec3(i,0,0), vec3(0,i,1))
+        Polyhedron(name="poly", parent=tm, material=mat,
+                   verts=[(0,0,0), (1,0,0), (1,1,0), (0,1,0)],
+                   polys=[[(0,1,2,3)]])
+
+        desc = scenedesc.describeScene([tm])
+        desc = pickle.loads(pickle.dumps(desc))
+        self.assertEqual(len(desc.materials), 1)
+        # The geometry is stored as flat arrays
+        gdesc = desc.objects[0].geom
+        self.assertEqual(list(gdesc.verts), [0,0,0, 1,0,0, 0,1,0, 1,1,0])
+        self.assertEqual(list(gdesc.faces), [0,1,2, 1,3,2])
+        self.assertEqual(list(gdesc.variables[0][4]), [0,0, 1,2, 2,4, 3,6])
+        
+        scene.clear()
+        objs = scenedesc.createScene(desc)
+        self.assertEqual(len(objs), 1)
+
+        obj = worldObject("tm")
+        self.assertEqual(type(obj), TriMesh)
+        self.assertEqual(obj.pos, vec3(1,2,3))
+        self.assertEqual(list(obj.geom.verts), [vec3(0,0,0), vec3(1,0,0), vec3(0,1,0), vec3(1,1,0)])
+        self.assertEqual(list(obj.geom.faces), [(0,1,2), (1,3,2)])
+        self.assertEqual(list(obj.geom.slot("st")), [(0,0), (1,2), (2,4), (3,6)])
+        self.assertEqual(obj.geom.slot("Cs")[1], vec3(0.5, 0.25, 1))
+        self.assertEqual(list(obj.geom.slot("dPdu")), [(vec3(i,0,0), vec3(0,i,1)) for i in range(4)])
+        self.assertEqual(obj.getMaterial().name, "mat")
+        self.assertEqual(obj.getMaterial().diffuse, vec4(1,0,0,1))
+
+        obj = worldObject("tm|poly")
+        self.assertEqual(type(obj), Polyhedron)
+        self.assertEqual(obj.geom.getPoly(0), [[0,1,2,3]])
+        # The material is shared
+        self.assertTrue(obj.getMaterial() is worldObject("tm").getMaterial())
+
+    def testProceduralGeom(self):
+        scene = getScene()
+        scene.clear()
+
+        Box(name="box", lx=2, ly=3, lz=4, pos=(0,1,0))
+        desc = scenedesc.describeScene(list(scene.worldRoot().iterChilds()))
+        desc = pickle.loads(pickle.dumps(desc))
+        scene.clear()
+        scenedesc.createScene(desc)
+
+        obj = worldObject("box")
+        self.assertEqual(type(obj), Box)
+        self.assertEqual(type(obj.geom), BoxGeom)
+        self.assertEqual((obj.lx, obj.ly, obj.lz), (2.0, 3.0, 4.0))
+        self.assertEqual(obj.pos, vec3(0,1,0))
+
+
+######################################################################
+
+if __name__=="__main__":
+    unittest.main()
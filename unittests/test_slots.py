@@ -164,6 +164,70 @@ class TestTransformSlots(unittest.TestCase):
         self.assertEqual(S, b.worldtransform)
 
 
+class TestSlotBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.count = 0
+
+    def onValueChanged(self):
+        self.count += 1
+
+    def testBatch(self):
+        """Check that notifications are deferred until the batch ends."""
+        a = DoubleSlot(1.0)
+        ps = ProceduralDoubleSlot(lambda: 2*a.getValue())
+        a.addDependent(ps)
+        n = NotificationForwarder(self.onValueChanged)
+        a.addDependent(n)
+        self.assertEqual(ps.getValue(), 2.0)
+        self.count = 0
+
+        with SlotBatch():
+            self.assertEqual(slotBatchDepth(), 1)
+            a.setValue(2.0)
+            with SlotBatch():
+                self.assertEqual(slotBatchDepth(), 2)
+                a.setValue(3.0)
+            a.setValue(4.0)
+            self.assertEqual(self.count, 0)
+            # The procedural slot wasn't invalidated yet
+            self.assertEqual(ps.getValue(), 2.0)
+
+        self.assertEqual(slotBatchDepth(), 0)
+        self.assertEqual(self.count, 1)
+        self.assertEqual(ps.getValue(), 8.0)
+
+        # Outside of a batch every change is propagated
+        a.setValue(5.0)
+        a.setValue(6.0)
+        self.assertEqual(self.count, 3)
+        self.assertEqual(ps.getValue(), 12.0)
+
+    def testCounters(self):
+        """Check the notification/computation counters."""
+        a = DoubleSlot(1.0)
+        ps = ProceduralDoubleSlot(lambda: 2*a.getValue())
+        a.addDependent(ps)
+        ps.getValue()
+
+        resetSlotCounters()
+        self.assertEqual(getSlotCounters(), (0,0,0))
+        with SlotBatch():
+            for i in range(10):
+                a.setValue(float(i))
+        self.assertEqual(ps.getValue(), 18.0)
+        self.assertEqual(ps.getValue(), 18.0)
+        self.assertEqual(getSlotCounters(), (1,1,1))
+
+    def testDeletedSlot(self):
+        """Delete a slot whose notification is still pending."""
+        with SlotBatch():
+            a = DoubleSlot(1.0)
+            a.setValue(2.0)
+            del a
+        self.assertEqual(slotBatchDepth(), 0)
+
+
 ######################################################################
 
 if __name__=="__main__":
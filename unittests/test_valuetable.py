@@ -0,0 +1,45 @@
+# Test the ValueTable component
+
+import unittest
+from cgkit.all import *
+
+class TestValueTable(unittest.TestCase):
+
+    def testAdd(self):
+        """Check adding values and the step interpolation."""
+        vt = ValueTable(type="double", auto_insert=False)
+        vt.add(0.5, 2.0)
+        vt.add(0.0, 1.0)
+        vt.add(1.0, 3.0)
+        vt[0.5] = 4.0
+        self.assertEqual(list(vt), [(0.0, 1.0), (0.5, 4.0), (1.0, 3.0)])
+        self.assertEqual(vt(-1.0), 1.0)
+        self.assertEqual(vt(0.2), 1.0)
+        self.assertEqual(vt(0.5), 4.0)
+        self.assertEqual(vt[0.7], 4.0)
+        self.assertEqual(vt(2.0), 3.0)
+
+    def testSetSamples(self):
+        """Check the setSamples() method."""
+        vt = ValueTable(type="vec3", auto_insert=False)
+        vt.setSamples([0, 2, 1, 2], [vec3(0), vec3(2), vec3(1), vec3(3)])
+        self.assertEqual(len(vt), 3)
+        self.assertEqual(list(vt), [(0.0, vec3(0)), (1.0, vec3(1)), (2.0, vec3(3))])
+        self.assertRaises(ValueError, lambda: vt.setSamples([0,1], [vec3(0)]))
+
+    def testInterpolation(self):
+        """Check the linear and cubic interpolation."""
+        vt = ValueTable(type="double", values=[(0,0), (1,10), (2,20)],
+                        interpolation="linear", auto_insert=False)
+        self.assertAlmostEqual(vt(0.25), 2.5)
+        self.assertAlmostEqual(vt(1.5), 15.0)
+        self.assertAlmostEqual(vt(5.0), 20.0)
+        vt.interpolation = "cubic"
+        self.assertAlmostEqual(vt(1.0), 10.0)
+        self.assertAlmostEqual(vt(0.5), 4.9375)
+        self.assertRaises(ValueError, lambda: ValueTable(interpolation="spam", auto_insert=False))
+
+######################################################################
+
+if __name__=="__main__":
+    unittest.main()
@@ -43,6 +43,8 @@ from cgkit.all import *
 
 # Parse options
 parser = optparse.OptionParser("usage: %prog [options] inputfiles outputfile")
+parser.add_option("-j", "--jobs", type="int", default=1,
+                  help="Number of processes used for loading the input files (0 = number of CPUs)")
 options, args = parser.parse_args()
 
 # Check if there are enough arguments (at least one input file and an
@@ -54,9 +56,13 @@ if len(args)<2:
 srcs = args[:-1]
 dst = args[-1]
 # Read the input files...
-for src in srcs:
-    print 'Loading "%s"...'%src
-    load(src)
+if options.jobs==1:
+    for src in srcs:
+        print 'Loading "%s"...'%src
+        load(src)
+else:
+    print 'Loading %d files...'%len(srcs)
+    loadBatch(srcs, processes=options.jobs or None)
 
 # Save the scene
 print 'Saving "%s"...'%dst
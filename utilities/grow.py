@@ -35,7 +35,7 @@
 # ***** END LICENSE BLOCK *****
 
 ######################################################################
-# grow v1.0.1
+# grow v1.1.0
 #
 # "Grow" objects on the surface of another object.
 # This tool generates uniformly distributed points on the surface
@@ -96,8 +96,36 @@ Globals(
     # If the placement procedure returns None, then the procedure takes care
     # for the RIB output itself.
     
-    resultdesc = ["P"]
-    
+    resultdesc = ["P"],
+
+    # The RenderMan primitive that is used to output the values returned
+    # by the placement procedure. This can either be "curves" (RiCurves())
+    # or "points" (RiPoints()).
+    # (Command line option: --primitive)
+
+    primitive = "curves",
+
+    # The maximum number of surface points whose values are written
+    # with one single RiCurves()/RiPoints() call.
+    # (Command line option: -b/--batchsize)
+
+    batchsize = 10000,
+
+    # If this is True, the surface points are stratified using Hammersley
+    # points instead of being purely random (this requires numpy).
+    # (Command line option: -s/--stratify)
+
+    stratify = False,
+
+    # If this is True, the placement procedure is called once for a whole
+    # batch of points instead of once per point. The arguments P, N, F,
+    # s, t are then numpy arrays with shapes (n,3), (n,3), (n,4,4), (n,)
+    # and (n,) and the procedure must return one array (or flat sequence)
+    # per result variable that contains the values for all n points
+    # (this requires numpy).
+    # (Command line option: -v/--vectorized)
+
+    vectorized = False
 )
 """
 
@@ -105,6 +133,12 @@ import sys, os.path, copy, time, optparse, fnmatch, random
 import profile
 from cgkit.all import *
 from cgkit.ri import *
+from cgkit import hammersley
+try:
+    import numpy
+    _numpy_available = True
+except ImportError:
+    _numpy_available = False
 
 # VaryingVar
 class VaryingVar:
@@ -362,9 +396,190 @@ class SurfacePointGenerator:
         self._triangles = triangles
         self._area = A
         print >>sys.stderr, "Surface area:",A
-        
+
+# SurfaceSampler
+class SurfaceSampler:
+    """Generate random points on a TriMesh using numpy.
+
+    This is the vectorized counterpart to SurfacePointGenerator. All
+    triangles of the mesh are stored in numpy arrays together with a
+    cumulative area table. A set of surface points is generated by
+    drawing the triangles for all points with one single table lookup
+    and by computing the positions, normals and texture coordinates
+    of all points at once.
+
+    Usage:
+
+    srf = SurfaceSampler(obj)
+    P,N,s,t = srf.sample(num)
+    """
+
+    def __init__(self, obj):
+        """Constructor.
+
+        obj: A TriMesh
+        """
+        if not _numpy_available:
+            raise ImportError("numpy is not available")
+
+        self.obj = worldObject(obj)
+        self._area = 0.0
+
+        self._preprocess()
+
+    # getArea
+    def getArea(self):
+        """Return the surface area of the object."""
+        return self._area
+
+    # sample
+    def sample(self, num, stratify=False):
+        """Generate num points on the surface of the object.
+
+        Returns a tuple (P, N, s, t) where P is an array of shape (num,3)
+        containing the positions, N an array of shape (num,3) containing
+        the (interpolated and normalized) surface normals and s, t are
+        arrays of shape (num,) containing the texture coordinates.
+
+        If stratify is True, the points are obtained from num Hammersley
+        points that are randomly shifted (so different calls still
+        produce different points). Otherwise the points are purely random.
+        """
+        if stratify:
+            rnd = hammersley.planeHammersleyArray(num) + numpy.random.random_sample(2)
+            rnd = numpy.fmod(rnd, 1.0)
+            r1 = rnd[:,1]
+            r2 = rnd[:,0]
+        else:
+            r1 = numpy.random.random_sample(num)
+            r2 = numpy.random.random_sample(num)
+
+        # Select the triangles. The remaining fraction of the area value
+        # inside the triangle is reused as random number for the position
+        # on the triangle (which keeps the stratification intact).
+        areas = self._areas
+        A = r1*self._area
+        tri = numpy.searchsorted(self._cumareas, A, side="right")
+        tri = numpy.minimum(tri, len(areas)-1)
+        Af = areas[tri]
+        r1 = numpy.clip((A-(self._cumareas[tri]-Af))/Af, 0.0, 1.0)
+
+        # Barycentric coordinates (uniformly distributed on the triangle)
+        sr1 = numpy.sqrt(r1)
+        u = (sr1*(1.0-r2)).reshape(-1,1)
+        v = (sr1*r2).reshape(-1,1)
+        w = 1.0-u-v
+
+        i = self._faces[tri,0]
+        j = self._faces[tri,1]
+        k = self._faces[tri,2]
+        P = w*self._verts[i] + u*self._verts[j] + v*self._verts[k]
+        if self._normals is None:
+            N = self._facenormals[tri]
+        else:
+            N = w*self._normals[i] + u*self._normals[j] + v*self._normals[k]
+            N /= numpy.sqrt(numpy.sum(N*N, axis=1)).reshape(-1,1)
+        st = w*self._st[i] + u*self._st[j] + v*self._st[k]
+        return P, N, st[:,0], st[:,1]
+
+    # _preprocess
+    def _preprocess(self):
+        """Preprocessing the object.
+
+        Computes the triangle arrays, the cumulative area table and
+        self._area.
+        """
+
+        varN = VaryingVar("N", NORMAL)
+        varN.init1(self.obj)
+
+        varst = VaryingVar("st", FLOAT, 2)
+        varst.init1(self.obj)
+
+        varN.init2()
+        varst.init2()
+        N_slot = varN.slot
+        st_slot = varst.slot
+
+        obj = self.obj
+        L = obj.worldtransform
+        L3 = L.getMat3()
+        M = numpy.array([list(L3.getRow(i)) for i in range(3)])
+        T = numpy.array(list(L.getColumn(3))[:3])
+
+        verts = _slotArray(obj.verts, 3)
+        self._verts = numpy.dot(verts, M.T) + T
+        self._faces = _slotArray(obj.faces, 3, numpy.int32).astype(int)
+        if st_slot!=None:
+            self._st = _slotArray(st_slot, 2)
+        else:
+            self._st = numpy.zeros((len(self._verts),2))
+
+        a = self._verts[self._faces[:,0]]
+        b = self._verts[self._faces[:,1]]
+        c = self._verts[self._faces[:,2]]
+        cross = numpy.cross(b-a, c-a)
+        crosslen = numpy.sqrt(numpy.sum(cross*cross, axis=1))
+        if N_slot!=None:
+            N = numpy.dot(_slotArray(N_slot, 3), M.T)
+            self._normals = N/numpy.sqrt(numpy.sum(N*N, axis=1)).reshape(-1,1)
+            self._facenormals = None
+        else:
+            self._normals = None
+            self._facenormals = cross/numpy.maximum(crosslen, 1E-30).reshape(-1,1)
+
+        self._areas = 0.5*crosslen
+        self._cumareas = numpy.cumsum(self._areas)
+        if len(self._areas)>0:
+            self._area = float(self._cumareas[-1])
+        print >>sys.stderr, "Surface area:",self._area
+
 ######################################################################  
 
+# _slotArray
+def _slotArray(slot, mult, dtype=float):
+    """Return the contents of a slot as an (N,mult) numpy array.
+
+    dtype is the numpy type that corresponds to the slot type.
+    """
+    n = slot.size()
+    if hasattr(slot, "getBuffer"):
+        return numpy.fromstring(slot.getBuffer(), dtype=dtype).reshape((n,mult))
+    res = numpy.empty((n,mult), dtype=dtype)
+    for i in range(n):
+        res[i] = tuple(slot[i])
+    return res
+
+# lookAtFrames
+def lookAtFrames(P, N, up=(0,0,1)):
+    """Vectorized version of mat4(1).lookAt(P, P+N, up).
+
+    P and N are arrays of shape (n,3). Returns an array of shape (n,4,4)
+    containing the transformations that move the origin to P and rotate
+    the z axis into N.
+    """
+    dir = N/numpy.sqrt(numpy.sum(N*N, axis=1)).reshape(-1,1)
+    up = numpy.asarray(up, dtype=float)
+    up = up/numpy.sqrt(numpy.dot(up, up))
+    up = up - numpy.dot(dir, up).reshape(-1,1)*dir
+    upl = numpy.sqrt(numpy.sum(up*up, axis=1))
+    # Looking along the up direction? Then use the x axis instead
+    bad = upl<=1E-12
+    if bad.any():
+        x = numpy.array([1.0, 0.0, 0.0])
+        up[bad] = x - dir[bad,0].reshape(-1,1)*dir[bad]
+        upl[bad] = numpy.sqrt(numpy.sum(up[bad]*up[bad], axis=1))
+    up /= upl.reshape(-1,1)
+    right = numpy.cross(up, dir)
+    right /= numpy.sqrt(numpy.sum(right*right, axis=1)).reshape(-1,1)
+    res = numpy.zeros((len(P),4,4))
+    res[:,:3,0] = right
+    res[:,:3,1] = up
+    res[:,:3,2] = dir
+    res[:,:3,3] = P
+    res[:,3,3] = 1.0
+    return res
+
 # time2str
 def time2str(t):
     """Convert a time value (in seconds) into a string.
@@ -381,17 +596,53 @@ def time2str(t):
             min = int(min%60)
             return "%dh %dmin %ds"%(h,min,sec)
 
+# emitValues
+def emitValues(primitive, n, resultdesc, values):
+    """Output the values that were generated for n surface points.
+
+    primitive is either "curves" or "points", resultdesc contains the
+    variable names and values the corresponding values (one sequence
+    or numpy array per variable). The number of vertices per curve is
+    determined from the "P" variable (6 if there is no "P" variable).
+    """
+    params = {}
+    nverts = 6
+    for name, vals in zip(resultdesc, values):
+        if _numpy_available and isinstance(vals, numpy.ndarray):
+            vals = vals.ravel().tolist()
+        params[name] = vals
+        if name.split()[-1]=="P" and n>0:
+            nverts = len(vals)//(3*n)
+    if primitive=="points":
+        RiPoints(params)
+    else:
+        RiCurves(RI_CUBIC, n*[nverts], RI_NONPERIODIC, params)
+
 # grow
-def grow(objs, proc, num=10, resultdesc=["P"]):
+def grow(objs, proc, num=10, resultdesc=["P"], primitive="curves",
+         batchsize=10000, stratify=False, vectorized=False):
     """Grow objects on the given object (TriMesh).
-    
+
+    The points are generated in batches of at most batchsize points
+    and the values returned by proc are written with one RiCurves()
+    or RiPoints() call per batch (see the Globals section at the top
+    for a description of the arguments). If numpy is not available,
+    the points are generated per triangle using SurfacePointGenerator.
     """
 
+    if primitive not in ["curves", "points"]:
+        raise ValueError('Invalid primitive: "%s"'%primitive)
+    if not _numpy_available and (stratify or vectorized):
+        raise ImportError("numpy is not available")
+
     srfs = []
     totalarea = 0.0
     for obj in objs:
         print >>sys.stderr, 'Preprocessing object "%s"...'%obj.name
-        srf = SurfacePointGenerator(obj)
+        if _numpy_available:
+            srf = SurfaceSampler(obj)
+        else:
+            srf = SurfacePointGenerator(obj)
         srfs.append(srf)
         totalarea += srf.getArea()
 
@@ -412,31 +663,78 @@ def grow(objs, proc, num=10, resultdesc=["P"]):
     total_n = 0
     for obj,srf,num in zip(objs, srfs, nums):
         print >>sys.stderr, 'Generating %d points on "%s"...'%(num,obj.name)
-        for tri in srf.triangles(num):
-            n = tri[1]
+        if _numpy_available:
+            batches = _sampleBatches(srf, proc, num, len(resultdesc), batchsize, stratify, vectorized)
+        else:
+            batches = _triangleBatches(srf, proc, num, len(resultdesc))
+        for n,values in batches:
             total_n += n
             print >>sys.stderr, "\015%d..."%total_n,
+            if values!=None:
+                emitValues(primitive, n, resultdesc, values)
+                
+        print >>sys.stderr, ""
+
+# _sampleBatches
+def _sampleBatches(srf, proc, num, numvars, batchsize, stratify, vectorized):
+    """Generate the surface points of one object using a SurfaceSampler.
 
-            # Create a list with len(resultdesc) lists (one list per variable)
-            valuelsts = []
-            for i in range(len(resultdesc)):
-                valuelsts.append([])
+    Yields tuples (n, values) where values contains the values returned
+    by proc for n points (one list per variable) or None if proc
+    returned None.
+    """
+    while num>0:
+        n = min(num, batchsize)
+        num -= n
+        P,N,s,t = srf.sample(n, stratify)
+        if vectorized:
+            yield n, proc(P=P, N=N, F=lookAtFrames(P, N), s=s, t=t)
+            continue
+
+        valuelsts = []
+        for i in range(numvars):
+            valuelsts.append([])
+
+        res = None
+        up = vec3(0,0,1)
+        for Pi,Ni,si,ti in zip(P.tolist(), N.tolist(), s.tolist(), t.tolist()):
+            Pi = vec3(Pi)
+            Ni = vec3(Ni)
+            F = mat4(1).lookAt(Pi, Pi+Ni, up=up)
+            res = proc(P=Pi, N=Ni, F=F, s=si, t=ti)
+            if res!=None:
+                for Lst, lst in zip(valuelsts, res):
+                    Lst += lst
+
+        if res==None:
+            valuelsts = None
+        yield n, valuelsts
 
-            # Iterate over the surface points...
-            for P,N,s,t in srf.surfacePoints(tri):
-                F = mat4(1).lookAt(P, P+N, up=vec3(0,0,1))
-                res = proc(P=P, N=N, F=F, s=s, t=t)
-                if res!=None:
-                    for Lst, lst in zip(valuelsts, res):
-                        Lst += lst
+# _triangleBatches
+def _triangleBatches(srf, proc, num, numvars):
+    """Generate the surface points of one object using a SurfacePointGenerator.
 
+    Yields one tuple (n, values) per triangle (see _sampleBatches()).
+    """
+    for tri in srf.triangles(num):
+        n = tri[1]
+
+        # Create a list with numvars lists (one list per variable)
+        valuelsts = []
+        for i in range(numvars):
+            valuelsts.append([])
+
+        # Iterate over the surface points...
+        for P,N,s,t in srf.surfacePoints(tri):
+            F = mat4(1).lookAt(P, P+N, up=vec3(0,0,1))
+            res = proc(P=P, N=N, F=F, s=s, t=t)
             if res!=None:
-                params = {}
-                for name, values in zip(resultdesc, valuelsts):
-                    params[name] = values
-                RiCurves(RI_CUBIC, n*[6], RI_NONPERIODIC, params)
-                
-        print >>sys.stderr, ""
+                for Lst, lst in zip(valuelsts, res):
+                    Lst += lst
+
+        if res==None:
+            valuelsts = None
+        yield n, valuelsts
 
 
 ######################################################################
@@ -447,7 +745,11 @@ Globals(
     inputpattern = "*",
     numpoints = 1000,
     RIBname = None,
-    resultdesc = ["P"]
+    resultdesc = ["P"],
+    primitive = "curves",
+    batchsize = 10000,
+    stratify = False,
+    vectorized = False
 )
 
 # Parse the command line
@@ -461,6 +763,14 @@ parser.add_option("-r", "--rib", metavar="NAME", default=None,
                   help="Output RIB name")
 parser.add_option("-i", "--inputpattern", metavar="PATTERN", default=None,
                   help="Input pattern used for matching object names")
+parser.add_option("", "--primitive", metavar="NAME", default=None,
+                  help="Output primitive (curves or points)")
+parser.add_option("-b", "--batchsize", type="int", default=None,
+                  help="Maximum number of points per output primitive call")
+parser.add_option("-s", "--stratify", action="store_true", default=None,
+                  help="Stratify the surface points")
+parser.add_option("-v", "--vectorized", action="store_true", default=None,
+                  help="Call the procedure once per batch of points")
 opts, args = parser.parse_args()
 
 # No scene files? then exit
@@ -528,11 +838,26 @@ if opts.numpoints!=None:
 
 desc = scene.getGlobal("resultdesc")
 
+primitive = scene.getGlobal("primitive")
+if opts.primitive!=None:
+    primitive = opts.primitive
+batchsize = scene.getGlobal("batchsize")
+if opts.batchsize!=None:
+    batchsize = opts.batchsize
+stratify = scene.getGlobal("stratify")
+if opts.stratify!=None:
+    stratify = opts.stratify
+vectorized = scene.getGlobal("vectorized")
+if opts.vectorized!=None:
+    vectorized = opts.vectorized
+
 print >>sys.stderr, 'Output RIB file: "%s"'%RIBname
 print >>sys.stderr, '#Surface points:',numpoints
 
 t1 = time.time()
-grow(objs=meshes, proc=proc, num=numpoints, resultdesc=desc)
+grow(objs=meshes, proc=proc, num=numpoints, resultdesc=desc,
+     primitive=primitive, batchsize=batchsize, stratify=stratify,
+     vectorized=vectorized)
 #profile.run("grow(objs=meshes, proc=proc, num=numpoints, resultdesc=desc)", "profile.log")
 t2 = time.time()
 dt = t2-t1
@@ -38,7 +38,7 @@ def writePtc(fileName, libName):
 def main():
     parser = optparse.OptionParser(usage="%prog [options] PtcFile")
     parser.add_option("-w", "--write", default=False, action="store_true", help="Write a test ptc file")
-    parser.add_option("-l", "--lib-name", default="aqsis_tex", help="The renderer library implementing the point cloud API")
+    parser.add_option("-l", "--lib-name", default=None, help="The renderer library implementing the point cloud API (cgkit for native cgkit point cloud files). By default, native files are detected automatically and new files are written in the native format")
     
     opts,args = parser.parse_args()
     
@@ -41,6 +41,6 @@ void class_ArraySlots()
     .def("copyValues", &IArraySlot::copyValues)
   ;
 
-  ARRAYSLOT("DoubleArraySlot",double);
-  ARRAYSLOT("IntArraySlot",int);
+  ARRAYSLOT("DoubleArraySlot",double) ARRAYSLOT_BUFFER(double);
+  ARRAYSLOT("IntArraySlot",int) ARRAYSLOT_BUFFER(int);
 }
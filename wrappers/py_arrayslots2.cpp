@@ -6,6 +6,6 @@
 
 void class_ArraySlots2()
 {
-  ARRAYSLOT("Vec3ArraySlot",vec3d);
-  ARRAYSLOT("Vec4ArraySlot",vec4d);
+  ARRAYSLOT("Vec3ArraySlot",vec3d) ARRAYSLOT_BUFFER(vec3d);
+  ARRAYSLOT("Vec4ArraySlot",vec4d) ARRAYSLOT_BUFFER(vec4d);
 }
@@ -254,6 +254,112 @@ vec3d vturbulence_vec3(const vec3d& p, int octaves, double lacunarity, double ga
 }
 
 
+// Batch versions
+
+/**
+  Releases the GIL for the lifetime of the object.
+
+  The GIL is reacquired in the destructor, so it is also restored when
+  the batch function throws an exception.
+ */
+class ReleaseGIL
+{
+  public:
+  ReleaseGIL() { state = PyEval_SaveThread(); }
+  ~ReleaseGIL() { PyEval_RestoreThread(state); }
+
+  private:
+  PyThreadState* state;
+};
+
+/**
+  Return the points stored in an object that supports the buffer interface.
+
+  The buffer must contain doubles (dim values per point). The number
+  of points is returned.
+ */
+static int pointBuffer(object points, int dim, const double*& pnts)
+{
+  const void* buf;
+  Py_ssize_t len;
+  if ((dim<1) || (dim>4))
+    throw EValueError("the point dimension must be between 1 and 4");
+  if (PyObject_AsReadBuffer(points.ptr(), &buf, &len)!=0)
+    throw_error_already_set();
+  int itemsize = sizeof(double)*dim;
+  if (len%itemsize!=0)
+    throw EValueError("The buffer size must be a multiple of the point size.");
+  pnts = (const double*)buf;
+  return len/itemsize;
+}
+
+/**
+  Return the writable buffer of an object that receives the results.
+
+  The buffer must be large enough to store count doubles.
+ */
+static double* outputBuffer(object out, int count)
+{
+  void* buf;
+  Py_ssize_t len;
+  if (PyObject_AsWriteBuffer(out.ptr(), &buf, &len)!=0)
+    throw_error_already_set();
+  if (len<Py_ssize_t(count*sizeof(double)))
+    throw EValueError("The output buffer is too small.");
+  return (double*)buf;
+}
+
+/**
+  Convert a sequence of periods into an int array (returns the dimension).
+ */
+static int periodValues(object period, int* periods)
+{
+  int dim = len(period);
+  if ((dim<1) || (dim>4))
+    throw EValueError("the period must have between 1 and 4 values");
+  for(int i=0; i<dim; i++)
+  {
+    periods[i] = extract<int>(period[i]);
+  }
+  return dim;
+}
+
+// noiseArray, cellnoiseArray, vnoiseArray, ...
+template<void (*func)(const double*, int, int, double*), bool vec>
+void noiseArray_py(object points, object out, int dim)
+{
+  const double* pnts;
+  int n = pointBuffer(points, dim, pnts);
+  double* res = outputBuffer(out, vec ? n*dim : n);
+  ReleaseGIL nogil;
+  func(pnts, n, dim, res);
+}
+
+// pnoiseArray, vpnoiseArray, ...
+template<void (*func)(const double*, int, int, const int*, double*), bool vec>
+void pnoiseArray_py(object points, object period, object out)
+{
+  int periods[4];
+  int dim = periodValues(period, periods);
+  const double* pnts;
+  int n = pointBuffer(points, dim, pnts);
+  double* res = outputBuffer(out, vec ? n*dim : n);
+  ReleaseGIL nogil;
+  func(pnts, n, dim, periods, res);
+}
+
+// fBmArray, turbulenceArray, vfBmArray, vturbulenceArray
+template<void (*func)(const double*, int, int, double, double, double*), bool vec>
+void fbmArray_py(object points, object out, int octaves, double lacunarity, double gain)
+{
+  const double* pnts;
+  int n = pointBuffer(points, 3, pnts);
+  double* res = outputBuffer(out, vec ? n*3 : n);
+  ReleaseGIL nogil;
+  func(pnts, n, octaves, lacunarity, gain, res);
+}
+
+
 //////////////////////////////////////////////////////////////////////
 void def_noises()
 {
@@ -426,4 +532,79 @@ void def_noises()
   // vturbulence
   def("vturbulence", vturbulence_vec3, (arg("p"), arg("octaves"), arg("lacunarity")=2.0, arg("gain")=0.5));
 
+  // Batch versions
+  def("noiseArray", noiseArray_py<noiseArray, false>,
+      (arg("points"), arg("out"), arg("dim")=3),
+      "noiseArray(points, out, dim=3)\n\n"
+      "Evaluate noise() at many points. points and out are objects that\n"
+      "support the buffer interface (e.g. numpy arrays) and that contain\n"
+      "doubles. points contains dim (1-4) values per point and out receives\n"
+      "one value per point. The GIL is released during the computation, so\n"
+      "several threads can fill different parts of an array at once.");
+  def("snoiseArray", noiseArray_py<snoiseArray, false>,
+      (arg("points"), arg("out"), arg("dim")=3),
+      "snoiseArray(points, out, dim=3)\n\n"
+      "Batch version of snoise() (see noiseArray()).");
+  def("cellnoiseArray", noiseArray_py<cellnoiseArray, false>,
+      (arg("points"), arg("out"), arg("dim")=3),
+      "cellnoiseArray(points, out, dim=3)\n\n"
+      "Batch version of cellnoise() (see noiseArray()).");
+  def("scellnoiseArray", noiseArray_py<scellnoiseArray, false>,
+      (arg("points"), arg("out"), arg("dim")=3),
+      "scellnoiseArray(points, out, dim=3)\n\n"
+      "Batch version of scellnoise() (see noiseArray()).");
+  def("vnoiseArray", noiseArray_py<vnoiseArray, true>,
+      (arg("points"), arg("out"), arg("dim")=3),
+      "vnoiseArray(points, out, dim=3)\n\n"
+      "Batch version of vnoise(). out receives dim values per point\n"
+      "(see noiseArray()).");
+  def("vsnoiseArray", noiseArray_py<vsnoiseArray, true>,
+      (arg("points"), arg("out"), arg("dim")=3),
+      "vsnoiseArray(points, out, dim=3)\n\n"
+      "Batch version of vsnoise() (see vnoiseArray()).");
+  def("vcellnoiseArray", noiseArray_py<vcellnoiseArray, true>,
+      (arg("points"), arg("out"), arg("dim")=3),
+      "vcellnoiseArray(points, out, dim=3)\n\n"
+      "Batch version of vcellnoise() (see vnoiseArray()).");
+  def("vscellnoiseArray", noiseArray_py<vscellnoiseArray, true>,
+      (arg("points"), arg("out"), arg("dim")=3),
+      "vscellnoiseArray(points, out, dim=3)\n\n"
+      "Batch version of vscellnoise() (see vnoiseArray()).");
+
+  def("pnoiseArray", pnoiseArray_py<pnoiseArray, false>,
+      (arg("points"), arg("period"), arg("out")),
+      "pnoiseArray(points, period, out)\n\n"
+      "Evaluate pnoise() at many points. period is a sequence of 1-4 ints\n"
+      "which also determines the dimension of the points (see noiseArray()).");
+  def("spnoiseArray", pnoiseArray_py<spnoiseArray, false>,
+      (arg("points"), arg("period"), arg("out")),
+      "spnoiseArray(points, period, out)\n\n"
+      "Batch version of spnoise() (see pnoiseArray()).");
+  def("vpnoiseArray", pnoiseArray_py<vpnoiseArray, true>,
+      (arg("points"), arg("period"), arg("out")),
+      "vpnoiseArray(points, period, out)\n\n"
+      "Batch version of vpnoise(). out receives one value per point\n"
+      "dimension (see pnoiseArray()).");
+  def("vspnoiseArray", pnoiseArray_py<vspnoiseArray, true>,
+      (arg("points"), arg("period"), arg("out")),
+      "vspnoiseArray(points, period, out)\n\n"
+      "Batch version of vspnoise() (see vpnoiseArray()).");
+
+  def("fBmArray", fbmArray_py<fBmArray, false>,
+      (arg("points"), arg("out"), arg("octaves"), arg("lacunarity")=2.0, arg("gain")=0.5),
+      "fBmArray(points, out, octaves, lacunarity=2.0, gain=0.5)\n\n"
+      "Evaluate fBm() at many 3D points (see noiseArray()).");
+  def("turbulenceArray", fbmArray_py<turbulenceArray, false>,
+      (arg("points"), arg("out"), arg("octaves"), arg("lacunarity")=2.0, arg("gain")=0.5),
+      "turbulenceArray(points, out, octaves, lacunarity=2.0, gain=0.5)\n\n"
+      "Evaluate turbulence() at many 3D points (see noiseArray()).");
+  def("vfBmArray", fbmArray_py<vfBmArray, true>,
+      (arg("points"), arg("out"), arg("octaves"), arg("lacunarity")=2.0, arg("gain")=0.5),
+      "vfBmArray(points, out, octaves, lacunarity=2.0, gain=0.5)\n\n"
+      "Evaluate vfBm() at many 3D points. out receives 3 values per point.");
+  def("vturbulenceArray", fbmArray_py<vturbulenceArray, true>,
+      (arg("points"), arg("out"), arg("octaves"), arg("lacunarity")=2.0, arg("gain")=0.5),
+      "vturbulenceArray(points, out, octaves, lacunarity=2.0, gain=0.5)\n\n"
+      "Evaluate vturbulence() at many 3D points. out receives 3 values per point.");
+
 }
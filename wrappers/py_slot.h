@@ -8,6 +8,7 @@
 #include <boost/python.hpp>
 #include <exception>
 #include <string>
+#include <cstring>
 #include "slot.h"
 #include "arrayslot.h"
 #include "vec3.h"
@@ -64,6 +65,13 @@ using std::string;
 //    .def("getValues", &ArraySlotWrapper<stype>::getValues_wrap) 
 //    .def("setValues", &ArraySlotWrapper<stype>::setValues_wrap) 
 
+// This macro adds the raw buffer access methods to an array slot type.
+// It may only be used for types whose values are stored as plain numbers
+// (such as double, int, vec3d, vec4d).
+#define ARRAYSLOT_BUFFER(stype) \
+    .def("getBuffer", &ArraySlotWrapper<stype>::getBuffer) \
+    .def("setBuffer", &ArraySlotWrapper<stype>::setBuffer, (arg("data"), arg("index")=0))
+
 
 // The ArraySlot iterator
 template<class T>
@@ -412,6 +420,64 @@ class ArraySlotWrapper : public ArraySlot<T>
     delete [] vals;
   }
 
+  /* Return the raw array data as a string.
+
+     The string contains size()*multiplicity() values of type T (in the
+     native byte order). It can be converted into a numpy array using
+     numpy.fromstring().
+   */
+  static object getBuffer(ArraySlot<T>* self)
+  {
+    int n = self->size()*self->multiplicity();
+    const char* ptr = 0;
+    if (n>0)
+      ptr = (const char*)self->getValues(0);
+    return object(handle<>(PyString_FromStringAndSize(ptr, n*sizeof(T))));
+  }
+
+  /* Set array values from an object supporting the buffer interface.
+
+     The buffer must contain raw values of type T (in the native byte
+     order). The values are written into the slot beginning at position
+     index. The number of values must be a multiple of the multiplicity
+     and the slot must be large enough to receive all values.
+   */
+  static void setBuffer(ArraySlot<T>* self, object data, int index=0)
+  {
+    const void* buf;
+    Py_ssize_t len;
+    if (PyObject_AsReadBuffer(data.ptr(), &buf, &len)!=0)
+      throw_error_already_set();
+
+    int mult = self->multiplicity();
+    int itemsize = sizeof(T)*mult;
+    if (len%itemsize!=0)
+      throw EValueError("The buffer size must be a multiple of the item size.");
+    int n = len/itemsize;
+    if (index<0)
+      index = self->size()+index;
+    if ((index<0) || (index+n>self->size()))
+      throw EIndexError();
+    if (n==0)
+      return;
+
+    // If there is a controller, the values have to be passed to the
+    // controller so that everyone is notified...
+    if (self->getController()!=0)
+    {
+      const T* vals = (const T*)buf;
+      for(int i=0; i<n; i++)
+      {
+        self->setValues(index+i, vals+i*mult);
+      }
+    }
+    else
+    {
+      memcpy(self->dataPtr()+index*mult, buf, len);
+      self->notifyDependentsValue(index, index+n);
+    }
+  }
+
   // this method is called when onValueChanged() is called from C++ code
   /*  void onValueChanged(int start, int end)
   {
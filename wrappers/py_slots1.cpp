@@ -10,10 +10,22 @@ long _slot_counter()
   return ISlot::_slot_counter;
 }
 
+// Return the slot batch counters as a tuple
+// (notifications, computations, deferred)
+object getSlotCounters()
+{
+  return make_tuple(SlotBatch::notifications, SlotBatch::computations, SlotBatch::deferred);
+}
+
 
 void class_Slots()
 {
   def("_slot_counter", _slot_counter);
+  def("beginSlotBatch", &SlotBatch::begin);
+  def("endSlotBatch", &SlotBatch::end);
+  def("slotBatchDepth", &SlotBatch::depth);
+  def("getSlotCounters", getSlotCounters);
+  def("resetSlotCounters", &SlotBatch::resetCounters);
 
   // Dependent
   class_<Dependent, DependentWrapper, boost::noncopyable>("Dependent")